@@ -99,6 +99,8 @@ def delete_ai_list(ai_list_id: str, user_id: int = 1):
         db.query(AiListItem).filter_by(ai_list_id=ai_list_id).delete()
         db.delete(ai_list)
         db.commit()
+        from app.services.ai_engine.retrieval_snapshot import drop_snapshot
+        drop_snapshot(ai_list_id)
         return {"deleted": True}
     finally:
         db.close()
@@ -511,6 +511,8 @@ async def chat_generate_list(
         db.commit()
         db.refresh(user_list)
         logger.info(f"Created UserList with id={user_list.id}, title='{user_list.title}'")
+        from ..services.list_sync_scheduler import schedule_list
+        schedule_list(user_list)
         
         for c in top_items:
             li = ListItem(
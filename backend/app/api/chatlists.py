@@ -3,6 +3,7 @@ from typing import Optional, List, Dict, Any
 from ..core.database import SessionLocal
 from ..models import UserList, ListItem
 from ..services.trakt_client import TraktClient
+from ..services.list_sync_scheduler import schedule_list
 import json
 import logging
 
@@ -32,6 +33,7 @@ async def create_chat_list(
         db.add(user_list)
         db.commit()
         db.refresh(user_list)
+        schedule_list(user_list)
 
         # Add items to ListItem
         for item in items:
@@ -2,14 +2,16 @@
 items.py - Item page API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import Dict, Any, Optional
 import logging
-from app.core.database import get_db
-from app.models import PersistentCandidate, UserRating
+from app.core.database import get_db, AsyncSessionLocal, run_db_sync
+from app.models import PersistentCandidate, UserRating, TraktWatchHistory
 from app.services.trakt_client import TraktClient
 from app.services.tmdb_client import get_tmdb_api_key, fetch_tmdb_metadata
-from app.services.ai_engine.candidate_enricher import enrich_candidates_async
+from app.services.ai_engine.candidate_enricher import enrich_candidates_sync
 from app.services.similar_items import SimilarItemsService
 import httpx
 import json
@@ -23,20 +25,30 @@ router = APIRouter()
 async def get_item_details(
     media_type: str,
     tmdb_id: int,
-    user_id: int = 1,
-    db: Session = Depends(get_db)
+    user_id: int = 1
 ) -> Dict[str, Any]:
     """
     Get comprehensive item details for item page.
     
     Returns:
     - Full persistent_candidate metadata
-    - Watch status from Trakt history
+    - Watch status from the synced Trakt watch history table
     - User rating (thumbs up/down)
     - Trailer URL (if available from TMDB, no DB storage)
     
     If metadata is stale/missing, triggers enrichment via candidate_enricher.
+    Reads use the asyncpg session; enrichment runs in the threadpool.
     """
+    async with AsyncSessionLocal() as db:
+        return await _get_item_details(db, media_type, tmdb_id, user_id)
+
+
+def _media_type_clause(normalized_type: str):
+    # Query with OR condition to handle both 'tv' and 'show' in database
+    return PersistentCandidate.media_type.in_(['tv', 'show']) if normalized_type == 'tv' else PersistentCandidate.media_type == 'movie'
+
+
+async def _get_item_details(db, media_type: str, tmdb_id: int, user_id: int) -> Dict[str, Any]:
     # Normalize media type
     if media_type not in ['movie', 'tv', 'show']:
         raise HTTPException(status_code=400, detail="Invalid media_type")
@@ -45,27 +57,26 @@ async def get_item_details(
     
     # Fetch from persistent_candidates - try TMDB ID first, then Trakt ID as fallback
     logger.info(f"Looking for item: {normalized_type}/{tmdb_id}")
-    # Query with OR condition to handle both 'tv' and 'show' in database
-    item = db.query(PersistentCandidate).filter(
+    item = (await db.execute(select(PersistentCandidate).where(
         PersistentCandidate.tmdb_id == tmdb_id,
-        PersistentCandidate.media_type.in_(['tv', 'show']) if normalized_type == 'tv' else PersistentCandidate.media_type == 'movie'
-    ).first()
+        _media_type_clause(normalized_type)
+    ).limit(1))).scalars().first()
     
     # If not found by TMDB ID, try Trakt ID (in case frontend sent Trakt ID by mistake)
     if not item:
         logger.warning(f"Item not found by TMDB ID {tmdb_id}, trying Trakt ID as fallback")
-        item = db.query(PersistentCandidate).filter(
+        item = (await db.execute(select(PersistentCandidate).where(
             PersistentCandidate.trakt_id == tmdb_id,
-            PersistentCandidate.media_type.in_(['tv', 'show']) if normalized_type == 'tv' else PersistentCandidate.media_type == 'movie'
-        ).first()
+            _media_type_clause(normalized_type)
+        ).limit(1))).scalars().first()
         if item:
             logger.info(f"Found item by Trakt ID {tmdb_id} -> TMDB ID {item.tmdb_id}")
     
     if not item:
         # Try to find ANY item with this ID to debug
-        any_item = db.query(PersistentCandidate).filter(
+        any_item = (await db.execute(select(PersistentCandidate).where(
             (PersistentCandidate.tmdb_id == tmdb_id) | (PersistentCandidate.trakt_id == tmdb_id)
-        ).first()
+        ).limit(1))).scalars().first()
         if any_item:
             logger.error(f"Found item with wrong media_type: {any_item.media_type} (requested {normalized_type}), tmdb_id={any_item.tmdb_id}, trakt_id={any_item.trakt_id}")
         else:
@@ -105,39 +116,41 @@ async def get_item_details(
     if needs_enrichment:
         try:
             logger.info(f"Enriching metadata for {normalized_type}/{tmdb_id}")
-            # Use ai_engine's on-demand enrichment
-            enriched = await enrich_candidates_async(db, [{
+            # Use ai_engine's on-demand enrichment (sync session + TMDB calls, off the event loop)
+            await run_in_threadpool(enrich_candidates_sync, [{
                 'id': item.id,
                 'tmdb_id': item.tmdb_id,
                 'media_type': item.media_type
-            }], max_age_days=90)
+            }], 90)
             # Refresh item from DB after enrichment
-            db.refresh(item)
+            await db.refresh(item)
         except Exception as e:
             logger.error(f"Failed to enrich item {tmdb_id}: {e}")
             # Continue with stale data rather than failing
     
-    # Get watch status from Trakt (check last 5000 items)
+    # Get watch status from the locally synced Trakt history (no Trakt round trip)
     watched = False
     watched_at = None
     try:
-        client = TraktClient(user_id, db)
-        history = await client.get_watch_history(media_type=normalized_type, limit=5000)
-        for entry in history:
-            if entry.get('trakt_id') == item.trakt_id:
+        if item.trakt_id:
+            last_watch = await db.scalar(select(TraktWatchHistory.watched_at).where(
+                TraktWatchHistory.user_id == user_id,
+                TraktWatchHistory.trakt_id == item.trakt_id,
+                TraktWatchHistory.media_type == ('show' if normalized_type == 'tv' else 'movie')
+            ).order_by(TraktWatchHistory.watched_at.desc()).limit(1))
+            if last_watch:
                 watched = True
-                watched_at = entry.get('watched_at')
-                break
+                watched_at = last_watch.isoformat()
     except Exception as e:
         logger.debug(f"Failed to fetch watch status: {e}")
     
     # Get user rating (thumbs up/down)
     rating = None
     if item.trakt_id:
-        user_rating = db.query(UserRating).filter(
+        user_rating = (await db.execute(select(UserRating).where(
             UserRating.user_id == user_id,
             UserRating.trakt_id == item.trakt_id
-        ).first()
+        ).limit(1))).scalars().first()
         if user_rating:
             rating = user_rating.rating  # 1 for thumbs up, -1 for thumbs down
     
@@ -391,48 +404,17 @@ async def get_item_collection(
         return {"collection_name": None, "items": []}
 
 
-@router.get("/{media_type}/{tmdb_id}/similar")
-async def get_similar_items(
-    media_type: str,
-    tmdb_id: int,
-    top_k: int = 20,
-    same_type_only: bool = True,
-    user_id: int = 1,
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
-    """
-    Get similar items using dual-index hybrid search (BGE multi-vector + FAISS fallback).
-    
-    Returns up to top_k similar items based on semantic similarity.
-    Uses Redis caching (7 days) to avoid repeated queries.
-    Enriches with watch status from Trakt and user ratings.
-    """
-    # Normalize media type
-    if media_type not in ['movie', 'tv', 'show']:
-        raise HTTPException(status_code=400, detail="Invalid media_type")
-    
-    normalized_type = 'tv' if media_type in ['tv', 'show'] else 'movie'
-    
-    # Check Redis cache
-    r = get_redis()
-    cache_key = f"similar_items:{normalized_type}:{tmdb_id}:{top_k}:{same_type_only}:v2"
-    
-    try:
-        cached = await r.get(cache_key)
-        if cached:
-            logger.debug(f"Returning cached similar items for {normalized_type}/{tmdb_id}")
-            return json.loads(cached)
-    except Exception as e:
-        logger.warning(f"Redis get failed for similar items: {e}")
-    
+def _search_similar(db: Session, tmdb_id: int, normalized_type: str, top_k: int,
+                    same_type_only: bool, user_id: int) -> Optional[list]:
+    """Run hybrid search for similar items (sync; call through run_db_sync). None if source is missing."""
     # Get source item
     source_item = db.query(PersistentCandidate).filter(
         PersistentCandidate.tmdb_id == tmdb_id,
-        PersistentCandidate.media_type.in_(['tv', 'show']) if normalized_type == 'tv' else PersistentCandidate.media_type == 'movie'
+        _media_type_clause(normalized_type)
     ).first()
     
     if not source_item:
-        raise HTTPException(status_code=404, detail="Item not found")
+        return None
     
     # Build candidate pool (exclude source item and adult content)
     query = db.query(PersistentCandidate).filter(
@@ -441,20 +423,13 @@ async def get_similar_items(
     )
     
     if same_type_only:
-        query = query.filter(
-            PersistentCandidate.media_type.in_(['tv', 'show']) if normalized_type == 'tv' else PersistentCandidate.media_type == 'movie'
-        )
+        query = query.filter(_media_type_clause(normalized_type))
     
     # Get larger pool for better results
     candidate_pool = query.limit(2000).all()
     
     if not candidate_pool:
-        result = {"items": []}
-        try:
-            await r.setex(cache_key, 3600, json.dumps(result))
-        except Exception:
-            pass
-        return result
+        return []
     
     # Use dual-index hybrid search
     from app.services.ai_engine.dual_index_search import hybrid_search
@@ -483,6 +458,7 @@ async def get_similar_items(
         candidate = result['candidate']
         similar_items.append({
             'tmdb_id': candidate.tmdb_id,
+            'trakt_id': candidate.trakt_id,
             'media_type': candidate.media_type,
             'title': candidate.title,
             'year': candidate.year,
@@ -491,44 +467,89 @@ async def get_similar_items(
             'similarity_score': result['score'],
             'is_watched': False
         })
+    return similar_items
+
+
+@router.get("/{media_type}/{tmdb_id}/similar")
+async def get_similar_items(
+    media_type: str,
+    tmdb_id: int,
+    top_k: int = 20,
+    same_type_only: bool = True,
+    user_id: int = 1
+) -> Dict[str, Any]:
+    """
+    Get similar items using dual-index hybrid search (BGE multi-vector + FAISS fallback).
+    
+    Returns up to top_k similar items based on semantic similarity.
+    Uses Redis caching (7 days) to avoid repeated queries.
+    Enriches with watch status from the synced Trakt history and user ratings.
+    Hybrid search is sync-only and runs in the threadpool; the rest uses the asyncpg session.
+    """
+    # Normalize media type
+    if media_type not in ['movie', 'tv', 'show']:
+        raise HTTPException(status_code=400, detail="Invalid media_type")
+    
+    normalized_type = 'tv' if media_type in ['tv', 'show'] else 'movie'
+    
+    # Check Redis cache
+    r = get_redis()
+    cache_key = f"similar_items:{normalized_type}:{tmdb_id}:{top_k}:{same_type_only}:v2"
     
-    # Enrich with watch status (check last 5000 items)
     try:
-        client = TraktClient(user_id, db)
-        watched_tmdb_ids = set()
-        
-        # Get watch history for appropriate media type
-        history_type = 'tv' if normalized_type == 'tv' else 'movie'
-        history = await client.get_watch_history(media_type=history_type, limit=5000)
-        
-        for entry in history:
-            # Map trakt_id to tmdb_id
-            candidate = db.query(PersistentCandidate).filter(
-                PersistentCandidate.trakt_id == entry.get('trakt_id')
-            ).first()
-            if candidate:
-                watched_tmdb_ids.add(candidate.tmdb_id)
-        
-        for item in similar_items:
-            item['is_watched'] = item['tmdb_id'] in watched_tmdb_ids
+        cached = await r.get(cache_key)
+        if cached:
+            logger.debug(f"Returning cached similar items for {normalized_type}/{tmdb_id}")
+            return json.loads(cached)
     except Exception as e:
-        logger.debug(f"Failed to fetch watch status for similar items: {e}")
+        logger.warning(f"Redis get failed for similar items: {e}")
     
-    # Enrich with user ratings
-    try:
-        ratings = db.query(UserRating).filter(
-            UserRating.user_id == user_id,
-            UserRating.tmdb_id.in_([item['tmdb_id'] for item in similar_items])
-        ).all()
-        
-        ratings_by_tmdb = {r.tmdb_id: r.rating for r in ratings}
+    similar_items = await run_db_sync(_search_similar, tmdb_id, normalized_type, top_k, same_type_only, user_id)
+    if similar_items is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    
+    if not similar_items:
+        result = {"items": []}
+        try:
+            await r.setex(cache_key, 3600, json.dumps(result))
+        except Exception:
+            pass
+        return result
+    
+    async with AsyncSessionLocal() as db:
+        # Enrich with watch status (one join against the synced history table)
+        try:
+            tmdb_ids = [item['tmdb_id'] for item in similar_items]
+            watched_rows = await db.execute(select(PersistentCandidate.tmdb_id).join(
+                TraktWatchHistory, TraktWatchHistory.trakt_id == PersistentCandidate.trakt_id
+            ).where(
+                TraktWatchHistory.user_id == user_id,
+                PersistentCandidate.tmdb_id.in_(tmdb_ids)
+            ).distinct())
+            watched_tmdb_ids = {row[0] for row in watched_rows}
+            
+            for item in similar_items:
+                item['is_watched'] = item['tmdb_id'] in watched_tmdb_ids
+        except Exception as e:
+            logger.debug(f"Failed to fetch watch status for similar items: {e}")
         
-        for item in similar_items:
-            item['user_rating'] = ratings_by_tmdb.get(item['tmdb_id'])
-    except Exception as e:
-        logger.debug(f"Failed to fetch user ratings for similar items: {e}")
-        for item in similar_items:
-            item['user_rating'] = None
+        # Enrich with user ratings (ratings are keyed by trakt_id)
+        try:
+            trakt_ids = [item['trakt_id'] for item in similar_items if item.get('trakt_id')]
+            ratings_by_trakt = {}
+            if trakt_ids:
+                ratings = (await db.execute(select(UserRating.trakt_id, UserRating.rating).where(
+                    UserRating.user_id == user_id,
+                    UserRating.trakt_id.in_(trakt_ids)
+                ))).all()
+                ratings_by_trakt = {tid: rating for tid, rating in ratings}
+            
+            for item in similar_items:
+                item['user_rating'] = ratings_by_trakt.get(item.get('trakt_id'))
+        except Exception as e:
+            logger.debug(f"Failed to fetch user ratings for similar items: {e}")
+            for item in similar_items:
+                item['user_rating'] = None
     
     result = {"items": similar_items}
     
@@ -582,33 +603,23 @@ async def get_item_rationale(
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    # Get user profile from database (LLM-generated persona)
-    from app.models import UserTextProfile
-    user_profile = db.query(UserTextProfile).filter_by(user_id=user_id).first()
-    
-    # Also get compressed persona from Redis (history compression)
+    # Compressed persona (falls back to UserTextProfile) from the cached persona context
     persona_text = ""
     history_summary = ""
     try:
-        from app.core.redis_client import get_redis_sync
-        redis_sync = get_redis_sync()
-        compression_key = f"history_compression:{user_id}"
-        compression_data = redis_sync.get(compression_key)
+        from app.services.persona_context import get_persona_context
+        persona_ctx = get_persona_context(user_id)
+        persona_text = (persona_ctx.persona_text or persona_ctx.profile_summary)[:300]
         
-        if compression_data:
-            compression = json.loads(compression_data if isinstance(compression_data, str) else compression_data.decode("utf-8"))
-            persona_text = compression.get("persona_text", "")[:300]
-            
-            # Get top genres/themes from history
-            top_genres = compression.get("top_genres", [])[:5]
-            if top_genres:
-                history_summary = f"Favorite genres: {', '.join(top_genres)}"
+        # Get top genres from the compressed watch vector
+        top_genres = [
+            key[len("genre:"):] for key, _ in sorted(persona_ctx.watch_vector.items(), key=lambda x: x[1], reverse=True)
+            if key.startswith("genre:")
+        ][:5]
+        if top_genres:
+            history_summary = f"Favorite genres: {', '.join(top_genres)}"
     except Exception as e:
-        logger.debug(f"Failed to get Redis persona: {e}")
-    
-    # Fallback to database profile if Redis not available
-    if not persona_text and user_profile:
-        persona_text = user_profile.summary_text[:300]
+        logger.debug(f"Failed to get persona context: {e}")
     
     # Get recent Trakt watch history for additional context
     watch_context = ""
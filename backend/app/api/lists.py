@@ -10,10 +10,13 @@ def extract_error_message(e: Exception) -> str:
 from fastapi import APIRouter, HTTPException, Query
 from ..schemas import ListCreate
 from .. import crud
-from ..core.database import SessionLocal
+from ..core.database import SessionLocal, AsyncSessionLocal
 from ..models import UserList  # Import here for Trakt list creation
 from app.services.list_sync import ListSyncService
 from fastapi import Body
+from datetime import datetime
+from typing import Optional
+import base64
 import json
 import logging
 import traceback
@@ -355,6 +358,10 @@ async def update_list(list_id: int,
             l.filters = json.dumps(f)
             changed = True
         db.commit()
+        if changed:
+            # sync_interval/full_sync_days may have moved the next due time
+            from ..services.list_sync_scheduler import schedule_list
+            schedule_list(l)
         # Send notification if anything changed
         if changed or filters_updated:
             await send_notification(user_id, f"List '{l.title}' updated successfully. Full sync triggered.", "success")
@@ -441,6 +448,39 @@ async def sync(list_id: int, force_full: bool = Query(False), watched_only: bool
         await send_notification(user_id, f"Sync error for list {list_id}: {str(e)}", "error")
         raise
 
+def _encode_items_cursor(sort_value, item_id: int) -> str:
+    """Opaque keyset cursor for list item pagination: last row's (sort value, id)."""
+    if isinstance(sort_value, datetime):
+        sort_value = {"dt": sort_value.isoformat()}
+    raw = json.dumps({"v": sort_value, "id": item_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_items_cursor(cursor: str):
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    data = json.loads(raw)
+    value = data.get("v")
+    if isinstance(value, dict) and "dt" in value:
+        value = datetime.fromisoformat(value["dt"])
+    return value, int(data["id"])
+
+
+def _keyset_after(column, id_column, value, last_id: int, descending: bool):
+    """WHERE clause for rows after (value, last_id).
+
+    Order is ``column DESC NULLS LAST, id DESC`` (or the exact reverse for ascending),
+    which matches ix_list_items_list_score_id so Postgres can seek instead of OFFSET.
+    """
+    from sqlalchemy import and_, or_
+    if descending:
+        if value is None:
+            return and_(column.is_(None), id_column < last_id)
+        return or_(column < value, and_(column == value, id_column < last_id), column.is_(None))
+    if value is None:
+        return or_(and_(column.is_(None), id_column > last_id), column.isnot(None))
+    return or_(column > value, and_(column == value, id_column > last_id))
+
+
 @router.get("/{list_id}/items")
 @router.get("/{list_id}/items/")
 async def get_list_items(
@@ -449,32 +489,62 @@ async def get_list_items(
     sort_by: str = Query("score"),  # score, added_at, watched_at
     order: str = Query("desc"),  # asc, desc
     page: int = Query(1, ge=1),
-    limit: int = Query(25, ge=1, le=100)
+    limit: int = Query(25, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset pagination)")
 ):
-    """Get items from a specific list with filtering and sorting options."""
+    """Get items from a specific list with filtering and sorting options.
+
+    Pages are keyset-paginated on (sort column, id): pass the returned ``next_cursor``
+    to fetch the following page. ``page`` is still honored (OFFSET) when no cursor is
+    given. The total comes from the trigger-maintained counts on user_lists, and
+    items missing posters are queued for background backfill instead of being
+    fetched inline.
+    """
     from ..models import ListItem, MediaMetadata
+    from sqlalchemy import select, func
+    from app.services.poster_backfill import enqueue_poster_backfill
     
-    db = SessionLocal()
+    db = AsyncSessionLocal()
     try:
-        query = db.query(ListItem).filter(ListItem.smartlist_id == list_id)
+        query = select(ListItem).where(ListItem.smartlist_id == list_id)
         
         if not include_watched:
-            query = query.filter(ListItem.is_watched == False)
+            query = query.where(ListItem.is_watched == False)
         
-        # Apply sorting
-        if sort_by == "score":
-            query = query.order_by(ListItem.score.desc() if order == "desc" else ListItem.score.asc())
-        elif sort_by == "added_at":
-            query = query.order_by(ListItem.added_at.desc() if order == "desc" else ListItem.added_at.asc())
-        elif sort_by == "watched_at":
-            query = query.order_by(ListItem.watched_at.desc() if order == "desc" else ListItem.watched_at.asc())
+        # Apply sorting; id breaks ties so the keyset order is total
+        sort_columns = {"score": ListItem.score, "added_at": ListItem.added_at, "watched_at": ListItem.watched_at}
+        sort_col = sort_columns.get(sort_by, ListItem.score)
+        descending = order == "desc"
+        if descending:
+            query = query.order_by(sort_col.desc().nullslast(), ListItem.id.desc())
+        else:
+            query = query.order_by(sort_col.asc().nullsfirst(), ListItem.id.asc())
         
-        # Get total before pagination
-        total = query.count()
+        # Total from the denormalized counts; fall back to COUNT(*) for lists not yet backfilled
+        counts = (await db.execute(
+            select(UserList.item_count, UserList.watched_count).where(UserList.id == list_id)
+        )).first()
+        if counts is not None and counts[0] is not None and counts[1] is not None:
+            total = counts[0] if include_watched else counts[0] - counts[1]
+        else:
+            total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery())) or 0
         
         # Apply pagination
-        offset = (page - 1) * limit
-        items = query.offset(offset).limit(limit).all()
+        if cursor:
+            try:
+                after_value, after_id = _decode_items_cursor(cursor)
+            except Exception:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.where(_keyset_after(sort_col, ListItem.id, after_value, after_id, descending))
+        else:
+            query = query.offset((page - 1) * limit)
+        # Fetch one extra row to know whether another page exists
+        rows = (await db.execute(query.limit(limit + 1))).scalars().all()
+        items = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit and items:
+            last = items[-1]
+            next_cursor = _encode_items_cursor(getattr(last, sort_col.key), last.id)
         
         # Bulk-load metadata to avoid N+1 queries
         # Load metadata per media_type to avoid show/movie collisions on same trakt_id
@@ -485,103 +555,23 @@ async def get_list_items(
         meta_by_trakt: dict[int, MediaMetadata] = {}
         for mt, ids in ids_by_type.items():
             if ids:
-                metas = db.query(MediaMetadata).filter(
+                metas = (await db.execute(select(MediaMetadata).where(
                     MediaMetadata.trakt_id.in_(ids),
                     MediaMetadata.media_type == mt
-                ).all()
+                ))).scalars().all()
                 for m in metas:
                     meta_by_trakt[m.trakt_id] = m
 
-        # Identify which items lack a poster and should fetch from Trakt/TMDB
+        # Items lacking a poster are backfilled by a worker; this page renders what we have
         missing: list[tuple[int, str]] = []  # (trakt_id, media_type)
         for it in items:
             if not it.trakt_id:
                 continue
             m = meta_by_trakt.get(it.trakt_id)
-            # Fallback criteria: we care about posters; fetch if poster is missing
             if not m or not getattr(m, 'poster_path', None):
                 missing.append((it.trakt_id, it.media_type))
-
-        # Fetch missing titles with bounded concurrency, then cache them
-        # To avoid slow responses on first load, cap per-page fallback fetches
         if missing:
-            # Fetch up to the current page size to ensure all visible rows get posters
-            missing = missing[:limit]
-            from app.services.trakt_client import TraktClient
-            import asyncio as _asyncio
-            from datetime import datetime as _dt
-            from app.services.tmdb_client import fetch_tmdb_metadata, get_tmdb_api_key
-            trakt_client = TraktClient(user_id=1)
-            sem = _asyncio.Semaphore(4)
-
-            async def fetch_one(tid: int, mt: str):
-                try:
-                    async with sem:
-                        details = await trakt_client.get_item_details(mt, tid)
-                        title = details.get('title') if isinstance(details, dict) else None
-                        year = details.get('year') if isinstance(details, dict) else None
-                        tmdb_id = None
-                        try:
-                            tmdb_id = (details.get('ids') or {}).get('tmdb')
-                        except Exception:
-                            tmdb_id = None
-                        poster_url = None
-                        backdrop_url = None
-                        # If we have a TMDB id and TMDB is configured, fetch poster/backdrop
-                        try:
-                            tmdb_key = await get_tmdb_api_key()
-                        except Exception:
-                            tmdb_key = None
-                        if tmdb_id and tmdb_key:
-                            try:
-                                tmdb = await fetch_tmdb_metadata(tmdb_id, 'movie' if mt == 'movie' else 'tv')
-                                if tmdb:
-                                    pp = tmdb.get('poster_path')
-                                    bp = tmdb.get('backdrop_path')
-                                    if pp:
-                                        poster_url = f"https://image.tmdb.org/t/p/w342{pp}"
-                                    if bp:
-                                        backdrop_url = f"https://image.tmdb.org/t/p/w780{bp}"
-                            except Exception:
-                                pass
-                        if title:
-                            # Upsert minimal metadata cache
-                            existing = meta_by_trakt.get(tid)
-                            if existing:
-                                if not existing.title:
-                                    existing.title = title
-                                existing.media_type = mt
-                                if year is not None:
-                                    existing.year = year
-                                if tmdb_id is not None:
-                                    existing.tmdb_id = tmdb_id
-                                # Store poster/backdrop as full URLs for convenience
-                                if poster_url:
-                                    existing.poster_path = poster_url
-                                if backdrop_url:
-                                    existing.backdrop_path = backdrop_url
-                                existing.last_updated = _dt.utcnow()
-                            else:
-                                new_meta = MediaMetadata(
-                                    trakt_id=tid,
-                                    media_type=mt,
-                                    title=title,
-                                    year=year,
-                                    tmdb_id=tmdb_id,
-                                    poster_path=poster_url,
-                                    backdrop_path=backdrop_url,
-                                    last_updated=_dt.utcnow()
-                                )
-                                db.add(new_meta)
-                                meta_by_trakt[tid] = new_meta
-                except Exception:
-                    pass
-
-            await _asyncio.gather(*[fetch_one(tid, mt) for tid, mt in missing])
-            try:
-                db.commit()
-            except Exception:
-                db.rollback()
+            await enqueue_poster_backfill(missing)
 
         # Fallback to PersistentCandidate for missing posters/titles (like AI lists do)
         from ..models import PersistentCandidate
@@ -601,16 +591,16 @@ async def get_list_items(
             for media_type in set(mt for _, mt in tmdb_ids_needed):
                 tmdb_ids = [tid for tid, mt in tmdb_ids_needed if mt == media_type]
                 if tmdb_ids:
-                    pcs = db.query(
+                    pcs = (await db.execute(select(
                         PersistentCandidate.tmdb_id,
                         PersistentCandidate.media_type,
                         PersistentCandidate.title,
                         PersistentCandidate.poster_path,
                         PersistentCandidate.year
-                    ).filter(
+                    ).where(
                         PersistentCandidate.tmdb_id.in_(tmdb_ids),
                         PersistentCandidate.media_type == media_type
-                    ).all()
+                    ))).all()
                     for tmdb_id, mt, title, poster, year_val in pcs:
                         pc_by_tmdb[(tmdb_id, mt)] = {
                             "title": title,
@@ -683,11 +673,14 @@ async def get_list_items(
             "total": total,
             "page": page,
             "limit": limit,
+            "next_cursor": next_cursor,
             "items": response_items
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get items: {e}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Failed to get items: {str(e)}")
     finally:
-        db.close()
+        await db.close()
@@ -63,13 +63,13 @@ async def rebuild_faiss_index(use_db_recovery: bool = True):
 
 
 @router.post("/rebuild-elasticsearch", response_model=MaintenanceResponse)
-async def rebuild_elasticsearch_index():
-    """Trigger Elasticsearch index rebuild from persistent candidates with embeddings."""
+async def rebuild_elasticsearch_index(full: bool = False):
+    """Trigger Elasticsearch index update (full=true recreates the index) from persistent candidates."""
     try:
         from app.services.tasks import rebuild_elasticsearch_task
         
         # Queue the task
-        task = rebuild_elasticsearch_task.delay()
+        task = rebuild_elasticsearch_task.delay(full=full)
         
         return MaintenanceResponse(
             status="queued",
@@ -81,6 +81,24 @@ async def rebuild_elasticsearch_index():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/rebuild-local-text-index", response_model=MaintenanceResponse)
+async def rebuild_local_text_index(full: bool = False):
+    """Trigger a build (full=true) or incremental update of the local fallback text index."""
+    try:
+        from app.services.tasks import rebuild_local_text_index_task
+
+        task = rebuild_local_text_index_task.delay(full=full)
+
+        return MaintenanceResponse(
+            status="queued",
+            message=f"Local text index {'rebuild' if full else 'update'} has been queued.",
+            task_id=task.id
+        )
+    except Exception as e:
+        logger.exception(f"Failed to queue local text index rebuild: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/faiss-status")
 async def get_faiss_status():
     """Get FAISS index status."""
@@ -10,7 +10,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal
 from app.services.overview_service import OverviewService
 from app.services.tasks import compute_user_overview_task
 
@@ -35,12 +35,12 @@ class RefreshRequest(BaseModel):
     """Request body for manual overview refresh."""
     user_id: int = 1
     skip_recent_days: int = Field(7, ge=0, le=30, description="Skip updating items refreshed within the last N days")
+    force: bool = Field(True, description="Recompute every module even if its inputs are unchanged")
 
 
 @router.post("/overview")
 async def get_overview(
-    request: OverviewRequest,
-    db: Session = Depends(get_db)
+    request: OverviewRequest
 ) -> Dict[str, Any]:
     """
     Retrieve cached overview modules with optional mood filtering.
@@ -71,7 +71,8 @@ async def get_overview(
                 k: v for k, v in request.mood.dict().items() if v is not None
             }
         
-        result = service.get_cached_overview(db, apply_mood=mood_dict)
+        async with AsyncSessionLocal() as session:
+            result = await service.get_cached_overview_async(session, apply_mood=mood_dict)
         
         if not result.get('sections'):
             logger.info(f"[OverviewAPI] No cached data for user {request.user_id}, triggering background compute")
@@ -110,7 +111,7 @@ async def refresh_overview(
     """
     try:
         # Queue Celery task
-        task = compute_user_overview_task.delay(request.user_id, request.skip_recent_days)
+        task = compute_user_overview_task.delay(request.user_id, request.skip_recent_days, request.force)
         
         logger.info(f"[OverviewAPI] Queued manual refresh for user {request.user_id}, task_id={task.id}")
         
@@ -128,8 +129,7 @@ async def refresh_overview(
 
 @router.get("/overview/status")
 async def get_overview_status(
-    user_id: int = 1,
-    db: Session = Depends(get_db)
+    user_id: int = 1
 ) -> Dict[str, Any]:
     """
     Check overview cache status.
@@ -144,14 +144,16 @@ async def get_overview_status(
     }
     """
     try:
+        from sqlalchemy import select
         from app.models import OverviewCache
         from app.utils.timezone import utc_now
         
         # Check for valid cache entries
-        cache_entries = db.query(OverviewCache).filter(
-            OverviewCache.user_id == user_id,
-            OverviewCache.expires_at > utc_now()
-        ).all()
+        async with AsyncSessionLocal() as session:
+            cache_entries = (await session.execute(select(OverviewCache).where(
+                OverviewCache.user_id == user_id,
+                OverviewCache.expires_at > utc_now()
+            ))).scalars().all()
         
         if not cache_entries:
             return {
@@ -2,10 +2,10 @@ from datetime import datetime, timedelta
 import json
 from typing import Dict, List, Optional
 from fastapi import APIRouter, HTTPException
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, select
 
 
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, AsyncSessionLocal
 from app.core.redis_client import get_redis
 from app.models import UserList as WatchList, MediaMetadata
 from app.models_ai import AiList
@@ -29,6 +29,8 @@ async def get_user_timezone(user_id: int) -> str:
 @router.get("/sync")
 async def get_sync_status(user_id: int = 1):
     """Get current sync status including active syncs and statistics"""
+    # One async session for every title lookup and stat query below
+    session = AsyncSessionLocal()
     try:
         # Get user's timezone for timestamp formatting
         user_timezone = await get_user_timezone(user_id)
@@ -56,11 +58,7 @@ async def get_sync_status(user_id: int = 1):
                     list_id = key.decode('utf-8').split(':')[1] if isinstance(key, bytes) else key.split(':')[1]
                 
                 # Get list title from database
-                db = SessionLocal()
-                try:
-                    watch_list = db.query(WatchList).filter(WatchList.id == int(list_id)).first()
-                finally:
-                    db.close()
+                watch_list = await session.get(WatchList, int(list_id))
 
                 if watch_list:
                     started_at = status_data.get("started_at")
@@ -102,11 +100,7 @@ async def get_sync_status(user_id: int = 1):
                     list_id = key.decode('utf-8').split(':')[1] if isinstance(key, bytes) else key.split(':')[1]
                 
                 # Get list title from database
-                db = SessionLocal()
-                try:
-                    watch_list = db.query(WatchList).filter(WatchList.id == int(list_id)).first()
-                finally:
-                    db.close()
+                watch_list = await session.get(WatchList, int(list_id))
 
                 if watch_list:
                     started_at = status_data.get("started_at")
@@ -147,11 +141,7 @@ async def get_sync_status(user_id: int = 1):
                 continue
             
             # Get list title from database
-            db = SessionLocal()
-            try:
-                watch_list = db.query(WatchList).filter(WatchList.id == int(list_id)).first()
-            finally:
-                db.close()
+            watch_list = await session.get(WatchList, int(list_id))
 
             if watch_list:
                 started_at = lock_data.get("started_at")
@@ -192,11 +182,7 @@ async def get_sync_status(user_id: int = 1):
                 pass
             
             # Get AI list title from database
-            db = SessionLocal()
-            try:
-                ai_list = db.query(AiList).filter(AiList.id == ai_list_id).first()
-            finally:
-                db.close()
+            ai_list = await session.get(AiList, ai_list_id)
 
             if ai_list:
                 started_at = lock_data.get("started_at")
@@ -215,31 +201,31 @@ async def get_sync_status(user_id: int = 1):
                 })
 
         # Get statistics from database
-        db = SessionLocal()
-
         # Count both user_lists and ai_lists
-        total_user_lists = db.query(func.count(WatchList.id)).scalar() or 0
-        total_ai_lists = db.query(func.count(AiList.id)).scalar() or 0
+        total_user_lists = await session.scalar(select(func.count(WatchList.id))) or 0
+        total_ai_lists = await session.scalar(select(func.count(AiList.id))) or 0
         total_lists = total_user_lists + total_ai_lists
 
         # Lists synced today (both types)
         today = datetime.utcnow().date()
-        user_lists_today = db.query(func.count(WatchList.id)).filter(
-            func.date(WatchList.last_updated) == today
-        ).scalar() or 0
-        ai_lists_today = db.query(func.count(AiList.id)).filter(
-            func.date(AiList.last_synced_at) == today
-        ).scalar() or 0
+        user_lists_today = await session.scalar(
+            select(func.count(WatchList.id)).where(func.date(WatchList.last_updated) == today)
+        ) or 0
+        ai_lists_today = await session.scalar(
+            select(func.count(AiList.id)).where(func.date(AiList.last_synced_at) == today)
+        ) or 0
         completed_today = user_lists_today + ai_lists_today
 
         # Last sync time (check both tables, formatted in user's timezone)
-        last_sync_user_list = db.query(WatchList).filter(
-            WatchList.last_updated.isnot(None)
-        ).order_by(WatchList.last_updated.desc()).first()
+        last_sync_user_list = (await session.execute(
+            select(WatchList).where(WatchList.last_updated.isnot(None))
+            .order_by(WatchList.last_updated.desc()).limit(1)
+        )).scalars().first()
         
-        last_sync_ai_list = db.query(AiList).filter(
-            AiList.last_synced_at.isnot(None)
-        ).order_by(AiList.last_synced_at.desc()).first()
+        last_sync_ai_list = (await session.execute(
+            select(AiList).where(AiList.last_synced_at.isnot(None))
+            .order_by(AiList.last_synced_at.desc()).limit(1)
+        )).scalars().first()
         
         # Pick the most recent sync from both types
         # Ensure both datetimes are timezone-aware for comparison
@@ -261,8 +247,6 @@ async def get_sync_status(user_id: int = 1):
         
         last_sync = format_datetime_in_timezone(last_sync_time, user_timezone) if last_sync_time else None
 
-        db.close()
-
         return {
             "active_syncs": active_syncs,
             "last_sync": last_sync,
@@ -272,6 +256,8 @@ async def get_sync_status(user_id: int = 1):
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get sync status: {str(e)}")
+    finally:
+        await session.close()
 
 @router.get("/health")
 async def get_system_health():
@@ -431,7 +417,14 @@ async def get_ai_health():
 
     # Overall
     overall_ok = all(v.get("ok") for v in result.values())
-    return {"ok": overall_ok, **result}
+
+    # Shared model registry (load counts/timings; informational, not part of "ok")
+    try:
+        from app.services.ai_engine.model_registry import get_registry
+        registry_stats = get_registry().stats()
+    except Exception as e:
+        registry_stats = {"error": str(e)}
+    return {"ok": overall_ok, **result, "model_registry": registry_stats}
 
 @router.get("/metrics")
 async def get_system_metrics():
@@ -63,6 +63,9 @@ celery_app.conf.update(
         'app.services.tasks.cleanup_orphaned_items': {'queue': 'maintenance'},
         'app.services.tasks.run_nightly_maintenance': {'queue': 'maintenance'},
         'rebuild_faiss_index': {'queue': 'maintenance'},
+        'rebuild_local_text_index': {'queue': 'maintenance'},
+        'build_candidate_features': {'queue': 'maintenance'},
+        'append_enriched_bge_vectors': {'queue': 'maintenance'},
         'app.services.tasks.ingest_new_movies': {'queue': 'ingestion'},
         'app.services.tasks.ingest_new_shows': {'queue': 'ingestion'},
         'app.services.tasks.refresh_recent_votes_movies': {'queue': 'ingestion'},
@@ -77,8 +80,10 @@ celery_app.conf.update(
         # Worker 3: List Updates + Sync (refreshes, watched status updates)
         'refresh_ai_list': {'queue': 'sync'},
         'app.services.tasks.sync_user_lists': {'queue': 'sync'},
+        'app.services.tasks.sync_due_list': {'queue': 'sync'},
         'app.services.tasks.sync_single_list_async': {'queue': 'sync'},
         'app.services.tasks.send_user_notification': {'queue': 'sync'},  # Low priority utility
+        'backfill_list_posters': {'queue': 'sync'},
         
         # Phase detection and watch history (maintenance queue - low priority)
         'app.services.tasks.compute_user_phases_task': {'queue': 'maintenance'},
@@ -132,8 +137,8 @@ celery_app.conf.update(
         # Periodic smart-list sync honoring per-list sync_interval (covers custom lists)
         "sync-user-lists": {
             "task": "app.services.tasks.sync_user_lists",
-            "schedule": 60 * 30,  # every 30 minutes checks all lists and skips those not due
-            "kwargs": {"user_id": 1, "force_full": False}
+            "schedule": 60 * 5,  # every 5 minutes dispatches only the lists due in the schedule
+            "kwargs": {"force_full": False}
         },
         # Daily phase detection for all users
         "compute-phases-daily": {
@@ -141,11 +146,11 @@ celery_app.conf.update(
             "schedule": 60 * 60 * 24,  # daily at midnight (timezone-aware)
             "kwargs": {"user_id": 1}
         },
-        # Incremental watch history sync (daily)
+        # Incremental watch history sync (daily; escalates to a full reconcile weekly)
         "sync-watch-history-daily": {
             "task": "app.services.tasks.sync_user_watch_history_task",
             "schedule": 60 * 60 * 24,  # daily
-            "kwargs": {"user_id": 1, "full_sync": True}
+            "kwargs": {"user_id": 1, "full_sync": False}
         },
         # Build user profile vectors (2-3 centroids) daily
         "build-user-profile-vectors": {
@@ -165,6 +170,16 @@ celery_app.conf.update(
             "schedule": 60 * 60 * 24,  # daily
             "kwargs": {"top_n": getattr(settings, "ai_bge_topn_nightly", 50000)}
         },
+        # Append vectors of freshly enriched candidates to the BGE index in one write
+        "append-enriched-bge-vectors": {
+            "task": "append_enriched_bge_vectors",
+            "schedule": 60 * 15,  # every 15 minutes
+        },
+        # Nightly global quantile features (popularity/rating/novelty/freshness) for the scorers
+        "build-candidate-features-nightly": {
+            "task": "build_candidate_features",
+            "schedule": 60 * 60 * 24,  # daily
+        },
         # Daily history compression (persona generation via phi3:mini)
         "compress-history-daily": {
             "task": "compress_user_history",
@@ -179,6 +194,25 @@ celery_app.conf.update(
 def debug_task(self):
     print(f"Request: {self.request!r}")
 
+from celery.signals import worker_process_init
+
+
+@worker_process_init.connect
+def _warm_models_on_worker_init(**_kwargs):
+    """Load shared AI models once per worker process (in a thread: init has a short timeout)."""
+    if not getattr(settings, "ai_model_warm_on_worker_init", True):
+        return
+    import threading
+
+    def _warm():
+        try:
+            from app.services.ai_engine.model_registry import warm_default_models
+            warm_default_models()
+        except Exception:
+            pass
+
+    threading.Thread(target=_warm, daemon=True, name="model-warmup").start()
+
 # Configure memory monitoring
 celery_app.conf.worker_send_task_events = True
 celery_app.conf.task_send_sent_event = True
@@ -11,6 +11,11 @@ class Settings(BaseSettings):
     database_url: str = f"postgresql+psycopg2://{os.getenv('POSTGRES_USER', 'watchbuddy')}:{os.getenv('POSTGRES_PASSWORD', 'watchbuddy')}@db:5432/{os.getenv('POSTGRES_DB', 'watchbuddy')}"
     redis_url: str = os.getenv("REDIS_URL", "redis://redis:6379/0")
     trakt_redirect_uri: str = "http://localhost:5173/auth/callback"
+    # Daily watch history syncs are incremental (start_at watermark); full reconcile at most this often
+    trakt_history_full_reconcile_days: int = int(os.getenv("TRAKT_HISTORY_FULL_RECONCILE_DAYS", "7"))
+    # Smart-list sync scheduler: concurrent list syncs per user and max lists dispatched per beat
+    list_sync_per_user_concurrency: int = int(os.getenv("LIST_SYNC_PER_USER_CONCURRENCY", "2"))
+    list_sync_max_dispatch: int = int(os.getenv("LIST_SYNC_MAX_DISPATCH", "200"))
 
     # Secondary BGE index (additive; disabled by default)
     ai_bge_index_enabled: bool = os.getenv("AI_BGE_INDEX_ENABLED", "false").lower() == "true"
@@ -24,12 +29,24 @@ class Settings(BaseSettings):
     # Multi-query & retrieval tuning
     ai_multiquery_enabled: bool = os.getenv("AI_MULTIQUERY_ENABLED", "true").lower() == "true"
     ai_multiquery_variants: int = int(os.getenv("AI_MULTIQUERY_VARIANTS", "4"))
+    # Per-list retrieval snapshots (reuse FAISS/BGE candidate pool on refresh while prompt + indexes are unchanged)
+    ai_retrieval_snapshot_enabled: bool = os.getenv("AI_RETRIEVAL_SNAPSHOT_ENABLED", "true").lower() == "true"
+    ai_retrieval_snapshot_max_age_hours: float = float(os.getenv("AI_RETRIEVAL_SNAPSHOT_MAX_AGE_HOURS", "72"))
+    # Literal search backend: "auto" (ElasticSearch, in-process index when ES is down), "elasticsearch" or "local"
+    text_search_backend: str = os.getenv("TEXT_SEARCH_BACKEND", "auto").lower()
+    # ElasticSearch reindex: rows per keyset page (checkpoint granularity) and parallel_bulk tuning
+    es_reindex_page_size: int = int(os.getenv("ES_REINDEX_PAGE_SIZE", "5000"))
+    es_bulk_chunk_size: int = int(os.getenv("ES_BULK_CHUNK_SIZE", "500"))
+    es_bulk_threads: int = int(os.getenv("ES_BULK_THREADS", "4"))
 
     # Cross-encoder reranker (optional)
     ai_reranker_enabled: bool = os.getenv("AI_RERANKER_ENABLED", "false").lower() == "true"
     ai_reranker_model: str = os.getenv("AI_RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
     ai_reranker_topk: int = int(os.getenv("AI_RERANKER_TOPK", "300"))
     ai_reranker_weight: float = float(os.getenv("AI_RERANKER_WEIGHT", "0.3"))
+    # Token budget per length-bucketed CE batch and optional top-k early exit (0 = score all top-K)
+    ai_reranker_max_batch_tokens: int = int(os.getenv("AI_RERANKER_MAX_BATCH_TOKENS", "8192"))
+    ai_reranker_early_exit_topk: int = int(os.getenv("AI_RERANKER_EARLY_EXIT_TOPK", "0"))
 
     # LLM judge reranker (optional, LOCAL by default)
     # Provider options: "openai_compatible" (can be local), "ollama"
@@ -58,4 +75,10 @@ class Settings(BaseSettings):
     ai_llm_pairwise_enabled: bool = os.getenv("AI_LLM_PAIRWISE_ENABLED", "false").lower() == "true"
     ai_llm_pairwise_max_pairs: int = int(os.getenv("AI_LLM_PAIRWISE_MAX_PAIRS", "60"))
 
+    # Process-wide model registry (sentence-transformers / cross-encoder)
+    # Evict least-recently-used models when RSS exceeds max_rss_mb or MemAvailable drops below min_available_mb (0 = off)
+    ai_model_registry_max_rss_mb: int = int(os.getenv("AI_MODEL_REGISTRY_MAX_RSS_MB", "0"))
+    ai_model_registry_min_available_mb: int = int(os.getenv("AI_MODEL_REGISTRY_MIN_AVAILABLE_MB", "512"))
+    ai_model_warm_on_worker_init: bool = os.getenv("AI_MODEL_WARM_ON_WORKER_INIT", "true").lower() == "true"
+
 settings = Settings()
@@ -59,6 +59,23 @@ async def get_async_session():
     async with AsyncSessionLocal() as session:
         yield session
 
+async def run_db_sync(fn, *args, **kwargs):
+    """Run blocking ORM work ``fn(db, *args, **kwargs)`` on a fresh SessionLocal in the threadpool.
+
+    For async request handlers whose logic still depends on sync-only services
+    (hybrid search, enrichment), so the queries don't block the event loop.
+    """
+    from starlette.concurrency import run_in_threadpool
+
+    def _call():
+        db = SessionLocal()
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    return await run_in_threadpool(_call)
+
 async def init_db():
     from app.models import Base
     loop = asyncio.get_running_loop()
@@ -87,6 +104,11 @@ async def init_db():
             "ALTER TABLE IF EXISTS user_lists ADD COLUMN IF NOT EXISTS poster_path varchar(500) NULL",
             "CREATE INDEX IF NOT EXISTS idx_user_lists_trakt_list_id ON user_lists (trakt_list_id)",
             "CREATE INDEX IF NOT EXISTS ix_userlist_type_pid ON user_lists (user_id, list_type, persistent_id)",
+            # Denormalized item counts (kept current by trg_list_items_counts below)
+            "ALTER TABLE IF EXISTS user_lists ADD COLUMN IF NOT EXISTS item_count integer NULL",
+            "ALTER TABLE IF EXISTS user_lists ADD COLUMN IF NOT EXISTS watched_count integer NULL",
+            # Keyset pagination index for list item browsing
+            "CREATE INDEX IF NOT EXISTS ix_list_items_list_score_id ON list_items (smartlist_id, score DESC NULLS LAST, id DESC)",
             # persistent_candidates index / columns (table created by create_all)
             "CREATE INDEX IF NOT EXISTS idx_persistent_candidates_media_type ON persistent_candidates (media_type)",
             "CREATE INDEX IF NOT EXISTS idx_persistent_candidates_language ON persistent_candidates (language)",
@@ -98,6 +120,9 @@ async def init_db():
             "CREATE INDEX IF NOT EXISTS idx_persistent_candidates_freshness ON persistent_candidates (freshness_score)",
             # Trigram index to accelerate ILIKE on genres JSON text
             "CREATE INDEX IF NOT EXISTS idx_persistent_candidates_genres_trgm ON persistent_candidates USING gin (genres gin_trgm_ops)",
+            # Seed-title resolution: exact (lower) and fuzzy (trigram) title lookups
+            "CREATE INDEX IF NOT EXISTS idx_persistent_candidates_title_lower ON persistent_candidates (lower(title))",
+            "CREATE INDEX IF NOT EXISTS idx_persistent_candidates_title_trgm ON persistent_candidates USING gin (lower(title) gin_trgm_ops)",
             "CREATE INDEX IF NOT EXISTS idx_candidate_ingestion_state_media_type ON candidate_ingestion_state (media_type)",
             # Ensure new AI columns exist on persistent_candidates
             "ALTER TABLE IF EXISTS persistent_candidates ADD COLUMN IF NOT EXISTS embedding BYTEA",
@@ -120,8 +145,14 @@ async def init_db():
             "ALTER TABLE IF EXISTS persistent_candidates ADD COLUMN IF NOT EXISTS episode_run_time TEXT",
             "ALTER TABLE IF EXISTS persistent_candidates ADD COLUMN IF NOT EXISTS first_air_date VARCHAR(50)",
             "ALTER TABLE IF EXISTS persistent_candidates ADD COLUMN IF NOT EXISTS last_air_date VARCHAR(50)",
+            # Embedding staleness hashes (nightly BGE build only composes text for stale rows)
+            "ALTER TABLE IF EXISTS persistent_candidates ADD COLUMN IF NOT EXISTS content_hash VARCHAR(40)",
+            "ALTER TABLE IF EXISTS persistent_candidates ADD COLUMN IF NOT EXISTS embedding_hash VARCHAR(40)",
+            "CREATE INDEX IF NOT EXISTS ix_persistent_candidates_embedding_stale ON persistent_candidates (id) WHERE content_hash IS NULL OR embedding_hash IS DISTINCT FROM content_hash",
             # Overview feature: add rating column to trakt_watch_history
-            "ALTER TABLE IF EXISTS trakt_watch_history ADD COLUMN IF NOT EXISTS user_trakt_rating INTEGER"
+            "ALTER TABLE IF EXISTS trakt_watch_history ADD COLUMN IF NOT EXISTS user_trakt_rating INTEGER",
+            # Overview module input fingerprints (skip recomputing unchanged modules)
+            "ALTER TABLE IF EXISTS overview_cache ADD COLUMN IF NOT EXISTS input_fingerprint VARCHAR(40)"
         ]
         try:
             with engine.begin() as conn:
@@ -143,6 +174,47 @@ async def init_db():
                     conn.execute(text("ALTER TABLE IF EXISTS ai_lists ADD COLUMN IF NOT EXISTS poster_path varchar(500) NULL"))
                 except Exception:
                     pass
+            # Maintain user_lists.item_count/watched_count on every list_items write, then backfill
+            # lists whose counts were never computed (trigger arithmetic leaves NULL counts NULL)
+            with engine.begin() as conn:
+                try:
+                    conn.execute(text("""
+                        CREATE OR REPLACE FUNCTION list_items_counts() RETURNS trigger AS $$
+                        BEGIN
+                            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                                UPDATE user_lists
+                                   SET item_count = item_count - 1,
+                                       watched_count = watched_count - (CASE WHEN OLD.is_watched THEN 1 ELSE 0 END)
+                                 WHERE id = OLD.smartlist_id;
+                            END IF;
+                            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                                UPDATE user_lists
+                                   SET item_count = item_count + 1,
+                                       watched_count = watched_count + (CASE WHEN NEW.is_watched THEN 1 ELSE 0 END)
+                                 WHERE id = NEW.smartlist_id;
+                            END IF;
+                            RETURN NULL;
+                        END
+                        $$ LANGUAGE plpgsql
+                    """))
+                    conn.execute(text("DROP TRIGGER IF EXISTS trg_list_items_counts ON list_items"))
+                    conn.execute(text(
+                        "CREATE TRIGGER trg_list_items_counts AFTER INSERT OR DELETE OR UPDATE OF is_watched, smartlist_id "
+                        "ON list_items FOR EACH ROW EXECUTE FUNCTION list_items_counts()"
+                    ))
+                    conn.execute(text("""
+                        UPDATE user_lists ul
+                           SET item_count = c.n, watched_count = c.w
+                          FROM (
+                                SELECT ul2.id, COUNT(li.id) AS n, COUNT(li.id) FILTER (WHERE li.is_watched) AS w
+                                  FROM user_lists ul2
+                                  LEFT JOIN list_items li ON li.smartlist_id = ul2.id
+                                 GROUP BY ul2.id
+                               ) c
+                         WHERE ul.id = c.id AND (ul.item_count IS NULL OR ul.watched_count IS NULL)
+                    """))
+                except Exception as e:
+                    logger.warning(f"list_items count trigger migration failed: {e}")
         except Exception:
             # Don't block startup if migrations fail; logs are available in container
             pass
@@ -158,17 +230,22 @@ async def init_db():
                     # Columns on list_items
                     ("SELECT COUNT(*) FROM information_schema.columns WHERE table_name='list_items' AND column_name IN ('is_watched','watched_at','trakt_id','media_type')", 4),
                     # Columns on user_lists
-                    ("SELECT COUNT(*) FROM information_schema.columns WHERE table_name='user_lists' AND column_name IN ('poster_path','trakt_list_id','list_type')", 3),
+                    ("SELECT COUNT(*) FROM information_schema.columns WHERE table_name='user_lists' AND column_name IN ('poster_path','trakt_list_id','list_type','item_count','watched_count')", 5),
+                    # List item count trigger + keyset index
+                    ("SELECT COUNT(*) FROM pg_trigger WHERE tgname='trg_list_items_counts'", 1),
+                    ("SELECT COUNT(*) FROM pg_indexes WHERE tablename='list_items' AND indexname='ix_list_items_list_score_id'", 1),
                     # Columns on persistent_candidates
-                    ("SELECT COUNT(*) FROM information_schema.columns WHERE table_name='persistent_candidates' AND column_name IN ('embedding','production_companies','spoken_languages','number_of_seasons')", 4),
+                    ("SELECT COUNT(*) FROM information_schema.columns WHERE table_name='persistent_candidates' AND column_name IN ('embedding','production_companies','spoken_languages','number_of_seasons','content_hash','embedding_hash')", 6),
+                    ("SELECT COUNT(*) FROM information_schema.columns WHERE table_name='overview_cache' AND column_name='input_fingerprint'", 1),
                     # Performance indexes
-                    ("SELECT COUNT(*) FROM pg_indexes WHERE tablename='persistent_candidates' AND indexname IN ('idx_persistent_candidates_media_type','idx_persistent_candidates_genres_trgm')", 2),
+                    ("SELECT COUNT(*) FROM pg_indexes WHERE tablename='persistent_candidates' AND indexname IN ('idx_persistent_candidates_media_type','idx_persistent_candidates_genres_trgm','idx_persistent_candidates_title_lower','idx_persistent_candidates_title_trgm')", 4),
                     # Presence of new AI tables (critical for AI features)
                     ("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema='public' AND table_name='bge_embeddings'", 1),
                     ("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema='public' AND table_name='item_llm_profiles'", 1),
                     ("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema='public' AND table_name='user_text_profiles'", 1),
                     ("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema='public' AND table_name='pairwise_training_sessions'", 1),
-                    ("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema='public' AND table_name='pairwise_judgments'", 1)
+                    ("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema='public' AND table_name='pairwise_judgments'", 1),
+                    ("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema='public' AND table_name='seed_title_cache'", 1)
                 ]
                 for sql, expected in sentinels:
                     val = conn.execute(text(sql)).scalar() or 0
@@ -659,6 +736,7 @@ async def init_db():
                                     manual=True
                                 )
                                 pc.compute_scores()
+                                pc.compute_content_hash()
                                 batch.append(pc)
 
                                 if len(batch) >= 500:
@@ -43,6 +43,36 @@ async def timing(name: str, milliseconds: float) -> None:
         pass
 
 
+def increment_sync(name: str, amount: int = 1) -> None:
+    """Blocking counterpart of increment() for threads and Celery workers without a loop."""
+    try:
+        from app.core.redis_client import get_redis_sync
+        get_redis_sync().hincrby(COUNTERS_KEY, name, amount)
+    except Exception:
+        pass
+
+
+def timing_sync(name: str, milliseconds: float) -> None:
+    """Blocking counterpart of timing() (count/sum/min/max aggregates)."""
+    try:
+        from app.core.redis_client import get_redis_sync
+        r = get_redis_sync()
+        key = f"metrics:latency:{name}"
+        ms = float(milliseconds)
+        pipe = r.pipeline()
+        pipe.hincrby(key, "count", 1)
+        pipe.hincrbyfloat(key, "sum", ms)
+        pipe.hget(key, "min")
+        pipe.hget(key, "max")
+        res = pipe.execute()
+        if res[2] is None or ms < float(res[2]):
+            r.hset(key, "min", ms)
+        if res[3] is None or ms > float(res[3]):
+            r.hset(key, "max", ms)
+    except Exception:
+        pass
+
+
 async def counters_snapshot() -> Dict[str, int]:
     r = get_redis()
     out: Dict[str, int] = {}
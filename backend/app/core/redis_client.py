@@ -68,5 +68,26 @@ def get_redis_sync() -> redis_sync.Redis:
 		_redis_sync = redis_sync.Redis(connection_pool=_sync_pool)
 	return _redis_sync
 
+_redis_sync_binary: redis_sync.Redis | None = None
+
+def get_redis_sync_binary() -> redis_sync.Redis:
+	"""Get a singleton sync Redis client that returns raw bytes (for packed vectors).
+
+	Values are not UTF-8 decoded, so float32 buffers can be read back with
+	np.frombuffer and sit in the same pipeline as JSON values.
+	"""
+	global _redis_sync_binary
+	if _redis_sync_binary is None:
+		pool = SyncConnectionPool.from_url(
+			settings.redis_url,
+			decode_responses=False,
+			max_connections=20,
+			socket_connect_timeout=5,
+			socket_timeout=5,
+			retry_on_timeout=True,
+		)
+		_redis_sync_binary = redis_sync.Redis(connection_pool=pool)
+	return _redis_sync_binary
+
 # Backward-compatible export expected to be sync in older modules
 redis_client = get_redis_sync()
@@ -1,5 +1,6 @@
 from .core.database import SessionLocal
 from . import models
+from .services.list_sync_scheduler import schedule_list, unschedule_list
 from sqlalchemy.orm import Session
 import json
 import logging
@@ -23,6 +24,7 @@ def create_list(payload):
         db.commit()
         db.refresh(l)
         logger.info(f"Successfully created list with ID: {l.id}")
+        schedule_list(l)
         return l
     except Exception as e:
         logger.error(f"Failed to create list: {e}")
@@ -56,8 +58,10 @@ def delete_list(list_id: int):
     try:
         l = db.query(models.UserList).filter(models.UserList.id == list_id).first()
         if not l: return False
+        user_id = l.user_id
         db.delete(l)
         db.commit()
+        unschedule_list(list_id, user_id)
         return True
     finally:
         db.close()
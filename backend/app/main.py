@@ -132,21 +132,10 @@ async def startup_event():
                         es.search("warm", limit=1)
                     except Exception:
                         pass
-                # Warm embedding model (load into memory)
+                # Load embedding / BGE / cross-encoder models into the process-wide registry
                 try:
-                    from app.services.ai_engine.embeddings import EmbeddingService
-                    EmbeddingService().encode_text("warmup")
-                except Exception:
-                    pass
-                # Warm Cross-Encoder reranker (ensures model is available)
-                try:
-                    from app.services.ai_engine.cross_encoder_reranker import CrossEncoderReranker
-                    ce = CrossEncoderReranker()
-                    ce.ensure()
-                    try:
-                        _ = ce.score("warmup", ["warmup"], batch_size=1)
-                    except Exception:
-                        pass
+                    from app.services.ai_engine.model_registry import warm_default_models
+                    warm_default_models()
                 except Exception:
                     pass
             except Exception:
@@ -34,6 +34,8 @@ class ListItem(Base):
     added_at = Column(DateTime, default=utc_now)
     user_list = relationship("UserList", back_populates="items")
 
+# Keyset pagination of list items on (score, id); matches ORDER BY score DESC NULLS LAST, id DESC
+Index('ix_list_items_list_score_id', ListItem.smartlist_id, ListItem.score.desc().nullslast(), ListItem.id.desc())
 
 
 class Secret(Base):
@@ -131,10 +133,14 @@ class PersistentCandidate(Base):
     last_refreshed = Column(DateTime, default=utc_now, index=True)
     manual = Column(Boolean, default=False, index=True)  # Mark rows inserted manually / via CSV bootstrap
     active = Column(Boolean, default=True, index=True)
+    # Embedding staleness tracking (SHA1 hex of compose_text_for_embedding output)
+    content_hash = Column(String(40), nullable=True)  # Refreshed whenever embedded fields are written
+    embedding_hash = Column(String(40), nullable=True)  # content_hash at the time BGE vectors were written
 
     __table_args__ = (
         UniqueConstraint('tmdb_id', 'media_type', name='uq_persistent_candidates_tmdb_media'),
         Index('ix_persistent_candidates_trakt_id', 'trakt_id', 'media_type', unique=True, postgresql_where=text('trakt_id IS NOT NULL')),
+        Index('ix_persistent_candidates_embedding_stale', 'id', postgresql_where=text('content_hash IS NULL OR embedding_hash IS DISTINCT FROM content_hash')),
         {'comment': 'Persistent combined TMDB/Trakt candidate pool'}
     )
 
@@ -159,10 +165,10 @@ class PersistentCandidate(Base):
                 try:
                     # Accept YYYY or YYYY-MM-DD
                     if len(self.release_date) == 4:
-                        rd = _dt.datetime(int(self.release_date), 1, 1)
+                        rd = _dt.datetime(int(self.release_date), 1, 1, tzinfo=_dt.timezone.utc)
                     else:
                         y, m, d = self.release_date.split('-')[:3]
-                        rd = _dt.datetime(int(y), int(m), int(d))
+                        rd = _dt.datetime(int(y), int(m), int(d), tzinfo=_dt.timezone.utc)
                     days = (utc_now() - rd).days
                     freshness = max(0.0, 1.0 - (days / (365 * 3)))  # 3-year decay
                 except Exception:
@@ -172,6 +178,19 @@ class PersistentCandidate(Base):
             # Fail silently; scores remain None
             pass
 
+    def compute_content_hash(self):
+        """Refresh content_hash from the fields that feed the embedding text.
+
+        Call after any write to embedded fields so the nightly BGE build can find
+        stale rows with a single `embedding_hash IS DISTINCT FROM content_hash` check.
+        """
+        try:
+            from app.services.ai_engine.metadata_processing import embedding_source_dict, compute_content_hash
+            self.content_hash = compute_content_hash(embedding_source_dict(self))
+        except Exception:
+            # Leave previous hash; nightly build backfills NULL hashes
+            pass
+
 class CandidateIngestionState(Base):
     """Tracks incremental ingestion checkpoints for persistent candidate updates."""
     __tablename__ = "candidate_ingestion_state"
@@ -240,6 +259,9 @@ class UserList(Base):
     created_at = Column(DateTime, default=utc_now)
     last_updated = Column(DateTime, nullable=True)
     last_error = Column(Text, nullable=True)
+    # Denormalized list_items counts, maintained by the list_items_counts trigger (NULL = not yet backfilled)
+    item_count = Column(Integer, default=0, nullable=True)
+    watched_count = Column(Integer, default=0, nullable=True)
 
     __table_args__ = (
         # For fast lookup of dynamic lists by type/id
@@ -504,7 +526,8 @@ class OverviewCache(Base):
     # Metadata
     item_count = Column(Integer, default=0)
     computed_at = Column(DateTime, nullable=False, default=utc_now, index=True)
-    expires_at = Column(DateTime, nullable=False, index=True)  # TTL: 24 hours
+    expires_at = Column(DateTime, nullable=False, index=True)  # Per-module TTL (OverviewService.MODULE_TTLS)
+    input_fingerprint = Column(String(40), nullable=True)  # SHA1 of module inputs; unchanged -> skip recompute
     
     __table_args__ = (
         UniqueConstraint('user_id', 'module_type', name='uq_overview_cache_user_module'),
@@ -568,6 +591,29 @@ class ItemLLMProfile(Base):
     )
 
 
+class SeedTitleCache(Base):
+    """Resolved seed titles for "like <title>" prompts (AI lists).
+
+    Keyed by normalized title. Filled from persistent_candidates when the title is
+    known locally, else from TMDB search; misses are cached too (tmdb_id NULL) so
+    unknown seeds do not hit TMDB on every refresh.
+    """
+    __tablename__ = "seed_title_cache"
+
+    id = Column(Integer, primary_key=True)
+    normalized_title = Column(String(300), nullable=False, unique=True, index=True)
+    tmdb_id = Column(Integer, nullable=True)
+    media_type = Column(String, nullable=True)  # 'movie' or 'show'
+    title = Column(String, nullable=True)
+    anchor_text = Column(Text, nullable=True)
+    source = Column(String(20), nullable=False, default='local')  # 'local', 'tmdb', 'miss'
+    resolved_at = Column(DateTime, default=utc_now, index=True)
+
+    __table_args__ = (
+        {'comment': 'Seed title -> (tmdb_id, media_type, anchor text) cache for AI list prompts'}
+    )
+
+
 class BGEEmbedding(Base):
     """BGE (BAAI/bge-small-en-v1.5) embeddings for multi-vector semantic search.
     
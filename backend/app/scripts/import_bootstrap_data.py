@@ -79,6 +79,30 @@ def load_metadata(bootstrap_dir):
     return metadata
 
 
+def _bundle_column_count(copy_file_gz):
+    """Read the per-tuple field count from a binary COPY dump (None if empty/unreadable).
+
+    Columns added after a bundle was exported are appended to the live table, so a
+    bundle with N fields maps onto the first N columns in ordinal order.
+    """
+    import gzip
+    import struct
+    try:
+        with gzip.open(copy_file_gz, 'rb') as f:
+            header = f.read(19)  # 11-byte signature + 4-byte flags + 4-byte extension length
+            if len(header) < 19 or not header.startswith(b"PGCOPY\n\xff\r\n\0"):
+                return None
+            ext_len = struct.unpack("!i", header[15:19])[0]
+            f.read(ext_len)
+            raw = f.read(2)
+            if len(raw) < 2:
+                return None
+            count = struct.unpack("!h", raw)[0]
+            return count if count > 0 else None
+    except Exception:
+        return None
+
+
 def import_database(bootstrap_dir):
     """Import persistent_candidates table using COPY from binary format."""
     logger.warning("Importing database from COPY file...")
@@ -131,9 +155,21 @@ def import_database(bootstrap_dir):
         cursor.execute("SET tcp_keepalives_interval = 10")
         cursor.execute("SET tcp_keepalives_count = 10")
         
+        # Older bundles lack columns added since export; target only the leading columns
+        column_clause = ""
+        field_count = _bundle_column_count(copy_file_gz)
+        if field_count:
+            columns = [r[0] for r in db.execute(text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_name = 'persistent_candidates' ORDER BY ordinal_position"
+            )).fetchall()]
+            if field_count < len(columns):
+                logger.warning(f"Bundle has {field_count} of {len(columns)} columns; newer columns stay NULL")
+                column_clause = " (" + ", ".join(f'"{c}"' for c in columns[:field_count]) + ")"
+
         with gzip.open(copy_file_gz, 'rb') as f:
             cursor.copy_expert(
-                "COPY persistent_candidates FROM STDIN WITH (FORMAT binary)",
+                f"COPY persistent_candidates{column_clause} FROM STDIN WITH (FORMAT binary)",
                 f
             )
         
@@ -1,12 +1,42 @@
+"""
+import_tmdb_csv.py
+
+Streaming TMDB CSV importer for persistent_candidates.
+
+  1) Parse the CSV in chunks (constant memory regardless of file size)
+  2) Compute obscurity/mainstream/freshness scores for the whole chunk with NumPy
+  3) COPY the chunk into a temp staging table
+  4) Merge with one INSERT ... ON CONFLICT (tmdb_id, media_type) DO UPDATE per chunk
+
+Progress is checkpointed in Redis after every committed chunk, so re-running the same
+command after a crash resumes where it stopped (use --restart to start over).
+
+Run inside the backend container:
+  docker exec -it watchbuddy-backend-1 python -m app.scripts.import_tmdb_csv /app/data/your_file.csv movie
+
+Notes:
+- Optional columns missing from the CSV never overwrite existing values (COALESCE)
+- Updated rows get content_hash reset so the nightly BGE build re-hashes them from the full row
+"""
+import argparse
 import csv
+import datetime as _dt
+import hashlib
+import io
 import json
 import sys
+import time
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import numpy as np
 
-from app.core.database import SessionLocal, engine
-from app.models import PersistentCandidate
-from sqlalchemy.dialects.postgresql import insert
+from app.core.database import engine
+from app.core.redis_client import get_redis_sync
+from app.services.ai_engine.metadata_processing import embedding_source_dict, compute_content_hash
+from app.services.candidate_cache import invalidate_candidates
 
 REQUIRED_COLUMNS = {
     'tmdb_id': ['id'],
@@ -32,6 +62,21 @@ OPTIONAL_COLUMNS = {
     'imdb_id': ['imdb_id']
 }
 
+# Staged columns in COPY order. Always overwritten on conflict:
+OVERWRITE_COLUMNS = [
+    'title', 'language', 'popularity', 'vote_average', 'vote_count', 'manual',
+    'obscurity_score', 'mainstream_score', 'freshness_score',
+]
+# Only overwritten when the CSV provides a value:
+OPTIONAL_DB_COLUMNS = [
+    'release_date', 'year', 'overview', 'genres', 'keywords', 'poster_path', 'backdrop_path',
+    'runtime', 'is_adult', 'status', 'original_title', 'imdb_id',
+]
+STAGE_COLUMNS = ['tmdb_id', 'media_type'] + OVERWRITE_COLUMNS + OPTIONAL_DB_COLUMNS + ['content_hash']
+
+DEFAULT_CHUNK_SIZE = 20000
+CHECKPOINT_KEY_PREFIX = "import_tmdb_csv:checkpoint:"
+
 def find_col(row_keys, aliases):
     lowered = {k.lower(): k for k in row_keys}
     for a in aliases:
@@ -56,140 +101,258 @@ def parse_list_field(raw: str):
     # Fallback: split by comma
     return [p.strip() for p in raw.split(',') if p.strip()]
 
-def compute_scores(obj: PersistentCandidate):
-    obj.compute_scores()
 
+def resolve_columns(headers) -> Dict[str, Optional[str]]:
+    """Map target field -> CSV header once per file instead of once per row."""
+    resolved = {}
+    for target, aliases in {**REQUIRED_COLUMNS, **OPTIONAL_COLUMNS}.items():
+        resolved[target] = find_col(headers, aliases)
+    return resolved
 
-def upsert_batch(db, batch):
-    if not batch:
-        return
-    for item_dict in batch:
-        # Use merge for upsert behavior (update if exists, insert if not)
-        existing = db.query(PersistentCandidate).filter_by(tmdb_id=item_dict['tmdb_id']).one_or_none()
-        if existing:
-            # Update existing
-            for key, value in item_dict.items():
-                if key not in ('id', 'tmdb_id'):
-                    setattr(existing, key, value)
+
+def map_row(row: Dict[str, str], colmap: Dict[str, Optional[str]], default_media_type: Optional[str] = None,
+            manual: bool = True) -> Optional[Dict]:
+    """Convert one CSV row to a persistent_candidates dict (None if required fields are missing)."""
+    def _get(target):
+        col = colmap.get(target)
+        return row.get(col) if col else None
+
+    mapped = {}
+    value = _get('tmdb_id')
+    if not value:
+        return None
+    try:
+        mapped['tmdb_id'] = int(value)
+    except ValueError:
+        return None
+    value = _get('title')
+    if not value:
+        return None
+    mapped['title'] = value.strip()
+    value = _get('media_type')
+    mt = value.lower() if value else (default_media_type or 'movie')
+    if mt in ('show','tv','tvshow','series','shows'):
+        mapped['media_type'] = 'show'
+    else:
+        mapped['media_type'] = 'movie'
+    mapped['language'] = (_get('original_language') or '').lower()[:5]
+    try:
+        value = _get('popularity')
+        mapped['popularity'] = float(value) if value else 0.0
+    except ValueError:
+        mapped['popularity'] = 0.0
+    try:
+        value = _get('vote_average')
+        mapped['vote_average'] = float(value) if value else None
+    except ValueError:
+        mapped['vote_average'] = None
+    try:
+        value = _get('vote_count')
+        mapped['vote_count'] = int(value) if value else 0
+    except ValueError:
+        mapped['vote_count'] = 0
+
+    # Optional columns
+    for target in OPTIONAL_COLUMNS:
+        value = _get(target)
+        if value is None or value == '':
+            continue
+        if target in ('genres','keywords'):
+            parsed = parse_list_field(value)
+            mapped[target] = json.dumps(parsed) if parsed else None
+        elif target == 'is_adult':
+            mapped['is_adult'] = str(value).lower() in ('1','true','t','yes','y')
+        elif target == 'runtime':
+            try:
+                mapped['runtime'] = int(float(value))
+            except Exception:
+                pass
         else:
-            # Insert new
-            pc = PersistentCandidate(**item_dict)
-            db.add(pc)
+            mapped[target] = value
+    # Derivations
+    if mapped.get('release_date') and len(mapped['release_date']) >= 4:
+        try:
+            mapped['year'] = int(mapped['release_date'][:4])
+        except Exception:
+            pass
+    mapped['manual'] = manual
+    return mapped
+
+
+def _release_day(raw: Optional[str]) -> str:
+    """Normalize YYYY / YYYY-MM-DD to a NumPy day string ('NaT' when unparseable)."""
+    if not raw or len(raw) < 4:
+        return 'NaT'
+    try:
+        if len(raw) == 4:
+            return _dt.date(int(raw), 1, 1).isoformat()
+        y, m, d = raw.split('-')[:3]
+        return _dt.date(int(y), int(m), int(d[:2])).isoformat()
+    except Exception:
+        return 'NaT'
+
 
+def compute_scores_vectorized(rows: List[Dict]) -> None:
+    """Vectorized equivalent of PersistentCandidate.compute_scores() for a chunk of dicts."""
+    if not rows:
+        return
+    pop = np.array([r.get('popularity') or 0.0 for r in rows], dtype=np.float64)
+    votes = np.array([r.get('vote_count') or 0 for r in rows], dtype=np.float64)
+    rating = np.array([r.get('vote_average') or 0.0 for r in rows], dtype=np.float64)
+    obscurity = rating / np.log(pop + 2) / np.log(votes + 3)
+    mainstream = rating * np.log(pop + 2) * np.log(votes + 3)
 
-def import_csv(path: Path, default_media_type: Optional[str] = None, manual=True):
-    db = SessionLocal()
+    released = np.array([_release_day(r.get('release_date')) for r in rows], dtype='datetime64[D]')
+    today = np.datetime64(_dt.datetime.utcnow().date(), 'D')
+    days = (today - released).astype('timedelta64[D]').astype(np.float64)
+    freshness = np.maximum(0.0, 1.0 - days / (365 * 3))
+    freshness[np.isnat(released)] = 0.0
+
+    for i, r in enumerate(rows):
+        r['obscurity_score'] = float(obscurity[i])
+        r['mainstream_score'] = float(mainstream[i])
+        r['freshness_score'] = float(freshness[i])
+
+
+def _merge_sql() -> str:
+    cols = ", ".join(STAGE_COLUMNS)
+    updates = [f"{c} = EXCLUDED.{c}" for c in OVERWRITE_COLUMNS]
+    updates += [f"{c} = COALESCE(EXCLUDED.{c}, persistent_candidates.{c})" for c in OPTIONAL_DB_COLUMNS]
+    # Staged hash only covers CSV fields; let the nightly BGE build re-hash the full row
+    updates += ["content_hash = NULL", "last_refreshed = EXCLUDED.last_refreshed"]
+    return f"""
+        WITH up AS (
+            INSERT INTO persistent_candidates ({cols}, inserted_at, last_refreshed, active)
+            SELECT {cols}, now(), now(), true FROM tmdb_csv_stage
+            ON CONFLICT (tmdb_id, media_type) DO UPDATE SET {", ".join(updates)}
+            RETURNING tmdb_id, media_type, (xmax = 0) AS inserted
+        )
+        SELECT tmdb_id, media_type, inserted FROM up
+    """
+
+
+def copy_upsert_chunk(raw_conn, rows: List[Dict]) -> tuple:
+    """COPY a chunk into the staging table and merge it. Returns (inserted, updated)."""
+    # Last occurrence wins for duplicate keys inside a chunk
+    deduped = {(r['tmdb_id'], r['media_type']): r for r in rows}
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for r in deduped.values():
+        writer.writerow([r.get(c) for c in STAGE_COLUMNS])
+    buf.seek(0)
+    cur = raw_conn.cursor()
+    try:
+        cur.copy_expert(f"COPY tmdb_csv_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buf)
+        cur.execute(_merge_sql())
+        merged = cur.fetchall()
+        raw_conn.commit()  # ON COMMIT DELETE ROWS empties the staging table
+        updated_keys = [(tmdb_id, media_type) for tmdb_id, media_type, inserted in merged if not inserted]
+        invalidate_candidates(updated_keys)
+        return len(merged) - len(updated_keys), len(updated_keys)
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def _checkpoint_key(path: Path) -> str:
+    return CHECKPOINT_KEY_PREFIX + hashlib.sha1(str(path.resolve()).encode('utf-8')).hexdigest()
+
+
+def _load_checkpoint(path: Path) -> int:
+    """Rows already committed for this exact file (0 if none or the file changed)."""
+    try:
+        raw = get_redis_sync().get(_checkpoint_key(path))
+        if not raw:
+            return 0
+        data = json.loads(raw)
+        st = path.stat()
+        if data.get('size') == st.st_size and data.get('mtime') == int(st.st_mtime):
+            return int(data.get('rows') or 0)
+    except Exception as e:
+        print(f"Checkpoint unavailable ({e}); importing from the start")
+    return 0
+
+
+def _save_checkpoint(path: Path, rows_done: int) -> None:
+    try:
+        st = path.stat()
+        payload = {"path": str(path), "size": st.st_size, "mtime": int(st.st_mtime), "rows": rows_done}
+        get_redis_sync().set(_checkpoint_key(path), json.dumps(payload), ex=7 * 86400)
+    except Exception:
+        pass
+
+
+def _clear_checkpoint(path: Path) -> None:
+    try:
+        get_redis_sync().delete(_checkpoint_key(path))
+    except Exception:
+        pass
+
+
+def import_csv(path: Path, default_media_type: Optional[str] = None, manual=True,
+               chunk_size: int = DEFAULT_CHUNK_SIZE, restart: bool = False):
+    if restart:
+        _clear_checkpoint(path)
+    start_row = _load_checkpoint(path)
     inserted = 0
     updated = 0
+    rows_done = start_row
+    started = time.perf_counter()
+
+    raw_conn = engine.raw_connection()
     try:
+        cur = raw_conn.cursor()
+        cur.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS tmdb_csv_stage ON COMMIT DELETE ROWS AS "
+            f"SELECT {', '.join(STAGE_COLUMNS)} FROM persistent_candidates WITH NO DATA"
+        )
+        raw_conn.commit()
+        cur.close()
+
         with path.open('r', encoding='utf-8', newline='') as f:
             reader = csv.DictReader(f)
-            headers = reader.fieldnames or []
-            batch = []
-            for row in reader:
-                # Resolve required columns
-                mapped = {}
-                skip = False
-                for target, aliases in REQUIRED_COLUMNS.items():
-                    col = find_col(headers, aliases)
-                    value = row.get(col) if col else None
-                    if target == 'tmdb_id':
-                        if not value:
-                            skip = True
-                            break
-                        try:
-                            mapped['tmdb_id'] = int(value)
-                        except ValueError:
-                            skip = True
-                            break
-                    elif target == 'title':
-                        if not value:
-                            skip = True
-                            break
-                        mapped['title'] = value.strip()
-                    elif target == 'media_type':
-                        mt = value.lower() if value else (default_media_type or 'movie')
-                        if mt in ('movie','movies'):
-                            mapped['media_type'] = 'movie'
-                        elif mt in ('show','tv','tvshow','series','shows'):
-                            mapped['media_type'] = 'show'
-                        else:
-                            mapped['media_type'] = 'movie'
-                    elif target == 'original_language':
-                        mapped['language'] = (value or '').lower()[:5]
-                    elif target == 'popularity':
-                        try:
-                            mapped['popularity'] = float(value) if value else 0.0
-                        except ValueError:
-                            mapped['popularity'] = 0.0
-                    elif target == 'vote_average':
-                        try:
-                            mapped['vote_average'] = float(value) if value else None
-                        except ValueError:
-                            mapped['vote_average'] = None
-                    elif target == 'vote_count':
-                        try:
-                            mapped['vote_count'] = int(value) if value else 0
-                        except ValueError:
-                            mapped['vote_count'] = 0
-                if skip:
-                    continue
-                # Optional columns
-                for target, aliases in OPTIONAL_COLUMNS.items():
-                    col = find_col(headers, aliases)
-                    value = row.get(col) if col else None
-                    if value is None or value == '':
-                        continue
-                    if target in ('genres','keywords'):
-                        parsed = parse_list_field(value)
-                        mapped[target] = json.dumps(parsed) if parsed else None
-                    elif target == 'is_adult':
-                        mapped['is_adult'] = str(value).lower() in ('1','true','t','yes','y','True')
-                    elif target == 'runtime':
-                        try:
-                            mapped['runtime'] = int(float(value))
-                        except Exception:
-                            pass
-                    elif target == 'imdb_id':
-                        mapped['imdb_id'] = value
-                    elif target == 'original_title':
-                        mapped['original_title'] = value
-                    else:
-                        mapped[target] = value
-                # Derivations
-                if 'release_date' in mapped and mapped.get('release_date') and len(mapped['release_date']) >= 4:
-                    try:
-                        mapped['year'] = int(mapped['release_date'][:4])
-                    except Exception:
-                        pass
-                mapped['manual'] = manual
-                # Initialize derived scores after creation in ORM object
-                pc_obj = PersistentCandidate(**mapped)
-                pc_obj.compute_scores()
-                # Convert object back to dict for bulk upsert
-                for key in ('obscurity_score','mainstream_score','freshness_score'):
-                    mapped[key] = getattr(pc_obj, key)
-                batch.append(mapped)
-                if len(batch) >= 500:
-                    upsert_batch(db, batch)
-                    db.commit()
-                    inserted += len(batch)
-                    batch = []
-            if batch:
-                upsert_batch(db, batch)
-                db.commit()
-                inserted += len(batch)
-        print(f"Imported/updated approx {inserted} rows from {path.name}")
+            colmap = resolve_columns(reader.fieldnames or [])
+            if start_row:
+                print(f"Resuming {path.name} after {start_row:,} rows")
+                for _ in islice(reader, start_row):
+                    pass
+            while True:
+                raw_rows = list(islice(reader, chunk_size))
+                if not raw_rows:
+                    break
+                chunk = []
+                for row in raw_rows:
+                    mapped = map_row(row, colmap, default_media_type, manual)
+                    if mapped is not None:
+                        chunk.append(mapped)
+                compute_scores_vectorized(chunk)
+                for mapped in chunk:
+                    mapped['content_hash'] = compute_content_hash(embedding_source_dict(SimpleNamespace(**mapped)))
+                if chunk:
+                    ins, upd = copy_upsert_chunk(raw_conn, chunk)
+                    inserted += ins
+                    updated += upd
+                rows_done += len(raw_rows)
+                _save_checkpoint(path, rows_done)
+                elapsed = max(time.perf_counter() - started, 1e-6)
+                print(f"{path.name}: {rows_done:,} rows read | {inserted:,} inserted | {updated:,} updated | "
+                      f"{(rows_done - start_row) / elapsed:,.0f} rows/s")
+        _clear_checkpoint(path)
+        print(f"Imported {inserted:,} new and updated {updated:,} existing rows from {path.name}")
     finally:
-        db.close()
+        raw_conn.close()
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Usage: python -m app.scripts.import_tmdb_csv <csv_path> [media_type]")
-        sys.exit(1)
-    csv_path = Path(sys.argv[1])
-    media_type = sys.argv[2] if len(sys.argv) > 2 else None
+    parser = argparse.ArgumentParser(description="Stream a TMDB CSV into persistent_candidates")
+    parser.add_argument("csv_path")
+    parser.add_argument("media_type", nargs="?", default=None, help="Default media type when the CSV has no type column")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--restart", action="store_true", help="Ignore any saved checkpoint for this file")
+    args = parser.parse_args()
+    csv_path = Path(args.csv_path)
     if not csv_path.exists():
         print(f"File not found: {csv_path}")
         sys.exit(1)
-    import_csv(csv_path, default_media_type=media_type)
+    import_csv(csv_path, default_media_type=args.media_type, chunk_size=args.chunk_size, restart=args.restart)
@@ -129,6 +129,7 @@ def import_tv_shows():
                     manual=True
                 )
                 pc.compute_scores()
+                pc.compute_content_hash()
                 batch.append(pc)
                 imported += 1
                 
@@ -0,0 +1,150 @@
+"""
+loadtest_list_browsing.py
+
+Concurrent load test for the list-browsing read path (list items, item details,
+similar items, overview, sync status). Run it before and after a change to compare
+request latency percentiles under the same concurrency.
+
+List items are paged the way the UI does it: a first page, then follow-up pages that
+pass the previous response's next_cursor (keyset pagination); the walk restarts from
+the first page when the list runs out.
+
+Usage (inside backend container, always set PYTHONPATH=/app):
+  python -m app.scripts.loadtest_list_browsing --list-id 12 --concurrency 32 --requests 500
+  python -m app.scripts.loadtest_list_browsing --base-url http://localhost:8000 --item movie:603
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+
+CURSOR_PLACEHOLDER = "{cursor}"
+
+
+def build_targets(args) -> List[Tuple[str, str, dict]]:
+    """Return (method, path, json_body) tuples that make up one browsing mix."""
+    targets: List[Tuple[str, str, dict]] = [
+        ("GET", f"/api/lists/{args.list_id}/items/?limit={args.page_size}", None),
+        ("GET", f"/api/lists/{args.list_id}/items/?limit={args.page_size}&cursor={CURSOR_PLACEHOLDER}", None),
+        ("GET", f"/api/status/sync?user_id={args.user_id}", None),
+        ("POST", "/api/overview", {"user_id": args.user_id}),
+    ]
+    for spec in args.item or []:
+        media_type, tmdb_id = spec.split(":", 1)
+        targets.append(("GET", f"/api/items/{media_type}/{tmdb_id}?user_id={args.user_id}", None))
+        targets.append(("GET", f"/api/items/{media_type}/{tmdb_id}/similar?top_k=12", None))
+    return targets
+
+
+def endpoint_key(path: str) -> str:
+    key = path.split("?")[0]
+    return f"{key} (cursor)" if CURSOR_PLACEHOLDER in path else key
+
+
+def resolve_cursor(path: str, cursor: Optional[str]) -> str:
+    """Fill in the last seen next_cursor, or fall back to the first page."""
+    if CURSOR_PLACEHOLDER not in path:
+        return path
+    if cursor:
+        return path.replace(CURSOR_PLACEHOLDER, quote(cursor, safe=""))
+    return path.replace(f"&cursor={CURSOR_PLACEHOLDER}", "")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+async def run(args) -> Dict[str, Dict[str, float]]:
+    targets = build_targets(args)
+    latencies: Dict[str, List[float]] = {endpoint_key(path): [] for _, path, _ in targets}
+    errors: Dict[str, int] = {key: 0 for key in latencies}
+    # next_cursor of the most recent list-items page, shared by all workers
+    page_state: Dict[str, Optional[str]] = {"cursor": None}
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(targets[i % len(targets)] if not args.shuffle else random.choice(targets))
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        async def worker():
+            while True:
+                try:
+                    method, path, body = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                key = endpoint_key(path)
+                paged = path.startswith("/api/lists/")
+                path = resolve_cursor(path, page_state["cursor"])
+                started = time.perf_counter()
+                try:
+                    resp = await client.request(method, path, json=body)
+                    if resp.status_code >= 400:
+                        errors[key] += 1
+                    elif paged:
+                        page_state["cursor"] = resp.json().get("next_cursor")
+                except Exception:
+                    errors[key] += 1
+                latencies[key].append((time.perf_counter() - started) * 1000.0)
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        wall = time.perf_counter() - wall_start
+
+    report: Dict[str, Dict[str, float]] = {}
+    all_values: List[float] = []
+    for key, values in latencies.items():
+        all_values.extend(values)
+        report[key] = {
+            "count": len(values),
+            "errors": errors[key],
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "mean": statistics.fmean(values) if values else 0.0,
+        }
+    report["__total__"] = {
+        "count": len(all_values),
+        "errors": sum(errors.values()),
+        "p50": percentile(all_values, 50),
+        "p95": percentile(all_values, 95),
+        "p99": percentile(all_values, 99),
+        "mean": statistics.fmean(all_values) if all_values else 0.0,
+        "rps": len(all_values) / wall if wall > 0 else 0.0,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the list-browsing read endpoints")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--list-id", type=int, default=1)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--item", action="append", help="media_type:tmdb_id to include item detail/similar calls (repeatable)")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--shuffle", action="store_true", help="Pick endpoints randomly instead of round-robin")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"{'endpoint':<48} {'n':>6} {'err':>5} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for key, row in report.items():
+        print(f"{key:<48} {row['count']:>6} {row['errors']:>5} "
+              f"{row['p50']:>8.1f}ms {row['p95']:>8.1f}ms {row['p99']:>8.1f}ms")
+    print(f"throughput: {report['__total__']['rps']:.1f} req/s at concurrency {args.concurrency}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+bge_aspect_store.py
+
+Columnar, memory-mapped copy of bge_embeddings for multi-vector scoring.
+
+Layout (one generation directory under AI_BGE_ASPECT_STORE_DIR, switched
+atomically through the CURRENT pointer file):
+  keys.npy            int64, sorted: tmdb_id * 2 + (1 if media_type == 'show' else 0)
+  mask.npy            uint8 presence bitmask per row (bit i = ASPECTS[i] stored)
+  <aspect>.npy        float16 (rows x dim), L2-normalized, zeros where absent
+  meta.json           dim, rows, model, updated_at watermark (+ ids of the rows at it)
+
+Readers open the matrices with np.load(mmap_mode='r'), so all workers share one
+page-cached copy. Key lookup is a vectorized searchsorted, and scoring a pool is
+one (pool x dim) @ (dim,) product per aspect with masked weighted fusion.
+
+refresh_aspect_store() keeps the store in sync with bge_embeddings: no-op when
+nothing changed, in-place row patches when only existing keys changed, a full
+rebuild (keyset-paged, in key order) otherwise.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = Path(os.getenv("AI_BGE_ASPECT_STORE_DIR", "/data/ai/bge_aspects"))
+STORE_VERSION = 2  # 2: vectors decoded as float16 (v1 stores hold misread float32 data)
+ASPECTS = ("base", "title", "keywords", "people", "brands")
+KEEP_GENERATIONS = 2
+
+DEFAULT_ASPECT_WEIGHTS = {
+    "base": 0.20,
+    "title": 0.25,
+    "keywords": 0.30,
+    "people": 0.20,
+    "brands": 0.05,
+}
+
+
+def encode_keys(tmdb_ids: Sequence[int], media_types: Sequence[str]) -> np.ndarray:
+    """Pack (tmdb_id, media_type) into sortable int64 keys (matches ORDER BY tmdb_id, media_type)."""
+    ids = np.asarray(tmdb_ids, dtype=np.int64)
+    shows = np.fromiter((1 if m == "show" else 0 for m in media_types), dtype=np.int64, count=len(ids))
+    return ids * 2 + shows
+
+
+def decode_embedding(blob: Optional[bytes]) -> Optional[np.ndarray]:
+    """float32 vector from a bge_embeddings blob (all writers store float16 bytes)."""
+    if not blob:
+        return None
+    return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+
+
+def _unit_rows(mat: np.ndarray) -> np.ndarray:
+    mat = np.asarray(mat, dtype=np.float32)
+    return mat / (np.linalg.norm(mat, axis=1, keepdims=True) + 1e-8)
+
+
+class BGEAspectStore:
+    """Sorted key index + per-aspect matrices (memmapped or in-memory)."""
+
+    def __init__(self, keys: np.ndarray, mask: np.ndarray, matrices: Dict[str, np.ndarray], meta: Optional[dict] = None):
+        self.keys = keys
+        self.mask = mask
+        self.matrices = matrices
+        self.meta = dict(meta or {})
+        self.dim = int(next(iter(matrices.values())).shape[1]) if matrices else 0
+
+    def __len__(self) -> int:
+        return int(self.keys.shape[0])
+
+    @classmethod
+    def from_rows(cls, rows: Iterable, deserialize=None) -> "BGEAspectStore":
+        """In-memory store from bge_embeddings rows (tmdb_id, media_type, embedding_<aspect>...)."""
+        deserialize = deserialize or decode_embedding
+        rows = sorted(rows, key=lambda r: (int(r.tmdb_id), 1 if r.media_type == "show" else 0))
+        keys = encode_keys([r.tmdb_id for r in rows], [r.media_type for r in rows])
+        mask = np.zeros(len(rows), dtype=np.uint8)
+        vectors: Dict[str, List[Optional[np.ndarray]]] = {a: [] for a in ASPECTS}
+        dim = 0
+        for i, r in enumerate(rows):
+            for bit, aspect in enumerate(ASPECTS):
+                blob = getattr(r, f"embedding_{aspect}", None)
+                vec = deserialize(blob) if blob else None
+                if vec is not None and vec.size:
+                    dim = dim or int(vec.size)
+                    mask[i] |= 1 << bit
+                vectors[aspect].append(vec)
+        matrices = {}
+        for aspect in ASPECTS:
+            mat = np.zeros((len(rows), dim), dtype=np.float32)
+            for i, vec in enumerate(vectors[aspect]):
+                if vec is not None and vec.size == dim:
+                    mat[i] = vec
+            matrices[aspect] = _unit_rows(mat).astype(np.float16)
+        return cls(keys, mask, matrices)
+
+    def rows_for(self, keys: np.ndarray) -> np.ndarray:
+        """Row index per key, -1 where the key is not stored."""
+        keys = np.asarray(keys, dtype=np.int64)
+        if not len(self):
+            return np.full(keys.shape, -1, dtype=np.int64)
+        pos = np.searchsorted(self.keys, keys)
+        pos_c = np.minimum(pos, len(self) - 1)
+        found = self.keys[pos_c] == keys
+        return np.where(found, pos_c, -1)
+
+    def aspect_matrix(self, aspect: str, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(vectors float32, present bool) for the given rows (-1 rows are absent)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        valid = rows >= 0
+        safe = np.where(valid, rows, 0)
+        bit = 1 << ASPECTS.index(aspect)
+        present = valid & ((self.mask[safe] & bit) != 0) if len(self) else valid
+        if not len(self):
+            return np.zeros((len(rows), self.dim), dtype=np.float32), present
+        return np.asarray(self.matrices[aspect][safe], dtype=np.float32), present
+
+    def score(
+        self,
+        profile_vectors: Dict[str, Optional[np.ndarray]],
+        keys: np.ndarray,
+        weights: Optional[Dict[str, float]] = None,
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray], np.ndarray]:
+        """Masked weighted multi-aspect cosine similarity.
+
+        Returns (final scores, {aspect: sims with NaN where absent}, stored row mask).
+        final is the weight-normalized mean over the aspects both sides have; 0 if none.
+        """
+        weights = weights or DEFAULT_ASPECT_WEIGHTS
+        rows = self.rows_for(keys)
+        n = len(rows)
+        num = np.zeros(n, dtype=np.float32)
+        den = np.zeros(n, dtype=np.float32)
+        per_aspect: Dict[str, np.ndarray] = {}
+        for aspect in ASPECTS:
+            q = profile_vectors.get(aspect)
+            if q is None:
+                continue
+            q = np.asarray(q, dtype=np.float32).reshape(-1)
+            if q.size != self.dim:
+                continue
+            q = q / (np.linalg.norm(q) + 1e-8)
+            mat, present = self.aspect_matrix(aspect, rows)
+            sims = mat @ q
+            per_aspect[aspect] = np.where(present, sims, np.nan)
+            w = float(weights.get(aspect, 0.0))
+            num += np.where(present, sims * w, 0.0)
+            den += np.where(present, w, 0.0)
+        final = np.divide(num, den, out=np.zeros(n, dtype=np.float32), where=den > 0)
+        return final, per_aspect, rows >= 0
+
+    def weighted_profile(self, keys: np.ndarray, item_weights: np.ndarray) -> Dict[str, Optional[np.ndarray]]:
+        """Per-aspect weighted average of the stored vectors for ``keys`` (None if no item has the aspect)."""
+        rows = self.rows_for(keys)
+        item_weights = np.asarray(item_weights, dtype=np.float32)
+        out: Dict[str, Optional[np.ndarray]] = {}
+        for aspect in ASPECTS:
+            mat, present = self.aspect_matrix(aspect, rows)
+            w = np.where(present, item_weights, 0.0).astype(np.float32)
+            total = float(w.sum())
+            out[aspect] = (w @ mat) / total if total > 0 else None
+        return out
+
+    # ---------------------
+    # Persistence
+    # ---------------------
+    @classmethod
+    def open(cls, directory: Path = STORE_DIR) -> Optional["BGEAspectStore"]:
+        """Memory-map the current generation, or None if no store was built yet."""
+        try:
+            gen = (directory / "CURRENT").read_text().strip()
+        except OSError:
+            return None
+        gen_dir = directory / gen
+        try:
+            meta = json.loads((gen_dir / "meta.json").read_text())
+            if meta.get("version") != STORE_VERSION:
+                return None
+            keys = np.load(gen_dir / "keys.npy", mmap_mode="r")
+            mask = np.load(gen_dir / "mask.npy", mmap_mode="r")
+            matrices = {a: np.load(gen_dir / f"{a}.npy", mmap_mode="r") for a in ASPECTS}
+            meta["generation"] = gen
+            return cls(keys, mask, matrices, meta)
+        except Exception as e:
+            logger.warning(f"[BGEAspects] Ignoring unreadable store generation {gen_dir}: {e}")
+            return None
+
+
+# ---------------------
+# Shared reader
+# ---------------------
+_store: Optional[BGEAspectStore] = None
+_store_gen: Optional[str] = None
+_store_checked_at = 0.0
+_store_lock = threading.Lock()
+
+
+def get_aspect_store(max_check_interval: float = 60.0) -> Optional[BGEAspectStore]:
+    """Process-wide memmapped store, re-opened when a refresh switched generations."""
+    global _store, _store_gen, _store_checked_at
+    now = time.time()
+    if _store is not None and now - _store_checked_at < max_check_interval:
+        return _store
+    with _store_lock:
+        _store_checked_at = now
+        try:
+            gen = (STORE_DIR / "CURRENT").read_text().strip()
+        except OSError:
+            return _store
+        if gen != _store_gen:
+            store = BGEAspectStore.open(STORE_DIR)
+            if store is not None:
+                _store, _store_gen = store, gen
+                logger.info(f"[BGEAspects] Opened store generation {gen} ({len(store)} items, dim={store.dim})")
+        return _store
+
+
+# ---------------------
+# Refresh from bge_embeddings
+# ---------------------
+_SELECT_COLS = "id, tmdb_id, media_type, " + ", ".join(f"embedding_{a}" for a in ASPECTS) + ", updated_at"
+
+
+def _fill_rows(mats: Dict[str, np.ndarray], mask: np.ndarray, positions: np.ndarray, rows) -> None:
+    dim = next(iter(mats.values())).shape[1]
+    for pos, r in zip(positions, rows):
+        m = 0
+        for bit, aspect in enumerate(ASPECTS):
+            blob = getattr(r, f"embedding_{aspect}")
+            vec = decode_embedding(blob)
+            if vec is not None and vec.size == dim:
+                mats[aspect][pos] = (vec / (np.linalg.norm(vec) + 1e-8)).astype(np.float16)
+                m |= 1 << bit
+            else:
+                mats[aspect][pos] = 0
+        mask[pos] = m
+
+
+def _unseen_rows(rows, watermark: Optional[str], seen_ids: Set[int]) -> list:
+    """Drop rows already stored at the (inclusive) watermark timestamp."""
+    return [
+        r for r in rows
+        if not (r.id in seen_ids and r.updated_at is not None and r.updated_at.isoformat() == watermark)
+    ]
+
+
+def _advance_watermark(rows, watermark: Optional[str], ids: Set[int]) -> Tuple[Optional[str], Set[int]]:
+    """Highest updated_at seen so far and the ids of the rows carrying it."""
+    for r in rows:
+        if r.updated_at is None:
+            continue
+        ts = r.updated_at.isoformat()
+        if watermark is None or ts > watermark:
+            watermark, ids = ts, set()
+        if ts == watermark:
+            ids.add(r.id)
+    return watermark, ids
+
+
+def _full_build(db, dim: int, page_size: int) -> Optional[str]:
+    """Write a new generation in key order; returns its name."""
+    from sqlalchemy import text
+
+    total = int(db.execute(text("SELECT COUNT(*) FROM bge_embeddings")).scalar() or 0)
+    gen = f"gen-{int(time.time() * 1000)}"
+    gen_dir = STORE_DIR / gen
+    gen_dir.mkdir(parents=True, exist_ok=True)
+    keys = np.lib.format.open_memmap(gen_dir / "keys.npy", mode="w+", dtype=np.int64, shape=(total,))
+    mask = np.lib.format.open_memmap(gen_dir / "mask.npy", mode="w+", dtype=np.uint8, shape=(total,))
+    mats = {
+        a: np.lib.format.open_memmap(gen_dir / f"{a}.npy", mode="w+", dtype=np.float16, shape=(total, dim))
+        for a in ASPECTS
+    }
+    n = 0
+    watermark, watermark_ids = None, set()
+    last_tmdb, last_media = -1, ""
+    while n < total:
+        rows = db.execute(text(
+            f"SELECT {_SELECT_COLS} FROM bge_embeddings "
+            "WHERE (tmdb_id, media_type) > (:t, :m) ORDER BY tmdb_id, media_type LIMIT :lim"
+        ), {"t": last_tmdb, "m": last_media, "lim": page_size}).fetchall()
+        if not rows:
+            break
+        rows = rows[: total - n]
+        positions = np.arange(n, n + len(rows))
+        keys[positions] = encode_keys([r.tmdb_id for r in rows], [r.media_type for r in rows])
+        _fill_rows(mats, mask, positions, rows)
+        watermark, watermark_ids = _advance_watermark(rows, watermark, watermark_ids)
+        n += len(rows)
+        last_tmdb, last_media = rows[-1].tmdb_id, rows[-1].media_type
+    for arr in (keys, mask, *mats.values()):
+        arr.flush()
+    del keys, mask, mats
+    if n < total:
+        # Rows deleted while building: truncate to what was written
+        for name in ["keys", "mask", *ASPECTS]:
+            arr = np.load(gen_dir / f"{name}.npy")[:n]
+            np.save(gen_dir / f"{name}.npy", arr)
+    meta = {
+        "version": STORE_VERSION, "dim": dim, "rows": n, "updated_at": watermark,
+        "updated_at_ids": sorted(watermark_ids), "built_at": time.time(),
+    }
+    (gen_dir / "meta.json").write_text(json.dumps(meta))
+    tmp = STORE_DIR / "CURRENT.tmp"
+    tmp.write_text(gen)
+    os.replace(tmp, STORE_DIR / "CURRENT")
+    for old in sorted(p for p in STORE_DIR.glob("gen-*") if p.is_dir() and p.name != gen)[:-(KEEP_GENERATIONS - 1) or None]:
+        shutil.rmtree(old, ignore_errors=True)
+    logger.info(f"[BGEAspects] Built store generation {gen}: {n} items x {len(ASPECTS)} aspects (dim={dim})")
+    return gen
+
+
+def refresh_aspect_store(full: bool = False, page_size: int = 2000) -> Dict[str, int]:
+    """Bring the on-disk store in line with bge_embeddings (see module docstring).
+
+    The incremental read is inclusive of the stored updated_at watermark, because rows
+    sharing that timestamp can commit after the previous run read it; rows already
+    stored at the watermark are skipped by id.
+    """
+    from sqlalchemy import text
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        store = BGEAspectStore.open(STORE_DIR)
+        dim = int(store.dim) if store is not None and store.dim else 0
+        if not dim:
+            sample = db.execute(text("SELECT embedding_base FROM bge_embeddings LIMIT 1")).scalar()
+            if not sample:
+                return {"rows": 0, "patched": 0, "rebuilt": 0}
+            dim = len(sample) // np.dtype(np.float16).itemsize
+        watermark = store.meta.get("updated_at") if store is not None else None
+        seen_at_watermark = set(store.meta.get("updated_at_ids") or []) if watermark else set()
+        if store is not None and not full:
+            total = int(db.execute(text("SELECT COUNT(*) FROM bge_embeddings")).scalar() or 0)
+            changed = db.execute(text(
+                f"SELECT {_SELECT_COLS} FROM bge_embeddings WHERE updated_at >= :wm ORDER BY tmdb_id, media_type"
+            ), {"wm": watermark}).fetchall() if watermark else None
+            if changed is not None:
+                changed = _unseen_rows(changed, watermark, seen_at_watermark)
+            if changed is not None and total == len(store):
+                if not changed:
+                    return {"rows": len(store), "patched": 0, "rebuilt": 0}
+                positions = store.rows_for(encode_keys([r.tmdb_id for r in changed], [r.media_type for r in changed]))
+                if (positions >= 0).all():
+                    gen_dir = STORE_DIR / store.meta["generation"]
+                    mats = {a: np.load(gen_dir / f"{a}.npy", mmap_mode="r+") for a in ASPECTS}
+                    mask = np.load(gen_dir / "mask.npy", mmap_mode="r+")
+                    _fill_rows(mats, mask, positions, changed)
+                    for arr in (mask, *mats.values()):
+                        arr.flush()
+                    meta = dict(store.meta)
+                    meta.pop("generation", None)
+                    meta["updated_at"], ids = _advance_watermark(changed, watermark, seen_at_watermark)
+                    meta["updated_at_ids"] = sorted(ids)
+                    (gen_dir / "meta.json").write_text(json.dumps(meta))
+                    logger.info(f"[BGEAspects] Patched {len(changed)} rows in place")
+                    return {"rows": len(store), "patched": len(changed), "rebuilt": 0}
+        gen = _full_build(db, dim, page_size)
+        rows = BGEAspectStore.open(STORE_DIR)
+        return {"rows": len(rows) if rows is not None else 0, "patched": 0, "rebuilt": 1 if gen else 0}
+    finally:
+        db.close()
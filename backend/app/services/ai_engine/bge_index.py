@@ -1,6 +1,8 @@
 import json
+import logging
 import os
 import threading
+import time
 from typing import Dict, Iterable, List, Optional, Tuple
 
 # Lazy imports to avoid overhead when feature is disabled
@@ -15,6 +17,32 @@ except Exception:  # pragma: no cover
     SentenceTransformer = None  # type: ignore
 
 
+logger = logging.getLogger(__name__)
+
+# Redis lock serializing BGE index writers (nightly build, enrichment append). Each writer loads
+# the index after taking it, so one writer's vectors are never overwritten by another's stale copy.
+WRITE_LOCK_KEY = "lock:bge_index:write"
+WRITE_LOCK_TTL = 60 * 60 * 6  # outlasts a nightly build; a crashed writer frees it
+
+
+def acquire_write_lock() -> bool:
+    """Take the BGE index write lock; False while another writer holds it."""
+    try:
+        from app.core.redis_client import get_redis_sync
+        return bool(get_redis_sync().set(WRITE_LOCK_KEY, str(int(time.time())), nx=True, ex=WRITE_LOCK_TTL))
+    except Exception as e:
+        logger.warning(f"[BGE] Could not take the index write lock, proceeding unlocked: {e}")
+        return True
+
+
+def release_write_lock() -> None:
+    try:
+        from app.core.redis_client import get_redis_sync
+        get_redis_sync().delete(WRITE_LOCK_KEY)
+    except Exception:
+        pass
+
+
 class BGELock:
     """Cross-process lock via a lock file, plus in-process guard.
     Mirrors the pattern used in faiss_index.py without changing existing modules.
@@ -67,6 +95,7 @@ class BGEIndex:
         os.makedirs(base_dir, exist_ok=True)
         self._index = None
         self._id_map: Dict[str, Dict] = {}
+        self._pos_items = None  # dense FAISS position -> item_id array, built lazily
         self._lock = BGELock(self.lock_path)
 
     @property
@@ -84,6 +113,7 @@ class BGEIndex:
             self._index = faiss.read_index(self.index_path)
             with open(self.map_path, "r", encoding="utf-8") as f:
                 self._id_map = json.load(f)
+            self._pos_items = None
             # Back-compat normalization: if single-pos entries exist, wrap them into entries[] and build rev map
             items = self._id_map.get("items", {}) if isinstance(self._id_map, dict) else {}
             rev = self._id_map.get("rev")
@@ -121,8 +151,47 @@ class BGEIndex:
         distances, indices = self._index.search(xq, top_k)
         return indices.tolist(), distances.tolist()
 
+    def search_item_ids(self, vectors, top_k: int):
+        """Single FAISS search for an (m x d) query matrix.
+
+        Returns an (m x top_k) int64 array of item ids in rank order per query row
+        (-1 where FAISS returned no hit or the position is unmapped).
+        """
+        import numpy as np  # local import
+        xq = np.ascontiguousarray(np.asarray(vectors, dtype="float32"))
+        if xq.ndim == 1:
+            xq = xq[None, :]
+        if xq.shape[0] == 0 or (self._index is None and not self.load()):
+            return np.full((xq.shape[0], top_k), -1, dtype=np.int64)
+        assert self._index is not None
+        _, positions = self._index.search(xq, top_k)
+        lookup = self._position_item_array()
+        out = np.full(positions.shape, -1, dtype=np.int64)
+        valid = (positions >= 0) & (positions < lookup.shape[0])
+        out[valid] = lookup[positions[valid]]
+        return out
+
+    def _position_item_array(self):
+        import numpy as np  # local import
+        if self._pos_items is None:
+            rev = (self._id_map or {}).get("rev", {}) or {}
+            size = max((int(p) for p in rev), default=-1) + 1
+            arr = np.full(size, -1, dtype=np.int64)
+            for p, info in rev.items():
+                if isinstance(info, dict) and info.get("item_id") is not None:
+                    arr[int(p)] = int(info["item_id"])
+            self._pos_items = arr
+        return self._pos_items
+
     def add_items(self, item_ids: List[int], vectors: List[List[float]], content_hashes: Optional[List[str]] = None,
-                  hnsw_m: int = 32, ef_construction: int = 300, labels: Optional[List[str]] = None) -> None:
+                  hnsw_m: int = 32, ef_construction: int = 300, labels: Optional[List[str]] = None,
+                  replace: bool = False) -> None:
+        """Append vectors and persist the index and id_map.
+
+        With replace=True, earlier entries with the same (item_id, label) are unmapped, so
+        superseded vectors no longer resolve in searches. HNSW cannot delete vectors, so the
+        orphaned rows stay in the graph until the index is rebuilt.
+        """
         if faiss is None:
             raise RuntimeError("FAISS not available")
         import numpy as np
@@ -137,9 +206,12 @@ class BGEIndex:
                 self._index.hnsw.efConstruction = ef_construction
                 # initialize id_map
                 self._id_map = {"model": "BAAI/bge-small-en-v1.5", "dim": dim, "items": {}, "rev": {}}
+            if replace:
+                self._unmap_entries(item_ids, labels)
             # append vectors
             xb = np.array(vectors, dtype="float32")
             start = self._index.ntotal
+            self._pos_items = None
             self._index.add(xb)
             # update map
             for offset, item_id in enumerate(item_ids):
@@ -175,6 +247,32 @@ class BGEIndex:
         finally:
             self._lock.release()
 
+    def _unmap_entries(self, item_ids: List[int], labels: Optional[List[str]]) -> None:
+        """Drop id_map/rev entries for the (item_id, label) pairs about to be re-added."""
+        wanted: Dict[str, set] = {}
+        for offset, item_id in enumerate(item_ids):
+            label = labels[offset] if labels and offset < len(labels) else "base"
+            wanted.setdefault(str(item_id), set()).add(label)
+        items = self._id_map.setdefault("items", {})
+        rev = self._id_map.setdefault("rev", {})
+        for sid, drop in wanted.items():
+            existing = items.get(sid)
+            if not existing:
+                continue
+            entries = existing.get("entries") if isinstance(existing.get("entries"), list) else [
+                {"pos": existing.get("pos"), "hash": existing.get("hash"), "label": "base"}
+            ]
+            kept = []
+            for e in entries:
+                if e.get("label", "base") in drop:
+                    rev.pop(str(e.get("pos")), None)
+                else:
+                    kept.append(e)
+            if kept:
+                items[sid] = {"entries": kept}
+            else:
+                del items[sid]
+
     def get_missing_or_stale(self, candidates: Dict[int, str]) -> List[int]:
         """Return item_ids that are missing or whose stored content hash differs (base entry).
 
@@ -218,7 +316,7 @@ class BGEIndex:
 
 
 class BGEEmbedder:
-    """Lazy-loading wrapper around sentence-transformers for BGE."""
+    """Lazy-loading wrapper around sentence-transformers for BGE (weights shared via model_registry)."""
 
     def __init__(self, model_name: str = "BAAI/bge-small-en-v1.5"):
         self.model_name = model_name
@@ -228,7 +326,8 @@ class BGEEmbedder:
         if self._model is None:
             if SentenceTransformer is None:
                 raise RuntimeError("sentence-transformers not available")
-            self._model = SentenceTransformer(self.model_name)
+            from .model_registry import get_sentence_transformer
+            self._model = get_sentence_transformer(self.model_name)
 
     def embed(self, texts: List[str], batch_size: int = 64) -> List[List[float]]:
         self.ensure_model()
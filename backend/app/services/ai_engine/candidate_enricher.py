@@ -6,17 +6,23 @@ this module fetches fresh data from TMDB, updates the database, regenerates embe
 and returns enriched candidate dicts for scoring.
 """
 import logging
-import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 
 from app.models import PersistentCandidate, BGEEmbedding
+from app.services.candidate_cache import invalidate_candidates
 from app.services.tmdb_client import fetch_tmdb_metadata, extract_enriched_fields
 from app.utils.timezone import utc_now
 
 logger = logging.getLogger(__name__)
 
+BGE_ASPECTS = ("base", "title", "keywords", "people", "brands")
+BGE_ENCODE_BATCH_SIZE = 64
+# Redis hash candidate id -> content_hash of enriched rows waiting for the BGE index append
+BGE_PENDING_KEY = "bge_index:pending"
+BGE_PENDING_PROCESSING_KEY = "bge_index:pending:processing"
+
 
 # ============================================================================
 # PUBLIC API - Use these functions from external code
@@ -112,53 +118,11 @@ async def enrich_single_candidate(
             logger.debug(f"[Enricher] No TMDB metadata for {media_type}/{tmdb_id}")
             return
         
-        # Extract enriched fields
-        enriched = extract_enriched_fields(metadata, media_type)
-        
-        # Update all enriched fields
-        candidate.title = metadata.get('title') or metadata.get('name') or candidate.title
-        candidate.overview = metadata.get('overview') or candidate.overview
-        candidate.poster_path = metadata.get('poster_path') or candidate.poster_path
-        candidate.backdrop_path = metadata.get('backdrop_path') or candidate.backdrop_path
-        candidate.vote_average = metadata.get('vote_average') or candidate.vote_average
-        candidate.vote_count = metadata.get('vote_count') or candidate.vote_count
-        candidate.popularity = metadata.get('popularity') or candidate.popularity
-        candidate.status = enriched.get('status') or candidate.status
-        candidate.tagline = enriched.get('tagline') or candidate.tagline
-        candidate.homepage = enriched.get('homepage') or candidate.homepage
-        candidate.runtime = enriched.get('runtime') or candidate.runtime
-        
-        # Update JSON fields
-        candidate.keywords = enriched.get('keywords') or candidate.keywords
-        candidate.cast = enriched.get('cast') or candidate.cast
-        candidate.genres = enriched.get('genres') or candidate.genres
-        candidate.production_companies = enriched.get('production_companies') or candidate.production_companies
-        candidate.production_countries = enriched.get('production_countries') or candidate.production_countries
-        candidate.spoken_languages = enriched.get('spoken_languages') or candidate.spoken_languages
-        
-        # TV-specific fields
-        if media_type == 'show':
-            candidate.networks = enriched.get('networks') or candidate.networks
-            candidate.created_by = enriched.get('created_by') or candidate.created_by
-            candidate.number_of_seasons = enriched.get('number_of_seasons') or candidate.number_of_seasons
-            candidate.number_of_episodes = enriched.get('number_of_episodes') or candidate.number_of_episodes
-            candidate.episode_run_time = enriched.get('episode_run_time') or candidate.episode_run_time
-            candidate.first_air_date = enriched.get('first_air_date') or candidate.first_air_date
-            candidate.last_air_date = enriched.get('last_air_date') or candidate.last_air_date
-            candidate.in_production = enriched.get('in_production') or candidate.in_production
-        
-        # Recompute scores
-        scores = _compute_scores(metadata)
-        candidate.obscurity_score = scores['obscurity_score']
-        candidate.mainstream_score = scores['mainstream_score']
-        candidate.freshness_score = scores['freshness_score']
-        
-        candidate.last_refreshed = utc_now()
-        
+        _apply_metadata(candidate, metadata, media_type)
         db.add(candidate)
         
-        # Regenerate BGE embedding
-        await _regenerate_bge_embedding(db, candidate)
+        # Regenerate BGE embedding (DB row only; the nightly build appends it to the index)
+        _regenerate_bge_embeddings(db, [candidate])
         
         logger.debug(f"[Enricher] Enriched: {candidate.title} ({media_type}/{tmdb_id})")
         
@@ -298,260 +262,301 @@ async def _enrich_candidates_async(
     
     logger.info(f"[Enricher] Enriching {len(enrichment_tasks)}/{len(candidates)} candidates with stale/missing metadata")
     
-    # Semaphore to limit concurrent TMDB requests
+    # Stage 1: concurrent TMDB fetch (no DB access while requests are in flight)
     semaphore = asyncio.Semaphore(max_concurrent)
     
-    async def enrich_one(task):
+    async def fetch_one(task):
+        tmdb_id = task['tmdb_id']
+        media_type = task['media_type']
+        if not tmdb_id or not media_type:
+            return None
         async with semaphore:
-            idx = task['idx']
-            tmdb_id = task['tmdb_id']
-            media_type = task['media_type']
-            pc_id = task['id']
-            
-            if not tmdb_id or not media_type:
-                return None
-            
-            try:
-                # Fetch fresh metadata from TMDB
-                tmdb_media_type = 'tv' if media_type == 'show' else 'movie'
-                metadata = await fetch_tmdb_metadata(tmdb_id, tmdb_media_type)
-                
-                if not metadata:
-                    logger.debug(f"[Enricher] No TMDB metadata for {media_type}/{tmdb_id}")
-                    return None
-                
-                # Extract enriched fields
-                enriched = extract_enriched_fields(metadata, media_type)
-                
-                # Update PersistentCandidate in database
-                pc = db.query(PersistentCandidate).filter(PersistentCandidate.id == pc_id).first()
-                if not pc:
-                    logger.warning(f"[Enricher] PersistentCandidate {pc_id} not found")
-                    return None
-                
-                # Update all enriched fields
-                pc.title = metadata.get('title') or metadata.get('name') or pc.title
-                pc.overview = metadata.get('overview') or pc.overview
-                pc.poster_path = metadata.get('poster_path') or pc.poster_path
-                pc.backdrop_path = metadata.get('backdrop_path') or pc.backdrop_path
-                pc.vote_average = metadata.get('vote_average') or pc.vote_average
-                pc.vote_count = metadata.get('vote_count') or pc.vote_count
-                pc.popularity = metadata.get('popularity') or pc.popularity
-                pc.status = enriched.get('status') or pc.status
-                pc.tagline = enriched.get('tagline') or pc.tagline
-                pc.homepage = enriched.get('homepage') or pc.homepage
-                pc.runtime = enriched.get('runtime') or pc.runtime
-                
-                # Update JSON fields
-                pc.keywords = enriched.get('keywords') or pc.keywords
-                pc.cast = enriched.get('cast') or pc.cast
-                pc.genres = enriched.get('genres') or pc.genres
-                pc.production_companies = enriched.get('production_companies') or pc.production_companies
-                pc.production_countries = enriched.get('production_countries') or pc.production_countries
-                pc.spoken_languages = enriched.get('spoken_languages') or pc.spoken_languages
-                
-                # TV-specific fields
-                if media_type == 'show':
-                    pc.networks = enriched.get('networks') or pc.networks
-                    pc.created_by = enriched.get('created_by') or pc.created_by
-                    pc.number_of_seasons = enriched.get('number_of_seasons') or pc.number_of_seasons
-                    pc.number_of_episodes = enriched.get('number_of_episodes') or pc.number_of_episodes
-                    pc.episode_run_time = enriched.get('episode_run_time') or pc.episode_run_time
-                    pc.first_air_date = enriched.get('first_air_date') or pc.first_air_date
-                    pc.last_air_date = enriched.get('last_air_date') or pc.last_air_date
-                    pc.in_production = enriched.get('in_production') or pc.in_production
-                
-                # Recompute scores
-                scores = _compute_scores(metadata)
-                pc.obscurity_score = scores['obscurity_score']
-                pc.mainstream_score = scores['mainstream_score']
-                pc.freshness_score = scores['freshness_score']
-                
-                pc.last_refreshed = utc_now()
-                
-                db.add(pc)
-                
-                # Regenerate BGE embedding
-                await _regenerate_bge_embedding(db, pc)
-                
-                # Build updated candidate dict
-                updated_candidate = {
-                    **candidates[idx],  # Keep original fields
-                    'title': pc.title,
-                    'overview': pc.overview,
-                    'keywords': pc.keywords,
-                    'cast': pc.cast,
-                    'genres': pc.genres,
-                    'tagline': pc.tagline,
-                    'poster_path': pc.poster_path,
-                    'backdrop_path': pc.backdrop_path,
-                    'vote_average': pc.vote_average,
-                    'vote_count': pc.vote_count,
-                    'popularity': pc.popularity,
-                    'status': pc.status,
-                    'obscurity_score': pc.obscurity_score,
-                    'mainstream_score': pc.mainstream_score,
-                    'freshness_score': pc.freshness_score,
-                    'production_companies': pc.production_companies,
-                    'last_refreshed': pc.last_refreshed
-                }
-                
-                logger.debug(f"[Enricher] Enriched: {pc.title} ({media_type}/{tmdb_id})")
-                return {'idx': idx, 'candidate': updated_candidate}
-                
-            except Exception as e:
-                logger.error(f"[Enricher] Failed to enrich {media_type}/{tmdb_id}: {e}", exc_info=True)
-                return None
-    
-    # Run enrichment tasks concurrently
-    results = await asyncio.gather(*[enrich_one(task) for task in enrichment_tasks], return_exceptions=True)
-    
-    # Update candidates list with enriched data
-    enriched_count = 0
-    for result in results:
-        if result and isinstance(result, dict) and 'idx' in result:
-            candidates[result['idx']] = result['candidate']
-            enriched_count += 1
+            tmdb_media_type = 'tv' if media_type == 'show' else 'movie'
+            metadata = await fetch_tmdb_metadata(tmdb_id, tmdb_media_type)
+        if not metadata:
+            logger.debug(f"[Enricher] No TMDB metadata for {media_type}/{tmdb_id}")
+            return None
+        return task, metadata
+    
+    fetched = []
+    for task, result in zip(enrichment_tasks, await asyncio.gather(*[fetch_one(t) for t in enrichment_tasks], return_exceptions=True)):
+        if isinstance(result, Exception):
+            logger.error(f"[Enricher] Failed to fetch {task['media_type']}/{task['tmdb_id']}: {result}")
+        elif result:
+            fetched.append(result)
+    if not fetched:
+        return candidates
+    
+    # Stage 2: bulk DB update (one query for all rows, one commit at the end)
+    rows = {
+        pc.id: pc for pc in db.query(PersistentCandidate).filter(
+            PersistentCandidate.id.in_([task['id'] for task, _ in fetched])
+        ).all()
+    }
+    updated = []
+    for task, metadata in fetched:
+        pc = rows.get(task['id'])
+        if not pc:
+            logger.warning(f"[Enricher] PersistentCandidate {task['id']} not found")
+            continue
+        try:
+            _apply_metadata(pc, metadata, task['media_type'])
+        except Exception as e:
+            logger.error(f"[Enricher] Failed to enrich {task['media_type']}/{task['tmdb_id']}: {e}", exc_info=True)
+            continue
+        updated.append((task, pc))
+    
+    # Stages 3-4: one batched multi-aspect embedding pass and bulk bge_embeddings upsert
+    embedded = _regenerate_bge_embeddings(db, [pc for _, pc in updated])
     
     # Commit all database updates
     try:
         db.commit()
-        logger.info(f"[Enricher] Successfully enriched {enriched_count}/{len(enrichment_tasks)} candidates (total pool: {len(candidates)})")
+        invalidate_candidates((task['tmdb_id'], task['media_type']) for task, _ in updated)
     except Exception as e:
         db.rollback()
         logger.error(f"[Enricher] Failed to commit enrichment updates: {e}", exc_info=True)
+        return candidates
+    # Only committed vectors are queued for the BGE index append
+    if embedded:
+        _queue_bge_index_append([pc for _, pc in updated])
+    
+    for task, pc in updated:
+        candidates[task['idx']] = {
+            **candidates[task['idx']],  # Keep original fields
+            'title': pc.title,
+            'overview': pc.overview,
+            'keywords': pc.keywords,
+            'cast': pc.cast,
+            'genres': pc.genres,
+            'tagline': pc.tagline,
+            'poster_path': pc.poster_path,
+            'backdrop_path': pc.backdrop_path,
+            'vote_average': pc.vote_average,
+            'vote_count': pc.vote_count,
+            'popularity': pc.popularity,
+            'status': pc.status,
+            'obscurity_score': pc.obscurity_score,
+            'mainstream_score': pc.mainstream_score,
+            'freshness_score': pc.freshness_score,
+            'production_companies': pc.production_companies,
+            'last_refreshed': pc.last_refreshed
+        }
+    logger.info(f"[Enricher] Successfully enriched {len(updated)}/{len(enrichment_tasks)} candidates (total pool: {len(candidates)})")
     
     return candidates
 
 
-async def _regenerate_bge_embedding(db: Session, pc: PersistentCandidate) -> None:
+def _apply_metadata(pc: PersistentCandidate, metadata: Dict[str, Any], media_type: str) -> None:
+    """Copy fresh TMDB metadata onto a PersistentCandidate and refresh derived fields."""
+    enriched = extract_enriched_fields(metadata, media_type)
+    
+    # Update all enriched fields
+    pc.title = metadata.get('title') or metadata.get('name') or pc.title
+    pc.overview = metadata.get('overview') or pc.overview
+    pc.poster_path = metadata.get('poster_path') or pc.poster_path
+    pc.backdrop_path = metadata.get('backdrop_path') or pc.backdrop_path
+    pc.vote_average = metadata.get('vote_average') or pc.vote_average
+    pc.vote_count = metadata.get('vote_count') or pc.vote_count
+    pc.popularity = metadata.get('popularity') or pc.popularity
+    pc.status = enriched.get('status') or pc.status
+    pc.tagline = enriched.get('tagline') or pc.tagline
+    pc.homepage = enriched.get('homepage') or pc.homepage
+    pc.runtime = enriched.get('runtime') or pc.runtime
+    
+    # Update JSON fields
+    pc.keywords = enriched.get('keywords') or pc.keywords
+    pc.cast = enriched.get('cast') or pc.cast
+    pc.genres = enriched.get('genres') or pc.genres
+    pc.production_companies = enriched.get('production_companies') or pc.production_companies
+    pc.production_countries = enriched.get('production_countries') or pc.production_countries
+    pc.spoken_languages = enriched.get('spoken_languages') or pc.spoken_languages
+    
+    # TV-specific fields
+    if media_type == 'show':
+        pc.networks = enriched.get('networks') or pc.networks
+        pc.created_by = enriched.get('created_by') or pc.created_by
+        pc.number_of_seasons = enriched.get('number_of_seasons') or pc.number_of_seasons
+        pc.number_of_episodes = enriched.get('number_of_episodes') or pc.number_of_episodes
+        pc.episode_run_time = enriched.get('episode_run_time') or pc.episode_run_time
+        pc.first_air_date = enriched.get('first_air_date') or pc.first_air_date
+        pc.last_air_date = enriched.get('last_air_date') or pc.last_air_date
+        pc.in_production = enriched.get('in_production') or pc.in_production
+    
+    # Recompute scores
+    scores = _compute_scores(metadata)
+    pc.obscurity_score = scores['obscurity_score']
+    pc.mainstream_score = scores['mainstream_score']
+    pc.freshness_score = scores['freshness_score']
+    
+    pc.last_refreshed = utc_now()
+    pc.compute_content_hash()
+
+
+def _bge_aspect_texts(pcs: List[PersistentCandidate]) -> Tuple[List[str], List[Tuple[int, str]]]:
+    """Flattened non-empty aspect texts for all candidates and their (candidate index, aspect) owners.
+
+    Same texts as the nightly build_bge_index_topN, so its content-hash checks see these vectors as current.
+    """
+    from .metadata_processing import bge_label_texts, compose_text_for_embedding, embedding_source_dict
+    
+    texts: List[str] = []
+    owners: List[Tuple[int, str]] = []
+    for i, pc in enumerate(pcs):
+        cand = embedding_source_dict(pc)
+        aspects = {"base": compose_text_for_embedding(cand), **bge_label_texts(cand)}
+        for aspect, text in aspects.items():
+            if text:
+                texts.append(text)
+                owners.append((i, aspect))
+    return texts, owners
+
+
+def _regenerate_bge_embeddings(db: Session, pcs: List[PersistentCandidate]) -> int:
     """
-    Regenerate BGE multi-vector embeddings for enriched candidate.
-    
-    Creates/updates BGEEmbedding record with fresh embeddings for:
-    - embedding_base (title + overview + genres + keywords)
-    - embedding_title (title only)
-    - embedding_keywords (keywords + tagline)
-    - embedding_people (cast + created_by)
-    - embedding_brands (production_companies + networks)
+    Regenerate BGE multi-vector embeddings for enriched candidates in one pass.
+    
+    Every aspect text (base, title, keywords, people, brands) of every candidate is
+    encoded in one batched model call and written with one bge_embeddings upsert
+    (inside a savepoint, so a failed upsert does not abort the caller's transaction).
+    Does NOT commit; after committing, callers queue the candidates with
+    _queue_bge_index_append so append_pending_to_bge_index adds the stored vectors to
+    the BGE FAISS index off the request path. Returns the number of candidates written.
     """
+    if not pcs:
+        return 0
     try:
-        from sentence_transformers import SentenceTransformer
+        import hashlib
         import numpy as np
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        from app.core.config import settings
+        from .model_registry import get_sentence_transformer
         
-        # Load BGE model
-        model = SentenceTransformer('BAAI/bge-small-en-v1.5')
-        
-        # Build text components
-        title = pc.title or ""
-        overview = pc.overview or ""
-        tagline = pc.tagline or ""
+        texts, owners = _bge_aspect_texts(pcs)
+        model_name = settings.ai_bge_model_name
+        # Shared BGE model (loaded once per process)
+        model = get_sentence_transformer(model_name)
+        vecs = np.asarray(
+            model.encode(texts, batch_size=BGE_ENCODE_BATCH_SIZE, normalize_embeddings=True), dtype=np.float32
+        )
+        hashes = [hashlib.sha1(t.encode('utf-8')).hexdigest() for t in texts]
         
-        # Parse JSON fields
-        try:
-            genres = json.loads(pc.genres or "[]")
-            genres_text = " ".join(genres)
-        except Exception:
-            genres_text = ""
+        now = utc_now()
+        rows = []
+        for pc in pcs:
+            row = {"tmdb_id": pc.tmdb_id, "media_type": pc.media_type, "model_name": model_name,
+                   "embedding_dim": int(vecs.shape[1]), "created_at": now, "updated_at": now}
+            for aspect in BGE_ASPECTS:
+                row[f"embedding_{aspect}"] = None
+                row[f"hash_{aspect}"] = None
+            rows.append(row)
+        for (i, aspect), vec, h in zip(owners, vecs, hashes):
+            # float16 for storage efficiency
+            rows[i][f"embedding_{aspect}"] = vec.astype(np.float16).tobytes()
+            rows[i][f"hash_{aspect}"] = h
+        # ON CONFLICT cannot touch the same row twice in one statement
+        rows = list({(r["tmdb_id"], r["media_type"]): r for r in rows}.values())
         
-        try:
-            keywords = json.loads(pc.keywords or "[]")
-            keywords_text = " ".join(keywords)
-        except Exception:
-            keywords_text = ""
-        
-        try:
-            cast = json.loads(pc.cast or "[]")
-            cast_text = " ".join(cast[:10])  # Top 10 actors
-        except Exception:
-            cast_text = ""
-        
-        try:
-            companies = json.loads(pc.production_companies or "[]")
-            companies_text = " ".join(companies)
-        except Exception:
-            companies_text = ""
-        
-        try:
-            networks = json.loads(pc.networks or "[]") if pc.networks else []
-            networks_text = " ".join(networks)
-        except Exception:
-            networks_text = ""
+        stmt = pg_insert(BGEEmbedding.__table__).values(rows)
+        update_cols = [f"embedding_{a}" for a in BGE_ASPECTS] + [f"hash_{a}" for a in BGE_ASPECTS]
+        with db.begin_nested():
+            db.execute(stmt.on_conflict_do_update(
+                constraint='uq_bge_embeddings_tmdb_media',
+                set_={**{c: stmt.excluded[c] for c in update_cols + ["model_name", "embedding_dim"]}, "updated_at": now},
+            ))
         
+        logger.debug(f"[Enricher] Regenerated BGE embeddings for {len(rows)} candidates ({len(texts)} vectors)")
+        return len(rows)
+    except Exception as e:
+        logger.error(f"[Enricher] Failed to regenerate BGE embeddings: {e}", exc_info=True)
+        return 0
+
+
+def _queue_bge_index_append(pcs: List[PersistentCandidate]) -> None:
+    """Record enriched candidates for the next append_pending_to_bge_index run."""
+    try:
+        from app.core.redis_client import get_redis_sync
+        get_redis_sync().hset(BGE_PENDING_KEY, mapping={str(pc.id): pc.content_hash or "" for pc in pcs})
+    except Exception as e:
+        logger.warning(f"[Enricher] Failed to queue BGE index append (nightly build will re-embed): {e}")
+
+
+def append_pending_to_bge_index(db: Session = None) -> Dict[str, int]:
+    """Append the stored bge_embeddings vectors of queued candidates to the BGE index in one write.
+
+    Superseded vectors of the same candidates are unmapped (add_items replace=True). embedding_hash
+    is recorded only where content_hash still matches the queued hash, so rows changed again since
+    enrichment stay stale for the nightly build. Without an index the queue is dropped: the nightly
+    build creates the index from all stale rows. While another writer (the nightly build) holds the
+    index write lock the queue is left untouched for the next run.
+    """
+    from app.core.redis_client import get_redis_sync
+    from .bge_index import acquire_write_lock, release_write_lock
+
+    if not acquire_write_lock():
+        logger.info("[Enricher] BGE index is being written by another task; deferring the append")
+        return {"queued": 0, "vectors": 0, "deferred": 1}
+    try:
+        return _append_pending_locked(get_redis_sync(), db)
+    finally:
+        release_write_lock()
+
+
+def _append_pending_locked(r, db: Session = None) -> Dict[str, int]:
+    from sqlalchemy import and_, text
+    from app.core.config import settings
+    from .bge_aspect_store import decode_embedding
+    from .bge_index import BGEIndex
+
+    # Claim the queue atomically; a previous run that failed left its claim in place
+    if not r.exists(BGE_PENDING_PROCESSING_KEY):
         try:
-            created_by = json.loads(pc.created_by or "[]") if pc.created_by else []
-            created_by_text = " ".join(created_by)
+            r.rename(BGE_PENDING_KEY, BGE_PENDING_PROCESSING_KEY)
         except Exception:
-            created_by_text = ""
-        
-        # Generate embeddings
-        base_text = f"{title} {overview} {genres_text} {keywords_text}".strip()
-        title_text = title.strip()
-        keywords_text_full = f"{keywords_text} {tagline}".strip()
-        people_text = f"{cast_text} {created_by_text}".strip()
-        brands_text = f"{companies_text} {networks_text}".strip()
-        
-        # Serialize embeddings (float16 for storage efficiency)
-        def serialize_embedding(text: str) -> Optional[bytes]:
-            if not text:
-                return None
-            emb = model.encode(text, normalize_embeddings=True)
-            return np.array(emb, dtype=np.float16).tobytes()
-        
-        embedding_base = serialize_embedding(base_text)
-        embedding_title = serialize_embedding(title_text) if title_text else None
-        embedding_keywords = serialize_embedding(keywords_text_full) if keywords_text_full else None
-        embedding_people = serialize_embedding(people_text) if people_text else None
-        embedding_brands = serialize_embedding(brands_text) if brands_text else None
-        
-        # Compute content hashes for staleness detection
-        import hashlib
-        hash_base = hashlib.sha1(base_text.encode('utf-8')).hexdigest()
-        hash_title = hashlib.sha1(title_text.encode('utf-8')).hexdigest() if title_text else None
-        hash_keywords = hashlib.sha1(keywords_text_full.encode('utf-8')).hexdigest() if keywords_text_full else None
-        hash_people = hashlib.sha1(people_text.encode('utf-8')).hexdigest() if people_text else None
-        hash_brands = hashlib.sha1(brands_text.encode('utf-8')).hexdigest() if brands_text else None
-        
-        # Update or create BGEEmbedding
-        bge_emb = db.query(BGEEmbedding).filter(
-            BGEEmbedding.tmdb_id == pc.tmdb_id,
-            BGEEmbedding.media_type == pc.media_type
-        ).first()
-        
-        if bge_emb:
-            # Update existing
-            bge_emb.embedding_base = embedding_base
-            bge_emb.embedding_title = embedding_title
-            bge_emb.embedding_keywords = embedding_keywords
-            bge_emb.embedding_people = embedding_people
-            bge_emb.embedding_brands = embedding_brands
-            bge_emb.hash_base = hash_base
-            bge_emb.hash_title = hash_title
-            bge_emb.hash_keywords = hash_keywords
-            bge_emb.hash_people = hash_people
-            bge_emb.hash_brands = hash_brands
-            bge_emb.updated_at = utc_now()
-        else:
-            # Create new
-            bge_emb = BGEEmbedding(
-                tmdb_id=pc.tmdb_id,
-                media_type=pc.media_type,
-                embedding_base=embedding_base,
-                embedding_title=embedding_title,
-                embedding_keywords=embedding_keywords,
-                embedding_people=embedding_people,
-                embedding_brands=embedding_brands,
-                hash_base=hash_base,
-                hash_title=hash_title,
-                hash_keywords=hash_keywords,
-                hash_people=hash_people,
-                hash_brands=hash_brands,
-                created_at=utc_now(),
-                updated_at=utc_now()
+            return {"queued": 0, "vectors": 0}
+    pending = {int(k): v for k, v in r.hgetall(BGE_PENDING_PROCESSING_KEY).items()}
+    if not pending:
+        r.delete(BGE_PENDING_PROCESSING_KEY)
+        return {"queued": 0, "vectors": 0}
+
+    # Loaded under the write lock, so add_items persists on top of the latest build
+    idx = BGEIndex(settings.ai_bge_index_dir)
+    if not idx.load():
+        r.delete(BGE_PENDING_PROCESSING_KEY)
+        return {"queued": len(pending), "vectors": 0}
+
+    own_session = db is None
+    if own_session:
+        from app.core.database import SessionLocal
+        db = SessionLocal()
+    try:
+        rows = db.query(PersistentCandidate.id, BGEEmbedding).join(
+            BGEEmbedding,
+            and_(BGEEmbedding.tmdb_id == PersistentCandidate.tmdb_id, BGEEmbedding.media_type == PersistentCandidate.media_type),
+        ).filter(PersistentCandidate.id.in_(list(pending))).all()
+        ids, vecs, hashes, labels = [], [], [], []
+        for cid, bge in rows:
+            for aspect in BGE_ASPECTS:
+                vec = decode_embedding(getattr(bge, f"embedding_{aspect}"))
+                if vec is not None and vec.size:
+                    ids.append(cid)
+                    vecs.append(vec.tolist())
+                    hashes.append(getattr(bge, f"hash_{aspect}"))
+                    labels.append(aspect)
+        if ids:
+            idx.add_items(ids, vecs, content_hashes=hashes, labels=labels, replace=True)
+            appended = {cid for cid, _ in rows}
+            db.execute(
+                text("UPDATE persistent_candidates SET embedding_hash = content_hash WHERE id = :id AND content_hash = :h"),
+                [{"id": cid, "h": pending[cid]} for cid in appended if pending.get(cid)],
             )
-        
-        db.add(bge_emb)
-        logger.debug(f"[Enricher] Regenerated BGE embeddings for {pc.title}")
-        
-    except Exception as e:
-        logger.error(f"[Enricher] Failed to regenerate BGE embedding: {e}", exc_info=True)
+            db.commit()
+        r.delete(BGE_PENDING_PROCESSING_KEY)
+        logger.info(f"[Enricher] Appended {len(ids)} BGE vectors for {len(rows)}/{len(pending)} enriched candidates")
+        return {"queued": len(pending), "vectors": len(ids)}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
@@ -40,10 +40,13 @@ def detect_tone_keywords(prompt: str) -> List[str]:
 
 def sbert_tone_vector(prompt: str) -> np.ndarray:
     """SBERT-based similarity to mood/theme labels."""
+    from .vocab_embeddings import get_vocab_table
     embedder = EmbeddingService()
-    prompt_emb = embedder.encode_text(prompt)
-    label_embs = embedder.encode_texts(MOOD_THEME_LABELS)
-    sims = np.dot(label_embs, prompt_emb) / (np.linalg.norm(label_embs, axis=1) * np.linalg.norm(prompt_emb) + 1e-8)
+    prompt_emb = embedder.encode_text(prompt).astype(np.float32)
+    # Label vectors come from the precomputed (row-normalized) vocabulary table
+    table = get_vocab_table()
+    label_embs = table.matrix[table.rows_for(MOOD_THEME_LABELS)]
+    sims = np.dot(label_embs, prompt_emb) / (np.linalg.norm(prompt_emb) + 1e-8)
     sims = np.maximum(sims, 0)
     tone_vec = sims / (np.sum(sims) + 1e-8)
     return tone_vec
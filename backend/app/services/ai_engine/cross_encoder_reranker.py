@@ -1,10 +1,26 @@
-from typing import Dict, List, Optional, Tuple
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
 
 try:
     from sentence_transformers import CrossEncoder  # type: ignore
 except Exception:  # pragma: no cover
     CrossEncoder = None  # type: ignore
 
+logger = logging.getLogger(__name__)
+
+
+def _clip01(s) -> float:
+    try:
+        sc = float(s)
+    except Exception:
+        return 0.0
+    if sc < 0.0 or sc > 1.0:
+        sc = max(0.0, min(1.0, sc))
+    return sc
+
 
 class CrossEncoderReranker:
     def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"):
@@ -15,21 +31,241 @@ class CrossEncoderReranker:
         if self._model is None:
             if CrossEncoder is None:
                 raise RuntimeError("CrossEncoder not available")
-            self._model = CrossEncoder(self.model_name)
+            from .model_registry import get_cross_encoder
+            self._model = get_cross_encoder(self.model_name)
 
-    def score(self, query: str, texts: List[str], batch_size: int = 64) -> List[float]:
+    def predict_pairs(self, pairs: Sequence[Tuple[str, str]], batch_size: int = 64) -> List[float]:
+        """Raw model scores for (query, text) pairs, clipped to 0..1."""
         self.ensure()
         assert self._model is not None
-        pairs = [(query, t) for t in texts]
-        scores = self._model.predict(pairs, batch_size=batch_size).tolist()
+        if not pairs:
+            return []
+        scores = self._model.predict(list(pairs), batch_size=batch_size, show_progress_bar=False).tolist()
+        return [_clip01(s) for s in scores]
+
+    def score(self, query: str, texts: List[str], batch_size: int = 64) -> List[float]:
         # Normalize to 0..1 if range unknown; most CE models return 0..1 already
-        out: List[float] = []
-        for s in scores:
+        return self.predict_pairs([(query, t) for t in texts], batch_size=batch_size)
+
+    def token_lengths(self, query: str, texts: List[str]) -> List[int]:
+        """Approximate per-pair token counts (tokenizer when loaded, else whitespace words)."""
+        tok = getattr(self._model, "tokenizer", None) if self._model is not None else None
+        if tok is not None:
             try:
-                sc = float(s)
-                if sc < 0.0 or sc > 1.0:
-                    sc = max(0.0, min(1.0, sc))
-                out.append(sc)
+                q_len = len(tok.tokenize(query))
+                return [q_len + len(tok.tokenize(t or "")) + 3 for t in texts]
             except Exception:
-                out.append(0.0)
+                pass
+        q_len = len(query.split())
+        # ~1.3 word pieces per word for English text
+        return [int((q_len + len((t or "").split())) * 1.3) + 3 for t in texts]
+
+
+class CrossEncoderRerankService:
+    """Cross-encoder scoring with length-bucketed batches, a score cache and top-k early exit.
+
+    - Pairs are sorted by token length and cut into batches under a token budget, so
+      short overviews are not padded to the length of the longest one in the batch.
+    - Scores are cached per (model, query hash, item content hash) in a small in-process
+      LRU and in Redis (``ce:v2:*`` keys, MGET/pipelined SET), so refreshing the same
+      AI list only scores new or changed items.
+    - With ``top_k``, pairs are scored in chunks in ``priors`` order and scoring stops
+      once the top-k set has not changed for ``patience`` chunks; unscored items get None.
+    """
+
+    CACHE_PREFIX = "ce:v2"
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        max_batch_size: int = 64,
+        max_batch_tokens: int = 8192,
+        cache_ttl: int = 21600,
+        local_cache_size: int = 50000,
+        redis_client=None,
+        use_redis: bool = True,
+    ):
+        self.reranker = CrossEncoderReranker(model_name)
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.cache_ttl = cache_ttl
+        self.local_cache_size = local_cache_size
+        self._local: "OrderedDict[str, float]" = OrderedDict()
+        self._local_lock = threading.Lock()
+        self._redis = redis_client
+        self._use_redis = use_redis
+        self.stats: Dict[str, int] = {"cache_hits": 0, "scored": 0, "batches": 0, "skipped_early_exit": 0}
+
+    # ---------------------
+    # Cache
+    # ---------------------
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha1((text or "").encode("utf-8")).hexdigest()[:20]
+
+    def _cache_key(self, qhash: str, chash: str) -> str:
+        return f"{self.CACHE_PREFIX}:{self.model_name}:{qhash}:{chash}"
+
+    def _redis_client(self):
+        if not self._use_redis:
+            return None
+        if self._redis is None:
+            try:
+                from app.core.redis_client import get_redis_sync
+                self._redis = get_redis_sync()
+            except Exception:
+                self._use_redis = False
+                return None
+        return self._redis
+
+    def _cache_get_many(self, keys: List[str]) -> Dict[str, float]:
+        found: Dict[str, float] = {}
+        with self._local_lock:
+            for k in keys:
+                v = self._local.get(k)
+                if v is not None:
+                    self._local.move_to_end(k)
+                    found[k] = v
+        missing = [k for k in keys if k not in found]
+        rds = self._redis_client() if missing else None
+        if rds is not None:
+            try:
+                for k, v in zip(missing, rds.mget(missing)):
+                    if v is not None:
+                        found[k] = float(v)
+                self._local_put({k: found[k] for k in missing if k in found})
+            except Exception as e:
+                logger.debug(f"[CE] Redis cache read failed: {e}")
+        return found
+
+    def _local_put(self, values: Dict[str, float]) -> None:
+        if not values:
+            return
+        with self._local_lock:
+            for k, v in values.items():
+                self._local[k] = v
+                self._local.move_to_end(k)
+            while len(self._local) > self.local_cache_size:
+                self._local.popitem(last=False)
+
+    def _cache_put_many(self, values: Dict[str, float]) -> None:
+        self._local_put(values)
+        rds = self._redis_client()
+        if rds is None or not values:
+            return
+        try:
+            pipe = rds.pipeline()
+            for k, v in values.items():
+                pipe.set(k, repr(float(v)), ex=self.cache_ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"[CE] Redis cache write failed: {e}")
+
+    # ---------------------
+    # Scoring
+    # ---------------------
+    def _length_batches(self, query: str, texts: List[str], positions: List[int]) -> List[List[int]]:
+        """Group ``positions`` into batches of similar token length under the token budget."""
+        lengths = self.reranker.token_lengths(query, [texts[p] for p in positions])
+        order = sorted(range(len(positions)), key=lambda i: lengths[i])
+        batches: List[List[int]] = []
+        current: List[int] = []
+        for i in order:
+            longest = max(lengths[i], 1)
+            # batch padded to its longest (= current) member since lengths are ascending
+            if current and (len(current) >= self.max_batch_size or longest * (len(current) + 1) > self.max_batch_tokens):
+                batches.append(current)
+                current = []
+            current.append(positions[i])
+        if current:
+            batches.append(current)
+        return batches
+
+    def _score_uncached(self, query: str, texts: List[str], positions: List[int]) -> Dict[int, float]:
+        out: Dict[int, float] = {}
+        if not positions:
+            return out
+        self.reranker.ensure()
+        for batch in self._length_batches(query, texts, positions):
+            scores = self.reranker.predict_pairs([(query, texts[p]) for p in batch], batch_size=len(batch))
+            self.stats["batches"] += 1
+            for p, sc in zip(batch, scores):
+                out[p] = sc
+        self.stats["scored"] += len(out)
         return out
+
+    def score(
+        self,
+        query: str,
+        texts: List[str],
+        content_hashes: Optional[List[str]] = None,
+        top_k: Optional[int] = None,
+        priors: Optional[Sequence[float]] = None,
+        chunk_size: int = 64,
+        patience: int = 1,
+    ) -> List[Optional[float]]:
+        """Score (query, text) pairs; returns one score per text (None if skipped by early exit).
+
+        ``content_hashes`` identify item content for caching (defaults to a hash of the text).
+        """
+        n = len(texts)
+        if n == 0:
+            return []
+        qhash = hashlib.sha1(query.encode("utf-8")).hexdigest()[:20]
+        chashes = content_hashes or [self.content_hash(t) for t in texts]
+        keys = [self._cache_key(qhash, chashes[i] or self.content_hash(texts[i])) for i in range(n)]
+        cached = self._cache_get_many(keys)
+        scores: List[Optional[float]] = [cached.get(k) for k in keys]
+        self.stats["cache_hits"] += sum(1 for s in scores if s is not None)
+
+        pending = [i for i in range(n) if scores[i] is None]
+        if not pending:
+            return scores
+
+        if not top_k or top_k >= n:
+            fresh = self._score_uncached(query, texts, pending)
+            for p, sc in fresh.items():
+                scores[p] = sc
+            self._cache_put_many({keys[p]: sc for p, sc in fresh.items()})
+            return scores
+
+        # Early-exit mode: walk pending items in prior order (best first) chunk by chunk
+        if priors is not None:
+            pending.sort(key=lambda i: -float(priors[i]))
+        stable = 0
+        prev_top: Optional[set] = None
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            fresh = self._score_uncached(query, texts, chunk)
+            for p, sc in fresh.items():
+                scores[p] = sc
+            self._cache_put_many({keys[p]: sc for p, sc in fresh.items()})
+            scored = [(s, i) for i, s in enumerate(scores) if s is not None]
+            if len(scored) < top_k:
+                continue
+            top = {i for _, i in sorted(scored, reverse=True)[:top_k]}
+            stable = stable + 1 if top == prev_top else 0
+            prev_top = top
+            if stable >= patience:
+                self.stats["skipped_early_exit"] += len(pending) - (start + len(chunk))
+                break
+        return scores
+
+
+_services: Dict[str, CrossEncoderRerankService] = {}
+_services_lock = threading.Lock()
+
+
+def get_rerank_service(model_name: Optional[str] = None) -> CrossEncoderRerankService:
+    """Process-wide rerank service per model (shares the in-process score cache)."""
+    from app.core.config import settings
+    name = model_name or settings.ai_reranker_model
+    svc = _services.get(name)
+    if svc is None:
+        with _services_lock:
+            svc = _services.get(name)
+            if svc is None:
+                svc = CrossEncoderRerankService(name, max_batch_tokens=settings.ai_reranker_max_batch_tokens)
+                _services[name] = svc
+    return svc
@@ -12,6 +12,9 @@ Multi-vector BGE aspects:
 - embedding_keywords: Thematic elements
 - embedding_people: Cast and crew
 - embedding_brands: Studios and networks
+
+Aspect vectors are read from the memmapped BGEAspectStore (bge_aspect_store.py)
+and scored for a whole pool at once.
 """
 import logging
 import numpy as np
@@ -20,6 +23,9 @@ from sklearn.metrics.pairwise import cosine_similarity
 from sqlalchemy.orm import Session
 
 from app.models import BGEEmbedding, PersistentCandidate
+from app.services.ai_engine.bge_aspect_store import (
+    ASPECTS, DEFAULT_ASPECT_WEIGHTS, BGEAspectStore, encode_keys, get_aspect_store
+)
 from app.services.ai_engine.faiss_index import (
     load_index, search_index, deserialize_embedding, _l2_normalize
 )
@@ -51,6 +57,22 @@ def weighted_avg(vectors: List[np.ndarray], weights: List[float]) -> Optional[np
     return result
 
 
+def _aspect_store_for(db: Session, keys: List[Tuple[int, str]]) -> Optional[BGEAspectStore]:
+    """The memmapped aspect store, or (before it is built) an in-memory one from a single batched query."""
+    store = get_aspect_store()
+    if store is not None:
+        return store
+    if not keys:
+        return None
+    rows = []
+    key_set = set(keys)
+    tmdb_ids = sorted({k[0] for k in keys})
+    for i in range(0, len(tmdb_ids), 1000):
+        chunk = db.query(BGEEmbedding).filter(BGEEmbedding.tmdb_id.in_(tmdb_ids[i:i + 1000])).all()
+        rows.extend(r for r in chunk if (r.tmdb_id, r.media_type) in key_set)
+    return BGEAspectStore.from_rows(rows) if rows else None
+
+
 def build_user_profile_vectors(
     db: Session,
     user_id: int,
@@ -73,67 +95,28 @@ def build_user_profile_vectors(
         TraktWatchHistory.watched_at >= cutoff
     ).order_by(TraktWatchHistory.watched_at.desc()).limit(max_items).all()
     
+    empty = {aspect: None for aspect in ASPECTS}
+    watches = [w for w in watches if w.tmdb_id]
     if not watches:
         logger.debug(f"[DualIndex] No recent watch history for user {user_id}")
-        return {'base': None, 'title': None, 'keywords': None, 'people': None, 'brands': None}
-    
-    # Aggregate vectors per aspect
-    vectors_by_aspect = {
-        'base': [],
-        'title': [],
-        'keywords': [],
-        'people': [],
-        'brands': []
-    }
-    
-    for watch in watches:
-        bge_emb = db.query(BGEEmbedding).filter(
-            BGEEmbedding.tmdb_id == watch.tmdb_id,
-            BGEEmbedding.media_type == watch.media_type
-        ).first()
-        
-        if not bge_emb:
-            continue
-        
-        # Weight recent watches higher (exponential decay over 30 days)
-        days_ago = (datetime.utcnow() - watch.watched_at).days
-        weight = 1.0 / (1.0 + days_ago / 30.0)
-        
-        # Also boost by user rating if available
-        if watch.user_trakt_rating:
-            rating_boost = (watch.user_trakt_rating / 10.0) ** 2  # Square for stronger effect
-            weight *= (1.0 + rating_boost)
-        
-        # Deserialize and collect embeddings
-        if bge_emb.embedding_base:
-            vec = deserialize_embedding(bge_emb.embedding_base)
-            vectors_by_aspect['base'].append((vec, weight))
-        
-        if bge_emb.embedding_title:
-            vec = deserialize_embedding(bge_emb.embedding_title)
-            vectors_by_aspect['title'].append((vec, weight))
-        
-        if bge_emb.embedding_keywords:
-            vec = deserialize_embedding(bge_emb.embedding_keywords)
-            vectors_by_aspect['keywords'].append((vec, weight))
-        
-        if bge_emb.embedding_people:
-            vec = deserialize_embedding(bge_emb.embedding_people)
-            vectors_by_aspect['people'].append((vec, weight))
-        
-        if bge_emb.embedding_brands:
-            vec = deserialize_embedding(bge_emb.embedding_brands)
-            vectors_by_aspect['brands'].append((vec, weight))
-    
-    # Compute weighted averages
-    profile_vectors = {}
-    for aspect, vec_weight_pairs in vectors_by_aspect.items():
-        if vec_weight_pairs:
-            vectors = [v[0] for v in vec_weight_pairs]
-            weights = [v[1] for v in vec_weight_pairs]
-            profile_vectors[aspect] = weighted_avg(vectors, weights)
-        else:
-            profile_vectors[aspect] = None
+        return empty
+    
+    keys = [(int(w.tmdb_id), w.media_type) for w in watches]
+    store = _aspect_store_for(db, keys)
+    if store is None:
+        return empty
+    
+    # Weight recent watches higher (exponential decay over 30 days),
+    # boosted by user rating if available (squared for stronger effect)
+    now = datetime.utcnow()
+    weights = np.array([
+        (1.0 / (1.0 + (now - w.watched_at).days / 30.0))
+        * (1.0 + ((w.user_trakt_rating / 10.0) ** 2 if w.user_trakt_rating else 0.0))
+        for w in watches
+    ], dtype=np.float32)
+    profile_vectors = store.weighted_profile(
+        encode_keys([k[0] for k in keys], [k[1] for k in keys]), weights
+    )
     
     logger.info(f"[DualIndex] Built user profile vectors: {sum(1 for v in profile_vectors.values() if v is not None)}/5 aspects")
     return profile_vectors
@@ -148,78 +131,42 @@ def search_with_bge_multivector(
     """
     Score candidate pool using BGE multi-vector similarity.
     
+    One matrix-vector product per aspect over the whole pool (BGEAspectStore),
+    fused with the aspect weights over the aspects each item actually has.
+    
     Args:
         db: Database session
         user_profile_vectors: User profile vectors per aspect (from build_user_profile_vectors)
         candidate_pool: List of PersistentCandidate objects to score
-        weights: Aspect weights (default: title=0.25, keywords=0.35, people=0.25, brands=0.15)
+        weights: Aspect weights (default: DEFAULT_ASPECT_WEIGHTS)
     
     Returns:
         List of (candidate, final_score, score_breakdown) tuples
     """
     if weights is None:
-        weights = {
-            'base': 0.20,
-            'title': 0.25,
-            'keywords': 0.30,
-            'people': 0.20,
-            'brands': 0.05
-        }
+        weights = DEFAULT_ASPECT_WEIGHTS
     
-    scored_items = []
+    if not candidate_pool:
+        return []
     
-    for candidate in candidate_pool:
-        bge_emb = db.query(BGEEmbedding).filter(
-            BGEEmbedding.tmdb_id == candidate.tmdb_id,
-            BGEEmbedding.media_type == candidate.media_type
-        ).first()
-        
-        if not bge_emb:
-            # No BGE embedding - will need MiniLM fallback
-            scored_items.append((candidate, 0.0, {}))
-            continue
-        
-        # Compute cosine similarity per aspect
-        scores = {}
-        
-        if bge_emb.embedding_base and user_profile_vectors.get('base') is not None:
-            item_vec = deserialize_embedding(bge_emb.embedding_base)
-            sim = cosine_similarity([user_profile_vectors['base']], [item_vec])[0][0]
-            scores['base'] = float(sim)
-        
-        if bge_emb.embedding_title and user_profile_vectors.get('title') is not None:
-            item_vec = deserialize_embedding(bge_emb.embedding_title)
-            sim = cosine_similarity([user_profile_vectors['title']], [item_vec])[0][0]
-            scores['title'] = float(sim)
-        
-        if bge_emb.embedding_keywords and user_profile_vectors.get('keywords') is not None:
-            item_vec = deserialize_embedding(bge_emb.embedding_keywords)
-            sim = cosine_similarity([user_profile_vectors['keywords']], [item_vec])[0][0]
-            scores['keywords'] = float(sim)
-        
-        if bge_emb.embedding_people and user_profile_vectors.get('people') is not None:
-            item_vec = deserialize_embedding(bge_emb.embedding_people)
-            sim = cosine_similarity([user_profile_vectors['people']], [item_vec])[0][0]
-            scores['people'] = float(sim)
-        
-        if bge_emb.embedding_brands and user_profile_vectors.get('brands') is not None:
-            item_vec = deserialize_embedding(bge_emb.embedding_brands)
-            sim = cosine_similarity([user_profile_vectors['brands']], [item_vec])[0][0]
-            scores['brands'] = float(sim)
-        
-        # Compute weighted average score
-        if not scores:
-            final_score = 0.0
-        else:
-            # Normalize weights for available aspects
-            available_weights = {k: weights.get(k, 0) for k in scores.keys()}
-            total_weight = sum(available_weights.values())
-            if total_weight > 0:
-                final_score = sum(scores[k] * available_weights[k] for k in scores.keys()) / total_weight
-            else:
-                final_score = 0.0
-        
-        scored_items.append((candidate, final_score, scores))
+    keys = [(int(c.tmdb_id), c.media_type) for c in candidate_pool]
+    store = _aspect_store_for(db, keys)
+    if store is None:
+        # No BGE embeddings - will need MiniLM fallback
+        return [(c, 0.0, {}) for c in candidate_pool]
+    
+    final, per_aspect, _ = store.score(
+        user_profile_vectors,
+        encode_keys([k[0] for k in keys], [k[1] for k in keys]),
+        weights,
+    )
+    
+    scored_items = []
+    for i, candidate in enumerate(candidate_pool):
+        breakdown = {
+            aspect: float(sims[i]) for aspect, sims in per_aspect.items() if not np.isnan(sims[i])
+        }
+        scored_items.append((candidate, float(final[i]) if breakdown else 0.0, breakdown))
     
     return scored_items
 
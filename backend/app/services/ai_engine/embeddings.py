@@ -1,6 +1,6 @@
 """
 EmbeddingService using sentence-transformers (CPU-only).
-Provides encode_text and encode_texts(batch_size=64). Ensures model is lazy-loaded and closed as needed.
+Provides encode_text and encode_texts(batch_size=64). The model is lazy-loaded once per process via model_registry.
 Converts vectors to float16 for FAISS storage. Uses del and gc.collect after encoding batches.
 """
 import numpy as np
@@ -26,14 +26,12 @@ class EmbeddingService:
                 raise ImportError("sentence-transformers not installed")
             # Load from local snapshot directory directly (bundled with Docker image)
             import os
+            from .model_registry import get_sentence_transformer
             snapshot_path = "/app/app/models_cache/all-MiniLM-L6-v2/models--sentence-transformers--all-MiniLM-L6-v2/snapshots/c9745ed1d9f207416be6d2e6f8de32d1f16199bf"
             
-            if os.path.exists(snapshot_path):
-                # Load directly from the snapshot directory (offline mode)
-                self._model = SentenceTransformer(snapshot_path, device="cpu")
-            else:
-                # Fallback to online download
-                self._model = SentenceTransformer(self.model_name, device="cpu")
+            # Shared process-wide instance; offline snapshot when bundled, else online download
+            source = snapshot_path if os.path.exists(snapshot_path) else self.model_name
+            self._model = get_sentence_transformer(self.model_name, device="cpu", source=source)
 
     def encode_text(self, text: str) -> np.ndarray:
         self._ensure_model()
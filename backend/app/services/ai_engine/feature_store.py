@@ -0,0 +1,228 @@
+"""
+feature_store.py
+
+Precomputed global candidate features for the scorers.
+
+Features (all in [0, 1], NaN where unknown):
+  popularity   quantile of TMDB popularity across all active candidates
+  rating       quantile of the vote-count-shrunk rating (Bayesian average toward the global mean)
+  novelty      1 - popularity
+  freshness    quantile of the release / first-air date
+
+Layout (one .npz under AI_FEATURE_STORE_DIR, default /data/ai, replaced atomically):
+  features     float32 (rows x len(FEATURES))
+  keys         int64, sorted: tmdb_id * 2 + (1 if media_type == 'show' else 0)
+  key_rows     int32 row of each key
+
+Quantiles are global, so a score no longer depends on which other candidates
+happen to be in the pool (subset min-max made a 6.5 rating look perfect in a
+weak pool). Lookup is a vectorized searchsorted plus one fancy-index; ANN
+results are scored after being joined back to candidate rows, so the scorers
+gather by (tmdb_id, media_type) rather than by FAISS position.
+build_feature_store() is run nightly; readers reload when the file changes.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from app.services.ai_engine.bge_aspect_store import encode_keys
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(os.getenv("AI_FEATURE_STORE_DIR", "/data/ai"))
+STORE_FILE = DATA_DIR / "candidate_features.npz"
+FEATURES = ("popularity", "rating", "novelty", "freshness")
+RATING_PRIOR_VOTES = 50  # Votes needed before an item's own average outweighs the global mean
+RELOAD_CHECK_SECONDS = 60
+
+_store: Optional["CandidateFeatureStore"] = None
+_store_mtime: Optional[float] = None
+_next_check = 0.0
+_store_lock = threading.Lock()
+
+
+def quantile_normalize(values: np.ndarray) -> np.ndarray:
+    """Map values to their rank quantile in [0, 1] (ties share the average rank; NaN stays NaN)."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan, dtype=np.float64)
+    valid = ~np.isnan(values)
+    n = int(valid.sum())
+    if n == 0:
+        return out
+    if n == 1:
+        out[valid] = 0.5
+        return out
+    ordered = np.sort(values[valid])
+    lo = np.searchsorted(ordered, values[valid], side="left")
+    hi = np.searchsorted(ordered, values[valid], side="right")
+    out[valid] = (lo + hi - 1) / 2.0 / (n - 1)
+    return out
+
+
+def shrunk_rating(vote_average: np.ndarray, vote_count: np.ndarray, prior_votes: int = RATING_PRIOR_VOTES) -> np.ndarray:
+    """Bayesian average: few-vote ratings are pulled toward the vote-weighted global mean."""
+    avg = np.nan_to_num(np.asarray(vote_average, dtype=np.float64), nan=0.0)
+    votes = np.clip(np.nan_to_num(np.asarray(vote_count, dtype=np.float64), nan=0.0), 0.0, None)
+    total = votes.sum()
+    prior = float((avg * votes).sum() / total) if total > 0 else float(avg.mean()) if avg.size else 0.0
+    return (avg * votes + prior * prior_votes) / (votes + prior_votes)
+
+
+def _date_ordinal(release_date: Optional[str], first_air_date: Optional[str], year: Optional[int]) -> float:
+    for raw in (release_date, first_air_date):
+        if raw and len(raw) >= 10:
+            try:
+                return float(date.fromisoformat(raw[:10]).toordinal())
+            except ValueError:
+                pass
+    try:
+        if year:
+            return float(date(int(year), 1, 1).toordinal())
+    except (TypeError, ValueError):
+        pass
+    return np.nan
+
+
+def compute_features(popularity: np.ndarray, vote_average: np.ndarray, vote_count: np.ndarray,
+                     date_ordinals: np.ndarray) -> np.ndarray:
+    """(n x len(FEATURES)) float32 matrix from raw candidate columns."""
+    pop_q = quantile_normalize(np.nan_to_num(np.asarray(popularity, dtype=np.float64), nan=0.0))
+    features = np.empty((len(pop_q), len(FEATURES)), dtype=np.float32)
+    features[:, 0] = pop_q
+    features[:, 1] = quantile_normalize(shrunk_rating(vote_average, vote_count))
+    features[:, 2] = 1.0 - pop_q
+    features[:, 3] = quantile_normalize(date_ordinals)
+    return features
+
+
+class CandidateFeatureStore:
+    """Read-only feature matrix with (tmdb_id, media_type) lookup."""
+
+    def __init__(self, features: np.ndarray, keys: np.ndarray, key_rows: np.ndarray, built_at: float = 0.0):
+        self.features = features
+        self.keys = keys
+        self.key_rows = key_rows
+        self.built_at = float(built_at)
+        # Row `len(features)` is an all-NaN sentinel for misses, so gathers stay a single fancy-index
+        self._padded = np.vstack([features, np.full((1, features.shape[1]), np.nan, dtype=features.dtype)])
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    def _rows_for_keys(self, keys: np.ndarray) -> np.ndarray:
+        miss = len(self.features)
+        if not len(self.keys):
+            return np.full(len(keys), miss, dtype=np.int64)
+        pos = np.clip(np.searchsorted(self.keys, keys), 0, len(self.keys) - 1)
+        return np.where(self.keys[pos] == keys, self.key_rows[pos], miss)
+
+    def gather(self, tmdb_ids: Sequence[int], media_types: Sequence[str]) -> np.ndarray:
+        """(n x len(FEATURES)) features for the given items; NaN rows for unknown items."""
+        return self._padded[self._rows_for_keys(encode_keys(tmdb_ids, media_types))]
+
+    def gather_candidates(self, candidates: Iterable[Dict[str, Any]]) -> np.ndarray:
+        """gather() for candidate dicts (persistent_candidates or Trakt-shaped)."""
+        tmdb_ids, media_types = [], []
+        for c in candidates:
+            try:
+                tmdb_ids.append(int((c.get("ids") or {}).get("tmdb") or c.get("tmdb_id") or -1))
+            except (TypeError, ValueError):
+                tmdb_ids.append(-1)
+            media_types.append(c.get("media_type") or c.get("type") or "movie")
+        return self.gather(tmdb_ids, media_types)
+
+    def column(self, name: str) -> int:
+        return FEATURES.index(name)
+
+
+def build_feature_store(page_size: int = 20000) -> Dict[str, int]:
+    """Recompute all features from persistent_candidates and replace the store file."""
+    from sqlalchemy import text
+    from app.core.database import SessionLocal
+
+    ids, tmdb_ids, media_types = [], [], []
+    popularity, vote_average, vote_count, dates = [], [], [], []
+    db = SessionLocal()
+    try:
+        last_id = 0
+        while True:
+            rows = db.execute(text(
+                """
+                SELECT id, tmdb_id, media_type, popularity,
+                       vote_average, vote_count, release_date, first_air_date, year
+                FROM persistent_candidates
+                WHERE active = true AND tmdb_id IS NOT NULL AND id > :last_id
+                ORDER BY id
+                LIMIT :lim
+                """
+            ), {"last_id": last_id, "lim": page_size}).fetchall()
+            if not rows:
+                break
+            for r in rows:
+                ids.append(r.id)
+                tmdb_ids.append(int(r.tmdb_id))
+                media_types.append(r.media_type)
+                popularity.append(r.popularity if r.popularity is not None else np.nan)
+                vote_average.append(r.vote_average if r.vote_average is not None else np.nan)
+                vote_count.append(r.vote_count or 0)
+                dates.append(_date_ordinal(r.release_date, r.first_air_date, r.year))
+            last_id = rows[-1].id
+    finally:
+        db.close()
+
+    features = compute_features(np.array(popularity), np.array(vote_average), np.array(vote_count), np.array(dates))
+    # Rows are in id order; a duplicated (tmdb_id, media_type) resolves to its first row
+    keys, key_rows = np.unique(encode_keys(tmdb_ids, media_types), return_index=True)
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = STORE_FILE.with_suffix(".tmp.npz")
+    np.savez(tmp, features=features, keys=keys, key_rows=key_rows.astype(np.int32),
+             built_at=np.float64(time.time()))
+    os.replace(tmp, STORE_FILE)
+
+    stats = {"rows": int(len(features)), "candidates": len(ids), "keys": int(len(keys))}
+    logger.info(f"[Features] Store written to {STORE_FILE}: {stats}")
+    return stats
+
+
+def get_feature_store() -> Optional[CandidateFeatureStore]:
+    """Process-wide store, reloaded when the file changes. None until the first build."""
+    global _store, _store_mtime, _next_check
+    now = time.monotonic()
+    if now < _next_check:
+        return _store
+    with _store_lock:
+        if now < _next_check:
+            return _store
+        _next_check = now + RELOAD_CHECK_SECONDS
+        try:
+            mtime = STORE_FILE.stat().st_mtime
+        except OSError:
+            _store, _store_mtime = None, None
+            return None
+        if mtime == _store_mtime:
+            return _store
+        try:
+            with np.load(STORE_FILE) as data:
+                _store = CandidateFeatureStore(
+                    data["features"], data["keys"], data["key_rows"], float(data["built_at"]),
+                )
+            _store_mtime = mtime
+            logger.info(f"[Features] Loaded {len(_store)} rows from {STORE_FILE}")
+        except Exception as e:
+            logger.warning(f"[Features] Failed to load {STORE_FILE}: {e}")
+        return _store
+
+
+def gather_candidate_features(candidates: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """Features for candidate dicts, all NaN when the store has not been built yet."""
+    store = get_feature_store()
+    if store is None:
+        return np.full((len(candidates), len(FEATURES)), np.nan, dtype=np.float32)
+    return store.gather_candidates(candidates)
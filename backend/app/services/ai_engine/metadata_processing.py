@@ -2,10 +2,25 @@
 metadata_processing.py (AI Engine)
 - Compose candidate text from PersistentCandidate fields for embedding/TF-IDF.
 """
+import hashlib
 import json
 from typing import Dict, Any, List, Optional
 import re
 
+# PersistentCandidate columns that feed compose_text_for_embedding, with the defaults
+# used when a column is NULL. Changing this list changes every content hash.
+EMBEDDING_SOURCE_FIELDS: Dict[str, Any] = {
+    "id": None, "tmdb_id": None, "trakt_id": None, "media_type": None,
+    "title": "", "original_title": "", "overview": "",
+    "genres": "[]", "keywords": "[]", "cast": "[]", "production_companies": "[]",
+    "vote_average": 0, "vote_count": 0, "popularity": 0, "year": None,
+    "language": "", "runtime": 0, "tagline": "", "homepage": "",
+    "production_countries": "[]", "spoken_languages": "[]",
+    "networks": "[]", "created_by": "[]", "number_of_seasons": None, "number_of_episodes": None,
+    "episode_run_time": "[]", "first_air_date": "", "last_air_date": "", "in_production": None,
+    "status": "",
+}
+
 
 def normalize_prompt(prompt: str) -> str:
     """Normalize prompt while preserving semantic meaning.
@@ -67,3 +82,53 @@ def compose_text_for_embedding(candidate: Dict[str, Any], extra_fields: Optional
         for f in extra_fields:
             parts.append(str(candidate.get(f, "")))
     return ". ".join([p for p in parts if p]).strip()
+
+
+def embedding_source_dict(row: Any) -> Dict[str, Any]:
+    """Build the candidate dict used for embedding text from a PersistentCandidate or SQL row."""
+    out: Dict[str, Any] = {}
+    for name, default in EMBEDDING_SOURCE_FIELDS.items():
+        val = getattr(row, name, None)
+        if default is not None:
+            val = val or default
+        out[name] = val
+    return out
+
+
+def compute_content_hash(candidate: Dict[str, Any]) -> str:
+    """SHA1 hex of the composed embedding text (same hash stored in the BGE id map)."""
+    return hashlib.sha1(compose_text_for_embedding(candidate).encode("utf-8")).hexdigest()
+
+
+def join_list_field(val: Any) -> str:
+    """Join JSON array-like or list-like values into a comma-separated string."""
+    try:
+        if isinstance(val, str):
+            if not val:
+                return ""
+            arr = json.loads(val)
+            if isinstance(arr, list):
+                return ", ".join(str(x) for x in arr)
+            return str(val)
+        if isinstance(val, list):
+            return ", ".join(str(x) for x in val)
+    except Exception:
+        pass
+    return str(val or "")
+
+
+def bge_label_texts(candidate: Dict[str, Any]) -> Dict[str, str]:
+    """Texts for the labeled BGE vectors (title/keywords/people/brands) of an embedding_source_dict.
+
+    The base vector uses compose_text_for_embedding(); hashes of these texts are the
+    per-label hashes in the BGE id map and bge_embeddings.
+    """
+    labels: Dict[str, str] = {}
+    if candidate.get("title"):
+        labels["title"] = candidate["title"]
+    labels["keywords"] = join_list_field(candidate.get("keywords", "[]"))
+    labels["people"] = join_list_field(candidate.get("cast", "[]"))
+    brands = join_list_field(candidate.get("production_companies", "[]"))
+    if brands:
+        labels["brands"] = brands
+    return labels
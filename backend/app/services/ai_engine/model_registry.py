@@ -0,0 +1,280 @@
+"""
+model_registry.py
+
+Process-wide registry for sentence-transformers models (MiniLM, BGE) and
+cross-encoders. Each (kind, name, device) is loaded once per process and
+shared by every EmbeddingService / BGEEmbedder / CrossEncoderReranker
+instance, so constructing those wrappers per request is cheap.
+
+- Thread-safe: a per-key lock makes concurrent first use load the weights once,
+  while different models can load in parallel.
+- Warmed at FastAPI startup and Celery worker_process_init (warm_default_models).
+- Least-recently-used models are evicted when process RSS exceeds
+  AI_MODEL_REGISTRY_MAX_RSS_MB or available system memory drops below
+  AI_MODEL_REGISTRY_MIN_AVAILABLE_MB.
+- Load counts/timings, hits and evictions go to app.core.metrics and stats().
+"""
+import gc
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KIND_SENTENCE_TRANSFORMER = "sentence_transformer"
+KIND_CROSS_ENCODER = "cross_encoder"
+
+ModelKey = Tuple[str, str, str]
+
+# How often get() re-checks memory pressure between loads (seconds)
+_PRESSURE_CHECK_INTERVAL = 30.0
+
+
+def _load_sentence_transformer(source: str, device: Optional[str]):
+    from sentence_transformers import SentenceTransformer
+    if device:
+        return SentenceTransformer(source, device=device)
+    return SentenceTransformer(source)
+
+
+def _load_cross_encoder(source: str, device: Optional[str]):
+    from sentence_transformers import CrossEncoder
+    if device:
+        return CrossEncoder(source, device=device)
+    return CrossEncoder(source)
+
+
+_LOADERS: Dict[str, Callable[[str, Optional[str]], Any]] = {
+    KIND_SENTENCE_TRANSFORMER: _load_sentence_transformer,
+    KIND_CROSS_ENCODER: _load_cross_encoder,
+}
+
+
+def _process_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB (Linux /proc), None if unknown."""
+    try:
+        with open("/proc/self/statm") as fh:
+            pages = int(fh.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def _available_memory_mb() -> Optional[float]:
+    """MemAvailable from /proc/meminfo in MB, None if unknown."""
+    try:
+        with open("/proc/meminfo") as fh:
+            for line in fh:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except Exception:
+        pass
+    return None
+
+
+class ModelRegistry:
+    """Thread-safe LRU registry of loaded models keyed by (kind, name, device)."""
+
+    def __init__(self, max_rss_mb: float = 0.0, min_available_mb: float = 0.0):
+        self.max_rss_mb = max_rss_mb
+        self.min_available_mb = min_available_mb
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[ModelKey, Any]" = OrderedDict()
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+        self._stats: Dict[ModelKey, Dict[str, float]] = {}
+        self._last_pressure_check = 0.0
+
+    @staticmethod
+    def _key(kind: str, name: str, device: Optional[str]) -> ModelKey:
+        return (kind, name, device or "auto")
+
+    def _stat(self, key: ModelKey) -> Dict[str, float]:
+        return self._stats.setdefault(key, {"loads": 0, "load_ms_total": 0.0, "last_load_ms": 0.0, "hits": 0, "evictions": 0})
+
+    def get(self, kind: str, name: str, device: Optional[str] = None, source: Optional[str] = None) -> Any:
+        """Return the shared model, loading it on first use.
+
+        ``name`` identifies the model in the registry; ``source`` (defaults to name)
+        is what the loader opens, e.g. a local snapshot directory.
+        """
+        key = self._key(kind, name, device)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self._stat(key)["hits"] += 1
+                check_pressure = time.monotonic() - self._last_pressure_check > _PRESSURE_CHECK_INTERVAL
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        if model is not None:
+            if check_pressure:
+                self.relieve_memory_pressure(keep=key)
+            return model
+
+        with key_lock:
+            # Another thread may have finished loading while we waited
+            with self._lock:
+                model = self._models.get(key)
+                if model is not None:
+                    self._models.move_to_end(key)
+                    self._stat(key)["hits"] += 1
+                    return model
+
+            loader = _LOADERS.get(kind)
+            if loader is None:
+                raise ValueError(f"Unknown model kind: {kind}")
+            started = time.perf_counter()
+            model = loader(source or name, device)
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+            with self._lock:
+                self._models[key] = model
+                stat = self._stat(key)
+                stat["loads"] += 1
+                stat["load_ms_total"] += elapsed_ms
+                stat["last_load_ms"] = elapsed_ms
+            logger.info(f"[ModelRegistry] Loaded {kind}:{name} ({device or 'auto'}) in {elapsed_ms:.0f}ms")
+            self._report_load(kind, name, elapsed_ms)
+
+        self.relieve_memory_pressure(keep=key)
+        return model
+
+    def _report_load(self, kind: str, name: str, elapsed_ms: float) -> None:
+        try:
+            from app.core.metrics import increment_sync, timing_sync
+            increment_sync("model_registry.loads")
+            increment_sync(f"model_registry.loads.{kind}.{name}")
+            timing_sync(f"model_registry.load.{kind}.{name}", elapsed_ms)
+        except Exception:
+            pass
+
+    def _under_pressure(self) -> bool:
+        if self.max_rss_mb and self.max_rss_mb > 0:
+            rss = _process_rss_mb()
+            if rss is not None and rss > self.max_rss_mb:
+                return True
+        if self.min_available_mb and self.min_available_mb > 0:
+            avail = _available_memory_mb()
+            if avail is not None and avail < self.min_available_mb:
+                return True
+        return False
+
+    def relieve_memory_pressure(self, keep: Optional[ModelKey] = None) -> int:
+        """Evict least-recently-used models (never ``keep``) while memory is under pressure."""
+        self._last_pressure_check = time.monotonic()
+        evicted = 0
+        while self._under_pressure():
+            with self._lock:
+                victim = next((k for k in self._models if k != keep), None)
+            if victim is None:
+                break
+            if self.evict(*victim):
+                evicted += 1
+        return evicted
+
+    def evict(self, kind: str, name: str, device: Optional[str] = None) -> bool:
+        """Drop a model from the registry. Callers already holding it keep a working reference."""
+        key = self._key(kind, name, device)
+        with self._lock:
+            model = self._models.pop(key, None)
+            if model is None:
+                return False
+            self._stat(key)["evictions"] += 1
+        del model
+        gc.collect()
+        try:
+            import torch  # type: ignore
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+        logger.warning(f"[ModelRegistry] Evicted {kind}:{name} ({key[2]}) under memory pressure")
+        try:
+            from app.core.metrics import increment_sync
+            increment_sync("model_registry.evictions")
+        except Exception:
+            pass
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+        gc.collect()
+
+    def loaded(self) -> List[ModelKey]:
+        with self._lock:
+            return list(self._models.keys())
+
+    def stats(self) -> Dict[str, Any]:
+        """In-process load/hit/eviction counters per model plus current memory readings."""
+        with self._lock:
+            models = {
+                f"{k[0]}:{k[1]}@{k[2]}": {**v, "loaded": k in self._models}
+                for k, v in self._stats.items()
+            }
+        return {"models": models, "rss_mb": _process_rss_mb(), "available_mb": _available_memory_mb()}
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                try:
+                    from app.core.config import settings
+                    max_rss = float(getattr(settings, "ai_model_registry_max_rss_mb", 0) or 0)
+                    min_avail = float(getattr(settings, "ai_model_registry_min_available_mb", 0) or 0)
+                except Exception:
+                    max_rss, min_avail = 0.0, 0.0
+                _registry = ModelRegistry(max_rss_mb=max_rss, min_available_mb=min_avail)
+    return _registry
+
+
+def get_sentence_transformer(name: str, device: Optional[str] = None, source: Optional[str] = None):
+    return get_registry().get(KIND_SENTENCE_TRANSFORMER, name, device=device, source=source)
+
+
+def get_cross_encoder(name: str, device: Optional[str] = None):
+    return get_registry().get(KIND_CROSS_ENCODER, name, device=device)
+
+
+def warm_default_models() -> Dict[str, Any]:
+    """Load (and run one tiny inference on) the models this process is configured to use.
+
+    Safe to call from a background thread; failures are logged and skipped.
+    """
+    from app.core.config import settings
+    warmed: Dict[str, Any] = {}
+    try:
+        from .embeddings import EmbeddingService
+        EmbeddingService().encode_text("warmup")
+        warmed["minilm"] = True
+        from .vocab_embeddings import get_vocab_table
+        warmed["vocab_terms"] = len(get_vocab_table().terms)
+    except Exception as e:
+        logger.debug(f"[ModelRegistry] MiniLM warm-up skipped: {e}")
+        warmed["minilm"] = False
+    if getattr(settings, "ai_bge_index_enabled", False):
+        try:
+            from .bge_index import BGEEmbedder
+            BGEEmbedder(model_name=settings.ai_bge_model_name).embed(["warmup"], batch_size=1)
+            warmed["bge"] = True
+        except Exception as e:
+            logger.debug(f"[ModelRegistry] BGE warm-up skipped: {e}")
+            warmed["bge"] = False
+    if getattr(settings, "ai_reranker_enabled", False):
+        try:
+            from .cross_encoder_reranker import CrossEncoderReranker
+            CrossEncoderReranker(settings.ai_reranker_model).score("warmup", ["warmup"], batch_size=1)
+            warmed["cross_encoder"] = True
+        except Exception as e:
+            logger.debug(f"[ModelRegistry] Cross-encoder warm-up skipped: {e}")
+            warmed["cross_encoder"] = False
+    logger.info(f"[ModelRegistry] Warm-up complete: {warmed}")
+    return warmed
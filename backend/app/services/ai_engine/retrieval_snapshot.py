@@ -0,0 +1,186 @@
+"""
+retrieval_snapshot.py
+
+Per-list snapshot of the expensive retrieval stages of AI list generation: prompt
+parse, seed anchor lookup, query embedding, BGE and FAISS candidate ids + scores.
+
+A refresh of an unchanged prompt reuses the snapshot and only re-runs the SQL
+filter, scoring/personalization, rerank and diversification. A snapshot is valid
+while:
+  - the input fingerprint (prompt text, list type, default obscurity) matches,
+  - the index generation matches, i.e. neither the MiniLM FAISS index nor the BGE
+    index files were rewritten since the snapshot was taken (new ingestion, rebuild),
+  - it is younger than AI_RETRIEVAL_SNAPSHOT_MAX_AGE_HOURS.
+
+Snapshots are stored as npz files under /data/ai/retrieval_snapshots (shared by
+workers, like the FAISS index itself).
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = Path(os.getenv("AI_RETRIEVAL_SNAPSHOT_DIR", "/data/ai/retrieval_snapshots"))
+SNAPSHOT_VERSION = 1
+
+
+def index_generation() -> str:
+    """Token that changes whenever the FAISS or BGE index files are rewritten."""
+    from app.core.config import settings
+    from .faiss_index import INDEX_FILE, MAPPING_FILE
+
+    paths = [
+        str(INDEX_FILE),
+        str(MAPPING_FILE),
+        os.path.join(settings.ai_bge_index_dir, "faiss_bge.index"),
+        os.path.join(settings.ai_bge_index_dir, "id_map.json"),
+    ]
+    h = hashlib.sha1()
+    for p in paths:
+        try:
+            st = os.stat(p)
+            h.update(f"{p}:{st.st_mtime_ns}:{st.st_size};".encode("utf-8"))
+        except OSError:
+            h.update(f"{p}:missing;".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def input_fingerprint(prompt_text: str, list_type: str, default_obscurity: Optional[str]) -> str:
+    payload = json.dumps([prompt_text or "", list_type or "", default_obscurity or ""], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class RetrievalSnapshot:
+    """Retrieval outputs for one AI list; FAISS results are kept per attempted top_k."""
+
+    def __init__(
+        self,
+        fingerprint: str,
+        generation: str,
+        parsed: dict,
+        enhanced_prompt: str,
+        query_embedding: np.ndarray,
+        small_index: bool = False,
+        bge_enabled: bool = False,
+        bge_ids: Optional[List[int]] = None,
+        bge_scores: Optional[List[float]] = None,
+        faiss_results: Optional[Dict[int, Tuple[List[int], List[float]]]] = None,
+        saved_at: Optional[float] = None,
+    ):
+        self.fingerprint = fingerprint
+        self.generation = generation
+        self.parsed = parsed
+        self.enhanced_prompt = enhanced_prompt
+        self.query_embedding = np.asarray(query_embedding)
+        self.small_index = bool(small_index)
+        self.bge_enabled = bool(bge_enabled)
+        self.bge_ids = list(bge_ids or [])
+        self.bge_scores = list(bge_scores or [])
+        self.faiss_results: Dict[int, Tuple[List[int], List[float]]] = dict(faiss_results or {})
+        self.saved_at = saved_at or time.time()
+
+    def is_valid_for(self, fingerprint: str, generation: str, max_age_seconds: float) -> bool:
+        return (
+            self.fingerprint == fingerprint
+            and self.generation == generation
+            and (time.time() - self.saved_at) <= max_age_seconds
+        )
+
+    @staticmethod
+    def path_for(ai_list_id: str, directory: Path = SNAPSHOT_DIR) -> Path:
+        safe = "".join(ch for ch in str(ai_list_id) if ch.isalnum() or ch in "-_")
+        return directory / f"{safe}.npz"
+
+    def save(self, ai_list_id: str, directory: Path = SNAPSHOT_DIR) -> Optional[Path]:
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            path = self.path_for(ai_list_id, directory)
+            meta = {
+                "version": SNAPSHOT_VERSION,
+                "fingerprint": self.fingerprint,
+                "generation": self.generation,
+                "parsed": self.parsed,
+                "enhanced_prompt": self.enhanced_prompt,
+                "small_index": self.small_index,
+                "bge_enabled": self.bge_enabled,
+                "faiss_top_k": sorted(self.faiss_results),
+                "saved_at": self.saved_at,
+            }
+            arrays = {
+                "meta": np.array(json.dumps(meta, default=str)),
+                "query_embedding": self.query_embedding,
+                "bge_ids": np.asarray(self.bge_ids, dtype=np.int64),
+                "bge_scores": np.asarray(self.bge_scores, dtype=np.float32),
+            }
+            for top_k, (ids, scores) in self.faiss_results.items():
+                arrays[f"faiss_ids_{top_k}"] = np.asarray(ids, dtype=np.int64)
+                arrays[f"faiss_scores_{top_k}"] = np.asarray(scores, dtype=np.float32)
+            tmp = path.with_suffix(".tmp.npz")
+            np.savez(tmp, **arrays)
+            os.replace(tmp, path)
+            return path
+        except Exception as e:
+            logger.warning(f"[RetrievalSnapshot] Failed to save snapshot for list {ai_list_id}: {e}")
+            return None
+
+    @classmethod
+    def load(cls, ai_list_id: str, directory: Path = SNAPSHOT_DIR) -> Optional["RetrievalSnapshot"]:
+        path = cls.path_for(ai_list_id, directory)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("version") != SNAPSHOT_VERSION:
+                    return None
+                faiss_results = {
+                    int(k): (data[f"faiss_ids_{k}"].tolist(), data[f"faiss_scores_{k}"].tolist())
+                    for k in meta.get("faiss_top_k") or []
+                }
+                return cls(
+                    fingerprint=meta["fingerprint"],
+                    generation=meta["generation"],
+                    parsed=meta.get("parsed") or {},
+                    enhanced_prompt=meta.get("enhanced_prompt") or "",
+                    query_embedding=data["query_embedding"],
+                    small_index=meta.get("small_index", False),
+                    bge_enabled=meta.get("bge_enabled", False),
+                    bge_ids=data["bge_ids"].tolist(),
+                    bge_scores=data["bge_scores"].tolist(),
+                    faiss_results=faiss_results,
+                    saved_at=meta.get("saved_at"),
+                )
+        except Exception as e:
+            logger.warning(f"[RetrievalSnapshot] Ignoring unreadable snapshot {path}: {e}")
+            return None
+
+
+def load_valid_snapshot(ai_list_id: str, fingerprint: str) -> Optional[RetrievalSnapshot]:
+    """Return the list's snapshot if it still matches the prompt inputs and index generation."""
+    from app.core.config import settings
+    if not settings.ai_retrieval_snapshot_enabled:
+        return None
+    snap = RetrievalSnapshot.load(ai_list_id)
+    if snap is None:
+        return None
+    max_age = float(settings.ai_retrieval_snapshot_max_age_hours) * 3600.0
+    if not snap.is_valid_for(fingerprint, index_generation(), max_age):
+        logger.info(f"[RetrievalSnapshot] Snapshot for list {ai_list_id} is stale (inputs, index generation or age changed)")
+        return None
+    return snap
+
+
+def drop_snapshot(ai_list_id: str) -> None:
+    try:
+        RetrievalSnapshot.path_for(ai_list_id).unlink()
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.debug(f"[RetrievalSnapshot] Failed to delete snapshot for list {ai_list_id}: {e}")
@@ -517,17 +517,9 @@ def _compute_genre_embedding_similarity(prompt_embedding: np.ndarray, candidate_
     if not candidate_genres or prompt_embedding is None:
         return 0.0
     try:
-        # Lazy load embedder
-        from .embeddings import EmbeddingService
-        embedder = EmbeddingService()
-        # Encode candidate genres
-        genre_embs = embedder.encode_texts(candidate_genres)
-        # Normalize embeddings
-        prompt_norm = prompt_embedding / (np.linalg.norm(prompt_embedding) + 1e-8)
-        genre_norms = genre_embs / (np.linalg.norm(genre_embs, axis=1, keepdims=True) + 1e-8)
-        # Max similarity across all genres
-        similarities = genre_norms.dot(prompt_norm)
-        return float(np.max(similarities))
+        # Genre vectors come from the precomputed vocabulary table (no per-call encoding)
+        from .vocab_embeddings import genre_similarity_bonuses
+        return float(genre_similarity_bonuses(prompt_embedding, [candidate_genres])[0])
     except Exception as e:
         logger.warning(f"[GENRE_EMB] Failed to compute genre embedding similarity: {e}")
         return 0.0
@@ -537,15 +529,42 @@ def _reciprocal_rank_fusion(rankings: List[np.ndarray], k: int = 60) -> np.ndarr
     n = len(rankings[0])
     rrf_scores = np.zeros(n)
     for ranking in rankings:
-        for idx in range(n):
-            # ranking[idx] is the original index in the candidate list
-            # Its position in the ranking array is its rank
-            rank = np.where(ranking == idx)[0]
-            if len(rank) > 0:
-                rrf_scores[idx] += 1.0 / (k + rank[0])
+        ranking = np.asarray(ranking, dtype=np.int64)
+        # ranking[pos] is the original index; its first position is its rank
+        idx, first_pos = np.unique(ranking, return_index=True)
+        ok = (idx >= 0) & (idx < n)
+        rrf_scores[idx[ok]] += 1.0 / (k + first_pos[ok])
     return rrf_scores
 
 
+def _multi_query_rrf(item_id_rows: np.ndarray, cand_ids: np.ndarray, k: int = 60) -> np.ndarray:
+    """Vectorized RRF over an (m x k) matrix of retrieved item ids (one row per query).
+
+    Each candidate scores sum over rows of 1 / (k + rank), using its best rank within
+    a row (multi-vector indexes can return the same item several times). Candidates
+    never retrieved score 0.
+    """
+    n = len(cand_ids)
+    scores = np.zeros(n, dtype=np.float64)
+    if n == 0 or item_id_rows is None or item_id_rows.size == 0:
+        return scores
+    m, width = item_id_rows.shape
+    order = np.argsort(cand_ids, kind="stable")
+    sorted_ids = cand_ids[order]
+    flat_ids = item_id_rows.ravel()
+    pos = np.minimum(np.searchsorted(sorted_ids, flat_ids), n - 1)
+    hit = (flat_ids > 0) & (sorted_ids[pos] == flat_ids)
+    if not np.any(hit):
+        return scores
+    local = order[pos[hit]]
+    row = np.repeat(np.arange(m), width)[hit]
+    rank = np.tile(np.arange(width), m)[hit]
+    # Flattened row-major order is rank order within a row, so first occurrence = best rank
+    _, first = np.unique(row * n + local, return_index=True)
+    np.add.at(scores, local[first], 1.0 / (k + rank[first]))
+    return scores
+
+
 def score_candidates(
     prompt_text: str,
     candidates: List[Dict[str, Any]],
@@ -564,13 +583,12 @@ def score_candidates(
     ai_list_types = ("chat", "mood", "theme", "fusion", "custom")
     if list_type in ai_list_types:
         from .intent_extractor import IntentExtractor
-        from app.services.persona_helper import PersonaHelper
+        from app.services.persona_context import get_persona_context
         
-        # Get compressed persona/history if not provided
+        # Get compressed persona/history if not provided (cached per process)
         if not persona or not history_summary:
             try:
-                persona_data = PersonaHelper.format_for_prompt(
-                    user_id=user_id or 1,
+                persona_data = get_persona_context(user_id or 1).format_for_prompt(
                     include_history=True,
                     include_pairwise=True
                 )
@@ -629,11 +647,21 @@ def score_candidates(
     #     except Exception as e:
     #         logger.warning(f"[Scorer] Candidate enrichment failed (continuing with existing data): {e}")
     
-    # Popularity and rating normalization
+    # Popularity and rating normalization: global quantiles from the nightly feature store,
+    # subset min-max only for items the store has not seen yet
     popularity = np.array([float(c.get("popularity") or 0) for c in cand_subset])
     rating = np.array([float(c.get("vote_average") or 0) for c in cand_subset])
     pop_norm = _normalize(popularity)
     rating_norm = _normalize(rating)
+    try:
+        from .feature_store import FEATURES, gather_candidate_features
+        feats = gather_candidate_features(cand_subset)
+        pop_q = feats[:, FEATURES.index("popularity")]
+        rating_q = feats[:, FEATURES.index("rating")]
+        pop_norm = np.where(np.isnan(pop_q), pop_norm, pop_q)
+        rating_norm = np.where(np.isnan(rating_q), rating_norm, rating_q)
+    except Exception as e:
+        logger.debug(f"[AI_SCORE] Feature store unavailable, using pool normalization: {e}")
     novelty = 1.0 - pop_norm
 
     # 2) Top-K reduction with quick composite
@@ -930,84 +958,56 @@ def score_candidates(
             else:
                 variants = [prompt_text]
 
-            # Encode variants with BGE and search the secondary index
-            embedder_bge = BGEEmbedder(model_name=settings.ai_bge_model_name)
-            v_embs = embedder_bge.embed(variants, batch_size=32)
-            idx_bge = BGEIndex(settings.ai_bge_index_dir)
-            idx_bge.load()
-            topk_bge = int(getattr(settings, 'ai_bge_topk_query', 600) or 600)
-            all_indices: list[list[int]] = []
-            for ve in v_embs:
-                ids_lists, _ = idx_bge.search([ve], topk_bge)
-                # ids_lists is a list of lists of FAISS positions; convert to item IDs
-                item_ids = idx_bge.positions_to_item_ids(ids_lists[0]) if ids_lists and ids_lists[0] else []
-                all_indices.append(item_ids)
-
-            # Include user profile vectors if available (redis-stored BGE centers + compressed watch vector)
+            # Collect every query for the secondary index: prompt variants, user profile
+            # centers (redis-stored BGE clusters) and the compressed-history persona text
+            profile_centers: list = []
+            persona_text = ""
             try:
                 from app.core.redis_client import get_redis_sync as _get_redis_sync
+                import json as _json
                 rds = _get_redis_sync()
-                
-                # 1) User profile vectors from BGE clustering
                 pv_raw = rds.get(f"profile_vectors:{user_id or 1}")
                 if pv_raw:
-                    import json as _json
                     centers = _json.loads(pv_raw)
-                    if isinstance(centers, list) and centers:
-                        for ce_vec in centers[:3]:
-                            try:
-                                ids_lists, _ = idx_bge.search([ce_vec], topk_bge)
-                                item_ids = idx_bge.positions_to_item_ids(ids_lists[0]) if ids_lists and ids_lists[0] else []
-                                all_indices.append(item_ids)
-                            except Exception:
-                                pass
-                
-                # 2) Compressed watch vector (user-as-query pattern for personalized recall)
-                # Convert persona_text from history_compression to embedding and use as query
-                compression_raw = rds.get(f"history_compression:{user_id or 1}")
-                if compression_raw:
-                    import json as _json
-                    compression = _json.loads(compression_raw)
-                    persona_text = compression.get("persona_text", "")
-                    if persona_text and len(persona_text) > 20:
-                        try:
-                            # Encode persona text to BGE embedding
-                            persona_emb = embedder_bge.embed([persona_text], batch_size=1)[0]
-                            # Search FAISS with persona embedding as query
-                            ids_lists, _ = idx_bge.search([persona_emb], topk_bge)
-                            item_ids = idx_bge.positions_to_item_ids(ids_lists[0]) if ids_lists and ids_lists[0] else []
-                            all_indices.append(item_ids)
-                            logger.debug(f"[Scorer] Added compressed watch persona query (text_len={len(persona_text)})")
-                        except Exception as e_cv:
-                            logger.warning(f"[Scorer] Failed to use compressed watch persona: {e_cv}")
+                    if isinstance(centers, list):
+                        profile_centers = [c for c in centers[:3] if isinstance(c, list) and c]
             except Exception:
                 pass
+            try:
+                from app.services.persona_context import get_persona_context
+                persona_text = get_persona_context(user_id or 1).persona_text
+                if len(persona_text) <= 20:
+                    persona_text = ""
+            except Exception:
+                persona_text = ""
 
-            # Build ranking over our current candidate subset using best rank across variants
-            n = len(cand_subset)
-            large_rank = max(1, n) + 100000
-            # Map candidate persistent id -> local index
-            cand_id_to_local = {}
+            # One embedding batch (variants + persona) and one (m x d) FAISS search
+            embedder_bge = BGEEmbedder(model_name=settings.ai_bge_model_name)
+            texts_bge = list(variants) + ([persona_text] if persona_text else [])
+            query_mat = np.asarray(embedder_bge.embed(texts_bge, batch_size=32), dtype=np.float32)
+            if profile_centers:
+                try:
+                    centers_mat = np.asarray(profile_centers, dtype=np.float32)
+                    if centers_mat.ndim == 2 and centers_mat.shape[1] == query_mat.shape[1]:
+                        query_mat = np.vstack([query_mat, centers_mat])
+                except Exception:
+                    pass
+            if persona_text:
+                logger.debug(f"[Scorer] Added compressed watch persona query (text_len={len(persona_text)})")
+            idx_bge = BGEIndex(settings.ai_bge_index_dir)
+            idx_bge.load()
+            topk_bge = int(getattr(settings, 'ai_bge_topk_query', 600) or 600)
+            item_id_rows = idx_bge.search_item_ids(query_mat, topk_bge)
+
+            # Fuse all query rows over the current candidate subset
+            cand_ids = np.zeros(len(cand_subset), dtype=np.int64)
             for i, c in enumerate(cand_subset):
                 try:
-                    cid = int(c.get('id') or 0)
+                    cand_ids[i] = int(c.get('id') or 0)
                 except Exception:
-                    cid = 0
-                if cid:
-                    cand_id_to_local[cid] = i
-
-            # Initialize ranks with large default
-            ranks = np.full(n, large_rank, dtype=np.int64)
-            for variant_ids in all_indices:
-                for rank_pos, item_id in enumerate(variant_ids):
-                    local = cand_id_to_local.get(item_id)
-                    if local is not None:
-                        if rank_pos < ranks[local]:
-                            ranks[local] = rank_pos
-
-            # Convert ranks to RRF-like scores and normalize
-            k_rrf = 60
-            bge_scores = np.array([1.0 / (k_rrf + r) if r < large_rank else 0.0 for r in ranks], dtype=np.float32)
+                    cand_ids[i] = 0
+
+            bge_scores = _multi_query_rrf(item_id_rows, cand_ids, k=60).astype(np.float32)
             if bge_scores.size:
                 bge_norm = _normalize(bge_scores)
                 weight = float(getattr(settings, 'ai_bge_weight_in_rrf', 1.1) or 1.1)
@@ -1035,8 +1035,10 @@ def score_candidates(
     genre_emb_bonus = np.zeros(len(cand_subset))
     try:
         if q is not None:
-            for i, cand in enumerate(cand_subset):
+            genres_per_cand: List[List[str]] = []
+            for cand in cand_subset:
                 genres_raw = cand.get("genres", "")
+                genres_cleaned: List[str] = []
                 if genres_raw:
                     # Parse genres (JSON array or comma-separated)
                     try:
@@ -1044,15 +1046,14 @@ def score_candidates(
                             genres_list = json.loads(genres_raw) if genres_raw.startswith("[") else genres_raw.split(",")
                         else:
                             genres_list = genres_raw
-                        
                         genres_cleaned = [str(g).strip().lower() for g in genres_list if g]
-                        
-                        if genres_cleaned:
-                            # Compute similarity
-                            similarity = _compute_genre_embedding_similarity(q, genres_cleaned)
-                            genre_emb_bonus[i] = similarity * 0.10  # 0.10 max bonus for perfect match
                     except Exception:
-                        pass
+                        genres_cleaned = []
+                genres_per_cand.append(genres_cleaned)
+            
+            # One (vocab x dim) @ q product for the whole list, then a max over each candidate's rows
+            from .vocab_embeddings import genre_similarity_bonuses
+            genre_emb_bonus = genre_similarity_bonuses(q, genres_per_cand).astype(np.float64) * 0.10  # 0.10 max bonus for perfect match
             
             matched_count = np.sum(genre_emb_bonus > 0)
             if matched_count > 0:
@@ -1292,12 +1293,8 @@ def score_candidates(
                 _tun, _use_tun = {}, False
             topk_ce = min(int(((_tun.get('ce_topk') if (_use_tun and _tun.get('ce_topk')) else settings.ai_reranker_topk) or 300)), len(cand_subset))
             if topk_ce > 0:
-                from .cross_encoder_reranker import CrossEncoderReranker
-                try:
-                    from app.core.redis_client import get_redis_sync as _get_redis_sync
-                except Exception:
-                    _get_redis_sync = None  # type: ignore
-                reranker = CrossEncoderReranker(settings.ai_reranker_model)
+                from .cross_encoder_reranker import get_rerank_service
+                rerank_service = get_rerank_service(settings.ai_reranker_model)
                 # Build query string with mild context from tone/seasonal
                 q_parts = [prompt_text]
                 if filters.get("tone"):
@@ -1312,47 +1309,18 @@ def score_candidates(
                 proxy = 0.6 * bm25_sim + 0.4 * (faiss_sim if np.any(faiss_sim > 0) else semantic_sim)
                 order_ce = np.argsort(-proxy)[:topk_ce]
                 ce_texts = [texts_subset[i] for i in order_ce]
-                # Try Redis cache per (model, query-hash, candidate-id)
-                if _get_redis_sync is not None:
-                    try:
-                        rds = _get_redis_sync()
-                        import hashlib as _hl
-                        qhash = _hl.sha1(ce_query.encode("utf-8")).hexdigest()
-                        keys = []
-                        missing_idx = []
-                        cached_vals = {}
-                        for j, idx_j in enumerate(order_ce):
-                            cand = cand_subset[idx_j]
-                            cid = int(cand.get("id") or cand.get("trakt_id") or 0)
-                            k = f"ce:{settings.ai_reranker_model}:{qhash}:{cid}"
-                            keys.append(k)
-                            v = rds.get(k)
-                            if v is None:
-                                missing_idx.append(j)
-                            else:
-                                try:
-                                    cached_vals[j] = float(v)
-                                except Exception:
-                                    missing_idx.append(j)
-                        scores_arr = np.zeros(len(order_ce), dtype=np.float32)
-                        # Score only missing
-                        if missing_idx:
-                            texts_to_score = [ce_texts[j] for j in missing_idx]
-                            fresh_scores = reranker.score(ce_query, texts_to_score, batch_size=64)
-                            for pos, sc in zip(missing_idx, fresh_scores):
-                                scores_arr[pos] = float(sc)
-                                try:
-                                    rds.set(keys[pos], str(float(sc)), ex=21600)
-                                except Exception:
-                                    pass
-                        # Fill cached
-                        for pos, sc in cached_vals.items():
-                            scores_arr[pos] = float(sc)
-                        ce_scores = scores_arr
-                    except Exception:
-                        ce_scores = np.array(reranker.score(ce_query, ce_texts, batch_size=64), dtype=np.float32)
-                else:
-                    ce_scores = np.array(reranker.score(ce_query, ce_texts, batch_size=64), dtype=np.float32)
+                # Cached per (model, query hash, text hash); length-bucketed batches for misses.
+                # With early exit enabled, items the CE never reached keep their current signal.
+                early_k = int(settings.ai_reranker_early_exit_topk or 0)
+                raw_scores = rerank_service.score(
+                    ce_query,
+                    ce_texts,
+                    top_k=early_k if early_k > 0 else None,
+                    priors=[float(proxy[i]) for i in order_ce],
+                )
+                kept = [j for j, sc in enumerate(raw_scores) if sc is not None]
+                order_ce = order_ce[kept]
+                ce_scores = np.array([raw_scores[j] for j in kept], dtype=np.float32)
                 # Normalize CE scores to 0..1 and blend into semantic signal
                 if ce_scores.size > 0:
                     ce_min, ce_max = float(ce_scores.min()), float(ce_scores.max())
@@ -2182,9 +2150,8 @@ def score_candidates(
             max_pairs = int(getattr(settings, "ai_llm_pairwise_max_pairs", 120) or 120)
             if results and max_pairs > 1:
                 # Build user context for LLM judge
-                from app.services.persona_helper import PersonaHelper
-                persona_data = PersonaHelper.format_for_prompt(
-                    user_id=user.get("id", 1),
+                from app.services.persona_context import get_persona_context
+                persona_data = get_persona_context(user.get("id", 1)).format_for_prompt(
                     include_history=True,
                     include_pairwise=True
                 )
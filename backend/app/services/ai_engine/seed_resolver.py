@@ -0,0 +1,195 @@
+"""
+seed_resolver.py
+
+Resolve seed titles from "like <title>" prompts to an anchor text
+("Anchor: <title>. Genres: .. Keywords: .. Overview: ..") for query enrichment.
+
+Lookup order, cheapest first:
+  1. seed_title_cache (durable, keyed by normalized title)
+  2. persistent_candidates: exact lower(title) match, then trigram similarity
+     (idx_persistent_candidates_title_lower / idx_persistent_candidates_title_trgm)
+  3. TMDB search (movie, then TV) + metadata fetch
+
+Every outcome, including "not found", is written back to seed_title_cache, so in
+the common case seeded list generation makes no external calls.
+"""
+import json
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.utils.timezone import utc_now
+
+logger = logging.getLogger(__name__)
+
+# Minimum pg_trgm similarity to accept a fuzzy local title match
+TRIGRAM_MIN_SIMILARITY = 0.55
+# Resolutions are refreshed after this long; misses are retried sooner
+RESOLVED_TTL = timedelta(days=90)
+MISS_TTL = timedelta(days=7)
+
+
+@dataclass
+class SeedResolution:
+    seed: str
+    tmdb_id: Optional[int]
+    media_type: Optional[str]
+    title: Optional[str]
+    anchor_text: Optional[str]
+    source: str  # 'cache', 'local', 'tmdb', 'miss'
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    s = unicodedata.normalize("NFKD", str(title or ""))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch)).lower()
+    s = s.replace("&", " and ")
+    s = re.sub(r"[^a-z0-9]+", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def _json_names(value: Any) -> List[str]:
+    """Names from a JSON text column / TMDB list (strings or {"name": ..} dicts)."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except Exception:
+            return [v.strip() for v in value.split(",") if v.strip()]
+    if isinstance(value, dict):
+        value = value.get("keywords") or value.get("results") or []
+    out = []
+    for v in value or []:
+        name = v.get("name") if isinstance(v, dict) else v
+        if name:
+            out.append(str(name))
+    return out
+
+
+def build_anchor_text(title: str, genres: List[str], keywords: List[str], overview: str) -> str:
+    return f"Anchor: {title}. Genres: {', '.join(genres)}. Keywords: {'; '.join(keywords[:12])}. Overview: {overview or ''}"
+
+
+def _anchor_from_tmdb(seed_meta: Dict, seed: str) -> str:
+    title = seed_meta.get("title") or seed_meta.get("name") or seed
+    return build_anchor_text(
+        title,
+        _json_names(seed_meta.get("genres")),
+        _json_names(seed_meta.get("keywords")),
+        seed_meta.get("overview") or "",
+    )
+
+
+def _cached(db, key: str, seed: str) -> Optional[SeedResolution]:
+    row = db.execute(
+        text("SELECT tmdb_id, media_type, title, anchor_text, source, resolved_at FROM seed_title_cache WHERE normalized_title = :k"),
+        {"k": key},
+    ).first()
+    if not row:
+        return None
+    resolved_at = row.resolved_at
+    if resolved_at is not None and resolved_at.tzinfo is None:
+        resolved_at = resolved_at.replace(tzinfo=timezone.utc)
+    ttl = MISS_TTL if row.source == "miss" else RESOLVED_TTL
+    if resolved_at is None or utc_now() - resolved_at > ttl:
+        return None
+    return SeedResolution(seed, row.tmdb_id, row.media_type, row.title, row.anchor_text, "cache")
+
+
+def _store(db, key: str, res: SeedResolution) -> None:
+    try:
+        db.execute(
+            text(
+                """
+                INSERT INTO seed_title_cache (normalized_title, tmdb_id, media_type, title, anchor_text, source, resolved_at)
+                VALUES (:k, :tmdb_id, :media_type, :title, :anchor, :source, :now)
+                ON CONFLICT (normalized_title) DO UPDATE SET
+                    tmdb_id = EXCLUDED.tmdb_id, media_type = EXCLUDED.media_type, title = EXCLUDED.title,
+                    anchor_text = EXCLUDED.anchor_text, source = EXCLUDED.source, resolved_at = EXCLUDED.resolved_at
+                """
+            ),
+            {
+                "k": key, "tmdb_id": res.tmdb_id, "media_type": res.media_type, "title": res.title,
+                "anchor": res.anchor_text, "source": res.source, "now": utc_now(),
+            },
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.debug(f"[SeedResolver] Failed to cache seed '{key}': {e}")
+
+
+def _resolve_local(db, seed: str, key: str) -> Optional[SeedResolution]:
+    cols = "tmdb_id, media_type, title, genres, keywords, overview"
+    row = db.execute(
+        text(
+            f"SELECT {cols} FROM persistent_candidates "
+            "WHERE lower(title) = :t AND active = true "
+            "ORDER BY vote_count DESC NULLS LAST, popularity DESC NULLS LAST LIMIT 1"
+        ),
+        {"t": seed.strip().lower()},
+    ).first()
+    if row is None and key:
+        row = db.execute(
+            text(
+                f"SELECT {cols}, similarity(lower(title), :q) AS sim FROM persistent_candidates "
+                "WHERE lower(title) % :q AND active = true "
+                "ORDER BY sim DESC, vote_count DESC NULLS LAST LIMIT 1"
+            ),
+            {"q": key},
+        ).first()
+        if row is not None and float(row.sim or 0.0) < TRIGRAM_MIN_SIMILARITY:
+            row = None
+    if row is None or not (row.overview or row.genres):
+        return None
+    anchor = build_anchor_text(row.title, _json_names(row.genres), _json_names(row.keywords), row.overview or "")
+    return SeedResolution(seed, int(row.tmdb_id), row.media_type, row.title, anchor, "local")
+
+
+async def _resolve_tmdb(seed: str) -> SeedResolution:
+    from app.services.tmdb_client import search_movies, search_tv, fetch_tmdb_metadata
+
+    for search, media_type, tmdb_media in ((search_movies, "movie", "movie"), (search_tv, "show", "tv")):
+        try:
+            found = await search(seed, page=1)
+            if found and found.get("results"):
+                tmdb_id = found["results"][0].get("id")
+                if tmdb_id:
+                    meta = await fetch_tmdb_metadata(tmdb_id, media_type=tmdb_media)
+                    if meta:
+                        title = meta.get("title") or meta.get("name") or seed
+                        return SeedResolution(seed, int(tmdb_id), media_type, title, _anchor_from_tmdb(meta, seed), "tmdb")
+        except Exception as e:
+            logger.debug(f"[SeedResolver] TMDB {media_type} lookup failed for '{seed}': {e}")
+    return SeedResolution(seed, None, None, None, None, "miss")
+
+
+async def resolve_seed(db, seed: str) -> SeedResolution:
+    """Resolve one seed title via cache -> local candidates -> TMDB, caching the outcome."""
+    key = normalize_title(seed)
+    if not key:
+        return SeedResolution(seed, None, None, None, None, "miss")
+    try:
+        hit = _cached(db, key, seed)
+        if hit is not None:
+            return hit
+    except Exception as e:
+        db.rollback()
+        logger.debug(f"[SeedResolver] Cache lookup failed for '{seed}': {e}")
+    res = None
+    try:
+        res = _resolve_local(db, seed, key)
+    except Exception as e:
+        db.rollback()
+        logger.debug(f"[SeedResolver] Local lookup failed for '{seed}': {e}")
+    if res is None:
+        res = await _resolve_tmdb(seed)
+    logger.info(f"[SeedResolver] '{seed}' resolved via {res.source} -> {res.media_type}:{res.tmdb_id}")
+    _store(db, key, res)
+    return res
@@ -62,6 +62,8 @@ class UserTextProfileService:
             row = UserTextProfile(user_id=user_id, summary_text=summary, tags_json=json.dumps(tags), created_at=utc_now(), updated_at=utc_now())
             db.add(row)
             db.commit()
+            from app.services.persona_context import publish_persona_update
+            publish_persona_update(user_id)
             return {"summary_text": summary, "tags": tags}
         finally:
             db.close()
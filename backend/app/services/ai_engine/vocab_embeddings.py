@@ -0,0 +1,216 @@
+"""
+vocab_embeddings.py
+
+Precomputed MiniLM embedding matrix for the small, fixed vocabularies the scorer
+compares prompts against: TMDB genre names plus the mood/theme words from
+classifiers.MOOD_KEYWORDS and moods_themes_map. The matrix is built once (startup
+warm-up or first use), persisted under /data/ai/vocab_embeddings and versioned by
+model name + vocabulary, so a model change or vocabulary edit triggers a rebuild.
+Terms first seen at scoring time are appended in memory and persisted in batches
+(save_if_due) rather than rewriting the file for every new term.
+
+Per list, genre bonuses become one (vocab x dim) @ (dim,) product plus row lookups
+instead of re-encoding every candidate's genre strings.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VOCAB_DIR = Path(os.getenv("AI_VOCAB_EMBED_DIR", "/data/ai/vocab_embeddings"))
+SAVE_MIN_NEW_TERMS = 32  # Persist appended terms once this many are unsaved...
+SAVE_MIN_INTERVAL = 300.0  # ...or when the last save is older than this (seconds)
+
+# TMDB movie + TV genre names
+GENRE_VOCAB = [
+    "action", "adventure", "animation", "comedy", "crime", "documentary", "drama",
+    "family", "fantasy", "history", "horror", "music", "mystery", "romance",
+    "science fiction", "tv movie", "thriller", "war", "western",
+    "action & adventure", "kids", "news", "reality", "sci-fi & fantasy", "soap",
+    "talk", "war & politics", "anime", "musical",
+]
+
+
+def normalize_term(term) -> str:
+    return str(term).strip().lower()
+
+
+def base_vocabulary() -> List[str]:
+    """Genres, mood keywords and mood/theme/fusion labels, normalized and de-duplicated in order."""
+    from .classifiers import MOOD_KEYWORDS
+    from .moods_themes_map import MOOD_THEME_LABELS
+
+    terms: List[str] = list(GENRE_VOCAB)
+    for mood, words in MOOD_KEYWORDS.items():
+        terms.append(mood)
+        terms.extend(words)
+    terms.extend(MOOD_THEME_LABELS)
+    seen = set()
+    out: List[str] = []
+    for t in terms:
+        n = normalize_term(t)
+        if n and n not in seen:
+            seen.add(n)
+            out.append(n)
+    return out
+
+
+class VocabEmbeddingTable:
+    """Row-normalized float32 embedding matrix with a term -> row index."""
+
+    def __init__(self, model_name: str, terms: List[str], matrix: np.ndarray):
+        self.model_name = model_name
+        self.terms = list(terms)
+        self.index: Dict[str, int] = {t: i for i, t in enumerate(self.terms)}
+        self.matrix = matrix.astype(np.float32, copy=False)
+        self._lock = threading.Lock()
+        self._saved_terms = 0
+        self._last_save = 0.0
+
+    @staticmethod
+    def version_for(model_name: str, terms: List[str]) -> str:
+        h = hashlib.sha1(model_name.encode("utf-8"))
+        h.update("\n".join(terms).encode("utf-8"))
+        return h.hexdigest()[:16]
+
+    @staticmethod
+    def _normalize_rows(mat: np.ndarray) -> np.ndarray:
+        mat = np.asarray(mat, dtype=np.float32)
+        return mat / (np.linalg.norm(mat, axis=1, keepdims=True) + 1e-8)
+
+    @classmethod
+    def build(cls, terms: List[str], embedder=None) -> "VocabEmbeddingTable":
+        from .embeddings import EmbeddingService
+        embedder = embedder or EmbeddingService()
+        mat = cls._normalize_rows(embedder.encode_texts(terms, batch_size=128))
+        return cls(embedder.model_name, terms, mat)
+
+    def rows_for(self, terms: Iterable[str], embedder=None) -> List[int]:
+        """Row indices for ``terms`` (normalized), encoding any unseen terms in one batch."""
+        normalized = [normalize_term(t) for t in terms]
+        unknown = [t for t in dict.fromkeys(normalized) if t and t not in self.index]
+        if unknown:
+            with self._lock:
+                unknown = [t for t in unknown if t not in self.index]
+                if unknown:
+                    from .embeddings import EmbeddingService
+                    embedder = embedder or EmbeddingService(model_name=self.model_name)
+                    extra = self._normalize_rows(embedder.encode_texts(unknown, batch_size=128))
+                    self.matrix = np.vstack([self.matrix, extra])
+                    for t in unknown:
+                        self.index[t] = len(self.terms)
+                        self.terms.append(t)
+        return [self.index[t] for t in normalized if t in self.index]
+
+    def similarities(self, query_vec: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every vocabulary row to ``query_vec``."""
+        q = np.asarray(query_vec, dtype=np.float32).reshape(-1)
+        q = q / (np.linalg.norm(q) + 1e-8)
+        return self.matrix @ q
+
+    def save(self, directory: Path = VOCAB_DIR) -> Optional[Path]:
+        with self._lock:
+            terms, matrix = list(self.terms), self.matrix
+        tmp = None
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{self.model_name.replace('/', '__')}.npz"
+            # Unique temp file: concurrent savers (threads or worker processes) never share one
+            with tempfile.NamedTemporaryFile(dir=directory, prefix=path.stem, suffix=".tmp.npz", delete=False) as f:
+                tmp = f.name
+                np.savez(f, matrix=matrix, terms=np.array(json.dumps(terms)),
+                         version=np.array(self.version_for(self.model_name, terms)))
+            os.replace(tmp, path)
+            self._saved_terms = max(self._saved_terms, len(terms))
+            self._last_save = time.monotonic()
+            return path
+        except Exception as e:
+            logger.warning(f"[VocabEmb] Failed to persist vocabulary embeddings: {e}")
+            if tmp and os.path.exists(tmp):
+                os.unlink(tmp)
+            return None
+
+    def save_if_due(self, directory: Path = VOCAB_DIR, force: bool = False) -> Optional[Path]:
+        """Persist appended terms once SAVE_MIN_NEW_TERMS accumulate or SAVE_MIN_INTERVAL has passed."""
+        unsaved = len(self.terms) - self._saved_terms
+        if unsaved <= 0:
+            return None
+        if not force and unsaved < SAVE_MIN_NEW_TERMS and time.monotonic() - self._last_save < SAVE_MIN_INTERVAL:
+            return None
+        return self.save(directory)
+
+    @classmethod
+    def load(cls, model_name: str, base_terms: List[str], directory: Path = VOCAB_DIR) -> Optional["VocabEmbeddingTable"]:
+        """Load a persisted table if it was built with ``model_name`` and starts with ``base_terms``."""
+        path = directory / f"{model_name.replace('/', '__')}.npz"
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                terms = json.loads(str(data["terms"]))
+                version = str(data["version"])
+                matrix = data["matrix"]
+            if version != cls.version_for(model_name, terms) or terms[:len(base_terms)] != base_terms:
+                return None
+            if matrix.shape[0] != len(terms):
+                return None
+            table = cls(model_name, terms, matrix)
+            table._saved_terms = len(terms)
+            table._last_save = time.monotonic()
+            return table
+        except Exception as e:
+            logger.warning(f"[VocabEmb] Ignoring unreadable vocabulary file {path}: {e}")
+            return None
+
+
+_table: Optional[VocabEmbeddingTable] = None
+_table_lock = threading.Lock()
+
+
+def get_vocab_table() -> VocabEmbeddingTable:
+    """Process-wide vocabulary table: load the persisted matrix or build and persist it."""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                from .embeddings import MODEL_NAME
+                terms = base_vocabulary()
+                table = VocabEmbeddingTable.load(MODEL_NAME, terms)
+                if table is None:
+                    table = VocabEmbeddingTable.build(terms)
+                    table.save()
+                    logger.info(f"[VocabEmb] Built vocabulary embeddings for {len(terms)} terms")
+                _table = table
+    return _table
+
+
+def genre_similarity_bonuses(query_vec: np.ndarray, candidate_genres: List[List[str]]) -> np.ndarray:
+    """Max cosine similarity between the query and each candidate's genres (0 when none).
+
+    New genre strings are encoded once (batched) and added to the table, which persists
+    them in batches; the per-list cost is one matrix-vector product and a gather per candidate.
+    """
+    out = np.zeros(len(candidate_genres), dtype=np.float32)
+    if query_vec is None or not candidate_genres:
+        return out
+    table = get_vocab_table()
+    all_terms = [g for genres in candidate_genres for g in genres]
+    if not all_terms:
+        return out
+    table.rows_for(all_terms)
+    table.save_if_due()
+    sims = table.similarities(query_vec)
+    for i, genres in enumerate(candidate_genres):
+        rows = [table.index[normalize_term(g)] for g in genres if normalize_term(g) in table.index]
+        if rows:
+            out[i] = float(np.max(sims[rows]))
+    return out
@@ -3017,6 +3017,7 @@ class BulkCandidateProvider:
                 
                 # Compute scores
                 pc.compute_scores()
+                pc.compute_content_hash()
                 
                 # Add to session
                 self.db.add(pc)
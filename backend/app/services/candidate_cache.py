@@ -0,0 +1,218 @@
+"""
+candidate_cache.py
+
+Shared read model for persistent_candidates rows.
+
+A candidate is cached as a compact dict of CANDIDATE_COLUMNS (no cast, keywords,
+embedding or other large TMDB blobs) keyed by (tmdb_id, media_type), in two layers:
+  - a bounded in-process LRU (LOCAL_MAX_ENTRIES entries, LOCAL_TTL seconds)
+  - Redis `candidate:{media_type}:{tmdb_id}` JSON strings (REDIS_TTL seconds)
+
+get_many() resolves a batch with at most one MGET and one column-only DB query,
+and writes DB hits back to both layers. Writers (candidate_enricher, ingestion)
+call invalidate_candidates() after commit: it replaces the Redis entries with an
+empty tombstone for TOMBSTONE_TTL seconds and drops this process's local copies;
+other processes' local copies expire within LOCAL_TTL. Write-backs are SET NX, so
+a DB read that raced an invalidation cannot re-cache the stale row behind the
+tombstone.
+Only active rows are returned (and cached).
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.redis_client import get_redis_sync
+
+logger = logging.getLogger(__name__)
+
+CandidateKey = Tuple[int, str]
+
+CANDIDATE_COLUMNS = (
+    "id", "trakt_id", "tmdb_id", "media_type", "title", "original_title", "year",
+    "release_date", "first_air_date", "language", "genres", "overview", "runtime",
+    "popularity", "vote_average", "vote_count", "poster_path", "backdrop_path",
+    "obscurity_score", "mainstream_score", "freshness_score",
+)
+LOCAL_MAX_ENTRIES = 20000
+LOCAL_TTL = 60
+REDIS_TTL = 60 * 60 * 6
+TOMBSTONE_TTL = 30  # must outlast a get_many DB read that started before the writer committed
+REDIS_KEY_PREFIX = "candidate"
+
+_local: "OrderedDict[CandidateKey, Tuple[Dict[str, Any], float]]" = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _redis_key(key: CandidateKey) -> str:
+    return f"{REDIS_KEY_PREFIX}:{key[1]}:{key[0]}"
+
+
+def _normalize_key(tmdb_id: Any, media_type: Any) -> Optional[CandidateKey]:
+    try:
+        return int(tmdb_id), str(media_type)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_genres(raw: Any) -> List[str]:
+    """Genre list from the stored JSON array (older rows use 'A|B')."""
+    if not raw:
+        return []
+    if isinstance(raw, list):
+        return raw
+    try:
+        genres = json.loads(raw)
+        return genres if isinstance(genres, list) else []
+    except (TypeError, ValueError):
+        return [g for g in str(raw).split("|") if g]
+
+
+def candidate_columns() -> List[Any]:
+    """PersistentCandidate attributes for a query that skips the large columns."""
+    from app.models import PersistentCandidate
+    return [getattr(PersistentCandidate, name) for name in CANDIDATE_COLUMNS]
+
+
+def candidate_record(row: Any) -> Dict[str, Any]:
+    """Compact dict from a PersistentCandidate (or a candidate_columns() result row)."""
+    record = {name: getattr(row, name, None) for name in CANDIDATE_COLUMNS}
+    record["genres"] = parse_genres(record["genres"])
+    return record
+
+
+def to_scoring_dict(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Candidate dict in the shape ScoringEngine expects (Trakt-style aliases included)."""
+    return {
+        **record,
+        "ids": {"trakt": record.get("trakt_id"), "tmdb": record.get("tmdb_id")},
+        "type": record.get("media_type"),
+        "rating": record.get("vote_average") or 0,
+        "vote_average": record.get("vote_average") or 0,
+        "votes": record.get("vote_count") or 0,
+        "vote_count": record.get("vote_count") or 0,
+        "overview": record.get("overview") or "",
+        "popularity": record.get("popularity") or 0,
+        "obscurity_score": record.get("obscurity_score") or 0,
+        "mainstream_score": record.get("mainstream_score") or 0,
+        "freshness_score": record.get("freshness_score") or 0,
+        "_from_persistent_store": True,  # Flag for scoring engine
+    }
+
+
+def _local_get(keys: Iterable[CandidateKey], out: Dict[CandidateKey, Dict[str, Any]]) -> None:
+    now = time.monotonic()
+    with _local_lock:
+        for key in keys:
+            hit = _local.get(key)
+            if hit is None:
+                continue
+            if hit[1] <= now:
+                del _local[key]
+                continue
+            _local.move_to_end(key)
+            out[key] = hit[0]
+
+
+def _local_put(records: Dict[CandidateKey, Dict[str, Any]]) -> None:
+    expires = time.monotonic() + LOCAL_TTL
+    with _local_lock:
+        for key, record in records.items():
+            _local[key] = (record, expires)
+            _local.move_to_end(key)
+        while len(_local) > LOCAL_MAX_ENTRIES:
+            _local.popitem(last=False)
+
+
+def _load_from_db(keys: List[CandidateKey], db=None) -> Dict[CandidateKey, Dict[str, Any]]:
+    from sqlalchemy import tuple_
+    from app.models import PersistentCandidate
+
+    own_session = db is None
+    if own_session:
+        from app.core.database import SessionLocal
+        db = SessionLocal()
+    try:
+        rows = db.query(*candidate_columns()).filter(
+            tuple_(PersistentCandidate.tmdb_id, PersistentCandidate.media_type).in_(keys),
+            PersistentCandidate.active == True,
+        ).all()
+        return {(row.tmdb_id, row.media_type): candidate_record(row) for row in rows}
+    finally:
+        if own_session:
+            db.close()
+
+
+def get_many(keys: Iterable[Tuple[Any, Any]], db=None) -> Dict[CandidateKey, Dict[str, Any]]:
+    """Records for (tmdb_id, media_type) keys; missing/inactive candidates are absent.
+
+    Callers must treat the returned dicts as read-only (they are shared with the LRU).
+    """
+    wanted = list(dict.fromkeys(k for k in (_normalize_key(*key) for key in keys) if k))
+    found: Dict[CandidateKey, Dict[str, Any]] = {}
+    if not wanted:
+        return found
+    _local_get(wanted, found)
+    missing = [k for k in wanted if k not in found]
+    if not missing:
+        return found
+
+    from_redis: Dict[CandidateKey, Dict[str, Any]] = {}
+    r = None
+    try:
+        r = get_redis_sync()
+        for key, raw in zip(missing, r.mget([_redis_key(k) for k in missing])):
+            if raw:
+                from_redis[key] = json.loads(raw)
+    except Exception as e:
+        logger.debug(f"[CandidateCache] Redis read failed, falling back to DB: {e}")
+    missing = [k for k in missing if k not in from_redis]
+
+    from_db = _load_from_db(missing, db) if missing else {}
+    cacheable = from_db
+    if from_db and r is not None:
+        try:
+            pipe = r.pipeline(transaction=False)
+            for key, record in from_db.items():
+                pipe.set(_redis_key(key), json.dumps(record), ex=REDIS_TTL, nx=True)
+            written = pipe.execute()
+            # A key that could not be written is tombstoned: the row may have changed under our read
+            cacheable = {key: record for (key, record), ok in zip(from_db.items(), written) if ok}
+        except Exception as e:
+            logger.debug(f"[CandidateCache] Redis write-back failed: {e}")
+
+    _local_put({**from_redis, **cacheable})
+    found.update(from_redis)
+    found.update(from_db)
+    if from_db:
+        logger.debug(f"[CandidateCache] {len(wanted)} keys: {len(from_redis)} from Redis, {len(from_db)} from DB")
+    return found
+
+
+def get_candidate(tmdb_id: int, media_type: str, db=None) -> Optional[Dict[str, Any]]:
+    key = _normalize_key(tmdb_id, media_type)
+    return get_many([key], db).get(key) if key else None
+
+
+def invalidate_candidates(keys: Iterable[Tuple[Any, Any]]) -> None:
+    """Drop cached records after the rows were written (call after commit)."""
+    keys = [k for k in (_normalize_key(*key) for key in keys) if k]
+    if not keys:
+        return
+    with _local_lock:
+        for key in keys:
+            _local.pop(key, None)
+    try:
+        pipe = get_redis_sync().pipeline(transaction=False)
+        for key in keys:
+            pipe.set(_redis_key(key), "", ex=TOMBSTONE_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"[CandidateCache] Failed to invalidate {len(keys)} cached candidates: {e}")
+
+
+def clear_local_cache() -> None:
+    with _local_lock:
+        _local.clear()
@@ -7,7 +7,8 @@ Responsible for:
 Design notes:
  - We favor TMDB for breadth & metadata; Trakt mapping can be deferred (lazy) to reduce API pressure.
  - Use CandidateIngestionState for per media_type release_date checkpoints (YYYY-MM-DD).
- - Rate limiting: lightweight async sleeps between page fetches; stop early on sparse results.
+ - Rate limiting: TMDB calls go through the shared Redis limiter (rate_limit.with_backoff);
+   ingestion only bounds its own concurrency. Stop early on sparse results.
  - Compute derived scores using PersistentCandidate.compute_scores().
 """
 from __future__ import annotations
@@ -17,11 +18,14 @@ import datetime as dt
 import json
 from typing import List, Optional
 
+from sqlalchemy import literal_column, or_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.core.database import SessionLocal
 from app.core.redis_client import get_redis_sync
 from app.models import PersistentCandidate, CandidateIngestionState
+from app.services.candidate_cache import invalidate_candidates
 from app.utils.logger import logger
 
 from app.services.tmdb_client import discover_movies, discover_tv, fetch_tmdb_metadata, search_multi
@@ -29,6 +33,10 @@ from app.services.trakt_client import TraktClient
 
 MIN_YEAR = 2024
 RECENT_DAYS_REFRESH = 90
+# Concurrent TMDB detail fetches per ingestion page (pacing itself comes from the shared tmdb_api limiter)
+INGEST_ENRICH_CONCURRENCY = 8
+# Fields refreshed on rows that already exist
+INGEST_FAST_FIELDS = ('popularity', 'vote_average', 'vote_count')
 
 def _update_worker_status(media_type: str, status: str, error: Optional[str] = None, items_processed: int = 0):
     """Update worker status in Redis."""
@@ -47,10 +55,111 @@ def _update_worker_status(media_type: str, status: str, error: Optional[str] = N
     except Exception as e:
         logger.warning(f"Failed to update worker status: {e}")
 
+async def _fetch_discover_page(fetch_fn, media_type: str, page: int) -> Optional[dict]:
+    try:
+        return await fetch_fn(page=page)
+    except Exception as e:
+        logger.debug(f"Ingest {media_type} page {page} failed: {e}")
+        await asyncio.sleep(0.5)
+        return None
+
+
+def _existing_tmdb_ids(db: Session, media_type: str, tmdb_ids: List[int]) -> set:
+    """tmdb_ids of this media type already in persistent_candidates (one query per page)."""
+    if not tmdb_ids:
+        return set()
+    rows = db.execute(
+        text("SELECT tmdb_id FROM persistent_candidates WHERE media_type = :mt AND tmdb_id = ANY(:ids)"),
+        {"mt": media_type, "ids": list(tmdb_ids)},
+    ).fetchall()
+    return {r.tmdb_id for r in rows}
+
+
+async def _enrich_new_items(rows: List[dict], tmdb_media: str, media_type: str) -> None:
+    """Fetch full TMDB metadata for new rows concurrently (in place).
+
+    Concurrency is bounded locally; request pacing is enforced by the shared
+    Redis 'tmdb_api' limiter inside fetch_tmdb_metadata.
+    """
+    from app.services.tmdb_client import extract_enriched_fields
+
+    sem = asyncio.Semaphore(INGEST_ENRICH_CONCURRENCY)
+
+    async def _one(row: dict):
+        async with sem:
+            try:
+                tmdb_metadata = await fetch_tmdb_metadata(row['tmdb_id'], tmdb_media)
+            except Exception as e:
+                logger.warning(f"Failed to fetch enriched metadata for {row['tmdb_id']}: {e}")
+                return
+        if tmdb_metadata:
+            row.update(extract_enriched_fields(tmdb_metadata, media_type))
+            logger.debug(f"Enriched TMDB {row['tmdb_id']} with cast/keywords/production details")
+        else:
+            logger.warning(f"TMDB {row['tmdb_id']} returned null metadata - persisting with basic fields only")
+
+    await asyncio.gather(*(_one(r) for r in rows))
+
+
+def _with_derived_fields(row: dict) -> dict:
+    """Fill scores and content_hash exactly as the model computes them."""
+    pc = PersistentCandidate(**row)
+    pc.compute_scores()
+    pc.compute_content_hash()
+    for field in ('obscurity_score', 'mainstream_score', 'freshness_score', 'content_hash'):
+        row[field] = getattr(pc, field)
+    return row
+
+
+def _upsert_page(db: Session, rows: List[dict]) -> int:
+    """Write a page with INSERT ... ON CONFLICT (tmdb_id, media_type); returns the number of inserted rows.
+
+    Multi-row VALUES needs uniform keys, so rows are grouped by their column set (enriched
+    and basic-only rows differ) and each group is one statement; a column a row does not
+    carry keeps its column default instead of being written as NULL. Rows that already
+    exist only get their vote/popularity fields (and derived scores) updated, and only when
+    those changed. Their content_hash is kept, so the nightly BGE build does not treat a
+    vote change as stale text.
+    """
+    if not rows:
+        return 0
+    groups: dict = {}
+    for r in rows:
+        groups.setdefault(tuple(sorted(r)), []).append(r)
+    table = PersistentCandidate.__table__
+    result = []
+    for group in groups.values():
+        stmt = pg_insert(table).values(group)
+        ex = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            # Matches the unique index (not always a named constraint, see scripts/fix_tmdb_constraint.py)
+            index_elements=['tmdb_id', 'media_type'],
+            set_={
+                'popularity': ex.popularity,
+                'vote_average': ex.vote_average,
+                'vote_count': ex.vote_count,
+                'obscurity_score': ex.obscurity_score,
+                'mainstream_score': ex.mainstream_score,
+                'freshness_score': ex.freshness_score,
+                'last_refreshed': ex.last_refreshed,
+                # content_hash is left alone: it covers the embedded text fields, not votes
+            },
+            where=or_(*(table.c[f].is_distinct_from(ex[f]) for f in INGEST_FAST_FIELDS)),
+        ).returning(table.c.tmdb_id, table.c.media_type, literal_column("(xmax = 0)").label("inserted"))
+        result.extend(db.execute(stmt).fetchall())
+    db.commit()
+    invalidate_candidates((r.tmdb_id, r.media_type) for r in result if not r.inserted)
+    return sum(1 for r in result if r.inserted)
+
+
 async def ingest_new_content(media_type: str = 'movies', pages: int = 5, per_page: int = 20) -> int:
     """Ingest new TMDB content newer than last checkpoint (or MIN_YEAR baseline).
 
-    Returns number of upserted rows.
+    Pipeline per discover page: one existence query for all ids, concurrent
+    enrichment of the new ones, one INSERT ... ON CONFLICT per column set. The next page is
+    fetched while the current one is being enriched.
+
+    Returns number of inserted rows.
     """
     assert media_type in ('movies','shows')
     _update_worker_status(media_type, "running")
@@ -65,6 +174,7 @@ async def ingest_new_content(media_type: str = 'movies', pages: int = 5, per_pag
     except Exception:
         pass
     
+    next_page = None
     try:
         state = db.query(CandidateIngestionState).filter_by(media_type=media_type).one_or_none()
         last_date = None
@@ -73,17 +183,21 @@ async def ingest_new_content(media_type: str = 'movies', pages: int = 5, per_pag
         cutoff_year = MIN_YEAR
         new_last_date = last_date
         fetch_fn = discover_movies if media_type == 'movies' else discover_tv
+        tmdb_media = 'movie' if media_type == 'movies' else 'tv'
+        pc_media = 'movie' if media_type == 'movies' else 'show'
+        next_page = asyncio.create_task(_fetch_discover_page(fetch_fn, media_type, 1))
         for page in range(1, pages + 1):
-            try:
-                data = await fetch_fn(page=page)
-            except Exception as e:
-                logger.debug(f"Ingest {media_type} page {page} failed: {e}")
-                await asyncio.sleep(0.5)
+            data = await next_page
+            next_page = None
+            if page < pages:
+                # Prefetch the next page while this one is enriched and written
+                next_page = asyncio.create_task(_fetch_discover_page(fetch_fn, media_type, page + 1))
+            if data is None:
                 continue
-            results = (data or {}).get('results') or []
+            results = data.get('results') or []
             if not results:
                 break
-            batch_objs: List[PersistentCandidate] = []
+            page_rows = {}
             for item in results:
                 release_date = item.get('release_date') or item.get('first_air_date')
                 if not release_date:
@@ -106,68 +220,34 @@ async def ingest_new_content(media_type: str = 'movies', pages: int = 5, per_pag
                 if not title:
                     logger.debug(f"Skipping TMDB {tmdb_id}: missing title")
                     continue
-                
-                # Build or update existing record
-                existing: Optional[PersistentCandidate] = db.query(PersistentCandidate).filter_by(tmdb_id=tmdb_id).one_or_none()
-                if existing:
-                    # Light update of fast fields only if missing popularity/votes
-                    updated = False
-                    for field, src_key in [('popularity','popularity'), ('vote_average','vote_average'), ('vote_count','vote_count')]:
-                        val = item.get(src_key)
-                        if val is not None and getattr(existing, field) != val:
-                            setattr(existing, field, val)
-                            updated = True
-                    if updated:
-                        existing.last_refreshed = dt.datetime.utcnow()
-                        existing.compute_scores()
-                else:
-                    # Fetch comprehensive metadata for new items (includes cast, keywords, etc.)
-                    tmdb_metadata = None
-                    enriched_fields = {}
-                    try:
-                        from app.services.tmdb_client import fetch_tmdb_metadata, extract_enriched_fields
-                        tmdb_metadata = await fetch_tmdb_metadata(tmdb_id, 'movie' if media_type=='movies' else 'tv')
-                        if tmdb_metadata:
-                            enriched_fields = extract_enriched_fields(tmdb_metadata, 'movie' if media_type=='movies' else 'show')
-                            logger.debug(f"Enriched TMDB {tmdb_id} with cast/keywords/production details")
-                        else:
-                            logger.warning(f"TMDB {tmdb_id} returned null metadata - persisting with basic fields only")
-                    except Exception as e:
-                        logger.warning(f"Failed to fetch enriched metadata for {tmdb_id}: {e}")
-                    
-                    pc = PersistentCandidate(
-                        tmdb_id=tmdb_id,
-                        trakt_id=None,
-                        media_type='movie' if media_type=='movies' else 'show',
-                        title=title,
-                        original_title=item.get('original_title') or item.get('original_name'),
-                        year=year,
-                        release_date=release_date,
-                        language=(item.get('original_language') or '').lower(),
-                        popularity=item.get('popularity') or 0.0,
-                        vote_average=item.get('vote_average') or 0.0,
-                        vote_count=item.get('vote_count') or 0,
-                        overview=item.get('overview'),
-                        poster_path=item.get('poster_path'),
-                        backdrop_path=item.get('backdrop_path'),
-                        manual=False,
-                        # Add enriched fields if available
-                        **enriched_fields
-                    )
-                    pc.compute_scores()
-                    batch_objs.append(pc)
-                    if not new_last_date or release_date > new_last_date:
-                        new_last_date = release_date
-                    
-                    # Add small delay after fetching detailed metadata to respect rate limits
-                    if tmdb_metadata:
-                        await asyncio.sleep(0.05)
-            if batch_objs:
-                db.bulk_save_objects(batch_objs)
-                db.commit()
-                inserted += len(batch_objs)
-            # Rate limit pacing
-            await asyncio.sleep(0.25)
+                page_rows[tmdb_id] = dict(
+                    tmdb_id=tmdb_id,
+                    trakt_id=None,
+                    media_type=pc_media,
+                    title=title,
+                    original_title=item.get('original_title') or item.get('original_name'),
+                    year=year,
+                    release_date=release_date,
+                    language=(item.get('original_language') or '').lower(),
+                    popularity=item.get('popularity') or 0.0,
+                    vote_average=item.get('vote_average') or 0.0,
+                    vote_count=item.get('vote_count') or 0,
+                    overview=item.get('overview'),
+                    poster_path=item.get('poster_path'),
+                    backdrop_path=item.get('backdrop_path'),
+                    manual=False,
+                    last_refreshed=dt.datetime.utcnow(),
+                )
+            if not page_rows:
+                continue
+            existing = _existing_tmdb_ids(db, pc_media, list(page_rows))
+            new_rows = [r for tid, r in page_rows.items() if tid not in existing]
+            # Fetch comprehensive metadata for new items only (includes cast, keywords, etc.)
+            await _enrich_new_items(new_rows, tmdb_media, pc_media)
+            inserted += _upsert_page(db, [_with_derived_fields(r) for r in page_rows.values()])
+            for r in new_rows:
+                if not new_last_date or r['release_date'] > new_last_date:
+                    new_last_date = r['release_date']
         # Update checkpoint
         if not state:
             state = CandidateIngestionState(media_type=media_type, last_release_date=new_last_date)
@@ -231,6 +311,8 @@ async def ingest_new_content(media_type: str = 'movies', pages: int = 5, per_pag
         
         return inserted
     finally:
+        if next_page is not None and not next_page.done():
+            next_page.cancel()
         db.close()
 
 async def refresh_recent_votes(media_type: str = 'movies', days: int = RECENT_DAYS_REFRESH, batch_limit: int = 400) -> int:
@@ -248,6 +330,7 @@ async def refresh_recent_votes(media_type: str = 'movies', days: int = RECENT_DA
     except Exception:
         pass
     
+    changed_keys = []
     try:
         cutoff = dt.datetime.utcnow() - dt.timedelta(days=days)
         # Filter by release_date year/ freshness_score or inserted_at recency
@@ -270,12 +353,15 @@ async def refresh_recent_votes(media_type: str = 'movies', days: int = RECENT_DA
                 if changed:
                     row.last_refreshed = dt.datetime.utcnow()
                     row.compute_scores()
+                    row.compute_content_hash()
+                    changed_keys.append((row.tmdb_id, row.media_type))
                     updated += 1
                 await asyncio.sleep(0.05)
             except Exception:
                 continue
         if updated:
             db.commit()
+            invalidate_candidates(changed_keys)
         logger.info(f"Refreshed votes for {updated} recent {media_type} candidates")
         
         # Send completion notification
@@ -441,6 +527,7 @@ async def ingest_via_search_multi(media_type: str = 'movies', duration_minutes:
                     **enriched_fields
                 )
                 pc.compute_scores()
+                pc.compute_content_hash()
                 new_objs.append(pc)
 
             if new_objs:
@@ -515,6 +602,7 @@ async def ingest_specific_tmdb_ids(
         'trakt_mapped': 0,
         'failed': 0
     }
+    touched_keys = []
     
     logger.info(f"[TargetedIngestion] Starting ingestion of {len(tmdb_ids)} {media_type} TMDB IDs ({source_label})")
     
@@ -565,6 +653,7 @@ async def ingest_specific_tmdb_ids(
                 ).first()
                 
                 if existing:
+                    touched_keys.append((existing.tmdb_id, existing.media_type))
                     # Determine if fresh (<= 7 days since last_refreshed)
                     try:
                         now = dt.datetime.utcnow()
@@ -594,6 +683,7 @@ async def ingest_specific_tmdb_ids(
                                 setattr(existing, field_name, field_value)
 
                         existing.compute_scores()
+                        existing.compute_content_hash()
                         stats['updated'] += 1
                 else:
                     # Insert new entry with all enriched fields
@@ -628,6 +718,7 @@ async def ingest_specific_tmdb_ids(
                         **enriched_fields  # Add all enriched fields (cast, keywords, etc.)
                     )
                     pc.compute_scores()
+                    pc.compute_content_hash()
                     db.add(pc)
                     stats['inserted'] += 1
                 
@@ -645,6 +736,7 @@ async def ingest_specific_tmdb_ids(
         
         # Final commit
         db.commit()
+        invalidate_candidates(touched_keys)
         
         logger.info(f"[TargetedIngestion] ✅ Completed {source_label} ingestion: {stats}")
         return stats
@@ -8,9 +8,10 @@ Service for generating and syncing dynamic Smart Lists (mood, fusion, theme) for
 - No external API calls during sync
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any
 from sqlalchemy.orm import Session
 from app.models import UserList, PersistentCandidate, ListItem
+from app.services import candidate_cache
 from app.services.scoring_engine import ScoringEngine
 from app.services.trakt_client import TraktClient
 from app.core.database import SessionLocal
@@ -59,6 +60,9 @@ class DynamicListService:
             new_lists.append(ul)
         if new_lists:
             db.commit()
+            from app.services.list_sync_scheduler import schedule_list
+            for ul in new_lists:
+                schedule_list(ul)
             lists += new_lists
         return lists
 
@@ -115,75 +119,15 @@ class DynamicListService:
             logger.warning(f"[DynamicList] sync_dynamic_lists_impl failed: {e}")
 
     def get_candidates(self, db: Session) -> List[PersistentCandidate]:
-        """Return all candidates."""
-        return db.query(PersistentCandidate).all()
+        """Return all candidates (compact columns only: no cast/keywords/embedding)."""
+        return db.query(*candidate_cache.candidate_columns()).all()
 
     def _cand_to_dict(self, c: PersistentCandidate) -> Dict[str, Any]:
-        genres: Optional[List[str]] = None
-        try:
-            if c.genres:
-                g = json.loads(c.genres)
-                if isinstance(g, list):
-                    genres = g
-        except Exception:
-            genres = []
-        return {
-            'ids': {'trakt': c.trakt_id, 'tmdb': c.tmdb_id},
-            'type': c.media_type,
-            'media_type': c.media_type,  # Ensure both fields are set
-            'trakt_id': c.trakt_id,
-            'tmdb_id': c.tmdb_id,
-            'title': c.title,
-            'year': c.year,
-            'rating': c.vote_average or 0,
-            'vote_average': c.vote_average or 0,
-            'votes': c.vote_count or 0,
-            'vote_count': c.vote_count or 0,
-            'genres': genres or [],
-            'overview': c.overview or '',
-            'popularity': c.popularity or 0,
-            'language': c.language,
-            'obscurity_score': c.obscurity_score or 0,
-            'mainstream_score': c.mainstream_score or 0,
-            'freshness_score': c.freshness_score or 0,
-            '_from_persistent_store': True  # Flag for scoring engine
-        }
-
-    
+        return candidate_cache.to_scoring_dict(candidate_cache.candidate_record(c))
 
     async def sync_dynamic_lists_impl(self, db: Session, lists: List[UserList], candidates: List[PersistentCandidate]):
         """Internal implementation of dynamic list sync (extracted for clarity)."""
-        def _cand_to_dict(c: PersistentCandidate) -> dict:
-            genres = []
-            try:
-                g = json.loads(c.genres)
-                if isinstance(g, list):
-                    genres = g
-            except Exception:
-                genres = []
-            return {
-                'ids': {'trakt': c.trakt_id, 'tmdb': c.tmdb_id},
-                'type': c.media_type,
-                'media_type': c.media_type,  # Ensure both fields are set
-                'trakt_id': c.trakt_id,
-                'tmdb_id': c.tmdb_id,
-                'title': c.title,
-                'year': c.year,
-                'rating': c.vote_average or 0,
-                'vote_average': c.vote_average or 0,
-                'votes': c.vote_count or 0,
-                'vote_count': c.vote_count or 0,
-                'genres': genres or [],
-                'overview': c.overview or '',
-                'popularity': c.popularity or 0,
-                'language': c.language,
-                'obscurity_score': c.obscurity_score or 0,
-                'mainstream_score': c.mainstream_score or 0,
-                'freshness_score': c.freshness_score or 0,
-                '_from_persistent_store': True  # Flag for scoring engine
-            }
-
-        converted = [_cand_to_dict(c) for c in candidates]
+        converted = [self._cand_to_dict(c) for c in candidates]
         title_by_trakt = {c.trakt_id: c.title for c in candidates if c.trakt_id}
 
         for ul in lists:
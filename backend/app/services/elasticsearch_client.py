@@ -7,6 +7,7 @@ Enhanced with mood/tone/theme extraction for intelligent matching.
 """
 import logging
 import time
+from types import SimpleNamespace
 from typing import List, Dict, Any, Optional
 from elasticsearch import Elasticsearch, helpers
 from elasticsearch.exceptions import NotFoundError, ConnectionError as ESConnectionError
@@ -184,10 +185,49 @@ class ElasticSearchClient:
             logger.error(f"Failed to create index: {e}")
             return False
     
-    def index_candidates(self, candidates: List[Dict[str, Any]]) -> int:
+    def _document_action(self, c: Dict[str, Any], profile_text: Optional[str], extractor) -> Dict[str, Any]:
+        """Bulk index action for one candidate, with mood/tone/themes from its profile text."""
+        if profile_text:
+            tags = extractor.extract_from_profile(SimpleNamespace(profile_text=profile_text))
+        else:
+            # Fallback: extract from overview + genres
+            tags = extractor.extract_from_text(f"{c.get('overview', '')} {c.get('genres', '')}")
+        return {
+            "_index": INDEX_NAME,
+            "_id": f"{c['tmdb_id']}_{c['media_type']}",
+            "_source": {
+                "tmdb_id": c['tmdb_id'],
+                "media_type": c['media_type'],
+                "title": c.get('title', ''),
+                "original_title": c.get('original_title', ''),
+                "overview": c.get('overview', ''),
+                "tagline": c.get('tagline', ''),
+                "genres": c.get('genres', ''),
+                "keywords": c.get('keywords', ''),
+                "cast": c.get('cast', ''),
+                "created_by": c.get('created_by', ''),
+                "networks": c.get('networks', ''),
+                "production_companies": c.get('production_companies', ''),
+                "production_countries": c.get('production_countries', ''),
+                "spoken_languages": c.get('spoken_languages', ''),
+                "year": c.get('year'),
+                "popularity": c.get('popularity'),
+                "vote_average": c.get('vote_average'),
+                "vote_count": c.get('vote_count'),
+                "mood_tags": tags.get('mood_tags', []),
+                "tone_tags": tags.get('tone_tags', []),
+                "themes": tags.get('themes', [])
+            }
+        }
+
+    def index_candidates(self, candidates: List[Dict[str, Any]], thread_count: int = 1, chunk_size: int = 100) -> int:
         """
         Bulk index candidates into ElasticSearch using a streaming generator
         to minimize memory usage. Enriches with mood/tone/themes from ItemLLMProfile.
+
+        Candidates that already carry a 'profile_text' key (selected by the caller's
+        query) skip the ItemLLMProfile lookup. thread_count > 1 sends chunks through
+        helpers.parallel_bulk.
         """
         if not self.es:
             logger.error("Not connected to ElasticSearch")
@@ -196,68 +236,53 @@ class ElasticSearchClient:
         if not candidates:
             return 0
         
-        # Fetch ItemLLMProfiles for candidates (batch lookup)
-        db = SessionLocal()
-        try:
-            tmdb_ids = [c['tmdb_id'] for c in candidates]
-            # Join with persistent_candidates to get tmdb_id
-            profiles = db.query(ItemLLMProfile, PersistentCandidate.tmdb_id).join(
-                PersistentCandidate, ItemLLMProfile.candidate_id == PersistentCandidate.id
-            ).filter(
-                PersistentCandidate.tmdb_id.in_(tmdb_ids)
-            ).all()
-            profile_map = {tmdb_id: profile for profile, tmdb_id in profiles}
-        finally:
-            db.close()
+        profile_map: Dict[Any, Optional[str]] = {}
+        if not all('profile_text' in c for c in candidates):
+            # Fetch ItemLLMProfiles for candidates (batch lookup)
+            db = SessionLocal()
+            try:
+                tmdb_ids = [c['tmdb_id'] for c in candidates]
+                # Join with persistent_candidates to get tmdb_id
+                profiles = db.query(ItemLLMProfile, PersistentCandidate.tmdb_id).join(
+                    PersistentCandidate, ItemLLMProfile.candidate_id == PersistentCandidate.id
+                ).filter(
+                    PersistentCandidate.tmdb_id.in_(tmdb_ids)
+                ).all()
+                profile_map = {tmdb_id: profile.profile_text for profile, tmdb_id in profiles}
+            finally:
+                db.close()
         
         # Extract mood/tone/themes
         extractor = get_mood_extractor()
 
         def action_generator():
             for c in candidates:
-                # Get mood/tone/themes from profile
-                profile = profile_map.get(c['tmdb_id'])
-                tags = {'mood_tags': [], 'tone_tags': [], 'themes': []}
-                if profile:
-                    tags = extractor.extract_from_profile(profile)
-                else:
-                    # Fallback: extract from overview + genres
-                    text = f"{c.get('overview', '')} {c.get('genres', '')}"
-                    tags = extractor.extract_from_text(text)
-                
-                yield {
-                    "_index": INDEX_NAME,
-                    "_id": f"{c['tmdb_id']}_{c['media_type']}",
-                    "_source": {
-                        "tmdb_id": c['tmdb_id'],
-                        "media_type": c['media_type'],
-                        "title": c.get('title', ''),
-                        "original_title": c.get('original_title', ''),
-                        "overview": c.get('overview', ''),
-                        "tagline": c.get('tagline', ''),
-                        "genres": c.get('genres', ''),
-                        "keywords": c.get('keywords', ''),
-                        "cast": c.get('cast', ''),
-                        "created_by": c.get('created_by', ''),
-                        "networks": c.get('networks', ''),
-                        "production_companies": c.get('production_companies', ''),
-                        "production_countries": c.get('production_countries', ''),
-                        "spoken_languages": c.get('spoken_languages', ''),
-                        "year": c.get('year'),
-                        "popularity": c.get('popularity'),
-                        "vote_average": c.get('vote_average'),
-                        "vote_count": c.get('vote_count'),
-                        "mood_tags": tags.get('mood_tags', []),
-                        "tone_tags": tags.get('tone_tags', []),
-                        "themes": tags.get('themes', [])
-                    }
-                }
+                profile_text = c['profile_text'] if 'profile_text' in c else profile_map.get(c['tmdb_id'])
+                yield self._document_action(c, profile_text, extractor)
 
         try:
+            if thread_count > 1:
+                success = failed = 0
+                for ok, _ in helpers.parallel_bulk(
+                    self.es,
+                    action_generator(),
+                    thread_count=thread_count,
+                    chunk_size=chunk_size,
+                    queue_size=thread_count,
+                    request_timeout=60,
+                    raise_on_error=False,
+                    raise_on_exception=False
+                ):
+                    if ok:
+                        success += 1
+                    else:
+                        failed += 1
+                logger.debug(f"Indexed {success} documents, {failed} failures")
+                return success
             success, failed = helpers.bulk(
                 self.es,
                 action_generator(),
-                chunk_size=100,
+                chunk_size=chunk_size,
                 request_timeout=30,
                 raise_on_error=False
             )
@@ -266,6 +291,38 @@ class ElasticSearchClient:
         except Exception as e:
             logger.error(f"Failed to bulk index: {e}")
             return 0
+
+    def delete_documents(self, keys: List[tuple]) -> int:
+        """Delete documents by (tmdb_id, media_type); missing documents are ignored."""
+        if not self.es or not keys:
+            return 0
+        actions = ({"_op_type": "delete", "_index": INDEX_NAME, "_id": f"{tmdb_id}_{media_type}"} for tmdb_id, media_type in keys)
+        try:
+            deleted, _ = helpers.bulk(self.es, actions, chunk_size=500, request_timeout=30, raise_on_error=False)
+            return deleted
+        except Exception as e:
+            logger.error(f"Failed to bulk delete: {e}")
+            return 0
+
+    def get_index_meta(self) -> Dict[str, Any]:
+        """Custom mapping _meta of the index (e.g. the last_refreshed watermark of the last reindex)."""
+        if not self.es:
+            return {}
+        try:
+            mapping = self.es.indices.get_mapping(index=INDEX_NAME)
+            return dict(mapping[INDEX_NAME]["mappings"].get("_meta") or {})
+        except Exception:
+            return {}
+
+    def set_index_meta(self, meta: Dict[str, Any]) -> bool:
+        if not self.es:
+            return False
+        try:
+            self.es.indices.put_mapping(index=INDEX_NAME, meta=meta)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to update index meta: {e}")
+            return False
     
     def search(
         self,
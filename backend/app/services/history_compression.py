@@ -3,22 +3,101 @@ History compression service for user watch history.
 
 Compresses user watch history into compact persona vectors and text summaries
 using phi3:mini LLM. Implements recency decay and version tracking.
+
+Reads only local tables (trakt_watch_history, kept current by the watch
+history sync, and user_ratings) - no Trakt API calls. A fingerprint of those
+tables (latest watched_at, event count, ratings checksum) decides the work:
+  - unchanged: cached compression is returned, no LLM call
+  - new watch events only: watch vector is decayed and extended with the new events
+  - ratings changed / history rewritten: watch vector is rebuilt from all events
 """
 import json
 import logging
+import math
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import hashlib
 
-from sqlalchemy import desc
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from app.core.redis_client import get_redis
 from app.core.database import SessionLocal
 from app.models import User, UserTextProfile
-from app.services.trakt_client import TraktClient
+from app.services.persona_context import publish_persona_update
 
 logger = logging.getLogger(__name__)
 
+WATCH_VECTOR_HALF_LIFE_DAYS = 180.0  # Watch event weight halves every 6 months
+THUMB_RATING_EQUIVALENT = {1: 8, -1: 3}  # user_ratings thumbs mapped onto the Trakt 1-10 scale
+
+_FINGERPRINT_SQL = text("""
+    SELECT
+        (SELECT MAX(watched_at) FROM trakt_watch_history WHERE user_id = :uid) AS max_watched_at,
+        (SELECT COUNT(*) FROM trakt_watch_history WHERE user_id = :uid) AS event_count,
+        (SELECT md5(COALESCE(string_agg(k, ',' ORDER BY k), '')) FROM (
+            SELECT DISTINCT 'h:' || media_type || ':' || trakt_id || ':' || user_trakt_rating AS k
+            FROM trakt_watch_history
+            WHERE user_id = :uid AND user_trakt_rating IS NOT NULL
+            UNION ALL
+            SELECT 'u:' || media_type || ':' || trakt_id || ':' || rating
+            FROM user_ratings
+            WHERE user_id = :uid
+        ) r) AS ratings_checksum
+""")
+
+# Latest event per title (Trakt "watched" shape: last_watched_at + plays)
+_TITLES_SQL = text("""
+    SELECT * FROM (
+        SELECT DISTINCT ON (h.trakt_id)
+               h.trakt_id, h.media_type, h.title, h.year, h.genres, h.watched_at,
+               h.user_trakt_rating, ur.rating AS thumb,
+               COUNT(*) OVER (PARTITION BY h.trakt_id) AS plays
+        FROM trakt_watch_history h
+        LEFT JOIN user_ratings ur
+               ON ur.user_id = h.user_id AND ur.trakt_id = h.trakt_id AND ur.media_type = h.media_type
+        WHERE h.user_id = :uid AND h.media_type = :media_type
+        ORDER BY h.trakt_id, h.watched_at DESC
+    ) t
+    ORDER BY watched_at DESC
+    LIMIT :limit
+""")
+
+_EVENTS_SQL = """
+    SELECT h.media_type, h.genres, h.watched_at, h.user_trakt_rating, ur.rating AS thumb
+    FROM trakt_watch_history h
+    LEFT JOIN user_ratings ur
+           ON ur.user_id = h.user_id AND ur.trakt_id = h.trakt_id AND ur.media_type = h.media_type
+    WHERE h.user_id = :uid {since_clause}
+"""
+
+
+def _as_utc(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _parse_genres(raw: Any) -> List[str]:
+    if not raw:
+        return []
+    try:
+        genres = json.loads(raw) if isinstance(raw, str) else raw
+    except Exception:
+        return []
+    return [g for g in genres if isinstance(g, str)] if isinstance(genres, list) else []
+
+
+def _effective_rating(trakt_rating: Optional[int], thumb: Optional[int]) -> Optional[int]:
+    if trakt_rating:
+        return trakt_rating
+    return THUMB_RATING_EQUIVALENT.get(thumb)
+
+
+def _decay(days: float) -> float:
+    return 0.5 ** (max(0.0, days) / WATCH_VECTOR_HALF_LIFE_DAYS)
+
 
 class HistoryCompressor:
     """Compresses watch history into persona summaries."""
@@ -37,57 +116,52 @@ class HistoryCompressor:
         
         Args:
             db: Database session
-            max_items: Maximum number of recent history items to include
-            force_rebuild: Force rebuild even if recent version exists
+            max_items: Maximum number of recent titles to feed the persona prompt
+            force_rebuild: Rebuild persona and watch vector even if the fingerprint is unchanged
             
         Returns:
             Dict with persona_text, watch_vector, version, and metadata
         """
-        # Check for existing compressed history
-        if not force_rebuild:
-            existing = await self._get_cached_compression()
-            if existing and self._is_fresh(existing):
-                logger.info(f"Using cached history compression for user {self.user_id}")
-                return existing
-                
-        # Fetch watch history from Trakt
-        trakt_client = TraktClient(user_id=self.user_id)
+        existing = await self._get_cached_compression()
         
         try:
-            # Get watched movies and shows with ratings
-            movies = await trakt_client.get_watched_movies(limit=max_items // 2)
-            shows = await trakt_client.get_watched_shows(limit=max_items // 2)
-            
-            # Get user ratings
-            movie_ratings = await trakt_client.get_user_ratings(media_type='movies', limit=100)
-            show_ratings = await trakt_client.get_user_ratings(media_type='shows', limit=100)
-            
+            fingerprint = self._compute_fingerprint(db)
         except Exception as e:
-            logger.error(f"Failed to fetch Trakt history for user {self.user_id}: {e}")
-            return self._get_empty_compression()
-            
-        # Combine and sort by recency
-        all_history = self._combine_history(movies, shows, movie_ratings, show_ratings)
+            logger.error(f"Failed to fingerprint watch history for user {self.user_id}: {e}")
+            return existing or self._get_empty_compression()
         
-        if not all_history:
+        if not fingerprint["count"]:
             logger.warning(f"No watch history found for user {self.user_id}")
             return self._get_empty_compression()
-            
+        
+        if existing and not force_rebuild and existing.get("fingerprint") == fingerprint:
+            logger.info(f"Watch history unchanged for user {self.user_id} (version {existing.get('version')}), reusing compression")
+            # Refresh TTL so an idle user keeps their compression
+            await self._cache_compression(existing)
+            return existing
+        
+        all_history = self._load_local_history(db, max_items)
+        
         # Apply recency decay weighting
         weighted_history = self._apply_recency_decay(all_history, max_items)
         
+        # Generate compressed watch vector (genre/keyword weights), incrementally when possible
+        now = datetime.now(timezone.utc)
+        watch_vector_raw, incremental = self._build_watch_vector_raw(db, existing, fingerprint, now, force_rebuild)
+        watch_vector = self._normalize_watch_vector(watch_vector_raw)
+        
         # Generate persona text summary via phi3:mini
         persona_text = await self._generate_persona_text(weighted_history)
         
-        # Generate compressed watch vector (genre/keyword weights)
-        watch_vector = self._generate_watch_vector(weighted_history)
-        
         # Create compression result
         compression = {
             "persona_text": persona_text,
             "watch_vector": watch_vector,
-            "version": self._compute_version(all_history),
-            "compressed_at": datetime.now(timezone.utc).isoformat(),
+            "watch_vector_raw": watch_vector_raw,
+            "vector_as_of": now.isoformat(),
+            "fingerprint": fingerprint,
+            "version": self._compute_version(fingerprint),
+            "compressed_at": now.isoformat(),
             "item_count": len(weighted_history),
             "user_id": self.user_id
         }
@@ -98,59 +172,46 @@ class HistoryCompressor:
         # Update UserTextProfile in database
         self._update_user_profile(db, persona_text, watch_vector)
         
-        logger.info(f"Compressed history for user {self.user_id}: {len(weighted_history)} items -> {len(persona_text)} chars persona")
+        # Drop cached persona contexts in every process
+        publish_persona_update(self.user_id, compression["version"])
+        
+        logger.info(
+            f"Compressed history for user {self.user_id}: {len(weighted_history)} items -> {len(persona_text)} chars persona "
+            f"({'incremental' if incremental else 'full'} watch vector over {fingerprint['count']} events)"
+        )
         
         return compression
         
-    def _combine_history(
-        self, 
-        movies: List[Dict], 
-        shows: List[Dict],
-        movie_ratings: List[Dict],
-        show_ratings: List[Dict]
-    ) -> List[Dict]:
-        """Combine watch history and ratings into unified list."""
-        history = []
+    def _compute_fingerprint(self, db: Session) -> Dict[str, Any]:
+        """Version fingerprint of the local history and ratings (one query)."""
+        row = db.execute(_FINGERPRINT_SQL, {"uid": self.user_id}).first()
+        max_watched_at = _as_utc(row.max_watched_at)
+        return {
+            "max_watched_at": max_watched_at.isoformat() if max_watched_at else None,
+            "count": int(row.event_count or 0),
+            "ratings": row.ratings_checksum or "",
+        }
         
-        # Add movies
-        for movie in movies:
-            history.append({
-                "type": "movie",
-                "title": movie.get("movie", {}).get("title", "Unknown"),
-                "year": movie.get("movie", {}).get("year"),
-                "genres": movie.get("movie", {}).get("genres", []),
-                "watched_at": movie.get("last_watched_at"),
-                "plays": movie.get("plays", 1),
-                "rating": None
-            })
-            
-        # Add shows
-        for show in shows:
-            history.append({
-                "type": "show",
-                "title": show.get("show", {}).get("title", "Unknown"),
-                "year": show.get("show", {}).get("year"),
-                "genres": show.get("show", {}).get("genres", []),
-                "watched_at": show.get("last_watched_at"),
-                "plays": show.get("plays", 1),
-                "rating": None
-            })
-            
-        # Merge ratings
-        rating_map = {}
-        for rating in movie_ratings:
-            title = rating.get("movie", {}).get("title")
-            if title:
-                rating_map[title] = rating.get("rating")
-                
-        for rating in show_ratings:
-            title = rating.get("show", {}).get("title")
-            if title:
-                rating_map[title] = rating.get("rating")
-                
-        for item in history:
-            if item["title"] in rating_map:
-                item["rating"] = rating_map[item["title"]]
+    def _load_local_history(self, db: Session, max_items: int) -> List[Dict]:
+        """Most recently watched titles (movies and shows, max_items // 2 each) from trakt_watch_history."""
+        history = []
+        for media_type in ("movie", "show"):
+            rows = db.execute(_TITLES_SQL, {
+                "uid": self.user_id,
+                "media_type": media_type,
+                "limit": max(1, max_items // 2),
+            }).fetchall()
+            for row in rows:
+                watched_at = _as_utc(row.watched_at)
+                history.append({
+                    "type": media_type,
+                    "title": row.title or "Unknown",
+                    "year": row.year,
+                    "genres": _parse_genres(row.genres),
+                    "watched_at": watched_at.isoformat() if watched_at else None,
+                    "plays": int(row.plays or 1),
+                    "rating": _effective_rating(row.user_trakt_rating, row.thumb)
+                })
                 
         # Sort by watched_at descending (most recent first)
         history.sort(key=lambda x: x.get("watched_at") or "", reverse=True)
@@ -170,7 +231,6 @@ class HistoryCompressor:
         
         # Apply exponential decay: weight = e^(-0.01 * position)
         for i, item in enumerate(history):
-            import math
             decay_factor = math.exp(-0.01 * i)
             item["recency_weight"] = decay_factor
             
@@ -267,53 +327,95 @@ Highly rated: {', '.join(top_rated[:5]) if top_rated else 'None'}
         else:
             return f"Enjoys {genre_str}. Recently watched {len(recent_items)} titles including {recent_items[0]['title']}."
             
-    def _generate_watch_vector(self, weighted_history: List[Dict]) -> Dict[str, float]:
-        """Generate compressed watch vector with genre/keyword weights.
-        
-        Uses recency weights to emphasize recent viewing patterns.
+    def _build_watch_vector_raw(
+        self,
+        db: Session,
+        existing: Optional[Dict[str, Any]],
+        fingerprint: Dict[str, Any],
+        now: datetime,
+        force_rebuild: bool
+    ) -> Tuple[Dict[str, float], bool]:
+        """Unnormalized, time-decayed watch vector and whether it was built incrementally.
+
+        Every watch event contributes with weight 0.5 ** (age_days / half-life), so
+        the previous vector only needs one decay factor before the events watched
+        since the previous fingerprint are added. Any other change (ratings, deleted
+        or backfilled events) rebuilds from all events.
         """
+        previous = (existing or {}).get("fingerprint") or {}
+        raw = (existing or {}).get("watch_vector_raw")
+        as_of = (existing or {}).get("vector_as_of")
+        
+        if (
+            not force_rebuild
+            and raw is not None
+            and as_of
+            and previous.get("max_watched_at")
+            and previous.get("ratings") == fingerprint["ratings"]
+            and previous.get("count", 0) <= fingerprint["count"]
+        ):
+            events = self._load_watch_events(db, since=_as_utc(previous["max_watched_at"]))
+            if len(events) == fingerprint["count"] - previous["count"]:
+                factor = _decay((now - _as_utc(as_of)).total_seconds() / 86400)
+                vector = {k: v * factor for k, v in raw.items()}
+                self._accumulate_watch_vector(vector, events, now)
+                return vector, True
+        
         vector: Dict[str, float] = {}
+        self._accumulate_watch_vector(vector, self._load_watch_events(db), now)
+        return vector, False
+        
+    def _load_watch_events(self, db: Session, since: Optional[datetime] = None) -> List[Any]:
+        """Watch events (optionally only those after `since`) with their effective rating inputs."""
+        params: Dict[str, Any] = {"uid": self.user_id}
+        since_clause = ""
+        if since is not None:
+            since_clause = "AND h.watched_at > :since"
+            # Column is naive UTC
+            params["since"] = since.astimezone(timezone.utc).replace(tzinfo=None)
+        return db.execute(text(_EVENTS_SQL.format(since_clause=since_clause)), params).fetchall()
         
-        for item in weighted_history:
-            weight = item.get("recency_weight", 1.0)
+    def _accumulate_watch_vector(self, vector: Dict[str, float], events: List[Any], now: datetime) -> None:
+        """Add decayed genre/rating/type weights of watch events to `vector` in place."""
+        for event in events:
+            watched_at = _as_utc(event.watched_at)
+            weight = _decay((now - watched_at).total_seconds() / 86400) if watched_at else 0.0
+            if weight <= 0:
+                continue
             
             # Genre weights
-            for genre in item.get("genres", []):
+            for genre in _parse_genres(event.genres):
                 genre_key = f"genre:{genre.lower()}"
                 vector[genre_key] = vector.get(genre_key, 0) + weight
                 
             # Rating boost (if highly rated)
-            if item.get("rating") and item["rating"] >= 8:
+            rating = _effective_rating(event.user_trakt_rating, event.thumb)
+            if rating and rating >= 8:
                 vector["high_rated"] = vector.get("high_rated", 0) + weight * 1.5
                 
             # Type preference
-            type_key = f"type:{item['type']}"
+            type_key = f"type:{event.media_type}"
             vector[type_key] = vector.get(type_key, 0) + weight
             
-        # Normalize vector (max value = 1.0)
-        if vector:
-            max_value = max(vector.values())
-            if max_value > 0:
-                vector = {k: v / max_value for k, v in vector.items()}
-                
-        return vector
-        
-    def _compute_version(self, history: List[Dict]) -> str:
-        """Compute version hash of watch history for cache invalidation."""
-        # Use first 50 items to generate hash (balance freshness vs stability)
-        items_for_hash = history[:50]
-        hash_input = json.dumps([
-            {"title": item["title"], "watched_at": item.get("watched_at")}
-            for item in items_for_hash
-        ], sort_keys=True)
+    def _normalize_watch_vector(self, raw: Dict[str, float]) -> Dict[str, float]:
+        """Normalize watch vector (max value = 1.0)."""
+        if not raw:
+            return {}
+        max_value = max(raw.values())
+        if max_value <= 0:
+            return {}
+        return {k: v / max_value for k, v in raw.items()}
         
+    def _compute_version(self, fingerprint: Dict[str, Any]) -> str:
+        """Compute version hash of the history fingerprint for cache invalidation."""
+        hash_input = json.dumps(fingerprint, sort_keys=True)
         return hashlib.md5(hash_input.encode()).hexdigest()[:12]
         
     async def _get_cached_compression(self) -> Optional[Dict[str, Any]]:
         """Get cached compression from Redis."""
         try:
             key = f"history_compression:{self.user_id}"
-            data = self.redis.get(key)
+            data = await self.redis.get(key)
             if data:
                 return json.loads(data)
         except Exception as e:
@@ -324,7 +426,7 @@ Highly rated: {', '.join(top_rated[:5]) if top_rated else 'None'}
         """Cache compression in Redis with 7-day TTL."""
         try:
             key = f"history_compression:{self.user_id}"
-            self.redis.setex(
+            await self.redis.setex(
                 key, 
                 60 * 60 * 24 * 7,  # 7 days
                 json.dumps(compression)
@@ -332,15 +434,6 @@ Highly rated: {', '.join(top_rated[:5]) if top_rated else 'None'}
         except Exception as e:
             logger.error(f"Failed to cache compression: {e}")
             
-    def _is_fresh(self, compression: Dict[str, Any]) -> bool:
-        """Check if cached compression is fresh (< 24 hours old)."""
-        try:
-            compressed_at = datetime.fromisoformat(compression["compressed_at"])
-            age_hours = (datetime.now(timezone.utc) - compressed_at).total_seconds() / 3600
-            return age_hours < 24
-        except Exception:
-            return False
-            
     def _get_empty_compression(self) -> Dict[str, Any]:
         """Return empty compression result."""
         return {
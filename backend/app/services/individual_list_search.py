@@ -3,7 +3,8 @@ individual_list_search.py
 
 Hybrid search service for Individual Lists combining:
 1. BGE Multi-Vector + FAISS semantic search (dual-index)
-2. ElasticSearch literal fuzzy search with query enhancement (mood/tone/theme)
+2. ElasticSearch literal fuzzy search with query enhancement (mood/tone/theme),
+   or the in-process local index when ES is unavailable (see text_search.py)
 
 Results are merged, deduplicated, and enriched with metadata.
 Enhanced with natural language understanding and intelligent boosting.
@@ -13,11 +14,12 @@ import logging
 from typing import List, Dict, Any, Optional
 import numpy as np
 
-from app.services.elasticsearch_client import get_elasticsearch_client
+from app.services.text_search import get_text_search_backend
 from app.services.ai_engine.embeddings import EmbeddingService
 from app.services.ai_engine.faiss_index import load_index
 from app.services.ai_engine.dual_index_search import hybrid_search
 from app.services.ai_engine.query_enhancer import QueryEnhancer
+from app.services import candidate_cache
 from app.services.fit_scoring import FitScorer
 from app.core.database import SessionLocal
 from app.models import PersistentCandidate
@@ -50,7 +52,6 @@ class IndividualListSearchService:
         self.user_id = user_id
         self.embedding_service = EmbeddingService()
         self.fit_scorer = FitScorer(user_id)
-        self.es_client = get_elasticsearch_client()
         self.query_enhancer = QueryEnhancer()
     
     def search(
@@ -281,8 +282,9 @@ class IndividualListSearchService:
             # Skip ES for very short queries to keep autocomplete snappy
             if not query or len(query.strip()) < 3:
                 return []
-            if not self.es_client.is_connected():
-                logger.warning("ElasticSearch not connected, skipping literal search")
+            backend = get_text_search_backend()
+            if not backend.is_connected():
+                logger.warning("No literal search backend available (ElasticSearch down, local index empty)")
                 return []
             
             # Build enhanced filters for boosting
@@ -291,7 +293,7 @@ class IndividualListSearchService:
                 es_filters = self.query_enhancer.build_es_filters(enhanced)
             
             # Use the broader field set even for multi-word queries to avoid missing obvious matches
-            results = self.es_client.search(
+            results = backend.search(
                 query, 
                 media_type, 
                 limit=ES_TOP_K, 
@@ -393,59 +395,34 @@ class IndividualListSearchService:
         if not results:
             return []
         
-        # Extract tmdb_ids and media_types
-        tmdb_ids = [r['tmdb_id'] for r in results]
+        # One cache round trip for the whole batch (DB only for misses)
+        candidate_map = candidate_cache.get_many((r['tmdb_id'], r['media_type']) for r in results)
         
-        # Fetch from DB
-        db = SessionLocal()
-        try:
-            candidates = db.query(PersistentCandidate).filter(
-                PersistentCandidate.tmdb_id.in_(tmdb_ids),
-                PersistentCandidate.active == True
-            ).all()
-            
-            # Create lookup
-            candidate_map = {
-                (c.tmdb_id, c.media_type): c
-                for c in candidates
-            }
-            
-            # Enrich results
-            enriched = []
-            for result in results:
-                key = (result['tmdb_id'], result['media_type'])
-                candidate = candidate_map.get(key)
-                
-                if not candidate:
-                    logger.warning(f"No candidate found for tmdb_id={result['tmdb_id']}, media_type={result['media_type']}")
-                    continue
-                
-                # Parse JSON fields
-                genres = []
-                try:
-                    genres = json.loads(candidate.genres) if candidate.genres else []
-                except:
-                    pass
-                
-                enriched_result = {
-                    'tmdb_id': candidate.tmdb_id,
-                    'trakt_id': candidate.trakt_id,
-                    'media_type': candidate.media_type,
-                    'title': candidate.title,
-                    'original_title': candidate.original_title,
-                    'year': candidate.year,
-                    'overview': candidate.overview,
-                    'poster_path': candidate.poster_path,
-                    'backdrop_path': candidate.backdrop_path,
-                    'genres': genres,
-                    'popularity': candidate.popularity,
-                    'vote_average': candidate.vote_average,
-                    '_search_score': result['_search_score'],
-                    '_sources': result['sources']
-                }
-                enriched.append(enriched_result)
+        enriched = []
+        for result in results:
+            key = (result['tmdb_id'], result['media_type'])
+            candidate = candidate_map.get(key)
             
-            return enriched
+            if not candidate:
+                logger.warning(f"No candidate found for tmdb_id={result['tmdb_id']}, media_type={result['media_type']}")
+                continue
             
-        finally:
-            db.close()
+            enriched_result = {
+                'tmdb_id': candidate['tmdb_id'],
+                'trakt_id': candidate['trakt_id'],
+                'media_type': candidate['media_type'],
+                'title': candidate['title'],
+                'original_title': candidate['original_title'],
+                'year': candidate['year'],
+                'overview': candidate['overview'],
+                'poster_path': candidate['poster_path'],
+                'backdrop_path': candidate['backdrop_path'],
+                'genres': list(candidate['genres']),
+                'popularity': candidate['popularity'],
+                'vote_average': candidate['vote_average'],
+                '_search_score': result['_search_score'],
+                '_sources': result['sources']
+            }
+            enriched.append(enriched_result)
+        
+        return enriched
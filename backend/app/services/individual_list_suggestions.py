@@ -3,7 +3,7 @@ individual_list_suggestions.py
 
 AI-powered suggestions service for Individual Lists.
 Generates intelligent suggestions based on current list items using:
-- Dual-index semantic search (BGE multi-vector + FAISS fallback)
+- FAISS neighbor search from stored embeddings (list centroid + per-item queries)
 - LLM-generated personalized rationales
 - Genre diversification
 - User profile fit scoring
@@ -17,10 +17,15 @@ from collections import Counter
 import numpy as np
 import asyncio
 import httpx
-from sqlalchemy import or_
+from sqlalchemy import tuple_
 
-from app.services.ai_engine.faiss_index import load_index, get_embedding_from_index
-from app.services.ai_engine.dual_index_search import hybrid_search
+from app.services.ai_engine.faiss_index import (
+    HNSW_EF_SEARCH,
+    _l2_normalize,
+    deserialize_embedding,
+    load_index,
+)
+from app.services import candidate_cache
 from app.services.fit_scoring import FitScorer
 from app.core.database import SessionLocal
 from app.core.redis_client import get_redis_sync
@@ -31,6 +36,8 @@ logger = logging.getLogger(__name__)
 SUGGESTIONS_LIMIT = 20
 NEIGHBORS_PER_ITEM = 30  # Increased for better dual-index coverage
 MIN_SIMILARITY = 0.40  # Slightly lower for broader suggestions
+MAX_ITEM_QUERIES = 50  # Per-item ANN queries per request; the centroid is built from every list item
+CENTROID_RANK_DECAY = 0.05  # Centroid weight 1/(1 + decay * list position)
 
 
 class IndividualListSuggestionsService:
@@ -38,8 +45,8 @@ class IndividualListSuggestionsService:
     Generate smart suggestions for Individual Lists using FAISS.
     
     Workflow:
-    1. Get embeddings for all items currently in the list
-    2. Query FAISS for nearest neighbors of each item
+    1. Load stored embeddings for the items currently in the list
+    2. Query FAISS once with the weighted list centroid and each item vector
     3. Aggregate and score candidates by:
        - Frequency (how many list items recommend it)
        - Average similarity score
@@ -258,145 +265,122 @@ class IndividualListSuggestionsService:
         existing_ids: Set[tuple]
     ) -> List[Dict[str, Any]]:
         """
-        Get nearest neighbors using dual-index hybrid search (BGE + FAISS).
+        Get nearest neighbors of the list from stored MiniLM embeddings.
         
-        Builds composite query from list items, then uses multi-vector BGE search
-        with FAISS fallback for better semantic matching.
+        Loads the embeddings of the list items in one query, then runs a single
+        batched FAISS search with a weighted centroid of all list items plus one
+        query per item (first MAX_ITEM_QUERIES by list order). Items already in the list
+        are excluded by trakt_id before any DB lookup, and the remaining
+        neighbors are resolved in one query. HNSW search keeps latency tied to
+        list size rather than catalogue size.
         
-        Returns list of candidates with {tmdb_id, media_type, similarity_scores, frequency}.
+        Returns list of candidates with {tmdb_id, media_type, avg_similarity, max_similarity, frequency}.
         """
         try:
-            # Build composite query from list items' titles and metadata
-            query_parts = []
+            ordered = sorted(list_items, key=lambda li: li.order_index or 0)
+            list_keys = [(li.tmdb_id, li.media_type) for li in ordered]
+            
             db = SessionLocal()
             try:
-                # Fetch metadata for list items to build rich query
-                tmdb_ids = [item.tmdb_id for item in list_items[:10]]  # Limit to top 10 items
-                candidates = db.query(PersistentCandidate).filter(
-                    PersistentCandidate.tmdb_id.in_(tmdb_ids)
+                rows = db.query(
+                    PersistentCandidate.tmdb_id,
+                    PersistentCandidate.media_type,
+                    PersistentCandidate.embedding
+                ).filter(
+                    tuple_(PersistentCandidate.tmdb_id, PersistentCandidate.media_type).in_(list_keys),
+                    PersistentCandidate.embedding.isnot(None)
                 ).all()
                 
-                for candidate in candidates:
-                    if candidate.title:
-                        query_parts.append(candidate.title)
-                    # Add genres and overview snippets for context
-                    try:
-                        if candidate.genres:
-                            genres = json.loads(candidate.genres)
-                            query_parts.extend(genres[:3])  # Top 3 genres
-                    except:
-                        pass
-                    
-                    # Add overview keywords (first 50 chars)
-                    if candidate.overview:
-                        query_parts.append(candidate.overview[:50])
+                # Precompute exclusions in FAISS id space (trakt_id) for the whole list
+                excluded_trakt_ids = {li.trakt_id for li in list_items if li.trakt_id}
+                missing_trakt = [(li.tmdb_id, li.media_type) for li in list_items if not li.trakt_id]
+                if missing_trakt:
+                    excluded_trakt_ids.update(
+                        tid for (tid,) in db.query(PersistentCandidate.trakt_id).filter(
+                            tuple_(PersistentCandidate.tmdb_id, PersistentCandidate.media_type).in_(missing_trakt),
+                            PersistentCandidate.trakt_id.isnot(None)
+                        ).all()
+                    )
             finally:
                 db.close()
             
-            # Build query string
-            query_text = " ".join(query_parts[:20])  # Limit total parts
-            if not query_text:
-                logger.warning("No query text built from list items, falling back to basic FAISS")
-                # Fallback to old method if query building fails
-                return self._get_faiss_neighbors_fallback(list_items, existing_ids)
+            embeddings = {(r.tmdb_id, r.media_type): r.embedding for r in rows}
+            vectors, weights = [], []
+            for position, key in enumerate(list_keys):
+                blob = embeddings.get(key)
+                if blob is None:
+                    continue
+                vectors.append(deserialize_embedding(blob))
+                # Items the user placed near the top of the list pull the centroid harder
+                weights.append(1.0 / (1.0 + CENTROID_RANK_DECAY * position))
             
-            logger.debug(f"Built query from {len(list_items)} list items: {query_text[:100]}...")
+            if not vectors:
+                logger.warning(f"No stored embeddings for {len(list_items)} list items")
+                return []
             
-            # Get candidate pool from database for hybrid search
-            db2 = SessionLocal()
-            try:
-                # Get broad candidate pool based on list items' characteristics
-                search_terms = query_text.lower().split()[:5]  # Top 5 terms
-                
-                query_obj = db2.query(PersistentCandidate)
-                
-                # Broad matching on title/overview
-                if search_terms:
-                    conditions = []
-                    for term in search_terms:
-                        conditions.append(PersistentCandidate.title.ilike(f'%{term}%'))
-                        conditions.append(PersistentCandidate.overview.ilike(f'%{term}%'))
-                    query_obj = query_obj.filter(or_(*conditions))
-                
-                candidate_pool = query_obj.limit(1000).all()
-                
-                if not candidate_pool:
-                    logger.warning("No candidates found for hybrid search, falling back")
-                    return self._get_faiss_neighbors_fallback(list_items, existing_ids)
-                
-                logger.debug(f"Found {len(candidate_pool)} candidates for hybrid search")
-                
-                # Use dual-index hybrid search with candidate pool
-                search_results = hybrid_search(
-                    db=db2,
-                    user_id=self.user_id,
-                    candidate_pool=candidate_pool,
-                    top_k=NEIGHBORS_PER_ITEM * len(list_items),  # More results to dedupe
-                    bge_weight=0.7,  # Prefer BGE multi-vector (better semantic understanding)
-                    faiss_weight=0.3
-                )
-            finally:
-                db2.close()
+            item_vectors = _l2_normalize(np.vstack(vectors))
+            centroid = (np.asarray(weights, dtype=np.float32)[:, None] * item_vectors).sum(axis=0, keepdims=True)
+            queries = _l2_normalize(np.vstack([centroid, item_vectors[:MAX_ITEM_QUERIES]]))
             
-            # Aggregate by (tmdb_id, media_type) and track frequency
-            candidate_scores = {}
+            index, mapping = load_index()
+            if hasattr(index, 'hnsw'):
+                index.hnsw.efSearch = HNSW_EF_SEARCH
+            # Oversample so excluded list items don't eat into each query's quota
+            top_k = NEIGHBORS_PER_ITEM + min(len(excluded_trakt_ids), NEIGHBORS_PER_ITEM)
+            distances, positions = index.search(queries, top_k)
+            similarities = 1.0 - (distances / 2.0)
+            
+            neighbor_scores: Dict[int, List[float]] = {}
+            for q in range(queries.shape[0]):
+                taken = 0
+                for pos, similarity in zip(positions[q], similarities[q]):
+                    if pos == -1 or similarity < MIN_SIMILARITY:
+                        continue
+                    trakt_id = mapping.get(int(pos))
+                    if not trakt_id or trakt_id in excluded_trakt_ids:
+                        continue
+                    neighbor_scores.setdefault(trakt_id, []).append(float(similarity))
+                    taken += 1
+                    if taken >= NEIGHBORS_PER_ITEM:
+                        break
             
-            for result in search_results:
-                # Extract from new hybrid_search return format
-                candidate = result.get('candidate')
-                if not candidate:
-                    continue
-                
-                tmdb_id = candidate.tmdb_id
-                media_type = candidate.media_type
-                similarity = result.get('score', 0.0)
-                
-                key = (tmdb_id, media_type)
-                
-                # Skip if already in list
-                if key in existing_ids:
-                    continue
-                
-                # Filter by minimum similarity
-                if similarity < MIN_SIMILARITY:
-                    continue
-                
-                # Aggregate scores (items may appear from multiple search vectors)
-                if key not in candidate_scores:
-                    candidate_scores[key] = {
-                        'tmdb_id': tmdb_id,
-                        'media_type': media_type,
-                        'scores': [],
-                        'frequency': 0
-                    }
-                
-                candidate_scores[key]['scores'].append(similarity)
-                candidate_scores[key]['frequency'] += 1
+            if not neighbor_scores:
+                return []
+            
+            db = SessionLocal()
+            try:
+                resolved = db.query(
+                    PersistentCandidate.trakt_id,
+                    PersistentCandidate.tmdb_id,
+                    PersistentCandidate.media_type
+                ).filter(
+                    PersistentCandidate.trakt_id.in_(list(neighbor_scores.keys()))
+                ).all()
+            finally:
+                db.close()
             
-            # Convert to list and calculate statistics
             candidates = []
-            for key, data in candidate_scores.items():
-                avg_score = np.mean(data['scores'])
-                max_score = max(data['scores'])
-                
+            for trakt_id, tmdb_id, media_type in resolved:
+                if (tmdb_id, media_type) in existing_ids:
+                    continue
+                scores = neighbor_scores[trakt_id]
                 candidates.append({
-                    'tmdb_id': data['tmdb_id'],
-                    'media_type': data['media_type'],
-                    'avg_similarity': float(avg_score),
-                    'max_similarity': float(max_score),
-                    'frequency': data['frequency']
+                    'tmdb_id': tmdb_id,
+                    'media_type': media_type,
+                    'avg_similarity': float(np.mean(scores)),
+                    'max_similarity': float(max(scores)),
+                    'frequency': len(scores)
                 })
             
             # Sort by frequency and average similarity
             candidates.sort(key=lambda x: (x['frequency'], x['avg_similarity']), reverse=True)
             
-            logger.debug(f"Dual-index search found {len(candidates)} unique candidates")
+            logger.debug(f"Embedding neighbor search: {len(vectors)} list vectors -> {len(candidates)} unique candidates")
             return candidates
             
         except Exception as e:
-            logger.error(f"Failed dual-index search, falling back: {e}")
-            # Fallback to basic FAISS if dual-index fails
-            return self._get_faiss_neighbors_fallback(list_items, existing_ids)
+            logger.error(f"Failed embedding neighbor search: {e}")
+            return []
     
     async def _generate_llm_rationale(
         self,
@@ -497,116 +481,6 @@ Example: "Shares the same dark Scandinavian noir atmosphere and explores moral a
             logger.error(f"LLM rationale error for item={title[:50]}: {type(e).__name__}: {e}")
             return ""
     
-    def _get_faiss_neighbors_fallback(
-        self,
-        list_items: List[IndividualListItem],
-        existing_ids: Set[tuple]
-    ) -> List[Dict[str, Any]]:
-        """
-        Fallback method using basic FAISS search (original implementation).
-        
-        Used when dual-index search fails or BGE index unavailable.
-        """
-        try:
-            # Load FAISS index
-            index, mapping = load_index()
-            
-            # Aggregate candidates from all list items
-            candidate_scores = {}  # (tmdb_id, media_type) -> [scores]
-            
-            for item in list_items:
-                # Get embedding for this item
-                embedding = get_embedding_from_index(item.tmdb_id, item.media_type)
-                
-                if embedding is None:
-                    logger.debug(f"No embedding for {item.tmdb_id} ({item.media_type})")
-                    continue
-                
-                # Normalize embedding
-                embedding = embedding.astype(np.float32)
-                embedding = embedding / (np.linalg.norm(embedding) + 1e-8)
-                embedding = embedding.reshape(1, -1)
-                
-                # Query FAISS
-                distances, indices = index.search(embedding, NEIGHBORS_PER_ITEM)
-                
-                # Collect valid trakt_ids from this item's neighbors
-                neighbor_data = []
-                for i, idx in enumerate(indices[0]):
-                    if idx == -1:
-                        continue
-                    
-                    similarity = float(distances[0][i])
-                    
-                    # Filter by minimum similarity
-                    if similarity < MIN_SIMILARITY:
-                        continue
-                    
-                    # Look up candidate trakt_id
-                    trakt_id = mapping.get(int(idx))
-                    if not trakt_id:
-                        continue
-                    
-                    neighbor_data.append((trakt_id, similarity))
-                
-                # Batch lookup all neighbors for this item in one query
-                if neighbor_data:
-                    trakt_ids = [tid for tid, _ in neighbor_data]
-                    trakt_to_sim = {tid: sim for tid, sim in neighbor_data}
-                    
-                    db = SessionLocal()
-                    try:
-                        candidates = db.query(PersistentCandidate).filter(
-                            PersistentCandidate.trakt_id.in_(trakt_ids)
-                        ).all()
-                        
-                        for candidate in candidates:
-                            # Skip if already in list
-                            key = (candidate.tmdb_id, candidate.media_type)
-                            if key in existing_ids:
-                                continue
-                            
-                            # Get similarity for this candidate
-                            similarity = trakt_to_sim.get(candidate.trakt_id, 0.0)
-                            
-                            # Aggregate scores
-                            if key not in candidate_scores:
-                                candidate_scores[key] = {
-                                    'tmdb_id': candidate.tmdb_id,
-                                    'media_type': candidate.media_type,
-                                    'scores': [],
-                                    'frequency': 0
-                                }
-                            
-                            candidate_scores[key]['scores'].append(similarity)
-                            candidate_scores[key]['frequency'] += 1
-                    finally:
-                        db.close()
-            
-            # Convert to list and calculate average scores
-            candidates = []
-            for key, data in candidate_scores.items():
-                avg_score = np.mean(data['scores'])
-                max_score = max(data['scores'])
-                
-                candidates.append({
-                    'tmdb_id': data['tmdb_id'],
-                    'media_type': data['media_type'],
-                    'avg_similarity': float(avg_score),
-                    'max_similarity': float(max_score),
-                    'frequency': data['frequency']
-                })
-            
-            # Sort by frequency and average similarity
-            candidates.sort(key=lambda x: (x['frequency'], x['avg_similarity']), reverse=True)
-            
-            logger.debug(f"FAISS fallback found {len(candidates)} unique candidates")
-            return candidates
-            
-        except Exception as e:
-            logger.error(f"Failed FAISS fallback: {e}")
-            return []
-    
     def _score_candidates(
         self,
         candidates: List[Dict[str, Any]],
@@ -652,19 +526,10 @@ Example: "Shares the same dark Scandinavian noir atmosphere and explores moral a
         if not candidates:
             return []
         
-        # Fetch metadata
-        tmdb_ids = [c['tmdb_id'] for c in candidates]
-        
-        db_candidates = db.query(PersistentCandidate).filter(
-            PersistentCandidate.tmdb_id.in_(tmdb_ids),
-            PersistentCandidate.active == True
-        ).all()
-        
-        # Create lookup
-        candidate_map = {
-            (c.tmdb_id, c.media_type): c
-            for c in db_candidates
-        }
+        # Fetch metadata (shared candidate cache: one round trip for the whole batch)
+        candidate_map = candidate_cache.get_many(
+            ((c['tmdb_id'], c['media_type']) for c in candidates), db
+        )
         
         # Extract aspects from list items (cast, themes, studios) for aspect-aware boosting
         list_people = set()
@@ -748,12 +613,7 @@ Example: "Shares the same dark Scandinavian noir atmosphere and explores moral a
             if not db_candidate:
                 continue
             
-            # Parse genres
-            genres = []
-            try:
-                genres = json.loads(db_candidate.genres) if db_candidate.genres else []
-            except:
-                pass
+            genres = list(db_candidate['genres'])
 
             # Compute diversity boost: promote genres that are underrepresented in the user's current list
             diversity_boost = 0.0
@@ -778,7 +638,7 @@ Example: "Shares the same dark Scandinavian noir atmosphere and explores moral a
             if list_people or list_themes or list_studios:
                 try:
                     # Get candidate's ItemLLMProfile from batch-fetched map
-                    candidate_key = (db_candidate.tmdb_id, db_candidate.media_type)
+                    candidate_key = (db_candidate['tmdb_id'], db_candidate['media_type'])
                     candidate_profile = candidate_profiles_map.get(candidate_key)
                     
                     if candidate_profile:
@@ -817,22 +677,22 @@ Example: "Shares the same dark Scandinavian noir atmosphere and explores moral a
                         except Exception as e:
                             logger.debug(f"Failed to parse candidate profile_json: {e}")
                 except Exception as e:
-                    logger.debug(f"Aspect matching failed for {db_candidate.tmdb_id}: {e}")
+                    logger.debug(f"Aspect matching failed for {db_candidate['tmdb_id']}: {e}")
                     aspect_boost = 0.0
             
             enriched_item = {
-                'tmdb_id': db_candidate.tmdb_id,
-                'trakt_id': db_candidate.trakt_id,
-                'media_type': db_candidate.media_type,
-                'title': db_candidate.title,
-                'original_title': db_candidate.original_title,
-                'year': db_candidate.year,
-                'overview': db_candidate.overview,
-                'poster_path': db_candidate.poster_path,
-                'backdrop_path': db_candidate.backdrop_path,
+                'tmdb_id': db_candidate['tmdb_id'],
+                'trakt_id': db_candidate['trakt_id'],
+                'media_type': db_candidate['media_type'],
+                'title': db_candidate['title'],
+                'original_title': db_candidate['original_title'],
+                'year': db_candidate['year'],
+                'overview': db_candidate['overview'],
+                'poster_path': db_candidate['poster_path'],
+                'backdrop_path': db_candidate['backdrop_path'],
                 'genres': genres,
-                'popularity': db_candidate.popularity,
-                'vote_average': db_candidate.vote_average,
+                'popularity': db_candidate['popularity'],
+                'vote_average': db_candidate['vote_average'],
                 '_suggestion_score': candidate['_suggestion_score'],
                 '_frequency': candidate['frequency'],
                 '_avg_similarity': candidate['avg_similarity'],
@@ -247,14 +247,22 @@ class IndividualListTraktSync:
         try:
             trakt_list_id = individual_list.trakt_list_id
             
-            # Update list metadata using asyncio.run() with client created inside
+            desired_items = [
+                {'media_type': item.media_type, 'trakt_id': item.trakt_id, 'tmdb_id': item.tmdb_id}
+                for item in items
+                if item.trakt_id or item.tmdb_id
+            ]
+            
+            # Update metadata and diff-sync items in one client session. Manual syncs always
+            # check the remote list (conditional GET) instead of trusting the shadow copy.
             async def _update():
                 client = TraktClient(user_id=self.user_id)
-                return await client.update_list(
+                await client.update_list(
                     trakt_list_id=trakt_list_id,
                     name=individual_list.name,
                     description=individual_list.description or "Synced from WatchBuddy Individual List"
                 )
+                return await client.sync_list_items(trakt_list_id, desired_items, force_fetch=True)
             
             # Check if we're already in an event loop
             try:
@@ -263,39 +271,19 @@ class IndividualListTraktSync:
                 import concurrent.futures
                 with concurrent.futures.ThreadPoolExecutor() as executor:
                     future = executor.submit(asyncio.run, _update())
-                    future.result()
+                    stats = future.result()
             except RuntimeError:
                 # No event loop running, safe to use asyncio.run
-                asyncio.run(_update())
-            
-            # Get current items
-            trakt_items = self._get_trakt_list_items(trakt_list_id)
-            trakt_ids_set = {(item['trakt_id'], item['media_type']) for item in trakt_items}
-            
-            # Determine items to add/remove
-            current_ids_set = {
-                (item.trakt_id, item.media_type) 
-                for item in items 
-                if item.trakt_id
-            }
-            
-            to_add = [item for item in items if (item.trakt_id, item.media_type) not in trakt_ids_set and item.trakt_id]
-            to_remove_ids = trakt_ids_set - current_ids_set
-            
-            # Add new items
-            add_result = self._add_items_to_trakt_list(trakt_list_id, to_add) if to_add else {'added': 0, 'failed': 0, 'errors': []}
-            
-            # Remove deleted items
-            remove_result = self._remove_items_from_trakt_list(trakt_list_id, to_remove_ids) if to_remove_ids else {'removed': 0, 'errors': []}
+                stats = asyncio.run(_update())
             
             return {
                 "success": True,
                 "trakt_list_id": str(trakt_list_id),
-                "items_added": add_result['added'],
-                "items_removed": remove_result['removed'],
-                "items_failed": add_result['failed'],
-                "errors": add_result['errors'] + remove_result['errors'],
-                "message": f"Updated Trakt list: +{add_result['added']} items, -{remove_result['removed']} items"
+                "items_added": stats['added'],
+                "items_removed": stats['removed'],
+                "items_failed": stats['not_found'],
+                "errors": [],
+                "message": f"Updated Trakt list: +{stats['added']} items, -{stats['removed']} items"
             }
             
         except Exception as e:
@@ -306,46 +294,6 @@ class IndividualListTraktSync:
                 "errors": [str(e)]
             }
     
-    def _get_trakt_list_items(self, trakt_list_id: str) -> List[Dict[str, Any]]:
-        """Get all items currently in Trakt list."""
-        try:
-            # Use asyncio.run()
-            async def _get_items():
-                client = TraktClient(user_id=self.user_id)
-                return await client.get_list_items(trakt_list_id)
-            
-            # Check if we're already in an event loop
-            try:
-                loop = asyncio.get_running_loop()
-                # We're in an async context, run in a thread pool
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, _get_items())
-                    response = future.result()
-            except RuntimeError:
-                # No event loop running, safe to use asyncio.run
-                response = asyncio.run(_get_items())
-            
-            items = []
-            if response and isinstance(response, list):
-                for entry in response:
-                    if entry.get('type') == 'movie' and entry.get('movie'):
-                        items.append({
-                            'trakt_id': entry['movie']['ids']['trakt'],
-                            'media_type': 'movie'
-                        })
-                    elif entry.get('type') == 'show' and entry.get('show'):
-                        items.append({
-                            'trakt_id': entry['show']['ids']['trakt'],
-                            'media_type': 'show'
-                        })
-            
-            return items
-            
-        except Exception as e:
-            logger.error(f"Failed to get Trakt list items: {e}")
-            return []
-    
     def _add_items_to_trakt_list(
         self,
         trakt_list_id: str,
@@ -438,61 +386,3 @@ class IndividualListTraktSync:
             logger.error(f"Failed to add items to Trakt list: {e}")
             errors.append(str(e))
             return {'added': 0, 'failed': len(items), 'errors': errors}
-    
-    def _remove_items_from_trakt_list(
-        self,
-        trakt_list_id: str,
-        items_to_remove: set
-    ) -> Dict[str, Any]:
-        """Remove items from Trakt list."""
-        if not items_to_remove:
-            return {'removed': 0, 'errors': []}
-        
-        # Build payload
-        movies = []
-        shows = []
-        
-        for trakt_id, media_type in items_to_remove:
-            entry = {"ids": {"trakt": trakt_id}}
-            
-            if media_type == 'movie':
-                movies.append(entry)
-            elif media_type == 'show':
-                shows.append(entry)
-        
-        payload = {}
-        if movies:
-            payload['movies'] = movies
-        if shows:
-            payload['shows'] = shows
-        
-        try:
-            # Prepare items for async client
-            item_dicts: List[Dict[str, Any]] = []
-            for trakt_id, media_type in items_to_remove:
-                item_dicts.append({'media_type': media_type, 'trakt_id': int(trakt_id)})
-            
-            # Use asyncio.run()
-            async def _remove():
-                client = TraktClient(user_id=self.user_id)
-                return await client.remove_items_from_list(trakt_list_id, item_dicts)
-            
-            # Check if we're already in an event loop
-            try:
-                loop = asyncio.get_running_loop()
-                # We're in an async context, run in a thread pool
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, _remove())
-                    response = future.result()
-            except RuntimeError:
-                # No event loop running, safe to use asyncio.run
-                response = asyncio.run(_remove())
-            
-            if response and 'deleted' in response:
-                removed_count = response['deleted'].get('movies', 0) + response['deleted'].get('shows', 0)
-                return {'removed': removed_count, 'errors': []}
-            return {'removed': 0, 'errors': ["Unexpected API response"]}
-        except Exception as e:
-            logger.error(f"Failed to remove items from Trakt list: {e}")
-            return {'removed': 0, 'errors': [str(e)]}
@@ -17,6 +17,7 @@ from app.services.scoring_engine import ScoringEngine
 from app.services.mood import ensure_user_mood
 from app.services.tmdb_client import fetch_tmdb_metadata, get_tmdb_api_key
 from app.services.dynamic_titles import DynamicTitleGenerator
+from app.services.list_sync_scheduler import reschedule_after_sync, sync_settings
 import json
 
 
@@ -621,6 +622,12 @@ class ListSyncService:
                 await r.delete(f"sync_lock:{user_list.id}")
             except Exception:
                 pass
+            # Next due time follows from the (possibly updated) last_sync_at/last_full_sync_at,
+            # or from the error backoff when the sync failed
+            try:
+                reschedule_after_sync(user_list)
+            except Exception:
+                pass
             db.close()
 
     def _determine_sync_type(self, user_list: UserList, force_full: bool) -> str:
@@ -632,15 +639,8 @@ class ListSyncService:
         if not user_list.last_sync_at:
             return "full"
         
-        # Check list-specific settings from filters
-        full_sync_days = 1  # default daily full sync unless overridden
-        try:
-            if user_list.filters:
-                filters = json.loads(user_list.filters)
-                if isinstance(filters, dict):
-                    full_sync_days = int(filters.get("full_sync_days", full_sync_days))
-        except Exception:
-            pass
+        # Check list-specific settings (sync_interval, filters.full_sync_days); shared with the scheduler
+        sync_interval_hours, full_sync_days = sync_settings(user_list)
 
         # Check if it's time for a full sync based on last_full_sync_at and setting
         if user_list.last_full_sync_at:
@@ -649,7 +649,6 @@ class ListSyncService:
                 return "full"
         
         # Check sync interval preference (default to 0.5 hours = 30 minutes if not set)
-        sync_interval_hours = user_list.sync_interval if user_list.sync_interval is not None else 0.5
         hours_since_sync = (datetime.utcnow() - user_list.last_sync_at).total_seconds() / 3600
         if hours_since_sync >= sync_interval_hours:
             return "incremental"
@@ -0,0 +1,238 @@
+"""
+list_sync_scheduler.py
+
+Due-list scheduler for the periodic smart-list sync.
+
+Every UserList has a member "{user_id}:{list_id}" in the Redis sorted set
+`list_schedule:due`, scored by the unix time the list is next due (the same
+interval/full-sync rules ListSyncService._determine_sync_type applies). The
+schedule is maintained where lists change: schedule_list() on create/update and
+after every sync, unschedule_list() on delete. The sync_user_lists beat claims
+only due members and fans them out as sync_due_list subtasks, instead of loading
+every list and asking each one whether it is due.
+
+Claimed lists are leased (score pushed CLAIM_LEASE seconds ahead) rather than
+removed, so a list whose worker dies is picked up again once the lease expires;
+subtasks waiting for a slot renew the lease so the beat does not dispatch them twice.
+A failed sync leaves last_sync_at unchanged, so reschedule_after_sync() backs off
+errored lists exponentially (one interval, doubling per consecutive failure, counted
+in `list_schedule:failures`) instead of leaving them due on every beat.
+Per-user concurrency is bounded by a slot counter (`list_schedule:running:{user_id}`):
+the dispatcher claims at most as many lists per user as there are free slots, and
+each subtask acquires a slot before syncing. The schedule is reseeded from the
+database (NX, so existing entries and leases are kept) once per SEED_INTERVAL to
+pick up lists created outside the hooked paths.
+"""
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_sync
+
+logger = logging.getLogger(__name__)
+
+DUE_KEY = "list_schedule:due"
+RUNNING_KEY_PREFIX = "list_schedule:running"
+SEED_MARKER_KEY = "list_schedule:seeded"
+FAILURES_KEY = "list_schedule:failures"
+
+DEFAULT_SYNC_INTERVAL_HOURS = 0.5
+DEFAULT_FULL_SYNC_DAYS = 1
+CLAIM_LEASE = 60 * 60  # a claimed list becomes due again if its sync never reschedules it
+SLOT_TTL = 60 * 60  # leaked slots (killed workers) free themselves
+SEED_INTERVAL = 60 * 60 * 24
+MAX_ERROR_BACKOFF = 60 * 60 * 24
+
+
+def _ts(dt: Optional[datetime]) -> Optional[float]:
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)  # list timestamps are stored as naive UTC
+    return dt.timestamp()
+
+
+def sync_settings(user_list: Any) -> Tuple[float, int]:
+    """(sync interval in hours, days between full syncs) for a list."""
+    interval = user_list.sync_interval if user_list.sync_interval is not None else DEFAULT_SYNC_INTERVAL_HOURS
+    full_sync_days = DEFAULT_FULL_SYNC_DAYS
+    try:
+        if user_list.filters:
+            filters = json.loads(user_list.filters)
+            if isinstance(filters, dict):
+                full_sync_days = int(filters.get("full_sync_days", full_sync_days))
+    except Exception:
+        pass
+    return interval, full_sync_days
+
+
+def next_due_at(user_list: Any, now: Optional[float] = None) -> float:
+    """Unix time at which _determine_sync_type stops returning 'skip' for this list."""
+    now = time.time() if now is None else now
+    last_sync = _ts(user_list.last_sync_at)
+    if last_sync is None:
+        return now
+    interval, full_sync_days = sync_settings(user_list)
+    due = last_sync + interval * 3600
+    last_full = _ts(user_list.last_full_sync_at)
+    if last_full is not None:
+        due = min(due, last_full + max(1, full_sync_days) * 86400)
+    return due
+
+
+def _member(user_id: Optional[int], list_id: int) -> str:
+    return f"{user_id or 0}:{list_id}"
+
+
+def _parse_member(member: Any) -> Optional[Tuple[int, int]]:
+    try:
+        if isinstance(member, bytes):
+            member = member.decode("utf-8")
+        user_id, list_id = str(member).split(":", 1)
+        return int(user_id), int(list_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def schedule_list(user_list: Any, due_at: Optional[float] = None) -> None:
+    """Insert or move a list in the schedule (call after the row is committed)."""
+    try:
+        score = next_due_at(user_list) if due_at is None else due_at
+        get_redis_sync().zadd(DUE_KEY, {_member(user_list.user_id, user_list.id): score})
+    except Exception as e:
+        logger.warning(f"[ListScheduler] Failed to schedule list {getattr(user_list, 'id', None)}: {e}")
+
+
+def error_backoff(user_list: Any, failures: int) -> float:
+    """Seconds until an errored list is retried: its interval, doubled per consecutive failure."""
+    interval, _ = sync_settings(user_list)
+    return min(interval * 3600 * 2 ** max(0, failures - 1), MAX_ERROR_BACKOFF)
+
+
+def reschedule_after_sync(user_list: Any, now: Optional[float] = None) -> None:
+    """Schedule a list after a sync attempt, backing off while its syncs keep failing."""
+    try:
+        r = get_redis_sync()
+        member = _member(user_list.user_id, user_list.id)
+        now = time.time() if now is None else now
+        due = next_due_at(user_list, now)
+        if getattr(user_list, "sync_status", None) == "error":
+            failures = int(r.hincrby(FAILURES_KEY, member, 1))
+            due = max(due, now + error_backoff(user_list, failures))
+        else:
+            r.hdel(FAILURES_KEY, member)
+        r.zadd(DUE_KEY, {member: due})
+    except Exception as e:
+        logger.warning(f"[ListScheduler] Failed to reschedule list {getattr(user_list, 'id', None)}: {e}")
+
+
+def renew_claim(user_id: int, list_id: int, now: Optional[float] = None) -> None:
+    """Extend the lease of a claimed list whose subtask is still waiting to run."""
+    try:
+        now = time.time() if now is None else now
+        get_redis_sync().zadd(DUE_KEY, {_member(user_id, list_id): now + CLAIM_LEASE}, xx=True)
+    except Exception as e:
+        logger.warning(f"[ListScheduler] Failed to renew claim on list {list_id}: {e}")
+
+
+def unschedule_list(list_id: int, user_id: Optional[int]) -> None:
+    try:
+        r = get_redis_sync()
+        r.zrem(DUE_KEY, _member(user_id, list_id))
+        r.hdel(FAILURES_KEY, _member(user_id, list_id))
+    except Exception as e:
+        logger.warning(f"[ListScheduler] Failed to unschedule list {list_id}: {e}")
+
+
+def seed_schedule(db=None, force: bool = False) -> int:
+    """Add every list missing from the schedule; runs at most once per SEED_INTERVAL unless forced."""
+    r = get_redis_sync()
+    if not force and r.exists(SEED_MARKER_KEY):
+        return 0
+    from app.models import UserList
+
+    own_session = db is None
+    if own_session:
+        from app.core.database import SessionLocal
+        db = SessionLocal()
+    try:
+        rows = db.query(
+            UserList.id, UserList.user_id, UserList.sync_interval, UserList.filters,
+            UserList.last_sync_at, UserList.last_full_sync_at,
+        ).all()
+    finally:
+        if own_session:
+            db.close()
+    now = time.time()
+    mapping = {_member(row.user_id, row.id): next_due_at(row, now) for row in rows}
+    pipe = r.pipeline(transaction=False)
+    items = list(mapping.items())
+    for i in range(0, len(items), 1000):
+        pipe.zadd(DUE_KEY, dict(items[i:i + 1000]), nx=True)
+    pipe.set(SEED_MARKER_KEY, str(int(now)), ex=SEED_INTERVAL)
+    pipe.execute()
+    logger.info(f"[ListScheduler] Seeded schedule with {len(mapping)} lists")
+    return len(mapping)
+
+
+def _running_key(user_id: int) -> str:
+    return f"{RUNNING_KEY_PREFIX}:{user_id}"
+
+
+def acquire_slot(user_id: int) -> bool:
+    """Take one of the user's concurrent-sync slots; False when all are busy."""
+    r = get_redis_sync()
+    key = _running_key(user_id)
+    if int(r.incr(key)) > settings.list_sync_per_user_concurrency:
+        r.decr(key)
+        return False
+    r.expire(key, SLOT_TTL)
+    return True
+
+
+def release_slot(user_id: int) -> None:
+    try:
+        r = get_redis_sync()
+        if int(r.decr(_running_key(user_id))) < 0:
+            r.delete(_running_key(user_id))
+    except Exception as e:
+        logger.warning(f"[ListScheduler] Failed to release sync slot for user {user_id}: {e}")
+
+
+def claim_due_lists(user_id: Optional[int] = None, now: Optional[float] = None,
+                    limit: Optional[int] = None, force: bool = False) -> List[Tuple[int, int]]:
+    """Lease due (user_id, list_id) pairs for dispatch, oldest first.
+
+    Normally at most the user's free slots are claimed per user; the rest stay due for
+    the next beat. force=True claims every scheduled list (of user_id, if given).
+    """
+    r = get_redis_sync()
+    now = time.time() if now is None else now
+    limit = settings.list_sync_max_dispatch if limit is None else limit
+    members = r.zrangebyscore(DUE_KEY, "-inf", "+inf" if force else now)
+
+    by_user: Dict[int, List[Tuple[Any, int]]] = defaultdict(list)
+    for member in members:
+        parsed = _parse_member(member)
+        if parsed and (user_id is None or parsed[0] == user_id):
+            by_user[parsed[0]].append((member, parsed[1]))
+
+    claimed: List[Tuple[Any, int, int]] = []
+    for uid, entries in by_user.items():
+        if not force:
+            running = int(r.get(_running_key(uid)) or 0)
+            entries = entries[:max(0, settings.list_sync_per_user_concurrency - running)]
+        claimed.extend((member, uid, list_id) for member, list_id in entries)
+    claimed = claimed[:limit]
+    if not claimed:
+        return []
+
+    pipe = r.pipeline(transaction=False)
+    for member, _, _ in claimed:
+        pipe.zadd(DUE_KEY, {member: now + CLAIM_LEASE}, xx=True)
+    pipe.execute()
+    return [(uid, list_id) for _, uid, list_id in claimed]
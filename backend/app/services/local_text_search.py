@@ -0,0 +1,556 @@
+"""
+local_text_search.py
+
+In-process full-text search over persistent_candidates, used when ElasticSearch
+is not running (small deployments) or not reachable. Same interface as
+ElasticSearchClient (search / index_candidates / is_connected / get_index_stats /
+health_check) and the same result shape, so callers pick a backend through
+app.services.text_search.get_text_search_backend().
+
+Index layout (compact, pure Python):
+- one shared term dictionary (term -> term id) and per-field postings
+  term id -> array('i') of doc ids, for titles, people, companies, genres,
+  countries and languages (the fields the ES query searches)
+- a trigram -> term ids table for fuzzy (edit distance 1) expansion and a lazily
+  sorted vocabulary for prefix expansion (autocomplete)
+- per-doc title/original title/year/popularity for phrase checks and results
+
+Scoring mirrors the ES bool/should query: phrase, bool-prefix and phrase-prefix
+clauses on titles plus a best_fields fuzzy clause with the same field boosts,
+weighted by IDF. Updates are upserts keyed by (tmdb_id, media_type); replaced
+docs are tombstoned and compacted once they make up a quarter of the index.
+The index is pickled to LOCAL_TEXT_INDEX_PATH and reloaded by readers when
+the file changes.
+"""
+import bisect
+import logging
+import math
+import os
+import pickle
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = Path(os.getenv("LOCAL_TEXT_INDEX_PATH", "/data/ai/local_text_index.pkl"))
+INDEX_VERSION = 1
+
+# Field boosts of the ES best_fields clause (elasticsearch_client.ElasticSearchClient.search)
+FIELD_BOOSTS: Dict[str, float] = {
+    "title": 5.0,
+    "original_title": 4.0,
+    "cast": 3.0,
+    "created_by": 2.0,
+    "production_companies": 2.0,
+    "networks": 2.0,
+    "genres": 2.0,
+    "production_countries": 1.0,
+    "spoken_languages": 1.0,
+}
+TITLE_FIELDS = ("title", "original_title")
+MAX_PREFIX_EXPANSIONS = 50
+PARTIAL_MATCH_WEIGHT = 0.8  # prefix / fuzzy expansions score below exact terms
+COMPACT_DEAD_RATIO = 0.25
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase + strip accents (ES lowercase/asciifolding)."""
+    s = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(ch for ch in s if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(fold(text))
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Levenshtein distance <= 1 (ES fuzziness=1)."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+class LocalTextSearchIndex:
+    """Inverted index with prefix/fuzzy expansion; see module docstring."""
+
+    backend_name = "local"
+
+    def __init__(self, path: Optional[Path] = INDEX_PATH):
+        self.path = Path(path) if path else None
+        self._lock = threading.RLock()
+        self._terms: Dict[str, int] = {}
+        self._term_list: List[str] = []
+        self._postings: Dict[str, Dict[int, array]] = {f: {} for f in FIELD_BOOSTS}
+        self._trigrams: Dict[str, array] = {}
+        self._sorted_terms: Optional[List[str]] = None
+        self._keys: List[Tuple[int, str]] = []
+        self._titles: List[str] = []
+        self._original_titles: List[str] = []
+        self._years: List[Optional[int]] = []
+        self._popularity: List[float] = []
+        self._alive = bytearray()
+        self._key_to_doc: Dict[Tuple[int, str], int] = {}
+        self.watermark: Optional[str] = None  # last_refreshed high-water mark of the last update
+        self.watermark_ids: List[int] = []  # rows already indexed whose last_refreshed equals the watermark
+        self._file_mtime: Optional[float] = None
+
+    # ---------------------
+    # Indexing
+    # ---------------------
+    @property
+    def doc_count(self) -> int:
+        return len(self._key_to_doc)
+
+    def _term_id(self, term: str) -> int:
+        tid = self._terms.get(term)
+        if tid is None:
+            tid = len(self._term_list)
+            self._terms[term] = tid
+            self._term_list.append(term)
+            for tg in trigrams(term):
+                self._trigrams.setdefault(tg, array("i")).append(tid)
+            self._sorted_terms = None
+        return tid
+
+    def _remove_doc(self, key: Tuple[int, str]) -> bool:
+        doc = self._key_to_doc.pop(key, None)
+        if doc is None:
+            return False
+        self._alive[doc] = 0
+        return True
+
+    def index_candidates(self, candidates: List[Dict[str, Any]]) -> int:
+        """Upsert candidates (ES document shape: tmdb_id, media_type and text fields)."""
+        indexed = 0
+        with self._lock:
+            for c in candidates:
+                try:
+                    key = (int(c["tmdb_id"]), str(c["media_type"]))
+                except Exception:
+                    continue
+                self._remove_doc(key)
+                doc = len(self._keys)
+                self._keys.append(key)
+                self._titles.append(c.get("title") or "")
+                self._original_titles.append(c.get("original_title") or "")
+                self._years.append(c.get("year"))
+                self._popularity.append(float(c.get("popularity") or 0.0))
+                self._alive.append(1)
+                self._key_to_doc[key] = doc
+                for field, postings in self._postings.items():
+                    for term in set(tokenize(c.get(field) or "")):
+                        postings.setdefault(self._term_id(term), array("i")).append(doc)
+                indexed += 1
+            self._maybe_compact()
+        return indexed
+
+    def remove(self, keys: Iterable[Tuple[int, str]]) -> int:
+        with self._lock:
+            removed = sum(1 for k in keys if self._remove_doc((int(k[0]), str(k[1]))))
+            self._maybe_compact()
+        return removed
+
+    def _maybe_compact(self) -> None:
+        total = len(self._keys)
+        if total and (total - self.doc_count) / total >= COMPACT_DEAD_RATIO:
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop tombstoned docs and renumber doc ids (postings stay sorted)."""
+        with self._lock:
+            remap = array("i", [-1]) * len(self._keys)
+            new_id = 0
+            for doc, alive in enumerate(self._alive):
+                if alive:
+                    remap[doc] = new_id
+                    new_id += 1
+            for postings in self._postings.values():
+                for tid in list(postings):
+                    kept = array("i", (remap[d] for d in postings[tid] if remap[d] >= 0))
+                    if kept:
+                        postings[tid] = kept
+                    else:
+                        del postings[tid]
+            keep = [doc for doc, alive in enumerate(self._alive) if alive]
+            self._keys = [self._keys[d] for d in keep]
+            self._titles = [self._titles[d] for d in keep]
+            self._original_titles = [self._original_titles[d] for d in keep]
+            self._years = [self._years[d] for d in keep]
+            self._popularity = [self._popularity[d] for d in keep]
+            self._alive = bytearray([1]) * len(keep)
+            self._key_to_doc = {k: i for i, k in enumerate(self._keys)}
+
+    # ---------------------
+    # Term expansion
+    # ---------------------
+    def _prefix_terms(self, prefix: str) -> List[int]:
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._term_list)
+        terms = self._sorted_terms
+        out = []
+        i = bisect.bisect_left(terms, prefix)
+        while i < len(terms) and terms[i].startswith(prefix) and len(out) < MAX_PREFIX_EXPANSIONS:
+            if terms[i] != prefix:
+                out.append(self._terms[terms[i]])
+            i += 1
+        return out
+
+    def _fuzzy_terms(self, token: str) -> List[int]:
+        """Terms within one edit of ``token`` sharing its first two characters (ES prefix_length=2)."""
+        grams = trigrams(token)
+        # One edit changes at most three padded trigrams
+        need = max(1, len(grams) - 3)
+        counts: Dict[int, int] = {}
+        for g in grams:
+            for tid in self._trigrams.get(g, ()):
+                counts[tid] = counts.get(tid, 0) + 1
+        out = []
+        for tid, n in counts.items():
+            if n < need:
+                continue
+            term = self._term_list[tid]
+            if term != token and term[:2] == token[:2] and within_one_edit(term, token):
+                out.append(tid)
+        return out
+
+    def _idf(self, field: str, tid: int) -> float:
+        df = len(self._postings[field].get(tid, ()))
+        n = max(1, self.doc_count)
+        return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+    def _token_matches(self, field: str, expansions: List[Tuple[int, float]]) -> Dict[int, float]:
+        """doc -> best weighted IDF for one query token in one field."""
+        best: Dict[int, float] = {}
+        postings = self._postings[field]
+        for tid, weight in expansions:
+            docs = postings.get(tid)
+            if not docs:
+                continue
+            w = weight * self._idf(field, tid)
+            for d in docs:
+                if w > best.get(d, 0.0):
+                    best[d] = w
+        return best
+
+    # ---------------------
+    # Search
+    # ---------------------
+    def search(
+        self,
+        query: str,
+        media_type: Optional[str] = None,
+        limit: int = 50,
+        strict_titles_only: bool = False,
+        enhanced_filters: Optional[List[Dict[str, Any]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search with the ES query's clause structure; returns ES-shaped results (es_score)."""
+        self.reload_if_changed()
+        tokens = tokenize(query)
+        if not tokens or not self.doc_count:
+            return []
+        with self._lock:
+            scores = self._score(query, tokens, strict_titles_only, enhanced_filters)
+            alive = self._alive
+            ranked = [
+                (s, d) for d, s in scores.items()
+                if alive[d] and (not media_type or self._keys[d][1] == media_type)
+            ]
+            # Phrase clauses only matter for docs that already score well on the token clauses
+            ranked.sort(reverse=True)
+            shortlist = ranked[:max(limit * 20, 500)]
+            q_norm = " ".join(tokens)
+            boosted = []
+            for s, d in shortlist:
+                s += self._phrase_bonus(d, q_norm, tokens, strict_titles_only)
+                if s > 0.01:
+                    boosted.append((s, self._popularity[d], d))
+            boosted.sort(reverse=True)
+            results = []
+            for s, _, d in boosted[:limit]:
+                tmdb_id, mt = self._keys[d]
+                results.append({
+                    "tmdb_id": tmdb_id,
+                    "media_type": mt,
+                    "title": self._titles[d],
+                    "year": self._years[d],
+                    "popularity": self._popularity[d],
+                    "es_score": round(float(s), 6),
+                })
+            return results
+
+    def _score(self, query: str, tokens: List[str], strict: bool, enhanced_filters) -> Dict[int, float]:
+        fuzzy = not strict and len(query.strip()) >= 5
+        last = len(tokens) - 1
+        exact: List[List[Tuple[int, float]]] = []
+        fuzzed: List[List[Tuple[int, float]]] = []
+        for tok in tokens:
+            ex = [(self._terms[tok], 1.0)] if tok in self._terms else []
+            exact.append(ex)
+            if fuzzy and len(tok) >= 3:
+                ex = ex + [(tid, PARTIAL_MATCH_WEIGHT) for tid in self._fuzzy_terms(tok)]
+            fuzzed.append(ex)
+        # bool_prefix: every token exact, the last one also as a prefix
+        prefixed = list(exact)
+        prefixed[last] = exact[last] + [(tid, PARTIAL_MATCH_WEIGHT) for tid in self._prefix_terms(tokens[last])]
+
+        scores: Dict[int, float] = {}
+        if strict:
+            # AND of all tokens on titles (8/6) + bool_prefix on titles (5/4), both require every token
+            for field, and_boost, prefix_boost in (("title", 8.0, 5.0), ("original_title", 6.0, 4.0)):
+                for toks, boost in ((prefixed, prefix_boost), (exact, and_boost)):
+                    per_token = [self._token_matches(field, t) for t in toks]
+                    for d in set.intersection(*(set(m) for m in per_token)):
+                        scores[d] = scores.get(d, 0.0) + boost * sum(m[d] for m in per_token)
+            return scores
+
+        # bool_prefix on titles (3/2), any token may match
+        for field, boost in (("title", 3.0), ("original_title", 2.0)):
+            for toks in prefixed:
+                for d, w in self._token_matches(field, toks).items():
+                    scores[d] = scores.get(d, 0.0) + boost * w
+        # best_fields (fuzzy) clause: best single field per doc
+        best: Dict[int, float] = {}
+        for field, boost in FIELD_BOOSTS.items():
+            field_scores: Dict[int, float] = {}
+            for toks in fuzzed:
+                for d, w in self._token_matches(field, toks).items():
+                    field_scores[d] = field_scores.get(d, 0.0) + boost * w
+            for d, s in field_scores.items():
+                if s > best.get(d, 0.0):
+                    best[d] = s
+        for d, s in best.items():
+            scores[d] = scores.get(d, 0.0) + s
+        # QueryEnhancer boosts ({"match": {field: {"query", "boost"}}}); mood/theme tags are ES-only
+        for clause in enhanced_filters or []:
+            match = clause.get("match") if isinstance(clause, dict) else None
+            if not isinstance(match, dict):
+                continue
+            for field, spec in match.items():
+                if field not in self._postings or not isinstance(spec, dict):
+                    continue
+                boost = float(spec.get("boost", 1.0))
+                for tok in tokenize(spec.get("query", "")):
+                    if tok in self._terms:
+                        for d, w in self._token_matches(field, [(self._terms[tok], 1.0)]).items():
+                            scores[d] = scores.get(d, 0.0) + boost * w
+        return scores
+
+    def _phrase_bonus(self, doc: int, q_norm: str, tokens: List[str], strict: bool) -> float:
+        """match_phrase / phrase_prefix clauses on titles, scaled like the token clauses."""
+        idf_sum = sum(self._idf("title", self._terms[t]) for t in tokens if t in self._terms) or 1.0
+        if strict:
+            boosts = {"title": (10.0, 4.0), "original_title": (8.0, 3.0)}
+        else:
+            boosts = {"title": (30.0, 10.0), "original_title": (24.0, 8.0)}
+        bonus = 0.0
+        for field, text in (("title", self._titles[doc]), ("original_title", self._original_titles[doc])):
+            if not text:
+                continue
+            t_norm = " " + " ".join(tokenize(text)) + " "
+            phrase_boost, prefix_boost = boosts[field]
+            if f" {q_norm} " in t_norm:
+                bonus += phrase_boost * idf_sum
+            elif f" {q_norm}" in t_norm:
+                bonus += prefix_boost * idf_sum
+        return bonus
+
+    # ---------------------
+    # Persistence / status
+    # ---------------------
+    def save(self) -> Optional[Path]:
+        if self.path is None:
+            return None
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(".tmp")
+                state = {k: v for k, v in self.__dict__.items() if k not in ("_lock", "path", "_sorted_terms", "_file_mtime")}
+                with open(tmp, "wb") as f:
+                    pickle.dump({"version": INDEX_VERSION, "state": state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, self.path)
+                self._file_mtime = self.path.stat().st_mtime
+                return self.path
+            except Exception as e:
+                logger.warning(f"[LocalSearch] Failed to persist index: {e}")
+                return None
+
+    def load(self) -> bool:
+        if self.path is None or not self.path.exists():
+            return False
+        try:
+            mtime = self.path.stat().st_mtime
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+            if data.get("version") != INDEX_VERSION:
+                return False
+            with self._lock:
+                self.__dict__.update(data["state"])
+                self._sorted_terms = None
+                self._file_mtime = mtime
+            logger.info(f"[LocalSearch] Loaded index with {self.doc_count} docs and {len(self._term_list)} terms")
+            return True
+        except Exception as e:
+            logger.warning(f"[LocalSearch] Ignoring unreadable index {self.path}: {e}")
+            return False
+
+    def reload_if_changed(self, min_interval: float = 30.0) -> None:
+        """Pick up an index file rewritten by the worker (checked at most every ``min_interval`` s)."""
+        if self.path is None:
+            return
+        now = time.time()
+        if now - getattr(self, "_checked_at", 0.0) < min_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return
+        if self._file_mtime is None or mtime > self._file_mtime:
+            self.load()
+
+    def is_connected(self) -> bool:
+        self.reload_if_changed()
+        return self.doc_count > 0
+
+    def health_check(self) -> bool:
+        return self.is_connected()
+
+    def get_index_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend_name,
+            "doc_count": self.doc_count,
+            "terms": len(self._term_list),
+            "tombstones": len(self._keys) - self.doc_count,
+            "watermark": self.watermark,
+            "status": "healthy" if self.doc_count else "empty",
+        }
+
+
+_index: Optional[LocalTextSearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_local_text_index() -> LocalTextSearchIndex:
+    """Process-wide index, loaded from disk on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                idx = LocalTextSearchIndex()
+                idx.load()
+                _index = idx
+    return _index
+
+
+def _unseen_rows(rows: List[Any], watermark: Optional[str], seen_ids: Set[int]) -> List[Any]:
+    """Drop rows the previous run already indexed at the (inclusive) watermark timestamp."""
+    return [
+        r for r in rows
+        if not (r.id in seen_ids and r.last_refreshed is not None and r.last_refreshed.isoformat() == watermark)
+    ]
+
+
+def _advance_watermark(rows: List[Any], watermark: Optional[str], ids: Set[int]) -> Tuple[Optional[str], Set[int]]:
+    """Highest last_refreshed seen so far and the ids of the rows carrying it."""
+    for r in rows:
+        if r.last_refreshed is None:
+            continue
+        ts = r.last_refreshed.isoformat()
+        if watermark is None or ts > watermark:
+            watermark, ids = ts, set()
+        if ts == watermark:
+            ids.add(r.id)
+    return watermark, ids
+
+
+def update_local_text_index(full: bool = False, batch_size: int = 2000) -> int:
+    """Build or incrementally update the persisted index from persistent_candidates.
+
+    Incremental runs only read rows with last_refreshed at or past the stored watermark
+    (keyset-paginated by id); inactive rows are removed. Rows sharing the watermark
+    timestamp can commit after the previous run read it, so the comparison is
+    inclusive and rows that run already indexed at that timestamp are skipped by id.
+    Returns rows processed.
+    """
+    from sqlalchemy import text
+    from app.core.database import SessionLocal
+    from app.services.tasks import _prepare_es_candidates_batch
+
+    idx = get_local_text_index()
+    if full or not idx.doc_count:
+        idx = LocalTextSearchIndex(idx.path)
+        watermark = None
+    else:
+        watermark = idx.watermark
+    seen_at_watermark = set(idx.watermark_ids) if watermark else set()
+    started = time.time()
+    processed = 0
+    new_watermark = watermark
+    new_watermark_ids = set(seen_at_watermark)
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            params = {"last_id": last_id, "lim": batch_size}
+            where = "id > :last_id"
+            if watermark:
+                where += " AND last_refreshed >= :wm"
+                params["wm"] = watermark
+            else:
+                where += " AND active = true"
+            rows = db.execute(text(
+                f"""
+                SELECT id, active, last_refreshed,
+                    tmdb_id, media_type, title, original_title, year, overview, tagline,
+                    genres, keywords, "cast" AS cast_json, created_by, networks,
+                    production_companies, production_countries, spoken_languages,
+                    popularity, vote_average, vote_count
+                FROM persistent_candidates
+                WHERE {where}
+                ORDER BY id
+                LIMIT :lim
+                """
+            ), params).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            rows = _unseen_rows(rows, watermark, seen_at_watermark)
+            active_rows = [r for r in rows if r.active]
+            idx.remove([(r.tmdb_id, r.media_type) for r in rows if not r.active])
+            idx.index_candidates(_prepare_es_candidates_batch(active_rows))
+            new_watermark, new_watermark_ids = _advance_watermark(rows, new_watermark, new_watermark_ids)
+            processed += len(rows)
+    finally:
+        db.close()
+    idx.watermark = new_watermark
+    idx.watermark_ids = sorted(new_watermark_ids)
+    idx.save()
+    global _index
+    _index = idx
+    logger.info(
+        f"[LocalSearch] {'Full build' if watermark is None else 'Incremental update'}: {processed} rows in "
+        f"{time.time() - started:.1f}s ({idx.doc_count} docs)"
+    )
+    return processed
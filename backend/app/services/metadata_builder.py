@@ -12,6 +12,7 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.core.redis_client import get_redis
+from app.services.candidate_cache import invalidate_candidates
 from app.services.trakt_client import TraktClient
 
 logger = logging.getLogger(__name__)
@@ -245,6 +246,7 @@ class MetadataBuilder:
                     break
                 
                 logger.info(f"Processing batch at offset {offset}, got {len(batch)} candidates")
+                mapped_keys = []
                 
                 for candidate in batch:
                     try:
@@ -259,6 +261,7 @@ class MetadataBuilder:
                             if trakt_id:
                                 candidate.trakt_id = trakt_id
                                 db.add(candidate)
+                                mapped_keys.append((candidate.tmdb_id, candidate.media_type))
                                 # Reset retry count on success
                                 await redis.delete(f"{retry_key_prefix}{candidate.id}")
                             else:
@@ -305,6 +308,7 @@ class MetadataBuilder:
                 try:
                     db.commit()
                     logger.info(f"Committed batch at offset {offset}")
+                    invalidate_candidates(mapped_keys)
                 except Exception as e:
                     logger.error(f"Failed to commit batch: {e}")
                     db.rollback()
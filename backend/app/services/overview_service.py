@@ -22,6 +22,7 @@ from app.models import (
     TraktWatchHistory, UserRating, PersistentCandidate, OverviewCache,
     UserShowProgress, TrendingIngestionQueue
 )
+from app.services import candidate_cache
 from app.services.scoring_engine import ScoringEngine
 from app.services.trakt_client import TraktClient
 from app.services.tmdb_client import fetch_tmdb_metadata, fetch_tmdb_upcoming
@@ -38,6 +39,15 @@ logger = logging.getLogger(__name__)
 class OverviewService:
     """Computes all 4 overview modules for a user."""
     
+    MODULE_TYPES = ('investment_tracker', 'new_shows', 'trending', 'upcoming')
+    # Per-module cache lifetime; trending follows a fast-moving external feed
+    MODULE_TTLS = {
+        'investment_tracker': timedelta(hours=24),
+        'new_shows': timedelta(hours=12),
+        'trending': timedelta(hours=6),
+        'upcoming': timedelta(hours=24),
+    }
+    
     def __init__(self, user_id: int = 1):
         self.user_id = user_id
         self.scoring_engine = ScoringEngine()
@@ -106,11 +116,12 @@ class OverviewService:
                 candidate_id=candidate.id
             ).first()
             
-            # Get UserTextProfile
-            user_profile = db.query(UserTextProfile).filter_by(user_id=self.user_id).first()
+            # UserTextProfile summary from the cached persona context (no per-item query)
+            from app.services.persona_context import get_persona_context
+            profile_summary = get_persona_context(self.user_id).profile_summary
             
             # If we don't have profiles, use template fallback
-            if not item_profile or not user_profile:
+            if not item_profile or not profile_summary:
                 return self._generate_template_rationale(score, breakdown, context)
             
             # Build LLM prompt
@@ -119,7 +130,7 @@ class OverviewService:
             
             prompt = f"""Write a single short sentence (10-15 words) explaining why this {candidate.media_type} is recommended.
 
-User Profile: {user_profile.summary_text[:200]}
+User Profile: {profile_summary[:200]}
 
 Item: {candidate.title} ({candidate.year})
 {item_profile.profile_text[:300]}
@@ -198,85 +209,85 @@ Output ONLY the rationale sentence, nothing else:"""
         else:
             return f"{base} with your taste"
     
-    async def compute_all_modules(self, db: Session, mood_overrides: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    async def compute_all_modules(
+        self,
+        db: Session,
+        mood_overrides: Optional[Dict[str, float]] = None,
+        force: bool = False
+    ) -> Dict[str, Any]:
         """
-        Compute all 4 modules and cache results.
+        Compute all 4 modules concurrently and cache results.
+        
+        Each module runs on its own session so a failure only rolls back that module.
+        Modules whose cached entry is unexpired and whose input fingerprint is
+        unchanged are reused instead of recomputed (unless ``force``).
         
         Args:
-            db: Database session
+            db: Database session (fingerprints, priorities and cache writes)
             mood_overrides: Optional dict with 'energy', 'exploration', 'commitment' (0-100)
+            force: Recompute every module regardless of cache state
         
         Returns:
             Dict with all module data + priority scores
         """
+        from app.core.database import SessionLocal
+        
         try:
             logger.info(f"Computing overview modules for user {self.user_id}")
             
-            # Compute each module with error isolation using savepoints
-            try:
-                sp = db.begin_nested()  # Create savepoint
-                investment_data = await self._compute_investment_tracker(db)
-                sp.commit()
-            except Exception as e:
-                logger.error(f"Failed to compute investment tracker: {e}", exc_info=True)
-                try:
-                    sp.rollback()
-                except Exception:
-                    pass
-                investment_data = {'error': str(e), 'total_hours': 0, 'total_items': 0}
+            fingerprints = self._module_fingerprints(db, mood_overrides)
+            cached = {} if force else self._reusable_cache_entries(db, fingerprints)
             
-            try:
-                sp = db.begin_nested()  # Create savepoint
-                new_shows_data = await self._compute_new_shows(db, mood_overrides)
-                sp.commit()
-            except Exception as e:
-                logger.error(f"Failed to compute new shows: {e}", exc_info=True)
-                try:
-                    sp.rollback()
-                except Exception:
-                    pass
-                new_shows_data = {'items': [], 'error': str(e)}
-            
-            try:
-                sp = db.begin_nested()  # Create savepoint
-                trending_data = await self._compute_trending(db, mood_overrides)
-                sp.commit()
-            except Exception as e:
-                logger.error(f"Failed to compute trending: {e}", exc_info=True)
-                try:
-                    sp.rollback()
-                except Exception:
-                    pass
-                trending_data = {'items': [], 'error': str(e)}
+            compute_fns = {
+                'investment_tracker': lambda session: self._compute_investment_tracker(session),
+                'new_shows': lambda session: self._compute_new_shows(session, mood_overrides),
+                'trending': lambda session: self._compute_trending(session, mood_overrides),
+                'upcoming': lambda session: self._compute_upcoming(session, mood_overrides),
+            }
+            error_defaults = {
+                'investment_tracker': lambda e: {'error': str(e), 'total_hours': 0, 'total_items': 0},
+            }
             
-            try:
-                sp = db.begin_nested()  # Create savepoint
-                upcoming_data = await self._compute_upcoming(db, mood_overrides)
-                sp.commit()
-            except Exception as e:
-                logger.error(f"Failed to compute upcoming: {e}", exc_info=True)
+            async def _run_module(module_type: str) -> Dict[str, Any]:
+                session = SessionLocal()
                 try:
-                    sp.rollback()
-                except Exception:
-                    pass
-                upcoming_data = {'items': [], 'error': str(e)}
-            
-            # Compute priority scores for dynamic reordering
-            priorities = self._compute_module_priorities(db, {
-                'investment_tracker': investment_data,
-                'new_shows': new_shows_data,
-                'trending': trending_data,
-                'upcoming': upcoming_data
-            })
+                    data = await compute_fns[module_type](session)
+                    session.commit()
+                    return data
+                except Exception as e:
+                    logger.error(f"Failed to compute {module_type}: {e}", exc_info=True)
+                    try:
+                        session.rollback()
+                    except Exception:
+                        pass
+                    return error_defaults.get(module_type, lambda err: {'items': [], 'error': str(err)})(e)
+                finally:
+                    session.close()
+            
+            to_compute = [m for m in self.MODULE_TYPES if m not in cached]
+            if cached:
+                logger.info(f"Overview: reusing unchanged modules {sorted(cached)} for user {self.user_id}")
+            started = utc_now()
+            computed = dict(zip(to_compute, await asyncio.gather(*[_run_module(m) for m in to_compute])))
+            if to_compute:
+                logger.info(f"Overview: computed {to_compute} in {(utc_now() - started).total_seconds():.1f}s")
+            
+            modules = {m: computed[m] if m in computed else cached[m]['data'] for m in self.MODULE_TYPES}
+            
+            # Priorities only need recomputing (LLM call) when some module changed
+            if computed or any(cached[m]['priority'] is None for m in cached):
+                priorities = self._compute_module_priorities(db, modules)
+            else:
+                priorities = {m: cached[m]['priority'] for m in self.MODULE_TYPES}
             
             # Cache results with transaction isolation
             try:
-                await self._cache_modules(db, {
-                    'investment_tracker': (investment_data, priorities['investment_tracker']),
-                    'new_shows': (new_shows_data, priorities['new_shows']),
-                    'trending': (trending_data, priorities['trending']),
-                    'upcoming': (upcoming_data, priorities['upcoming'])
-                })
+                await self._cache_modules(
+                    db,
+                    {m: (modules[m], priorities[m]) for m in self.MODULE_TYPES},
+                    fingerprints=fingerprints,
+                    reused=set(cached)
+                )
             except Exception as e:
                 logger.error(f"Failed to cache modules: {e}")
                 db.rollback()
@@ -284,11 +295,9 @@ Output ONLY the rationale sentence, nothing else:"""
             logger.info(f"Overview modules computed successfully for user {self.user_id}")
             
             return {
-                'investment_tracker': investment_data,
-                'new_shows': new_shows_data,
-                'trending': trending_data,
-                'upcoming': upcoming_data,
+                **modules,
                 'priorities': priorities,
+                'recomputed': to_compute,
                 'computed_at': utc_now().isoformat()
             }
             
@@ -297,6 +306,71 @@ Output ONLY the rationale sentence, nothing else:"""
             db.rollback()
             raise
     
+    def _module_fingerprints(self, db: Session, mood_overrides: Optional[Dict] = None) -> Dict[str, str]:
+        """Hash the inputs each module depends on, so unchanged modules can be skipped.
+        
+        External feeds (TMDB trending/upcoming) can't be fingerprinted; their
+        freshness is bounded by MODULE_TTLS instead.
+        """
+        import hashlib
+        
+        def _agg(query) -> str:
+            try:
+                row = query.one()
+                return "|".join("" if v is None else str(v) for v in row)
+            except Exception:
+                db.rollback()
+                return ""
+        
+        history = _agg(db.query(func.count(TraktWatchHistory.id), func.max(TraktWatchHistory.watched_at))
+                       .filter(TraktWatchHistory.user_id == self.user_id))
+        ratings = _agg(db.query(func.count(UserRating.id), func.max(UserRating.updated_at))
+                       .filter(UserRating.user_id == self.user_id))
+        progress = _agg(db.query(func.count(UserShowProgress.id), func.max(UserShowProgress.last_watched_at))
+                        .filter(UserShowProgress.user_id == self.user_id))
+        profile = _agg(db.query(func.max(UserTextProfile.updated_at))
+                       .filter(UserTextProfile.user_id == self.user_id))
+        trending_queue = _agg(db.query(func.count(TrendingIngestionQueue.id), func.max(TrendingIngestionQueue.discovered_at))
+                              .filter(TrendingIngestionQueue.status == 'completed'))
+        mood = json.dumps(mood_overrides or {}, sort_keys=True)
+        today = utc_now().date().isoformat()
+        
+        inputs = {
+            'investment_tracker': [history, ratings, progress],
+            'new_shows': [history, ratings, profile, mood, today],
+            'trending': [history, ratings, profile, mood, trending_queue],
+            'upcoming': [history, ratings, profile, mood, today],
+        }
+        return {
+            m: hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+            for m, parts in inputs.items()
+        }
+    
+    def _reusable_cache_entries(self, db: Session, fingerprints: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Unexpired cache entries whose stored fingerprint matches the current inputs."""
+        reusable: Dict[str, Dict[str, Any]] = {}
+        try:
+            entries = db.query(OverviewCache).filter(
+                OverviewCache.user_id == self.user_id,
+                OverviewCache.expires_at > utc_now(),
+                OverviewCache.input_fingerprint.isnot(None)
+            ).all()
+        except Exception as e:
+            logger.warning(f"Overview cache lookup failed, recomputing all modules: {e}")
+            db.rollback()
+            return reusable
+        for entry in entries:
+            if fingerprints.get(entry.module_type) != entry.input_fingerprint:
+                continue
+            try:
+                data = json.loads(entry.data_json)
+            except Exception:
+                continue
+            if isinstance(data, dict) and data.get('error'):
+                continue
+            reusable[entry.module_type] = {'data': data, 'priority': entry.priority_score}
+        return reusable
+    
     async def _compute_investment_tracker(self, db: Session) -> Dict[str, Any]:
         """
         Module 1: Investment Tracker
@@ -801,8 +875,8 @@ Output ONLY the rationale sentence, nothing else:"""
             if not candidates:
                 return {'items': [], 'message': 'Trending items not yet ingested'}
             
-            # NOTE: Don't commit here - we're inside a savepoint in compute_all_modules
-            # Metadata updates will be committed when the outer transaction commits
+            # NOTE: Don't commit here - compute_all_modules commits this module's session
+            # once the whole module succeeds (and rolls it back otherwise)
             
             logger.info(f"[Trending] Found {len(candidates)} candidates to score")
             
@@ -1262,19 +1336,17 @@ Output ONLY the rationale sentence, nothing else:"""
     
     def _compute_module_priorities_with_llm(self, db: Session, modules: Dict[str, Dict]) -> Dict[str, float]:
         """
-        Use LLM with UserTextProfile to dynamically reorder Overview modules.
+        Use LLM with the UserTextProfile summary to dynamically reorder Overview modules.
         Falls back to rule-based priorities if LLM fails.
         """
         try:
             import httpx
-            from app.models import UserTextProfile
+            from app.services.persona_context import get_persona_context
             
-            # Get user text profile
-            user_profile = db.query(UserTextProfile).filter_by(
-                user_id=self.user_id
-            ).first()
+            # UserTextProfile summary from the cached persona context
+            profile_summary = get_persona_context(self.user_id).profile_summary
             
-            if not user_profile:
+            if not profile_summary:
                 logger.debug("[OverviewService] No UserTextProfile, using rule-based priorities")
                 return self._compute_module_priorities_fallback(modules)
             
@@ -1293,7 +1365,7 @@ Output ONLY the rationale sentence, nothing else:"""
             # Build LLM prompt
             prompt = f"""Given this user's current viewing state:
 
-**User Profile**: {user_profile.summary_text}
+**User Profile**: {profile_summary}
 
 **Recent Activity**:
 - Watch hours this week: {recent_activity:.1f}
@@ -1508,16 +1580,35 @@ Use EXACT names: "investment_tracker", "new_shows", "trending", "upcoming"
                 # Silent best-effort; just log at debug level
                 logger.debug(f"[Images] Failed to patch images for tmdb {tmdb_id}: {e}")
     
-    async def _cache_modules(self, db: Session, modules: Dict[str, Tuple[Dict, float]]):
+    async def _cache_modules(
+        self,
+        db: Session,
+        modules: Dict[str, Tuple[Dict, float]],
+        fingerprints: Optional[Dict[str, str]] = None,
+        reused: Optional[set] = None
+    ):
         """
         Cache module results in overview_cache table.
         
         Args:
             modules: Dict of module_type -> (data_dict, priority_score)
+            fingerprints: Dict of module_type -> input fingerprint stored alongside the data
+            reused: Module types served from cache; only their priority is refreshed
         """
-        expires_at = utc_now() + timedelta(hours=24)
+        fingerprints = fingerprints or {}
+        reused = reused or set()
+        now = utc_now()
         
         for module_type, (data, priority) in modules.items():
+            if module_type in reused:
+                db.query(OverviewCache).filter(
+                    and_(
+                        OverviewCache.user_id == self.user_id,
+                        OverviewCache.module_type == module_type
+                    )
+                ).update({'priority_score': priority}, synchronize_session=False)
+                continue
+            
             # Delete existing cache
             db.query(OverviewCache).filter(
                 and_(
@@ -1526,6 +1617,11 @@ Use EXACT names: "investment_tracker", "new_shows", "trending", "upcoming"
                 )
             ).delete()
             
+            # Failed modules get a short TTL so the next run retries them
+            ttl = self.MODULE_TTLS.get(module_type, timedelta(hours=24))
+            if isinstance(data, dict) and data.get('error'):
+                ttl = min(ttl, timedelta(hours=1))
+            
             # Insert new cache
             cache_entry = OverviewCache(
                 user_id=self.user_id,
@@ -1533,13 +1629,14 @@ Use EXACT names: "investment_tracker", "new_shows", "trending", "upcoming"
                 data_json=json.dumps(data),
                 priority_score=priority,
                 item_count=self._count_items_in_module(data),
-                computed_at=utc_now(),
-                expires_at=expires_at
+                input_fingerprint=fingerprints.get(module_type),
+                computed_at=now,
+                expires_at=now + ttl
             )
             db.add(cache_entry)
         
         db.commit()
-        logger.info(f"Cached {len(modules)} overview modules for user {self.user_id}")
+        logger.info(f"Cached {len(modules) - len(reused)} overview modules ({len(reused)} reused) for user {self.user_id}")
     
     def _count_items_in_module(self, data: Dict) -> int:
         """Count items in a module data structure."""
@@ -1567,7 +1664,21 @@ Use EXACT names: "investment_tracker", "new_shows", "trending", "upcoming"
                 OverviewCache.expires_at > utc_now()
             )
         ).order_by(desc(OverviewCache.priority_score)).all()
-        
+        return self._build_cached_overview(cache_entries, apply_mood)
+    
+    async def get_cached_overview_async(self, session, apply_mood: Optional[Dict] = None) -> Dict[str, Any]:
+        """Same as get_cached_overview, reading through an AsyncSession (API hot path)."""
+        from sqlalchemy import select
+        result = await session.execute(
+            select(OverviewCache).where(
+                OverviewCache.user_id == self.user_id,
+                OverviewCache.expires_at > utc_now()
+            ).order_by(desc(OverviewCache.priority_score))
+        )
+        return self._build_cached_overview(result.scalars().all(), apply_mood)
+    
+    def _build_cached_overview(self, cache_entries: List[OverviewCache], apply_mood: Optional[Dict] = None) -> Dict[str, Any]:
+        """Decode cached module rows into ordered sections, applying mood filters if given."""
         if not cache_entries:
             return {'sections': [], 'message': 'No cached data available. Overview will be computed nightly.'}
         
@@ -1688,27 +1799,7 @@ Use EXACT names: "investment_tracker", "new_shows", "trending", "upcoming"
         """
         Convert PersistentCandidate model to dict for scoring engine.
         """
-        return {
-            'trakt_id': candidate.trakt_id,
-            'tmdb_id': candidate.tmdb_id,
-            'title': candidate.title,
-            'media_type': candidate.media_type,
-            'year': candidate.year,
-            'poster_path': candidate.poster_path,
-            'backdrop_path': candidate.backdrop_path,
-            'overview': candidate.overview,
-            'genres': candidate.genres.split('|') if candidate.genres else [],
-            'language': candidate.language,
-            'vote_average': candidate.vote_average,
-            'vote_count': candidate.vote_count,
-            'popularity': candidate.popularity,
-            'release_date': candidate.release_date,
-            'runtime': candidate.runtime,
-            'obscurity_score': candidate.obscurity_score,
-            'mainstream_score': candidate.mainstream_score,
-            'freshness_score': candidate.freshness_score,
-            '_from_persistent_store': True
-        }
+        return candidate_cache.to_scoring_dict(candidate_cache.candidate_record(candidate))
     
     async def _ingest_trakt_list_items(self, db: Session, list_items: List[Dict[str, Any]]) -> None:
         """
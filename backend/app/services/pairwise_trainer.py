@@ -3,23 +3,101 @@ Pairwise preference training service for user feedback collection.
 
 Implements tournament-style pairwise comparisons to learn user preferences.
 Updates user vectors immediately on judgment submission.
+
+Each session gets a pair scheduler in Redis, built once per session:
+  pairwise:{session_id}:queue       list of "a_id:b_id", highest information gain first
+  pairwise:{session_id}:candidates  hash id -> candidate dict (display + profile fields)
+  pairwise:{session_id}:vectors     hash id -> float32 embedding bytes
+Serving a pair reads the queue head and two hash fields; a judgment pops the
+pair (skips go to the back) and reads/writes the user vector and profile in
+one pipeline each.
 """
 import json
 import logging
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Set, Tuple, Any
 
 from sqlalchemy.orm import Session
-from app.core.redis_client import get_redis_sync
+from app.core.redis_client import get_redis_sync, get_redis_sync_binary
+from app.services.persona_context import publish_persona_update
 from app.models import (
-    PairwiseTrainingSession, 
-    PairwiseJudgment, 
+    PairwiseTrainingSession,
+    PairwiseJudgment,
     PersistentCandidate,
     User
 )
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_DIM = 384  # MiniLM dimension
+PAIR_QUEUE_TTL = 60 * 60 * 24  # Scheduler state outlives any realistic session
+PAIR_QUEUE_SLACK = 2  # Queue holds remaining_pairs * slack so skips don't exhaust it
+PAIR_SCORE_TEMPERATURE = 10.0  # Scales cosine score gaps into win probabilities
+USER_VECTOR_TTL = 60 * 60 * 24 * 90
+USER_PROFILE_TTL = 60 * 60 * 24 * 30
+
+
+def _pair_keys(session_id: int) -> Tuple[str, str, str]:
+    prefix = f"pairwise:{session_id}"
+    return f"{prefix}:queue", f"{prefix}:candidates", f"{prefix}:vectors"
+
+
+def rank_pairs_by_information_gain(
+    vectors: Any,
+    user_vec: Optional[Any],
+    limit: int,
+    exclude: Optional[Set[Tuple[int, int]]] = None
+) -> List[Tuple[int, int]]:
+    """Order pool index pairs (i < j) by expected information gain.
+
+    Gain of a pair is the entropy of its predicted outcome,
+    sigmoid(T * (u·v_i - u·v_j)), times the size of the vector update it
+    would cause, ||v_i - v_j||. Pairs are picked greedily with
+    gain / (1 + appearances of i and j) so the whole pool gets compared before
+    any candidate is reused heavily.
+
+    Args:
+        vectors: (n, dim) candidate embeddings
+        user_vec: Current user vector, or None for a cold start
+        limit: Maximum number of pairs to return
+        exclude: Index pairs (i, j), i < j, that were already judged
+    """
+    import numpy as np
+
+    vecs = np.asarray(vectors, dtype=np.float32)
+    n = vecs.shape[0] if vecs.ndim == 2 else 0
+    if n < 2 or limit <= 0:
+        return []
+
+    if user_vec is not None and np.shape(user_vec) == (vecs.shape[1],):
+        scores = vecs @ np.asarray(user_vec, dtype=np.float32)
+    else:
+        scores = np.zeros(n, dtype=np.float32)
+
+    ii, jj = np.triu_indices(n, k=1)
+    p = 1.0 / (1.0 + np.exp(-PAIR_SCORE_TEMPERATURE * (scores[ii] - scores[jj])))
+    p = np.clip(p, 1e-6, 1 - 1e-6)
+    entropy = -(p * np.log2(p) + (1 - p) * np.log2(1 - p))
+    spread = np.linalg.norm(vecs[ii] - vecs[jj], axis=1)
+    gain = entropy * (spread + 1e-6)  # Missing embeddings still get an order
+
+    available = np.ones(len(ii), dtype=bool)
+    if exclude:
+        for k, pair in enumerate(zip(ii.tolist(), jj.tolist())):
+            if pair in exclude:
+                available[k] = False
+
+    appearances = np.zeros(n, dtype=np.float32)
+    order: List[Tuple[int, int]] = []
+    for _ in range(min(limit, int(available.sum()))):
+        adjusted = np.where(available, gain / (1.0 + appearances[ii] + appearances[jj]), -np.inf)
+        k = int(np.argmax(adjusted))
+        available[k] = False
+        appearances[ii[k]] += 1
+        appearances[jj[k]] += 1
+        order.append((int(ii[k]), int(jj[k])))
+    return order
+
 
 class PairwiseTrainer:
     """Manages pairwise preference training sessions."""
@@ -70,7 +148,13 @@ class PairwiseTrainer:
         self.db.add(session)
         self.db.commit()
         self.db.refresh(session)
-        
+
+        try:
+            self._build_pair_queue(session)
+        except Exception as e:
+            # get_next_pair rebuilds lazily if the queue is missing
+            logger.warning(f"Failed to build pair queue for session {session.id}: {e}")
+
         # Track session start in telemetry
         try:
             from app.services.telemetry import TelemetryTracker
@@ -84,49 +168,46 @@ class PairwiseTrainer:
         
     def get_next_pair(self, session_id: int) -> Optional[Tuple[Dict, Dict]]:
         """Get next pair of candidates to judge.
-        
-        Uses Elo-inspired tournament scheduling to prioritize uncertain matchups.
-        
+
+        Serves the head of the session's precomputed pair queue (ordered by
+        information gain, see rank_pairs_by_information_gain). The pair stays at
+        the head until a judgment for it is submitted. The queue is rebuilt from
+        the DB if it expired.
+
         Args:
             session_id: Session ID to get pair from
-            
+
         Returns:
             Tuple of (candidate_a_dict, candidate_b_dict) or None if session complete
         """
         session = self.db.query(PairwiseTrainingSession).filter_by(id=session_id).first()
         if not session or session.status != "active":
             return None
-            
+
         # Check if already complete (>= not just ==)
         if session.completed_pairs >= session.total_pairs:
             self._complete_session(session_id)
             return None
-            
-        # Load candidate pool
-        candidate_ids = json.loads(session.candidate_pool_snapshot)
-        
-        # Get already judged pairs
-        judged_pairs = set()
-        judgments = self.db.query(PairwiseJudgment).filter_by(
-            session_id=session_id,
-            user_id=self.user_id
-        ).filter(PairwiseJudgment.winner != 'skip').all()
-        
-        for j in judgments:
-            judged_pairs.add((min(j.candidate_a_id, j.candidate_b_id), max(j.candidate_a_id, j.candidate_b_id)))
-            
-        # Generate next pair (simple round-robin for now)
-        for i, id_a in enumerate(candidate_ids):
-            for id_b in candidate_ids[i+1:]:
-                pair_key = (min(id_a, id_b), max(id_a, id_b))
-                if pair_key not in judged_pairs:
-                    # Fetch candidate details
-                    cand_a = self.db.query(PersistentCandidate).filter_by(id=id_a).first()
-                    cand_b = self.db.query(PersistentCandidate).filter_by(id=id_b).first()
-                    
-                    if cand_a and cand_b:
-                        return (self._candidate_to_dict(cand_a), self._candidate_to_dict(cand_b))
-                        
+
+        queue_key, candidates_key, _ = _pair_keys(session_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.lindex(queue_key, 0)
+        pipe.exists(candidates_key)
+        head, built = pipe.execute()
+
+        if not built:
+            self._build_pair_queue(session, exclude_judged=True)
+            head = self.redis.lindex(queue_key, 0)
+
+        if head:
+            id_a, id_b = head.split(":")
+            raw_a, raw_b = self.redis.hmget(candidates_key, id_a, id_b)
+            if raw_a and raw_b:
+                return (self._public_candidate(json.loads(raw_a)), self._public_candidate(json.loads(raw_b)))
+            logger.warning(f"Pair queue for session {session_id} references missing candidates, rebuilding")
+            self.redis.delete(candidates_key)
+            return self.get_next_pair(session_id) if built else None
+
         # No more pairs
         self._complete_session(session_id)
         return None
@@ -183,10 +264,12 @@ class PairwiseTrainer:
             
         self.db.commit()
         self.db.refresh(judgment)
-        
+
+        self._advance_pair_queue(session_id, candidate_a_id, candidate_b_id, requeue=(winner == 'skip'))
+
         # Update user preference vectors immediately
         if winner != 'skip':
-            self._update_user_vectors(candidate_a_id, candidate_b_id, winner)
+            self._update_user_vectors(session_id, candidate_a_id, candidate_b_id, winner)
             
         logger.info(f"Recorded judgment for session {session_id}: {candidate_a_id} vs {candidate_b_id}, winner={winner}")
         return judgment
@@ -217,6 +300,93 @@ class PairwiseTrainer:
             "completed_at": session.completed_at.isoformat() if session.completed_at else None
         }
         
+    def _build_pair_queue(self, session: PairwiseTrainingSession, exclude_judged: bool = False) -> int:
+        """Precompute the session's pair queue and preload its candidates into Redis.
+
+        One query loads the whole pool. Embeddings come from the stored column
+        (computed on demand only when missing).
+
+        Args:
+            session: Session to schedule
+            exclude_judged: Leave out pairs that already have a non-skip judgment
+                (used when rebuilding an expired queue mid-session)
+
+        Returns:
+            Number of queued pairs
+        """
+        import numpy as np
+
+        candidate_ids = list(dict.fromkeys(json.loads(session.candidate_pool_snapshot or "[]")))
+        rows = self.db.query(PersistentCandidate).filter(
+            PersistentCandidate.id.in_(candidate_ids)
+        ).all() if candidate_ids else []
+        by_id = {c.id: c for c in rows}
+        pool = [by_id[cid] for cid in candidate_ids if cid in by_id]
+
+        vectors = []
+        for cand in pool:
+            vec = self._get_or_compute_embedding(cand)
+            if vec is None or vec.shape != (EMBEDDING_DIM,):
+                vec = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+            vectors.append(vec.astype(np.float32))
+
+        exclude: Set[Tuple[int, int]] = set()
+        if exclude_judged and pool:
+            position = {cand.id: i for i, cand in enumerate(pool)}
+            judged = self.db.query(PairwiseJudgment.candidate_a_id, PairwiseJudgment.candidate_b_id).filter(
+                PairwiseJudgment.session_id == session.id,
+                PairwiseJudgment.user_id == self.user_id,
+                PairwiseJudgment.winner != 'skip'
+            ).all()
+            for a_id, b_id in judged:
+                if a_id in position and b_id in position:
+                    i, j = sorted((position[a_id], position[b_id]))
+                    exclude.add((i, j))
+
+        remaining = max(1, (session.total_pairs or 0) - (session.completed_pairs or 0))
+        order = rank_pairs_by_information_gain(
+            vectors, self._load_user_vector(), remaining * PAIR_QUEUE_SLACK, exclude=exclude
+        ) if pool else []
+
+        queue_key, candidates_key, vectors_key = _pair_keys(session.id)
+        pipe = get_redis_sync_binary().pipeline()
+        pipe.delete(queue_key, candidates_key, vectors_key)
+        if pool:
+            pipe.hset(candidates_key, mapping={str(c.id): json.dumps(self._pair_record(c)) for c in pool})
+            pipe.hset(vectors_key, mapping={str(c.id): v.tobytes() for c, v in zip(pool, vectors)})
+        if order:
+            pipe.rpush(queue_key, *[f"{pool[i].id}:{pool[j].id}" for i, j in order])
+        for key in (queue_key, candidates_key, vectors_key):
+            pipe.expire(key, PAIR_QUEUE_TTL)
+        pipe.execute()
+
+        logger.info(f"Built pair queue for session {session.id}: {len(order)} pairs over {len(pool)} candidates")
+        return len(order)
+
+    def _advance_pair_queue(self, session_id: int, candidate_a_id: int, candidate_b_id: int, requeue: bool = False) -> None:
+        """Drop a judged pair from the queue; skipped pairs go to the back."""
+        queue_key, _, _ = _pair_keys(session_id)
+        served = f"{candidate_a_id}:{candidate_b_id}"
+        try:
+            pipe = self.redis.pipeline()
+            pipe.lrem(queue_key, 0, served)
+            pipe.lrem(queue_key, 0, f"{candidate_b_id}:{candidate_a_id}")
+            if requeue:
+                pipe.rpush(queue_key, served)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to advance pair queue for session {session_id}: {e}")
+
+    def _load_user_vector(self) -> Optional[Any]:
+        import numpy as np
+
+        try:
+            raw = get_redis_sync_binary().get(f"user_vector:{self.user_id}")
+        except Exception as e:
+            logger.debug(f"Failed to get existing vector: {e}")
+            return None
+        return np.frombuffer(raw, dtype=np.float32) if raw else None
+
     def _complete_session(self, session_id: int) -> None:
         """Mark session as completed and generate persona micro-update."""
         session = self.db.query(PairwiseTrainingSession).filter_by(id=session_id).first()
@@ -377,64 +547,84 @@ User preferred these items:
             "popularity": candidate.popularity
         }
         
-    def _update_user_vectors(self, winner_id: int, loser_id: int, winner: str) -> None:
+    def _pair_record(self, candidate: PersistentCandidate) -> Dict[str, Any]:
+        """Candidate dict cached in the pair scheduler (API fields + profile inputs)."""
+        record = self._candidate_to_dict(candidate)
+        record["original_language"] = candidate.language
+        return record
+
+    @staticmethod
+    def _public_candidate(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in record.items() if k != "original_language"}
+
+    def _update_user_vectors(self, session_id: int, candidate_a_id: int, candidate_b_id: int, winner: str) -> None:
         """Update user preference vectors based on judgment using proper vector arithmetic.
         
         Implements immediate personalization updates:
         1. Update embedding vector: user_vector <- normalize(user_vector + α * (vec_winner - vec_loser))
         2. Update genre/decade weights for interpretability
         3. Store pairwise outcome for analytics
+
+        Candidates and embeddings come from the session's pair scheduler, and the
+        user vector and profile are read in one pipeline and written in another.
+        The DB is only hit when the scheduler state has expired.
         
         Args:
-            winner_id: Candidate A ID
-            loser_id: Candidate B ID
+            session_id: Session the judgment belongs to
+            candidate_a_id: Candidate A ID
+            candidate_b_id: Candidate B ID
             winner: 'a', 'b', 'both', or 'neither' indicating choice
         """
         import numpy as np
         
-        actual_winner_id = winner_id if winner == 'a' else loser_id
-        actual_loser_id = loser_id if winner == 'a' else winner_id
-        
-        # Fetch candidates
-        winner_cand = self.db.query(PersistentCandidate).filter_by(id=actual_winner_id).first()
-        loser_cand = self.db.query(PersistentCandidate).filter_by(id=actual_loser_id).first()
-        
-        if not winner_cand or not loser_cand:
-            logger.warning(f"Could not find candidates for vector update: winner={actual_winner_id}, loser={actual_loser_id}")
-            return
+        actual_winner_id = candidate_a_id if winner == 'a' else candidate_b_id
+        actual_loser_id = candidate_b_id if winner == 'a' else candidate_a_id
         
         # Learning rate (alpha parameter from spec: 0.05-0.12, using 0.08)
         alpha = 0.08
+        vector_key = f"user_vector:{self.user_id}"
+        profile_key = f"user_pairwise_profile:{self.user_id}"
+        _, candidates_key, vectors_key = _pair_keys(session_id)
         
         try:
-            # 1. UPDATE EMBEDDING VECTOR (proper vector arithmetic)
-            vector_key = f"user_vector:{self.user_id}"
-            
-            # Get binary data without UTF-8 decoding by using connection directly
-            existing_vector = None
-            try:
-                # Get connection from pool and send raw command
-                conn = self.redis.connection_pool.get_connection('GET')
-                try:
-                    conn.send_command('GET', vector_key)
-                    # Read response without decoding
-                    existing_vector = conn.read_response(disable_decoding=True)
-                finally:
-                    self.redis.connection_pool.release(conn)
-            except Exception as e:
-                logger.debug(f"Failed to get existing vector: {e}")
-                existing_vector = None
+            redis_bin = get_redis_sync_binary()
+            pipe = redis_bin.pipeline(transaction=False)
+            pipe.hmget(candidates_key, str(actual_winner_id), str(actual_loser_id))
+            pipe.hmget(vectors_key, str(actual_winner_id), str(actual_loser_id))
+            pipe.get(vector_key)
+            pipe.get(profile_key)
+            (raw_winner, raw_loser), (winner_blob, loser_blob), existing_vector, existing_profile = pipe.execute()
+            
+            if raw_winner and raw_loser:
+                winner_cand, loser_cand = json.loads(raw_winner), json.loads(raw_loser)
+                winner_vec = np.frombuffer(winner_blob, dtype=np.float32) if winner_blob else None
+                loser_vec = np.frombuffer(loser_blob, dtype=np.float32) if loser_blob else None
+            else:
+                # Scheduler state expired: fetch both candidates in one query
+                rows = {c.id: c for c in self.db.query(PersistentCandidate).filter(
+                    PersistentCandidate.id.in_([actual_winner_id, actual_loser_id])
+                ).all()}
+                if actual_winner_id not in rows or actual_loser_id not in rows:
+                    logger.warning(f"Could not find candidates for vector update: winner={actual_winner_id}, loser={actual_loser_id}")
+                    return
+                winner_cand = self._pair_record(rows[actual_winner_id])
+                loser_cand = self._pair_record(rows[actual_loser_id])
+                winner_vec = self._get_or_compute_embedding(rows[actual_winner_id])
+                loser_vec = self._get_or_compute_embedding(rows[actual_loser_id])
             
             # Get or initialize user vector (384-dim for MiniLM)
-            if existing_vector and existing_vector != b'':
+            if existing_vector:
                 user_vec = np.frombuffer(existing_vector, dtype=np.float32)
             else:
-                user_vec = np.zeros(384, dtype=np.float32)  # MiniLM dimension
+                user_vec = np.zeros(EMBEDDING_DIM, dtype=np.float32)
             
-            # Get candidate embedding vectors (from FAISS or compute on-demand)
-            winner_vec = self._get_or_compute_embedding(winner_cand)
-            loser_vec = self._get_or_compute_embedding(loser_cand)
+            # Zero-filled vectors mark candidates without embeddings in the scheduler
+            if winner_vec is not None and not winner_vec.any():
+                winner_vec = None
+            if loser_vec is not None and not loser_vec.any():
+                loser_vec = None
             
+            updated_vector = None
             if winner_vec is not None and loser_vec is not None:
                 # Apply update based on choice
                 if winner in ['a', 'b']:
@@ -456,15 +646,9 @@ User preferred these items:
                 norm = np.linalg.norm(user_vec)
                 if norm > 1e-6:
                     user_vec = user_vec / norm
-                
-                # Store updated vector with 90-day expiry
-                self.redis.setex(vector_key, 60 * 60 * 24 * 90, user_vec.tobytes())
-                logger.debug(f"Updated user {self.user_id} embedding vector (norm={norm:.4f})")
+                updated_vector = user_vec.astype(np.float32).tobytes()
             
             # 2. UPDATE GENRE/DECADE WEIGHTS (for interpretability and persona)
-            profile_key = f"user_pairwise_profile:{self.user_id}"
-            existing_profile = self.redis.get(profile_key)
-            
             if existing_profile:
                 profile = json.loads(existing_profile)
             else:
@@ -481,47 +665,52 @@ User preferred these items:
             boost_factor = 0.1
             
             if winner in ['a', 'b']:
-                if winner_cand.genres:
-                    winner_genres = json.loads(winner_cand.genres) if isinstance(winner_cand.genres, str) else winner_cand.genres
+                if winner_cand.get("genres"):
+                    winner_genres = json.loads(winner_cand["genres"]) if isinstance(winner_cand["genres"], str) else winner_cand["genres"]
                     if isinstance(winner_genres, list):
                         for genre in winner_genres:
                             genre = genre.strip().lower()
                             profile["genre_weights"][genre] = profile["genre_weights"].get(genre, 0) + boost_factor
                 
-                if loser_cand.genres:
-                    loser_genres = json.loads(loser_cand.genres) if isinstance(loser_cand.genres, str) else loser_cand.genres
+                if loser_cand.get("genres"):
+                    loser_genres = json.loads(loser_cand["genres"]) if isinstance(loser_cand["genres"], str) else loser_cand["genres"]
                     if isinstance(loser_genres, list):
                         for genre in loser_genres:
                             genre = genre.strip().lower()
                             profile["genre_weights"][genre] = profile["genre_weights"].get(genre, 0) - boost_factor * 0.5
             
             # Decade boosting
-            if winner_cand.year:
-                winner_decade = (winner_cand.year // 10) * 10
+            if winner_cand.get("year"):
+                winner_decade = (winner_cand["year"] // 10) * 10
                 profile["decade_weights"][str(winner_decade)] = profile["decade_weights"].get(str(winner_decade), 0) + boost_factor
             
             # Language boosting
-            if winner_cand.original_language:
-                lang = winner_cand.original_language.lower()
+            if winner_cand.get("original_language"):
+                lang = winner_cand["original_language"].lower()
                 profile["language_weights"][lang] = profile["language_weights"].get(lang, 0) + boost_factor
             
             # Obscurity/Freshness preferences
-            if winner_cand.vote_count and loser_cand.vote_count:
-                if winner_cand.vote_count < loser_cand.vote_count:
+            if winner_cand.get("vote_count") and loser_cand.get("vote_count"):
+                if winner_cand["vote_count"] < loser_cand["vote_count"]:
                     profile["obscurity_preference"] = min(1.0, profile["obscurity_preference"] + boost_factor * 0.5)
                 else:
                     profile["obscurity_preference"] = max(0.0, profile["obscurity_preference"] - boost_factor * 0.5)
             
-            if winner_cand.year and loser_cand.year:
-                if winner_cand.year > loser_cand.year:
+            if winner_cand.get("year") and loser_cand.get("year"):
+                if winner_cand["year"] > loser_cand["year"]:
                     profile["freshness_preference"] = min(1.0, profile["freshness_preference"] + boost_factor * 0.5)
                 else:
                     profile["freshness_preference"] = max(0.0, profile["freshness_preference"] - boost_factor * 0.5)
             
             profile["judgment_count"] += 1
             
-            # Store updated profile with 30-day expiry
-            self.redis.setex(profile_key, 60 * 60 * 24 * 30, json.dumps(profile))
+            # Store vector (90 days) and profile (30 days) in one round trip
+            pipe = redis_bin.pipeline()
+            if updated_vector is not None:
+                pipe.setex(vector_key, USER_VECTOR_TTL, updated_vector)
+            pipe.setex(profile_key, USER_PROFILE_TTL, json.dumps(profile))
+            pipe.execute()
+            publish_persona_update(self.user_id)
             
             logger.info(f"Updated user {self.user_id} vectors: {profile['judgment_count']} total judgments")
             
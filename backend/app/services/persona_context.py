@@ -0,0 +1,205 @@
+"""
+persona_context.py
+
+Per-user persona/history context shared by every LLM prompt builder
+(intent extraction, LLM judge, pairwise ranker, rationales).
+
+One load = one Redis MGET (history_compression + user_pairwise_profile) plus
+one UserTextProfile lookup. The parsed result is cached in-process for
+PERSONA_CONTEXT_TTL seconds and dropped early when a `persona_updated`
+message arrives on the `system:ai` pub/sub channel:
+
+    {"type": "persona_updated", "user_id": 1, "version": "<compression version>"}
+
+Writers of persona data call publish_persona_update(). A message carrying the
+version already cached is ignored; one without a version always invalidates.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.redis_client import get_redis_sync
+
+logger = logging.getLogger(__name__)
+
+PERSONA_CONTEXT_TTL = 300  # Upper bound on staleness if a pub/sub message is missed
+LISTENER_RETRY_SECONDS = 30
+SYSTEM_AI_CHANNEL = "system:ai"
+PERSONA_UPDATED = "persona_updated"
+
+_cache: Dict[int, Tuple["PersonaContext", float]] = {}
+_cache_lock = threading.Lock()
+_listener_lock = threading.Lock()
+_listener_pid: Optional[int] = None
+_listener_retry_at = 0.0
+
+
+@dataclass(frozen=True)
+class PersonaContext:
+    """Parsed persona inputs for one user. Treat as read-only."""
+    user_id: int
+    version: str = ""
+    persona_text: str = ""
+    watch_vector: Dict[str, float] = field(default_factory=dict)
+    pairwise_profile: Dict[str, Any] = field(default_factory=dict)
+    profile_summary: str = ""  # UserTextProfile.summary_text
+
+    @property
+    def persona(self) -> str:
+        """Trimmed persona (max 200 chars): compressed history first, then UserTextProfile."""
+        if self.persona_text and len(self.persona_text) > 10:
+            return self.persona_text[:200].strip()
+        return self.profile_summary[:200].strip() if self.profile_summary else ""
+
+    def history_summary(self, max_length: int = 150) -> str:
+        """Top genres/types from the watch vector as a comma-separated list."""
+        if not self.watch_vector:
+            return ""
+        sorted_items = sorted(self.watch_vector.items(), key=lambda x: x[1], reverse=True)[:10]
+        summary = ", ".join(k.replace("genre:", "").replace("type:", "") for k, _ in sorted_items)
+        if len(summary) > max_length:
+            summary = summary[:max_length].rsplit(",", 1)[0]  # Trim at last comma
+        return summary.strip()
+
+    def format_for_prompt(self, include_history: bool = True, include_pairwise: bool = False) -> Dict[str, str]:
+        """Dict with 'persona' and 'history' strings, trimmed for tokens."""
+        history = self.history_summary() if include_history else ""
+        if include_pairwise:
+            genre_weights = self.pairwise_profile.get("genre_weights", {}) if self.pairwise_profile else {}
+            if genre_weights:
+                top_genres = sorted(genre_weights.items(), key=lambda x: x[1], reverse=True)[:5]
+                genre_str = ", ".join(g for g, _ in top_genres)
+                history = f"{history}; prefers: {genre_str}" if history else f"Prefers: {genre_str}"
+        return {"persona": self.persona, "history": history}
+
+
+def _loads(raw: Any) -> Dict[str, Any]:
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw if isinstance(raw, str) else raw.decode("utf-8"))
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _load_profile_summary(user_id: int) -> str:
+    try:
+        from app.core.database import SessionLocal
+        from app.models import UserTextProfile
+        db = SessionLocal()
+        try:
+            row = db.query(UserTextProfile.summary_text).filter(UserTextProfile.user_id == user_id).first()
+            return (row[0] or "") if row else ""
+        finally:
+            db.close()
+    except Exception as e:
+        logger.debug(f"[PersonaContext] Failed to get UserTextProfile for user {user_id}: {e}")
+        return ""
+
+
+def _load_context(user_id: int) -> PersonaContext:
+    compression: Dict[str, Any] = {}
+    pairwise: Dict[str, Any] = {}
+    try:
+        raw_compression, raw_pairwise = get_redis_sync().mget(
+            f"history_compression:{user_id}", f"user_pairwise_profile:{user_id}"
+        )
+        compression, pairwise = _loads(raw_compression), _loads(raw_pairwise)
+    except Exception as e:
+        logger.debug(f"[PersonaContext] Failed to read persona data from Redis: {e}")
+
+    watch_vector = compression.get("watch_vector") or {}
+    return PersonaContext(
+        user_id=user_id,
+        version=str(compression.get("version") or ""),
+        persona_text=compression.get("persona_text") or "",
+        watch_vector=watch_vector if isinstance(watch_vector, dict) else {},
+        pairwise_profile=pairwise,
+        profile_summary=_load_profile_summary(user_id),
+    )
+
+
+def get_persona_context(user_id: int = 1) -> PersonaContext:
+    """Cached persona context for a user (loads on miss or after invalidation)."""
+    _ensure_listener()
+    user_id = int(user_id or 1)
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(user_id)
+    if hit and hit[1] > now:
+        return hit[0]
+
+    context = _load_context(user_id)
+    with _cache_lock:
+        _cache[user_id] = (context, now + PERSONA_CONTEXT_TTL)
+    return context
+
+
+def invalidate_persona_context(user_id: Optional[int] = None, version: Optional[str] = None) -> None:
+    """Drop one user's cached context (all users if user_id is None).
+
+    With a version, the entry is kept when it already holds that version.
+    """
+    with _cache_lock:
+        if user_id is None:
+            _cache.clear()
+            return
+        hit = _cache.get(int(user_id))
+        if hit and (not version or hit[0].version != version):
+            _cache.pop(int(user_id), None)
+
+
+def publish_persona_update(user_id: int, version: Optional[str] = None) -> None:
+    """Tell every process to drop its cached context for this user."""
+    invalidate_persona_context(user_id, version)
+    try:
+        get_redis_sync().publish(SYSTEM_AI_CHANNEL, json.dumps({
+            "type": PERSONA_UPDATED,
+            "user_id": user_id,
+            "version": version,
+        }))
+    except Exception as e:
+        logger.debug(f"[PersonaContext] Failed to publish persona update: {e}")
+
+
+def _handle_message(message: Dict[str, Any]) -> None:
+    payload = _loads(message.get("data"))
+    if payload.get("type") == PERSONA_UPDATED:
+        invalidate_persona_context(payload.get("user_id"), payload.get("version"))
+
+
+def _listen() -> None:
+    global _listener_pid, _listener_retry_at
+    try:
+        pubsub = get_redis_sync().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(SYSTEM_AI_CHANNEL)
+        # Anything published before the subscription landed is unseen
+        invalidate_persona_context()
+        while True:
+            message = pubsub.get_message(timeout=1.0)
+            if message:
+                _handle_message(message)
+    except Exception as e:
+        logger.warning(f"[PersonaContext] {SYSTEM_AI_CHANNEL} listener stopped, falling back to TTL: {e}")
+    finally:
+        with _listener_lock:
+            _listener_pid = None
+            _listener_retry_at = time.monotonic() + LISTENER_RETRY_SECONDS
+
+
+def _ensure_listener() -> None:
+    """Start the invalidation listener once per process (forked workers included)."""
+    global _listener_pid
+    pid = os.getpid()
+    if _listener_pid == pid or time.monotonic() < _listener_retry_at:
+        return
+    with _listener_lock:
+        if _listener_pid == pid or time.monotonic() < _listener_retry_at:
+            return
+        _listener_pid = pid
+        threading.Thread(target=_listen, name="persona-context-listener", daemon=True).start()
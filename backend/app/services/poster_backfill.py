@@ -0,0 +1,153 @@
+"""
+poster_backfill.py
+
+Background poster/title backfill for list items whose MediaMetadata row is missing
+or has no poster. API handlers only enqueue (trakt_id, media_type) pairs into a Redis
+set; the backfill_list_posters Celery task drains it against Trakt + TMDB so page
+loads never wait on external APIs.
+"""
+import asyncio
+import logging
+from typing import Iterable, List, Tuple
+
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "poster_backfill:queue"
+DISPATCH_LOCK_KEY = "poster_backfill:dispatch_lock"
+DISPATCH_LOCK_TTL = 30  # seconds; coalesces bursts of page loads into one task run
+BATCH_SIZE = 50
+FETCH_CONCURRENCY = 4
+
+
+async def enqueue_poster_backfill(items: Iterable[Tuple[int, str]]) -> int:
+    """Queue (trakt_id, media_type) pairs for backfill and dispatch the worker task once per window.
+
+    Returns the number of newly queued pairs. Never raises: a failed enqueue only means
+    the poster shows up on a later page load.
+    """
+    members = [f"{mt}:{tid}" for tid, mt in items if tid]
+    if not members:
+        return 0
+    try:
+        redis = get_redis()
+        added = await redis.sadd(QUEUE_KEY, *members)
+        if await redis.set(DISPATCH_LOCK_KEY, "1", nx=True, ex=DISPATCH_LOCK_TTL):
+            from app.services.tasks import backfill_list_posters
+            backfill_list_posters.delay()
+        return int(added or 0)
+    except Exception as e:
+        logger.debug(f"Poster backfill enqueue failed: {e}")
+        return 0
+
+
+def _parse_member(member) -> Tuple[int, str]:
+    if isinstance(member, bytes):
+        member = member.decode("utf-8")
+    mt, tid = member.split(":", 1)
+    return int(tid), mt
+
+
+async def drain_poster_backfill(max_batches: int = 20) -> int:
+    """Pop queued pairs in batches, fetch Trakt/TMDB details and upsert MediaMetadata.
+
+    Returns the number of metadata rows written.
+    """
+    from datetime import datetime as _dt
+    from app.core.database import SessionLocal
+    from app.models import MediaMetadata
+    from app.services.trakt_client import TraktClient
+    from app.services.tmdb_client import fetch_tmdb_metadata, get_tmdb_api_key
+
+    redis = get_redis()
+    trakt_client = TraktClient(user_id=1)
+    try:
+        tmdb_key = await get_tmdb_api_key()
+    except Exception:
+        tmdb_key = None
+    sem = asyncio.Semaphore(FETCH_CONCURRENCY)
+    written = 0
+
+    async def fetch_one(tid: int, mt: str):
+        try:
+            async with sem:
+                details = await trakt_client.get_item_details(mt, tid)
+                if not isinstance(details, dict) or not details.get("title"):
+                    return None
+                tmdb_id = (details.get("ids") or {}).get("tmdb")
+                poster_url = None
+                backdrop_url = None
+                if tmdb_id and tmdb_key:
+                    try:
+                        tmdb = await fetch_tmdb_metadata(tmdb_id, "movie" if mt == "movie" else "tv")
+                        if tmdb:
+                            if tmdb.get("poster_path"):
+                                poster_url = f"https://image.tmdb.org/t/p/w342{tmdb['poster_path']}"
+                            if tmdb.get("backdrop_path"):
+                                backdrop_url = f"https://image.tmdb.org/t/p/w780{tmdb['backdrop_path']}"
+                    except Exception:
+                        pass
+                return tid, mt, details.get("title"), details.get("year"), tmdb_id, poster_url, backdrop_url
+        except Exception as e:
+            logger.debug(f"Poster backfill fetch failed for {mt}:{tid}: {e}")
+            return None
+
+    for _ in range(max_batches):
+        members = await redis.spop(QUEUE_KEY, BATCH_SIZE)
+        if not members:
+            break
+        pairs: List[Tuple[int, str]] = []
+        for m in members:
+            try:
+                pairs.append(_parse_member(m))
+            except Exception:
+                continue
+        results = [r for r in await asyncio.gather(*[fetch_one(tid, mt) for tid, mt in pairs]) if r]
+        if not results:
+            continue
+
+        db = SessionLocal()
+        try:
+            for mt in {r[1] for r in results}:
+                batch = [r for r in results if r[1] == mt]
+                existing = {
+                    m.trakt_id: m for m in db.query(MediaMetadata).filter(
+                        MediaMetadata.trakt_id.in_([r[0] for r in batch]),
+                        MediaMetadata.media_type == mt
+                    ).all()
+                }
+                for tid, _mt, title, year, tmdb_id, poster_url, backdrop_url in batch:
+                    meta = existing.get(tid)
+                    if meta:
+                        if not meta.title:
+                            meta.title = title
+                        if year is not None:
+                            meta.year = year
+                        if tmdb_id is not None:
+                            meta.tmdb_id = tmdb_id
+                        if poster_url:
+                            meta.poster_path = poster_url
+                        if backdrop_url:
+                            meta.backdrop_path = backdrop_url
+                        meta.last_updated = _dt.utcnow()
+                    else:
+                        db.add(MediaMetadata(
+                            trakt_id=tid,
+                            media_type=mt,
+                            title=title,
+                            year=year,
+                            tmdb_id=tmdb_id,
+                            poster_path=poster_url,
+                            backdrop_path=backdrop_url,
+                            last_updated=_dt.utcnow()
+                        ))
+                    written += 1
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Poster backfill write failed: {e}")
+        finally:
+            db.close()
+
+    return written
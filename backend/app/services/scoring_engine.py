@@ -293,10 +293,15 @@ class ScoringEngine:
         # 2. Compute basic features (always computed)
         user_id = user.get('id') if isinstance(user, dict) else None
         pref_genres_set = set(self._get_user_genre_preferences(user_id))
-        for c in filtered:
+        global_features = self._global_features(filtered)
+        for c, (_pop_q, rating_q, _novelty_q, freshness_q) in zip(filtered, global_features):
             c['genre_overlap'] = self._genre_overlap(user, c)
+            # popularity_norm stays vote-count based (the weights below are tuned for it); rating and
+            # freshness use global quantiles from the nightly feature store, fixed ranges for unseen items
             c['popularity_norm'] = self._norm(c.get('votes', 0), 0, 100000)
-            c['rating_norm'] = self._norm(c.get('rating', 0), 0, 10)
+            c['rating_norm'] = rating_q if rating_q is not None else self._norm(c.get('rating', 0), 0, 10)
+            if freshness_q is not None:
+                c['freshness_norm'] = freshness_q
             # Filter alignment features
             c['filter_align'] = self._filter_alignment(c, filters or {})
             # User preferred genres alignment (from Trakt thumbs-up or mood fallback)
@@ -533,7 +538,7 @@ class ScoringEngine:
             cand_mood = compute_mood_vector_for_tmdb(tmdb_meta)
             c['mood_score'] = self._cosine(enhanced_user_mood, cand_mood)
             c['obscurity'] = c.get('obscurity_score', 0.0) or c.get('mainstream_score', 0.0) or c.get('popularity_norm', 0.0)
-            c['freshness'] = c.get('freshness_score', 0.0)
+            c['freshness'] = c.get('freshness_score') or c.get('freshness_norm', 0.0)
             c['novelty'] = 1.0 - c['popularity_norm']
 
         # Per-list-type weights from user table
@@ -891,6 +896,16 @@ class ScoringEngine:
     def _norm(self, val, minv, maxv):
         return min(1.0, max(0.0, (val - minv) / (maxv - minv + 1e-6)))
 
+    def _global_features(self, candidates: list) -> list:
+        """(popularity, rating, novelty, freshness) quantiles per candidate; None where unknown."""
+        try:
+            from app.services.ai_engine.feature_store import gather_candidate_features
+            feats = gather_candidate_features(candidates).tolist()
+        except Exception as e:
+            logger.debug(f"[ScoringEngine] Feature store unavailable: {e}")
+            return [(None, None, None, None)] * len(candidates)
+        return [tuple(None if math.isnan(v) else float(v) for v in row) for row in feats]
+
     def _user_profile_text(self, user):
         """Build a lightweight profile text from cached mood axes as tags."""
         mood = get_cached_user_mood(user.get('id')) or {}
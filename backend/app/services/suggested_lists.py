@@ -494,6 +494,8 @@ class SuggestedListsService:
             db.add(user_list)
             db.commit()
             db.refresh(user_list)
+            from app.services.list_sync_scheduler import schedule_list
+            schedule_list(user_list)
             
             # Create corresponding Trakt list (best-effort)
             try:
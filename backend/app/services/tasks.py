@@ -33,7 +33,7 @@ import json
 from datetime import datetime
 from celery import shared_task
 from celery.exceptions import Retry
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from app.core.redis_client import get_redis
 from app.core.redis_client import get_redis_sync
 from app.utils.timezone import utc_now
@@ -41,27 +41,11 @@ from app.services.scoring_engine import ScoringEngine
 from app.services.mood import get_user_mood
 from app.core.database import SessionLocal
 from app.core.config import settings
-from app.services.ai_engine.bge_index import BGEIndex, BGEEmbedder
+from app.services.ai_engine.bge_index import BGEIndex, BGEEmbedder, acquire_write_lock, release_write_lock
 from app.services.ai_engine.metadata_processing import compose_text_for_embedding
 
 logger = logging.getLogger(__name__)
 
-def _safe_join(val) -> str:
-    """Join JSON array-like or list-like values into a comma-separated string."""
-    try:
-        if isinstance(val, str):
-            if not val:
-                return ""
-            arr = json.loads(val)
-            if isinstance(arr, list):
-                return ", ".join(str(x) for x in arr)
-            return str(val)
-        if isinstance(val, list):
-            return ", ".join(str(x) for x in val)
-    except Exception:
-        pass
-    return str(val or "")
-
 class SyncLock:
     """Redis-based lock for sync operations."""
     
@@ -154,19 +138,33 @@ def format_sync_notification(list_title: str, trigger: str, updated: int = 0, re
     return msg
 
 
+def _refresh_bge_aspect_store() -> None:
+    """Sync the memmapped multi-aspect store used by dual_index_search with bge_embeddings."""
+    try:
+        from app.services.ai_engine.bge_aspect_store import refresh_aspect_store
+        stats = refresh_aspect_store()
+        logger.info(f"[BGE] Aspect store refreshed: {stats}")
+    except Exception as e:
+        logger.warning(f"[BGE] Aspect store refresh failed (scoring falls back to batched DB reads): {e}")
+
+
 @shared_task(bind=True, max_retries=3, name="build_bge_index_topN")
 def build_bge_index_topN(self, top_n: int | None = None) -> dict:
-    """Nightly builder for the secondary BGE FAISS index (additive, no schema changes).
+    """Nightly builder for the secondary BGE FAISS index.
 
     - Select top-N candidates by popularity/quality
-    - Compose stable text and hash
-    - Embed only missing/stale items
+    - Keep only rows whose content_hash differs from embedding_hash (one indexed comparison)
+    - Compose text and hash for those rows only; embed missing/stale items
     - Append to separate FAISS index under settings.ai_bge_index_dir
+    - Record embedding_hash so unchanged rows are skipped on the next run
 
+    Holds the BGE index write lock for the whole build, so the enrichment append
+    cannot interleave its writes with the build's batches.
     This task is safe to run even if retrieval isn't enabled yet.
     """
     import hashlib
     from sqlalchemy import text
+    from app.services.ai_engine.metadata_processing import embedding_source_dict, compute_content_hash, bge_label_texts
 
     base_dir = settings.ai_bge_index_dir
     model_name = settings.ai_bge_model_name
@@ -174,18 +172,22 @@ def build_bge_index_topN(self, top_n: int | None = None) -> dict:
     if limit <= 0:
         return {"updated": 0, "skipped": 0, "total": 0}
 
+    if not acquire_write_lock():
+        # An enrichment append is writing the index; it finishes within minutes
+        raise self.retry(countdown=300)
     db = SessionLocal()
     try:
-        # Select strong candidates: active, with good metadata; prioritize popularity and votes
-        sql = text(
+        # Load existing index and map. Without an index, recorded embedding hashes
+        # are meaningless and every top-N row has to be embedded again.
+        idx = BGEIndex(base_dir)
+        full_rebuild = not idx.load()
+
+        # Select strong candidates: active, with good metadata; prioritize popularity and votes.
+        # Only ids and the staleness flag are fetched here; the wide columns are loaded for stale rows.
+        top_sql = text(
             """
-            SELECT id, tmdb_id, trakt_id, media_type, title, original_title, overview,
-                   genres, keywords, "cast", production_companies,
-                   vote_average, vote_count, popularity, year, language, runtime,
-                   tagline, homepage, production_countries, spoken_languages,
-                   networks, created_by, number_of_seasons, number_of_episodes,
-                   episode_run_time, first_air_date, last_air_date, in_production,
-                   status
+            SELECT id,
+                   (content_hash IS NULL OR embedding_hash IS DISTINCT FROM content_hash) AS stale
             FROM persistent_candidates
             WHERE active = true AND title IS NOT NULL AND title != ''
             ORDER BY
@@ -199,84 +201,66 @@ def build_bge_index_topN(self, top_n: int | None = None) -> dict:
             LIMIT :lim
             """
         )
-        rows = db.execute(sql, {"lim": limit}).fetchall()
-        total = len(rows)
+        top_rows = db.execute(top_sql, {"lim": limit}).fetchall()
+        total = len(top_rows)
         if total == 0:
             return {"updated": 0, "skipped": 0, "total": 0}
+        stale_ids = [r[0] for r in top_rows if full_rebuild or r[1]]
+        if not stale_ids:
+            logger.info(f"[BGE] No updates needed (topN={total}, all embedding hashes current)")
+            _refresh_bge_aspect_store()
+            return {"updated": 0, "skipped": total, "total": total}
+        logger.info(f"[BGE] {len(stale_ids):,}/{total:,} candidates changed since last build (full_rebuild={full_rebuild})")
 
-        # Prepare texts and hashes (base + labeled variants)
+        rows_sql = text(
+            """
+            SELECT id, tmdb_id, trakt_id, media_type, title, original_title, overview,
+                   genres, keywords, "cast", production_companies,
+                   vote_average, vote_count, popularity, year, language, runtime,
+                   tagline, homepage, production_countries, spoken_languages,
+                   networks, created_by, number_of_seasons, number_of_episodes,
+                   episode_run_time, first_air_date, last_air_date, in_production,
+                   status
+            FROM persistent_candidates
+            WHERE id = ANY(:ids)
+            """
+        )
+        rows = []
+        for i in range(0, len(stale_ids), 5000):
+            rows.extend(db.execute(rows_sql, {"ids": stale_ids[i:i + 5000]}).fetchall())
+
+        # Prepare texts and hashes (base + labeled variants) for stale rows only
         candidates = {}
         id_to_text = {}
         id_to_labels: Dict[int, Dict[str, str]] = {}
         id_to_metadata: Dict[int, Tuple[int, str]] = {}  # Store tmdb_id, media_type to avoid re-query
         for row in rows:
-            (
-                rid, tmdb_id, trakt_id, media_type, title, original_title, overview,
-                genres, keywords, cast, production_companies,
-                vote_average, vote_count, popularity, year, language, runtime,
-                tagline, homepage, production_countries, spoken_languages,
-                networks, created_by, number_of_seasons, number_of_episodes,
-                episode_run_time, first_air_date, last_air_date, in_production,
-                status,
-            ) = row
-            cand = {
-                'id': rid,
-                'tmdb_id': tmdb_id,
-                'trakt_id': trakt_id,
-                'media_type': media_type,
-                'title': title or '',
-                'original_title': original_title or '',
-                'overview': overview or '',
-                'genres': genres or '[]',
-                'keywords': keywords or '[]',
-                'cast': cast or '[]',
-                'production_companies': production_companies or '[]',
-                'vote_average': vote_average or 0,
-                'vote_count': vote_count or 0,
-                'popularity': popularity or 0,
-                'year': year,
-                'language': language or '',
-                'runtime': runtime or 0,
-                'tagline': tagline or '',
-                'homepage': homepage or '',
-                'production_countries': production_countries or '[]',
-                'spoken_languages': spoken_languages or '[]',
-                'networks': networks or '[]',
-                'created_by': created_by or '[]',
-                'number_of_seasons': number_of_seasons,
-                'number_of_episodes': number_of_episodes,
-                'episode_run_time': episode_run_time or '[]',
-                'first_air_date': first_air_date or '',
-                'last_air_date': last_air_date or '',
-                'in_production': in_production,
-                'status': status or '',
-            }
+            cand = embedding_source_dict(row)
+            rid = cand['id']
             # Base text
             text_base = compose_text_for_embedding(cand)
             id_to_text[rid] = text_base
-            candidates[rid] = hashlib.sha1(text_base.encode('utf-8')).hexdigest()
-            id_to_metadata[rid] = (tmdb_id, media_type)  # Cache for persistence
-            # Labeled texts for multi-vector index
-            labels: Dict[str, str] = {}
-            # Title-only emphasis
-            if title:
-                labels["title"] = title
-            # Keywords focus
-            labels["keywords"] = _safe_join(cand.get('keywords', '[]'))
-            # People/brands focus
-            labels["people"] = _safe_join(cand.get('cast', '[]'))
-            brands = _safe_join(cand.get('production_companies', '[]'))
-            if brands:
-                labels["brands"] = brands
-            id_to_labels[rid] = labels
-
-        # Load existing index and map
-        idx = BGEIndex(base_dir)
-        idx.load()
+            candidates[rid] = compute_content_hash(cand)
+            id_to_metadata[rid] = (cand['tmdb_id'], cand['media_type'])  # Cache for persistence
+            # Labeled texts for multi-vector index (title/keywords/people/brands focus)
+            id_to_labels[rid] = bge_label_texts(cand)
+
         missing = idx.get_missing_or_stale(candidates)
 
+        def _record_embedding_hashes() -> None:
+            """Persist content_hash/embedding_hash for every processed stale row."""
+            params = [{"id": rid, "h": h} for rid, h in candidates.items()]
+            for j in range(0, len(params), 1000):
+                db.execute(
+                    text("UPDATE persistent_candidates SET content_hash = :h, embedding_hash = :h WHERE id = :id"),
+                    params[j:j + 1000],
+                )
+            db.commit()
+
         if not missing:
-            logger.info(f"[BGE] No updates needed (topN={total})")
+            # Hashes were NULL or out of date but the index already holds these vectors
+            _record_embedding_hashes()
+            logger.info(f"[BGE] No updates needed (topN={total}, {len(candidates):,} hashes recorded)")
             return {"updated": 0, "skipped": total, "total": total}
 
         logger.info(f"[BGE] 🚀 Starting base embedding generation for {len(missing):,} items")
@@ -302,7 +286,7 @@ def build_bge_index_topN(self, top_n: int | None = None) -> dict:
             
             vecs = embedder.embed(texts, batch_size=batch_size)
             hashes = [candidates[iid] for iid in batch_ids]
-            idx.add_items(batch_ids, vecs, content_hashes=hashes, labels=["base"] * len(batch_ids))
+            idx.add_items(batch_ids, vecs, content_hashes=hashes, labels=["base"] * len(batch_ids), replace=True)
             
             # Persist base embeddings to database for recovery
             persist_success = 0
@@ -456,7 +440,7 @@ def build_bge_index_topN(self, top_n: int | None = None) -> dict:
                     logger.warning(f"[BGE Persist] Failed labeled embedding id={iid}, label={lab}: {e}")
                 
                 if len(to_add_ids) >= 256:
-                    idx.add_items(to_add_ids, to_add_vecs, content_hashes=to_add_hashes, labels=to_add_labels)
+                    idx.add_items(to_add_ids, to_add_vecs, content_hashes=to_add_hashes, labels=to_add_labels, replace=True)
                     try:
                         db.commit()
                         logger.info(f"[BGE Persist] 💾 Labeled batch: {len(to_add_ids)} vectors saved to DB")
@@ -466,7 +450,7 @@ def build_bge_index_topN(self, top_n: int | None = None) -> dict:
                     to_add_ids, to_add_vecs, to_add_hashes, to_add_labels = [], [], [], []
         
         if to_add_ids:
-            idx.add_items(to_add_ids, to_add_vecs, content_hashes=to_add_hashes, labels=to_add_labels)
+            idx.add_items(to_add_ids, to_add_vecs, content_hashes=to_add_hashes, labels=to_add_labels, replace=True)
             try:
                 db.commit()
                 logger.info(f"[BGE Persist] 💾 Final labeled batch: {len(to_add_ids)} vectors saved to DB")
@@ -477,6 +461,12 @@ def build_bge_index_topN(self, top_n: int | None = None) -> dict:
         logger.info(f"[BGE] ✅ Labeled embeddings complete: {labeled_generated:,} vectors generated, {labeled_skipped:,} skipped (up-to-date)")
         logger.info(f"[BGE] 🎉 Index build finished: {updated:,} base vectors + {labeled_generated:,} labeled vectors = {updated + labeled_generated:,} total")
         logger.info(f"[BGE] Summary: {total:,} candidates | {updated:,} updated | {total - updated:,} unchanged")
+        try:
+            _record_embedding_hashes()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"[BGE] Failed to record embedding hashes (rows will be rechecked next run): {e}")
+        _refresh_bge_aspect_store()
         # Auto-enable runtime flag via Redis, so retrieval can use it without env change
         try:
             r = get_redis_sync()
@@ -490,6 +480,7 @@ def build_bge_index_topN(self, top_n: int | None = None) -> dict:
         logger.error(f"build_bge_index_topN failed: {e}", exc_info=True)
         raise
     finally:
+        release_write_lock()
         try:
             db.close()
         except Exception:
@@ -813,6 +804,9 @@ Profile:"""
         
         db.commit()
         
+        from app.services.persona_context import publish_persona_update
+        publish_persona_update(user_id)
+        
         return {
             "status": "success",
             "summary_length": len(summary_text),
@@ -879,6 +873,15 @@ def run_nightly_maintenance(self):
                     logger.warning("Nightly: ElasticSearch index rebuild timed out after 1 hour")
                 except Exception as e:
                     logger.warning(f"Nightly: ElasticSearch index rebuild failed: {e}")
+
+                # Keep the in-process fallback text index current (incremental, watermark based)
+                try:
+                    from app.services.text_search import local_index_enabled
+                    if local_index_enabled():
+                        from app.services.local_text_search import update_local_text_index
+                        update_local_text_index()
+                except Exception as e:
+                    logger.warning(f"Nightly: local text index update failed: {e}")
         except Exception as e:
             logger.warning(f"Nightly maintenance dispatcher error: {e}")
     # Use a fresh event loop to avoid "Event loop is closed" in forked workers
@@ -895,35 +898,84 @@ def run_nightly_maintenance(self):
                 pass
 
 @shared_task(bind=True, max_retries=2, default_retry_delay=60)
-def sync_user_lists(self, user_id: int = 1, force_full: bool = False):
-    """Periodically sync all user lists (including custom lists) honoring each list's sync_interval.
+def sync_user_lists(self, user_id: Optional[int] = None, force_full: bool = False):
+    """Dispatch syncs for the smart lists that are due, according to the list schedule.
 
-    This task scans the user's lists and, for each one, uses ListSyncService's scheduling logic
-    to decide full/incremental/skip. It ensures custom lists with a non-null sync_interval are
-    picked up automatically without requiring manual syncs.
+    Lists are kept in a Redis sorted set keyed by next-due time (see list_sync_scheduler),
+    so each beat only claims due lists (bounded by free per-user slots) and fans them out as
+    sync_due_list subtasks on the sync queue; nothing that is not due is loaded.
 
     Args:
-        user_id: The user to sync (default single-user mode: 1)
-        force_full: If True, force full sync for all lists regardless of interval
+        user_id: Only dispatch this user's lists (default: all users)
+        force_full: If True, dispatch a full sync for every scheduled list regardless of interval
     """
+    from app.services.list_sync_scheduler import claim_due_lists, seed_schedule
+
+    try:
+        seed_schedule()
+    except Exception as e:
+        logger.warning(f"sync_user_lists: schedule seeding failed: {e}")
+    try:
+        due = claim_due_lists(user_id=user_id, force=force_full)
+    except Exception as e:
+        logger.error(f"sync_user_lists failed to read the list schedule: {e}", exc_info=True)
+        raise
+    for owner_id, list_id in due:
+        sync_due_list.delay(list_id=list_id, user_id=owner_id, force_full=force_full)
+    if due:
+        logger.info(f"sync_user_lists dispatched {len(due)} due lists across {len({u for u, _ in due})} users")
+    return {"dispatched": len(due)}
+
+
+@shared_task(bind=True, max_retries=None)
+def sync_due_list(self, list_id: int, user_id: int, force_full: bool = False):
+    """Sync one list claimed by sync_user_lists, holding one of the user's concurrency slots."""
+    from app.services.list_sync_scheduler import acquire_slot, release_slot, renew_claim, unschedule_list
+
+    if not acquire_slot(user_id):
+        # All of this user's slots are busy; try again shortly. Renewing the claim lease keeps
+        # the list off the beat however long the wait, so it is never dispatched twice.
+        renew_claim(user_id, list_id)
+        raise self.retry(countdown=30)
+
     async def _run():
+        from app.core.database import SessionLocal
+        from app.models import UserList
+        from app.services.list_sync import ListSyncService
+        from app.services.mood import ensure_user_mood
+
+        db = SessionLocal()
         try:
-            from app.services.list_sync import ListSyncService
-            svc = ListSyncService(user_id=user_id)
-            result = await svc.sync_all_lists(force_full=force_full)
-            logger.info(f"sync_user_lists completed for user {user_id}: {result.get('synced',0)} synced, {result.get('errors',0)} errors")
-            return result
-        except Exception as e:
-            logger.error(f"sync_user_lists failed: {e}", exc_info=True)
-            raise
+            user_list = db.query(UserList).filter(UserList.id == list_id).first()
+        finally:
+            db.close()
+        if not user_list:
+            unschedule_list(list_id, user_id)
+            return {"list_id": list_id, "status": "missing"}
+        # Warm up mood cache daily for this user (no-op when cached)
+        try:
+            await ensure_user_mood(user_id)
+        except Exception:
+            pass
+        svc = ListSyncService(user_id=user_id)
+        try:
+            return await svc._sync_single_list(user_list, force_full=force_full)
+        finally:
+            svc.close()
 
-    # Ensure a fresh event loop inside Celery worker
     loop = None
     try:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        return loop.run_until_complete(_run())
+        result = loop.run_until_complete(_run())
+        logger.info(f"sync_due_list finished list {list_id}: {result.get('status')}")
+        return result
+    except Exception as e:
+        # _sync_single_list already recorded the error and rescheduled the list
+        logger.error(f"sync_due_list failed for list {list_id}: {e}")
+        return {"list_id": list_id, "status": "error", "error": str(e)}
     finally:
+        release_slot(user_id)
         if loop:
             try:
                 loop.close()
@@ -1222,28 +1274,46 @@ def _prepare_es_candidates_batch(rows):
             "vote_average": row.vote_average,
             "vote_count": row.vote_count
         }
+        if hasattr(row, "profile_text"):
+            candidate["profile_text"] = row.profile_text
         candidates.append(candidate)
     return candidates
 
 
-async def _rebuild_elasticsearch_index():
+ES_REINDEX_CHECKPOINT_KEY = "es:reindex:checkpoint"
+ES_REINDEX_CHECKPOINT_TTL = 2 * 86400  # Older checkpoints are abandoned and the run starts over
+
+
+async def _rebuild_elasticsearch_index(full: bool = False):
     """Rebuild ElasticSearch index from persistent candidates (incremental or full).
     
-    This indexes all active candidates with trakt_id and embeddings into ElasticSearch
-    for fast literal/fuzzy text search (complementing FAISS semantic search).
+    This indexes all active candidates into ElasticSearch for fast literal/fuzzy
+    text search (complementing FAISS semantic search).
     
     Strategy:
-    - If index exists with reasonable count, only add missing items (incremental)
-    - Otherwise, recreate index and bulk load all candidates (full rebuild)
+    - Full rebuild when requested, when the index is missing, or when it has no
+      last_refreshed watermark yet (index created before watermarks existed)
+    - Otherwise incremental: only rows whose last_refreshed (or ItemLLMProfile
+      updated_at) is newer than the watermark; rows that went inactive are deleted
+    - Rows are streamed by keyset pagination (id > last_id) with the profile text
+      joined in, and each page is sent through helpers.parallel_bulk
+    - After every page the last id is checkpointed in Redis, so an interrupted run
+      resumes where it stopped; the watermark (run start time) is written to the
+      index _meta only once the run completes
     """
     from app.core.database import SessionLocal
     from sqlalchemy import text
-    from app.services.elasticsearch_client import get_elasticsearch_client
+    from app.services.elasticsearch_client import get_elasticsearch_client, INDEX_NAME
     import json
     import time
     
     start_time = time.time()
     db = SessionLocal()
+    r = None
+    try:
+        r = get_redis_sync()
+    except Exception:
+        r = None
     
     try:
         logger.info("[ElasticSearch] Starting index update")
@@ -1255,150 +1325,121 @@ async def _rebuild_elasticsearch_index():
             logger.error("[ElasticSearch] Failed to connect. Ensure service is running.")
             return 0
         
-        # Count total candidates (no longer requiring trakt_id + embedding)
-        total = db.execute(text(
-            "SELECT COUNT(*) FROM persistent_candidates WHERE active=true"
-        )).scalar()
-        
-        logger.info(f"[ElasticSearch] {total} candidates in database")
+        checkpoint = None
+        if r is not None:
+            try:
+                raw = r.get(ES_REINDEX_CHECKPOINT_KEY)
+                checkpoint = json.loads(raw) if raw else None
+            except Exception:
+                checkpoint = None
+        index_exists = es_client.es.indices.exists(index=INDEX_NAME)
+        if checkpoint and (not index_exists or (full and checkpoint.get("mode") != "full")):
+            checkpoint = None
+        
+        if checkpoint:
+            mode = checkpoint["mode"]
+            logger.info(f"[ElasticSearch] Resuming {mode} reindex after id {checkpoint['last_id']} ({checkpoint.get('indexed', 0)} sent so far)")
+        else:
+            watermark = es_client.get_index_meta().get("last_refreshed_watermark") if index_exists else None
+            mode = "incremental" if (index_exists and watermark and not full) else "full"
+            checkpoint = {
+                "mode": mode,
+                "since": watermark if mode == "incremental" else None,
+                # Rows refreshed while this run streams are picked up by the next one
+                "cutoff": utc_now().isoformat(),
+                "last_id": 0,
+                "indexed": 0,
+                "deleted": 0,
+            }
+            if mode == "full":
+                logger.info("[ElasticSearch] Performing full rebuild (creating fresh index)...")
+                if not es_client.create_index():
+                    logger.error("[ElasticSearch] Failed to create index")
+                    return 0
+            else:
+                logger.info(f"[ElasticSearch] Incremental update of rows refreshed since {watermark}")
         
         # Temporarily disable automatic refresh to speed up bulk indexing
         try:
-            es_client.es.indices.put_settings(index="watchbuddy_candidates", body={"index": {"refresh_interval": "-1"}})
+            es_client.es.indices.put_settings(index=INDEX_NAME, body={"index": {"refresh_interval": "-1"}})
         except Exception:
             pass
-
-        # Check if index exists and has reasonable count
-        index_exists = es_client.es.indices.exists(index="watchbuddy_candidates")
-        if index_exists:
-            stats = es_client.get_index_stats()
-            current_count = stats.get('count', 0)
-            logger.info(f"[ElasticSearch] Existing index has {current_count} documents")
-            
-            # If index has reasonable count (>80% of total), do incremental update
-            if current_count > total * 0.8:
-                logger.info("[ElasticSearch] Index is mostly up-to-date, will add only new items")
-                
-                # Use memory-efficient streaming approach with smaller batches
-                from app.core.memory_manager import managed_memory, batch_query_iterator
-                
-                indexed = 0
-                batch_size = 250  # Reduced from 500 for better memory efficiency
-                
-                with managed_memory("elasticsearch_incremental_index"):
-                    # Use batch iterator to avoid loading all rows into memory
-                    query = text(
-                        """
-                        SELECT 
-                            tmdb_id, media_type, title, original_title, year, overview, tagline,
-                            genres, keywords, "cast" AS cast_json, created_by, networks,
-                            production_companies, production_countries, spoken_languages,
-                            popularity, vote_average, vote_count
-                        FROM persistent_candidates
-                        WHERE active=true
-                        ORDER BY id
-                        """
-                    )
-                    
-                    offset = 0
-                    while offset < total:
-                        # Fetch batch (streaming approach)
-                        rows = db.execute(text(
-                            """
-                            SELECT 
-                                tmdb_id, media_type, title, original_title, year, overview, tagline,
-                                genres, keywords, "cast" AS cast_json, created_by, networks,
-                                production_companies, production_countries, spoken_languages,
-                                popularity, vote_average, vote_count
-                            FROM persistent_candidates
-                            WHERE active=true
-                            ORDER BY id
-                            OFFSET :off LIMIT :lim
-                            """
-                        ), {"off": offset, "lim": batch_size}).fetchall()
-                        
-                        if not rows:
-                            break
-                        
-                        # Prepare candidates for indexing (process immediately, don't accumulate)
-                        candidates = _prepare_es_candidates_batch(rows)
-                        
-                        # Index batch immediately (stream to ES, don't accumulate)
-                        count = es_client.index_candidates(candidates)
-                        indexed += count
-                        offset += len(rows)
-                        
-                        # Clear batch data to free memory
-                        candidates.clear()
-                        del rows
-                        
-                        # Log progress every 10k items
-                        if indexed % 10000 == 0 or indexed == total:
-                            elapsed_min = (time.time() - start_time) / 60
-                            logger.info(f"[ElasticSearch] Progress: {indexed}/{total} processed ({indexed/total*100:.1f}%)")
-                
-                elapsed_min = (time.time() - start_time) / 60
-                logger.info(f"[ElasticSearch] ✅ Incremental update complete! {indexed} items processed in {elapsed_min:.1f} minutes")
-                
-                return indexed
         
-        # Full rebuild: Create/recreate index with mapping
-        logger.info("[ElasticSearch] Performing full rebuild (creating fresh index)...")
-        if not es_client.create_index():
-            logger.error("[ElasticSearch] Failed to create index")
-            return 0
+        if checkpoint["mode"] == "full":
+            where = "pc.active = true"
+        else:
+            where = "(pc.last_refreshed > :since OR p.updated_at > :since)"
+        query = text(
+            f"""
+            SELECT 
+                pc.id, pc.active,
+                pc.tmdb_id, pc.media_type, pc.title, pc.original_title, pc.year, pc.overview, pc.tagline,
+                pc.genres, pc.keywords, pc."cast" AS cast_json, pc.created_by, pc.networks,
+                pc.production_companies, pc.production_countries, pc.spoken_languages,
+                pc.popularity, pc.vote_average, pc.vote_count,
+                p.profile_text
+            FROM persistent_candidates pc
+            LEFT JOIN item_llm_profiles p ON p.candidate_id = pc.id
+            WHERE pc.id > :last_id AND {where}
+            ORDER BY pc.id
+            LIMIT :lim
+            """
+        )
+        page_size = max(1, settings.es_reindex_page_size)
         
         from app.core.memory_manager import managed_memory
         
-        indexed = 0
-        offset = 0
-        batch_size = 250  # Reduced for better memory efficiency
-        
-        with managed_memory("elasticsearch_full_rebuild"):
-            while offset < total:
-                # Fetch batch
-                rows = db.execute(text(
-                    """
-                    SELECT 
-                        tmdb_id, media_type, title, original_title, year, overview, tagline,
-                        genres, keywords, "cast" AS cast_json, created_by, networks,
-                        production_companies, production_countries, spoken_languages,
-                        popularity, vote_average, vote_count
-                    FROM persistent_candidates
-                    WHERE active=true
-                    ORDER BY id
-                    OFFSET :off LIMIT :lim
-                    """
-                ), {"off": offset, "lim": batch_size}).fetchall()
-                
+        with managed_memory(f"elasticsearch_{checkpoint['mode']}_reindex"):
+            while True:
+                rows = db.execute(query, {
+                    "last_id": checkpoint["last_id"],
+                    "since": checkpoint["since"],
+                    "lim": page_size,
+                }).fetchall()
                 if not rows:
                     break
                 
-                # Prepare candidates using helper function
-                candidates = _prepare_es_candidates_batch(rows)
-                
-                # Index batch immediately
-                count = es_client.index_candidates(candidates)
-                indexed += count
-                offset += len(rows)
-                
-                # Clear to free memory
-                candidates.clear()
-                del rows
+                active_rows = [row for row in rows if row.active]
+                inactive = [(row.tmdb_id, row.media_type) for row in rows if not row.active]
+                if active_rows:
+                    checkpoint["indexed"] += es_client.index_candidates(
+                        _prepare_es_candidates_batch(active_rows),
+                        thread_count=settings.es_bulk_threads,
+                        chunk_size=settings.es_bulk_chunk_size,
+                    )
+                if inactive:
+                    checkpoint["deleted"] += es_client.delete_documents(inactive)
+                checkpoint["last_id"] = rows[-1].id
+                del rows, active_rows
                 
-                # Log progress every 5k items
-                if indexed % 5000 == 0 or indexed == total:
-                    elapsed_min = (time.time() - start_time) / 60
-                    logger.info(f"[ElasticSearch] Progress: {indexed}/{total} indexed ({indexed/total*100:.1f}%)")
+                if r is not None:
+                    try:
+                        r.set(ES_REINDEX_CHECKPOINT_KEY, json.dumps(checkpoint), ex=ES_REINDEX_CHECKPOINT_TTL)
+                    except Exception:
+                        pass
+                logger.info(
+                    f"[ElasticSearch] Progress: {checkpoint['indexed']} indexed, {checkpoint['deleted']} deleted "
+                    f"(last id {checkpoint['last_id']}, {(time.time() - start_time) / 60:.1f} min)"
+                )
+        
+        es_client.set_index_meta({"last_refreshed_watermark": checkpoint["cutoff"]})
+        if r is not None:
+            try:
+                r.delete(ES_REINDEX_CHECKPOINT_KEY)
+            except Exception:
+                pass
         
         elapsed_min = (time.time() - start_time) / 60
-        logger.info(f"[ElasticSearch] ✅ Full rebuild complete! {indexed} items indexed in {elapsed_min:.1f} minutes")
+        logger.info(
+            f"[ElasticSearch] ✅ {checkpoint['mode'].capitalize()} reindex complete! {checkpoint['indexed']} items indexed, "
+            f"{checkpoint['deleted']} deleted in {elapsed_min:.1f} minutes"
+        )
         
         # Show stats
         stats = es_client.get_index_stats()
         logger.info(f"[ElasticSearch] Index stats: {stats}")
         
-        return indexed
+        return checkpoint["indexed"]
         
     except Exception as e:
         logger.error(f"[ElasticSearch] Fatal error during index rebuild: {e}", exc_info=True)
@@ -1420,17 +1461,27 @@ async def _rebuild_elasticsearch_index():
         db.close()
 
 @shared_task(bind=True, max_retries=2, default_retry_delay=60)
-def rebuild_elasticsearch_task(self):
-    """Celery task to rebuild Elasticsearch index."""
+def rebuild_elasticsearch_task(self, full: bool = False):
+    """Celery task to rebuild Elasticsearch index (resumes an interrupted run from its checkpoint)."""
     import asyncio
     try:
-        indexed = asyncio.run(_rebuild_elasticsearch_index())
+        indexed = asyncio.run(_rebuild_elasticsearch_index(full=full))
         logger.info(f"Elasticsearch rebuild task completed: {indexed} items indexed")
         return indexed
     except Exception as e:
         logger.exception(f"Elasticsearch rebuild task failed: {e}")
         raise self.retry(exc=e)
 
+@shared_task(bind=True, max_retries=2, default_retry_delay=60, name="rebuild_local_text_index")
+def rebuild_local_text_index_task(self, full: bool = False):
+    """Build (full=True) or incrementally update the in-process fallback text index."""
+    try:
+        from app.services.local_text_search import update_local_text_index
+        return update_local_text_index(full=full)
+    except Exception as e:
+        logger.exception(f"Local text index rebuild failed: {e}")
+        raise self.retry(exc=e)
+
 @shared_task
 def cleanup_orphaned_items():
     """Background cleanup of orphaned metadata."""
@@ -2085,10 +2136,11 @@ def compute_user_phases_task(self, user_id: int):
 
 
 @shared_task(bind=True, max_retries=2, default_retry_delay=60)
-def sync_user_watch_history_task(self, user_id: int, full_sync: bool = True):
+def sync_user_watch_history_task(self, user_id: int, full_sync: bool = False):
     """
     Sync user's Trakt watch history to database.
-    Runs after Trakt OAuth and daily for incremental updates.
+    Runs after Trakt OAuth and daily for incremental updates (full reconcile weekly
+    or when full_sync=True).
     """
     logger.info(f"[WatchHistoryTask] Starting {'full' if full_sync else 'incremental'} sync for user {user_id}")
     
@@ -2127,7 +2179,7 @@ def sync_user_watch_history_task(self, user_id: int, full_sync: bool = True):
 
 
 @shared_task(bind=True, max_retries=2, default_retry_delay=300)
-def compute_user_overview_task(self, user_id: int = 1, skip_recent_days: int = 7):
+def compute_user_overview_task(self, user_id: int = 1, skip_recent_days: int = 7, force: bool = False):
     """
     Nightly task: Compute all Overview modules and cache results.
     
@@ -2136,7 +2188,7 @@ def compute_user_overview_task(self, user_id: int = 1, skip_recent_days: int = 7
     2. Queue targeted ingestion for missing items
     3. Wait for ingestion to complete
     4. Sync user ratings from Trakt
-    5. Compute all 4 overview modules
+    5. Compute all 4 overview modules concurrently (unchanged modules reused unless force)
     6. Cache results in OverviewCache table
     
     Runs overnight (scheduled via Celery Beat)
@@ -2285,7 +2337,7 @@ def compute_user_overview_task(self, user_id: int = 1, skip_recent_days: int = 7
             # Step 5: Compute all overview modules
             logger.info("[OverviewTask] Computing overview modules...")
             service = OverviewService(user_id)
-            result = asyncio.run(service.compute_all_modules(db))
+            result = asyncio.run(service.compute_all_modules(db, force=force))
             
             logger.info(f"[OverviewTask] ✅ Overview computed successfully: {result}")
             
@@ -2314,3 +2366,32 @@ def compute_user_overview_task(self, user_id: int = 1, skip_recent_days: int = 7
             raise self.retry(countdown=300 * (2 ** self.request.retries))
         raise
 
+
+
+@shared_task(bind=True, max_retries=1, name="backfill_list_posters")
+def backfill_list_posters(self):
+    """Drain the poster backfill queue filled by list browsing endpoints.
+
+    Fetches Trakt/TMDB details for queued (trakt_id, media_type) pairs and upserts
+    MediaMetadata so the next page load can render posters from the database.
+    """
+    from app.services.poster_backfill import drain_poster_backfill
+
+    # Fresh event loop: forked Celery workers may hold a closed one
+    loop = None
+    try:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        written = loop.run_until_complete(drain_poster_backfill())
+        if written:
+            logger.info(f"[PosterBackfill] Wrote metadata for {written} list items")
+        return {"written": written}
+    except Exception as e:
+        logger.warning(f"[PosterBackfill] Failed: {e}")
+        return {"written": 0, "error": str(e)}
+    finally:
+        if loop:
+            try:
+                loop.close()
+            except Exception:
+                pass
@@ -0,0 +1,44 @@
+"""
+text_search.py
+
+Selects the literal (full-text) search backend for Individual Lists.
+
+TEXT_SEARCH_BACKEND:
+  - "elasticsearch": always ElasticSearch (the local index is only used if the
+    elasticsearch package is missing)
+  - "local": always the in-process index (local_text_search.py)
+  - "auto" (default): ElasticSearch while it answers pings, otherwise the local index
+
+Both backends expose search / is_connected / get_index_stats / health_check.
+"""
+import logging
+
+from app.core.config import settings
+from app.services.local_text_search import get_local_text_index
+
+logger = logging.getLogger(__name__)
+
+
+def _elasticsearch_client():
+    try:
+        from app.services.elasticsearch_client import get_elasticsearch_client
+        return get_elasticsearch_client()
+    except Exception as e:
+        logger.debug(f"[TextSearch] ElasticSearch client unavailable: {e}")
+        return None
+
+
+def local_index_enabled() -> bool:
+    return settings.text_search_backend in ("auto", "local")
+
+
+def get_text_search_backend():
+    """Backend to use for the next query (re-evaluated per call in auto mode)."""
+    mode = settings.text_search_backend
+    if mode == "local":
+        return get_local_text_index()
+    es = _elasticsearch_client()
+    if mode == "elasticsearch" or (es is not None and es.is_connected()):
+        return es if es is not None else get_local_text_index()
+    logger.debug("[TextSearch] ElasticSearch not reachable, using local text index")
+    return get_local_text_index()
@@ -22,9 +22,11 @@ Secrets (client id/secret, access tokens) are stored in Redis-based settings for
 """
 
 import asyncio
+import hashlib
 import httpx
 import json
-from typing import Any, Dict, Optional, List
+import time
+from typing import Any, AsyncIterator, Dict, Optional, List
 from datetime import datetime, timedelta
 from app.core.redis_client import get_redis
 
@@ -32,6 +34,88 @@ TRAKT_API_URL = "https://api.trakt.tv"
 REDIS_GLOBAL_PREFIX = "settings:global:"
 REDIS_USER_PREFIX = "settings:user:"
 
+# Shadow copy of each synced Trakt list: last pushed desired-set hash, the items
+# believed to be on Trakt, the last list ETag and a name/description hash.
+LIST_SHADOW_PREFIX = "trakt_list_shadow"
+LIST_SHADOW_TTL = 60 * 60 * 24 * 30
+# Re-check the remote list at least this often even when nothing changed locally,
+# so edits made directly on Trakt (or a deleted list) are eventually noticed.
+LIST_SHADOW_MAX_AGE = 60 * 60 * 24
+
+
+def _list_shadow_key(user_id: Optional[int], trakt_list_id: str) -> str:
+    return f"{LIST_SHADOW_PREFIX}:{user_id or 0}:{trakt_list_id}"
+
+
+def _desired_item_key(item: Dict[str, Any]) -> Optional[tuple]:
+    """(media_type, 'trakt'|'tmdb', id) for a desired list item, preferring the Trakt ID."""
+    media_type = item.get("media_type", "movie")
+    if media_type not in ("movie", "show"):
+        return None
+    for source in ("trakt", "tmdb"):
+        try:
+            value = item.get(f"{source}_id")
+            if value:
+                return media_type, source, int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def list_items_hash(keys) -> str:
+    """Order-independent content hash of a set of desired item keys."""
+    payload = "\n".join(sorted(f"{mt}:{source}:{value}" for mt, source, value in keys))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _remote_list_entries(items: List[Dict[str, Any]]) -> List[tuple]:
+    """(media_type, trakt_id, tmdb_id) for each movie/show on a fetched Trakt list."""
+    entries = []
+    for entry in items:
+        for media_type in ("movie", "show"):
+            media = entry.get(media_type)
+            if media:
+                ids = media.get("ids", {}) or {}
+                if ids.get("trakt") or ids.get("tmdb"):
+                    entries.append((media_type, ids.get("trakt"), ids.get("tmdb")))
+                break
+    return entries
+
+
+def _shadow_entry(item: Dict[str, Any]) -> Optional[tuple]:
+    try:
+        trakt_id = int(item["trakt_id"]) if item.get("trakt_id") else None
+        tmdb_id = int(item["tmdb_id"]) if item.get("tmdb_id") else None
+    except (TypeError, ValueError):
+        return None
+    if not trakt_id and not tmdb_id:
+        return None
+    return item.get("media_type", "movie"), trakt_id, tmdb_id
+
+
+def _entry_keys(entry: tuple) -> set:
+    media_type, trakt_id, tmdb_id = entry
+    keys = set()
+    if trakt_id:
+        keys.add((media_type, "trakt", int(trakt_id)))
+    if tmdb_id:
+        keys.add((media_type, "tmdb", int(tmdb_id)))
+    return keys
+
+
+def _not_found_keys(not_found: Dict[str, Any]) -> set:
+    """Item keys from the not_found block of an add-items response."""
+    keys = set()
+    for plural, media_type in (("movies", "movie"), ("shows", "show")):
+        entries = not_found.get(plural) or []
+        if not isinstance(entries, list):
+            continue
+        for entry in entries:
+            ids = (entry or {}).get("ids", {}) or {}
+            keys |= _entry_keys((media_type, ids.get("trakt"), ids.get("tmdb")))
+    return keys
+
+
 class TraktClient:
     async def _get_refresh_token(self) -> Optional[str]:
         # Try to get refresh token from user-specific storage
@@ -107,15 +191,26 @@ class TraktClient:
             "Authorization": f"Bearer {self._access_token}",
         }
 
-    async def _request(self, method: str, endpoint: str, params: Optional[dict] = None, data: Optional[dict] = None, max_retries: int = 5) -> Any:
+    async def _request(self, method: str, endpoint: str, params: Optional[dict] = None, data: Optional[dict] = None,
+                       max_retries: int = 5, extra_headers: Optional[Dict[str, str]] = None,
+                       use_cache: bool = True, with_meta: bool = False) -> Any:
+        """Send a Trakt API request.
+
+        GET responses are cached in Redis for 5 minutes unless use_cache is False.
+        With with_meta=True the result is (status_code, body, etag) and a 304 Not Modified
+        (from an If-None-Match in extra_headers) is returned as (304, None, etag) instead of raising.
+        """
         import logging
         logger = logging.getLogger(__name__)
         url = f"{TRAKT_API_URL}{endpoint}"
         headers = await self._get_headers()
+        if extra_headers:
+            headers.update(extra_headers)
         cache_key = f"trakt:{method}:{endpoint}:{json.dumps(params, sort_keys=True) if params else ''}:{json.dumps(data, sort_keys=True) if data else ''}"
+        cacheable = method.upper() == "GET" and use_cache and not with_meta
 
         # Check Redis cache ONLY for GET requests (never cache POST/PUT/DELETE)
-        if method.upper() == "GET":
+        if cacheable:
             cached = await self._r().get(cache_key)
             if cached:
                 # Handle both bytes and strings
@@ -135,6 +230,23 @@ class TraktClient:
 
         from app.services.rate_limit import with_backoff
 
+        async def finish(resp):
+            if with_meta and resp.status_code == 304:
+                return resp.status_code, None, resp.headers.get("ETag")
+            resp.raise_for_status()
+            # Some Trakt endpoints (e.g., DELETE list) return 204 No Content.
+            # Avoid JSON parsing when there is no body.
+            if resp.status_code == 204 or (resp.content is None or len(resp.content) == 0):
+                result = {}
+            else:
+                result = resp.json()
+            # Only cache GET responses
+            if cacheable:
+                await self._r().set(cache_key, json.dumps(result), ex=300)
+            if with_meta:
+                return resp.status_code, result, resp.headers.get("ETag")
+            return result
+
         async def make_request(headers_override=None):
             use_headers = headers_override if headers_override else headers
             try:
@@ -169,29 +281,14 @@ class TraktClient:
                                     new_headers = dict(use_headers)
                                     new_headers["Authorization"] = f"Bearer {new_access}"
                                     resp = await client.request(method, url, headers=new_headers, params=params, json=data)
-                                    resp.raise_for_status()
-                                    result = resp.json()
-                                    # Only cache GET responses
-                                    if method.upper() == "GET":
-                                        await self._r().set(cache_key, json.dumps(result), ex=300)
-                                    return result
+                                    return await finish(resp)
                             # If refresh fails, raise error
                             logger.error("Trakt access token expired and refresh failed.")
                             raise TraktAuthError("Trakt access token expired and refresh failed. Please reauthorize your Trakt account.")
                         else:
                             logger.error("Trakt access token expired and no refresh token available.")
                             raise TraktAuthError("Trakt access token expired and no refresh token available. Please reauthorize your Trakt account.")
-                    resp.raise_for_status()
-                    # Some Trakt endpoints (e.g., DELETE list) return 204 No Content.
-                    # Avoid JSON parsing when there is no body.
-                    if resp.status_code == 204 or (resp.content is None or len(resp.content) == 0):
-                        result = {}
-                    else:
-                        result = resp.json()
-                    # Only cache GET responses
-                    if method.upper() == "GET":
-                        await self._r().set(cache_key, json.dumps(result), ex=300)
-                    return result
+                    return await finish(resp)
             except httpx.ConnectTimeout:
                 logger.error("Network timeout connecting to Trakt API.")
                 raise TraktNetworkError("Network timeout connecting to Trakt API. Please check your connection or try again later.")
@@ -256,23 +353,39 @@ class TraktClient:
             page += 1
         return collected[:limit]
 
-    async def get_full_history(self, media_type: str = "movies", page_size: int = 100, max_pages: int = 2000) -> List[Dict]:
-        """Fetch the authenticated user's entire history for the media type.
-        Pages until an empty/short page is returned or max_pages is reached.
+    async def iter_history(
+        self,
+        media_type: str = "movies",
+        start_at: Optional[str] = None,
+        page_size: int = 100,
+        max_pages: int = 2000,
+    ) -> AsyncIterator[List[Dict]]:
+        """Yield the authenticated user's history page by page (newest first).
+        start_at (ISO 8601) limits the stream to watches at or after that time.
+        Stops on an empty/short page or after max_pages.
         """
-        collected: List[Dict] = []
         page = 1
         per_page = max(1, min(100, page_size))
         while page <= max_pages:
             endpoint = f"/users/me/history/{media_type}"
             params = {"limit": per_page, "page": page}
+            if start_at:
+                params["start_at"] = start_at
             batch = await self._request("GET", endpoint, params=params)
             if not batch:
                 break
-            collected.extend(batch)
+            yield batch
             if len(batch) < per_page:
                 break
             page += 1
+
+    async def get_full_history(self, media_type: str = "movies", page_size: int = 100, max_pages: int = 2000) -> List[Dict]:
+        """Fetch the authenticated user's entire history for the media type.
+        Pages until an empty/short page is returned or max_pages is reached.
+        """
+        collected: List[Dict] = []
+        async for batch in self.iter_history(media_type, page_size=page_size, max_pages=max_pages):
+            collected.extend(batch)
         return collected
 
     async def search(self, query: str, media_type: str = "movie", limit: int = 10) -> Any:
@@ -615,7 +728,9 @@ class TraktClient:
             description: New list description (optional)
             
         Returns:
-            Dict containing updated list details
+            Dict containing updated list details ({} when the name/description
+            match what was pushed less than LIST_SHADOW_MAX_AGE ago and the
+            request was skipped)
         """
         endpoint = f"/users/me/lists/{trakt_list_id}"
         data = {}
@@ -624,7 +739,15 @@ class TraktClient:
         if description is not None:
             data["description"] = description
         
-        return await self._request("PUT", endpoint, data=data)
+        meta_hash = hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+        shadow = await self._load_list_shadow(trakt_list_id)
+        age = time.time() - float(shadow.get("meta_synced_at") or 0)
+        # Re-push after LIST_SHADOW_MAX_AGE so a rename made directly on Trakt gets corrected
+        if shadow.get("meta") == meta_hash and age < LIST_SHADOW_MAX_AGE:
+            return {}
+        result = await self._request("PUT", endpoint, data=data)
+        await self._save_list_shadow(trakt_list_id, meta=meta_hash, meta_synced_at=time.time())
+        return result
     
     async def delete_list(self, trakt_list_id: str) -> bool:
         """Delete a list from Trakt.
@@ -638,6 +761,10 @@ class TraktClient:
         endpoint = f"/users/me/lists/{trakt_list_id}"
         try:
             await self._request("DELETE", endpoint)
+            try:
+                await self._r().delete(_list_shadow_key(self.user_id, trakt_list_id))
+            except Exception:
+                pass
             return True
         except Exception as e:
             import logging
@@ -754,78 +881,130 @@ class TraktClient:
         endpoint = f"/users/{user_part}/lists/{trakt_list_id}/items"
         return await self._request("GET", endpoint)
     
-    async def sync_list_items(self, trakt_list_id: str, desired_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _load_list_shadow(self, trakt_list_id: str) -> Dict[str, Any]:
+        try:
+            raw = await self._r().get(_list_shadow_key(self.user_id, trakt_list_id))
+            if raw:
+                return json.loads(raw)
+        except Exception:
+            pass
+        return {}
+
+    async def _save_list_shadow(self, trakt_list_id: str, **fields: Any) -> None:
+        """Merge fields into the list's shadow record (best effort)."""
+        try:
+            shadow = await self._load_list_shadow(trakt_list_id)
+            shadow.update(fields)
+            await self._r().set(_list_shadow_key(self.user_id, trakt_list_id), json.dumps(shadow), ex=LIST_SHADOW_TTL)
+        except Exception:
+            pass
+
+    async def sync_list_items(self, trakt_list_id: str, desired_items: List[Dict[str, Any]],
+                              force_fetch: bool = False) -> Dict[str, Any]:
         """Synchronize a Trakt list to match desired items.
-        
-        This will add missing items and remove items that shouldn't be there.
-        
+
+        This will add missing items and remove items that shouldn't be there, in at
+        most one add and one remove request. The last pushed state is kept as a shadow
+        copy in Redis: when the desired set hashes to the last pushed hash (and the
+        shadow is younger than LIST_SHADOW_MAX_AGE) no API call is made at all. Otherwise
+        the remote list is fetched with If-None-Match, falling back to the shadow items
+        on 304 Not Modified.
+
         Args:
             trakt_list_id: Trakt list ID
-            desired_items: List of items that should be in the list
-            
+            desired_items: Items that should be in the list ({"media_type", "trakt_id"
+                and/or "tmdb_id"}); items without a Trakt ID are matched by TMDB ID
+            force_fetch: Always check the remote list, even if nothing changed locally
+
         Returns:
-            Dict with sync statistics
+            Dict with sync statistics (added, removed, unchanged, not_found, skipped)
         """
-        # Get current list items
-        current_items = await self.get_list_items(trakt_list_id)
-        
-        # Build set of current trakt IDs
-        current_ids = set()
-        for item in current_items:
-            movie = item.get("movie")
-            show = item.get("show")
-            if movie:
-                trakt_id = movie.get("ids", {}).get("trakt")
-                if trakt_id:
-                    current_ids.add(trakt_id)
-            elif show:
-                trakt_id = show.get("ids", {}).get("trakt")
-                if trakt_id:
-                    current_ids.add(trakt_id)
-        
-        # Build set of desired trakt IDs
-        desired_ids = set()
+        import logging
+        logger = logging.getLogger(__name__)
+
+        desired: Dict[tuple, Dict[str, Any]] = {}
         for item in desired_items:
-            trakt_id = item.get("trakt_id")
-            if trakt_id and isinstance(trakt_id, int):
-                desired_ids.add(trakt_id)
-        
-        # Calculate what to add and remove
-        to_add = desired_ids - current_ids
-        to_remove = current_ids - desired_ids
-        
-        stats = {
-            "added": 0,
-            "removed": 0,
-            "unchanged": len(current_ids & desired_ids)
-        }
-        
-        # Add missing items
+            key = _desired_item_key(item)
+            if key:
+                desired.setdefault(key, item)
+        desired_hash = list_items_hash(desired)
+
+        stats = {"added": 0, "removed": 0, "unchanged": 0, "not_found": 0, "skipped": False}
+        shadow = await self._load_list_shadow(trakt_list_id)
+        age = time.time() - float(shadow.get("synced_at") or 0)
+        if not force_fetch and shadow.get("hash") == desired_hash and age < LIST_SHADOW_MAX_AGE:
+            stats["unchanged"] = len(desired)
+            stats["skipped"] = True
+            return stats
+
+        # Conditional fetch of the remote list (bypasses the 5-minute GET cache)
+        etag = shadow.get("etag") if shadow.get("items") is not None else None
+        status, body, new_etag = await self._request(
+            "GET", f"/users/me/lists/{trakt_list_id}/items",
+            extra_headers={"If-None-Match": etag} if etag else None,
+            use_cache=False, with_meta=True,
+        )
+        if status == 304:
+            current = [tuple(entry) for entry in shadow.get("items") or []]
+        else:
+            current = _remote_list_entries(body or [])
+
+        # Match desired items against remote entries by either Trakt or TMDB ID
+        index: Dict[tuple, int] = {}
+        for pos, (media_type, trakt_id, tmdb_id) in enumerate(current):
+            if trakt_id:
+                index.setdefault((media_type, "trakt", int(trakt_id)), pos)
+            if tmdb_id:
+                index.setdefault((media_type, "tmdb", int(tmdb_id)), pos)
+        matched = set()
+        to_add = []
+        for key, item in desired.items():
+            pos = index.get(key)
+            if pos is None and key[1] == "trakt" and item.get("tmdb_id"):
+                try:
+                    pos = index.get((key[0], "tmdb", int(item["tmdb_id"])))
+                except (TypeError, ValueError):
+                    pos = None
+            if pos is None:
+                to_add.append(item)
+            else:
+                matched.add(pos)
+        to_remove = [current[pos] for pos in range(len(current)) if pos not in matched]
+        stats["unchanged"] = len(matched)
+
+        kept = [current[pos] for pos in sorted(matched)]
         if to_add:
-            items_to_add = [item for item in desired_items if item.get("trakt_id") in to_add]
-            if items_to_add:
-                add_result = await self.add_items_to_list(trakt_list_id, items_to_add)
-                stats["added"] = add_result.get("added", {}).get("movies", 0) + add_result.get("added", {}).get("shows", 0)
-        
-        # Remove extra items
+            add_result = await self.add_items_to_list(trakt_list_id, to_add)
+            added = add_result.get("added", {}) or {}
+            stats["added"] = (added.get("movies", 0) or 0) + (added.get("shows", 0) or 0)
+            missing = _not_found_keys(add_result.get("not_found") or {})
+            for item in to_add:
+                entry = _shadow_entry(item)
+                if entry and not _entry_keys(entry) & missing:
+                    kept.append(entry)
+                else:
+                    stats["not_found"] += 1
         if to_remove:
-            items_to_remove = []
-            for trakt_id in to_remove:
-                # Find the item type from current_items
-                for item in current_items:
-                    movie = item.get("movie")
-                    show = item.get("show")
-                    if movie and movie.get("ids", {}).get("trakt") == trakt_id:
-                        items_to_remove.append({"media_type": "movie", "trakt_id": trakt_id})
-                        break
-                    elif show and show.get("ids", {}).get("trakt") == trakt_id:
-                        items_to_remove.append({"media_type": "show", "trakt_id": trakt_id})
-                        break
-            
-            if items_to_remove:
-                remove_result = await self.remove_items_from_list(trakt_list_id, items_to_remove)
-                stats["removed"] = remove_result.get("deleted", {}).get("movies", 0) + remove_result.get("deleted", {}).get("shows", 0)
-        
+            remove_result = await self.remove_items_from_list(trakt_list_id, [
+                {"media_type": media_type, "trakt_id": trakt_id, "tmdb_id": tmdb_id}
+                for media_type, trakt_id, tmdb_id in to_remove
+            ])
+            deleted = remove_result.get("deleted", {}) or {}
+            stats["removed"] = (deleted.get("movies", 0) or 0) + (deleted.get("shows", 0) or 0)
+
+        changed = bool(stats["added"] or stats["removed"])
+        await self._save_list_shadow(
+            trakt_list_id,
+            hash=desired_hash,
+            items=[list(entry) for entry in kept],
+            # A push that changed the remote list makes the fetched ETag stale
+            etag=None if changed else (new_etag or etag),
+            synced_at=time.time(),
+        )
+        logger.debug(
+            f"[TraktSync] List {trakt_list_id}: fetch={'304' if status == 304 else status} "
+            f"+{len(to_add)} -{len(to_remove)} ={stats['unchanged']}"
+        )
         return stats
 
     async def close(self):
@@ -23,6 +23,24 @@ from app.models_ai import AiList, AiListItem
 logger = logging.getLogger(__name__)
 
 
+def _desired_payload(items_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """sync_list_items entries for resolved list items.
+
+    Items whose Trakt ID did not resolve in this run are kept with their TMDB ID, so
+    sync_list_items matches them against the remote list instead of removing them.
+    """
+    payload = []
+    for item_data in items_data:
+        media_type = item_data.get('media_type')
+        if media_type and (item_data.get('trakt_id') or item_data.get('tmdb_id')):
+            payload.append({
+                "trakt_id": item_data.get('trakt_id'),
+                "tmdb_id": item_data.get('tmdb_id'),
+                "media_type": media_type,
+            })
+    return payload
+
+
 async def sync_user_list_to_trakt(user_list: UserList, db: Session, user_id: int = 1, 
                                    force_recreate: bool = False) -> Optional[str]:
     """
@@ -60,7 +78,7 @@ async def sync_user_list_to_trakt(user_list: UserList, db: Session, user_id: int
             user_list.trakt_list_id = str(list_data.get("ids", {}).get("trakt"))
             logger.info(f"Created Trakt list {user_list.trakt_list_id} for UserList {user_list.id}")
         else:
-            # Update existing list
+            # Update existing list (skipped when the name is unchanged)
             await trakt.update_list(user_list.trakt_list_id, name=user_list.title)
             logger.info(f"Updated Trakt list {user_list.trakt_list_id} for UserList {user_list.id}")
         
@@ -81,22 +99,13 @@ async def sync_user_list_to_trakt(user_list: UserList, db: Session, user_id: int
         # Batch resolve Trakt IDs
         items_with_trakt = await resolver.resolve_items_batch(items_to_resolve)
         
-        # Prepare Trakt items with correct format for add_items_to_list
-        items_payload = []
-        for item_data in items_with_trakt:
-            trakt_id = item_data.get('trakt_id')
-            media_type = item_data.get('media_type')
-            if trakt_id and media_type:
-                # Format expected by TraktClient.add_items_to_list
-                items_payload.append({
-                    "trakt_id": trakt_id,
-                    "media_type": media_type
-                })
+        # Desired list entries (TMDB ID included, so an unresolved Trakt ID never removes an item)
+        items_payload = _desired_payload(items_with_trakt)
         
-        # Add items to Trakt list
+        # Diff-sync items against the list's shadow copy (no API calls when nothing changed)
         if items_payload and user_list.trakt_list_id:
-            await trakt.add_items_to_list(user_list.trakt_list_id, items_payload)
-            logger.info(f"Added {len(items_payload)} items to Trakt list {user_list.trakt_list_id}")
+            stats = await trakt.sync_list_items(user_list.trakt_list_id, items_payload)
+            logger.info(f"Synced Trakt list {user_list.trakt_list_id}: {stats}")
         
         # Update sync timestamp
         user_list.last_sync_at = datetime.utcnow()
@@ -179,22 +188,13 @@ async def sync_ai_list_to_trakt(ai_list: AiList, db: Session, user_id: int = 1,
         # Batch resolve Trakt IDs
         items_with_trakt = await resolver.resolve_items_batch(items_to_resolve)
         
-        # Prepare Trakt items with correct format for add_items_to_list
-        items_payload = []
-        for item_data in items_with_trakt:
-            trakt_id = item_data.get('trakt_id')
-            media_type = item_data.get('media_type')
-            if trakt_id and media_type:
-                # Format expected by TraktClient.add_items_to_list
-                items_payload.append({
-                    "trakt_id": trakt_id,
-                    "media_type": media_type
-                })
+        # Desired list entries (TMDB ID included, so an unresolved Trakt ID never removes an item)
+        items_payload = _desired_payload(items_with_trakt)
         
-        # Add items to Trakt list
+        # Diff-sync items against the list's shadow copy (no API calls when nothing changed)
         if items_payload and ai_list.trakt_list_id:
-            await trakt.add_items_to_list(ai_list.trakt_list_id, items_payload)
-            logger.info(f"Added {len(items_payload)} items to Trakt list {ai_list.trakt_list_id}")
+            stats = await trakt.sync_list_items(ai_list.trakt_list_id, items_payload)
+            logger.info(f"Synced Trakt list {ai_list.trakt_list_id}: {stats}")
         
         # Update sync timestamp
         ai_list.last_synced_at = datetime.utcnow()
@@ -302,6 +302,7 @@ async def sync_individual_list_to_trakt(individual_list: IndividualList, db: Ses
                 # Already has Trakt ID
                 items_with_trakt.append({
                     'trakt_id': item.trakt_id,
+                    'tmdb_id': item.tmdb_id,
                     'media_type': item.media_type,
                     'list_item': item
                 })
@@ -318,22 +319,13 @@ async def sync_individual_list_to_trakt(individual_list: IndividualList, db: Ses
             resolved = await resolver.resolve_items_batch(items_to_resolve)
             items_with_trakt.extend(resolved)
         
-        # Prepare Trakt items with correct format for add_items_to_list
-        items_payload = []
-        for item_data in items_with_trakt:
-            trakt_id = item_data.get('trakt_id')
-            media_type = item_data.get('media_type')
-            if trakt_id and media_type:
-                # Format expected by TraktClient.add_items_to_list
-                items_payload.append({
-                    "trakt_id": trakt_id,
-                    "media_type": media_type
-                })
+        # Desired list entries (TMDB ID included, so an unresolved Trakt ID never removes an item)
+        items_payload = _desired_payload(items_with_trakt)
         
-        # Add items to Trakt list
+        # Diff-sync items against the list's shadow copy (no API calls when nothing changed)
         if items_payload and individual_list.trakt_list_id:
-            await trakt.add_items_to_list(individual_list.trakt_list_id, items_payload)
-            logger.info(f"Added {len(items_payload)} items to Trakt list {individual_list.trakt_list_id}")
+            stats = await trakt.sync_list_items(individual_list.trakt_list_id, items_payload)
+            logger.info(f"Synced Trakt list {individual_list.trakt_list_id}: {stats}")
         
         # Update sync timestamp
         individual_list.trakt_synced_at = datetime.utcnow()
@@ -7,7 +7,7 @@ Enriches watch events with TMDB metadata for phase detection.
 """
 import logging
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional, Tuple, Set
 import json
 from sqlalchemy import text
@@ -21,11 +21,16 @@ from app.utils.timezone import utc_now
 
 logger = logging.getLogger(__name__)
 
+# Incremental syncs re-request a small window before the watermark (duplicates are ignored on insert)
+HISTORY_WATERMARK_OVERLAP_SECONDS = 60
+
 
 class WatchHistorySync:
     """
     Syncs user's Trakt watch history to local database for phase detection.
-    Fetches all-time history on first sync, then incremental updates.
+    Fetches all-time history on first sync, then incremental updates from a
+    per-media watermark (Redis hash trakt_history_sync:{user_id}), with a full
+    reconcile every TRAKT_HISTORY_FULL_RECONCILE_DAYS or on demand.
     """
     
     def __init__(self, user_id: int):
@@ -40,32 +45,15 @@ class WatchHistorySync:
     
     async def sync_full_history(self) -> Dict[str, int]:
         """
-        Fetch and persist user's complete watch history from Trakt.
+        Fetch and persist user's complete watch history from Trakt (full reconcile).
+        Pages are processed as they arrive. Also resets the incremental watermarks.
         Returns stats: {movies: int, shows: int, total: int, new: int}
         """
         logger.info(f"[WatchHistorySync] Starting full history sync for user {self.user_id}")
         
         try:
-            client = TraktClient(self.user_id)
-            
-            # Fetch full movie and show history (paged until completion)
-            logger.debug(f"[WatchHistorySync] Fetching full movie history...")
-            movie_history = await client.get_full_history(media_type="movies", page_size=100)
-            
-            logger.debug(f"[WatchHistorySync] Fetching full show history...")
-            show_history = await client.get_full_history(media_type="shows", page_size=100)
-            
-            # Process and persist
-            movies_added = await self._process_history_batch(movie_history, "movie")
-            shows_added = await self._process_history_batch(show_history, "show")
-            
-            stats = {
-                "movies": len(movie_history),
-                "shows": len(show_history),
-                "total": len(movie_history) + len(show_history),
-                "new": movies_added + shows_added
-            }
-            
+            stats = await self._sync_streamed(start_at_by_media={})
+            self._save_sync_state(full=True, watermarks=stats.pop("watermarks"))
             logger.info(f"[WatchHistorySync] ✅ Full sync complete for user {self.user_id}: {stats}")
             return stats
             
@@ -73,6 +61,120 @@ class WatchHistorySync:
             logger.error(f"[WatchHistorySync] Full sync failed for user {self.user_id}: {e}", exc_info=True)
             raise
     
+    async def sync_incremental_history(self) -> Dict[str, int]:
+        """
+        Fetch only watches newer than the stored per-media watermark (Trakt start_at).
+        Cost scales with new watches instead of lifetime history; watches back-dated
+        before the watermark are picked up by the periodic full reconcile.
+        """
+        state = self._load_sync_state()
+        start_at_by_media = {}
+        for media_type in ("movie", "show"):
+            watermark = state.get(f"watermark:{media_type}")
+            if watermark:
+                wm = self._parse_watched_at(watermark) - timedelta(seconds=HISTORY_WATERMARK_OVERLAP_SECONDS)
+                start_at_by_media[media_type] = wm.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        logger.info(f"[WatchHistorySync] Starting incremental sync for user {self.user_id} since {start_at_by_media}")
+        
+        try:
+            stats = await self._sync_streamed(start_at_by_media=start_at_by_media)
+            self._save_sync_state(full=False, watermarks=stats.pop("watermarks"))
+            logger.info(f"[WatchHistorySync] ✅ Incremental sync complete for user {self.user_id}: {stats}")
+            return stats
+            
+        except Exception as e:
+            logger.error(f"[WatchHistorySync] Incremental sync failed for user {self.user_id}: {e}", exc_info=True)
+            raise
+    
+    async def _sync_streamed(self, start_at_by_media: Dict[str, str]) -> Dict:
+        """Stream history pages per media type into _process_history_batch.
+
+        Returns stats plus the newest watched_at seen per media type ("watermarks").
+        """
+        client = TraktClient(self.user_id)
+        counts = {"movie": 0, "show": 0}
+        added = 0
+        watermarks: Dict[str, str] = {}
+        for media_type, endpoint_type in (("movie", "movies"), ("show", "shows")):
+            newest: Optional[datetime] = None
+            async for page in client.iter_history(
+                media_type=endpoint_type,
+                start_at=start_at_by_media.get(media_type),
+                page_size=100,
+            ):
+                counts[media_type] += len(page)
+                added += await self._process_history_batch(page, media_type)
+                for item in page:
+                    if item.get("watched_at"):
+                        ts = self._parse_watched_at(item["watched_at"])
+                        if newest is None or ts > newest:
+                            newest = ts
+            if newest is not None:
+                watermarks[media_type] = newest.isoformat()
+        return {
+            "movies": counts["movie"],
+            "shows": counts["show"],
+            "total": counts["movie"] + counts["show"],
+            "new": added,
+            "watermarks": watermarks,
+        }
+    
+    def _sync_state_key(self) -> str:
+        return f"trakt_history_sync:{self.user_id}"
+    
+    def _load_sync_state(self) -> Dict[str, str]:
+        """Watermarks + last full reconcile time; falls back to MAX(watched_at) in the DB."""
+        state: Dict[str, str] = {}
+        try:
+            from app.core.redis_client import get_redis_sync
+            state = get_redis_sync().hgetall(self._sync_state_key()) or {}
+        except Exception as e:
+            logger.debug(f"[WatchHistorySync] Could not read sync state: {e}")
+        if not state.get("watermark:movie") and not state.get("watermark:show"):
+            try:
+                rows = self.db.execute(text(
+                    "SELECT media_type, MAX(watched_at) AS newest FROM trakt_watch_history "
+                    "WHERE user_id = :uid GROUP BY media_type"
+                ), {"uid": self.user_id}).fetchall()
+                for row in rows:
+                    if row.newest is not None:
+                        newest = row.newest if row.newest.tzinfo else row.newest.replace(tzinfo=timezone.utc)
+                        state[f"watermark:{row.media_type}"] = newest.isoformat()
+            except Exception as e:
+                logger.debug(f"[WatchHistorySync] Could not derive watermarks from history: {e}")
+        return state
+    
+    def _save_sync_state(self, full: bool, watermarks: Dict[str, str]) -> None:
+        """Advance watermarks (never backwards) and record a completed full reconcile."""
+        try:
+            from app.core.redis_client import get_redis_sync
+            r = get_redis_sync()
+            key = self._sync_state_key()
+            current = r.hgetall(key) or {}
+            mapping = {}
+            for media_type, ts in watermarks.items():
+                prev = current.get(f"watermark:{media_type}")
+                if not prev or self._parse_watched_at(ts) > self._parse_watched_at(prev):
+                    mapping[f"watermark:{media_type}"] = ts
+            if full:
+                mapping["last_full_at"] = utc_now().isoformat()
+            if mapping:
+                r.hset(key, mapping=mapping)
+        except Exception as e:
+            logger.warning(f"[WatchHistorySync] Failed to save sync state: {e}")
+    
+    def needs_full_reconcile(self) -> bool:
+        """True when no watermark exists yet or the last full sync is older than the reconcile interval."""
+        from app.core.config import settings
+        state = self._load_sync_state()
+        if not state.get("watermark:movie") and not state.get("watermark:show"):
+            return True
+        last_full = state.get("last_full_at")
+        if not last_full:
+            return True
+        age = utc_now() - self._parse_watched_at(last_full)
+        return age > timedelta(days=settings.trakt_history_full_reconcile_days)
+    
     async def sync_recent_history(self, days: int = 7) -> Dict[str, int]:
         """
         Fetch and persist recent watch history (last N days).
@@ -296,16 +398,19 @@ class WatchHistorySync:
             return {"total": 0, "movies": 0, "shows": 0}
 
 
-async def sync_user_watch_history(user_id: int, full_sync: bool = True) -> Dict[str, int]:
+async def sync_user_watch_history(user_id: int, full_sync: bool = False) -> Dict[str, int]:
     """
     Convenience function for syncing user watch history.
     Called from Celery tasks and API endpoints.
+
+    full_sync=True forces a full reconcile; otherwise the sync is incremental unless
+    no watermark exists yet or the last full reconcile is due.
     """
     sync = WatchHistorySync(user_id)
     try:
-        # Always perform a full sync to guarantee complete history coverage
-        # (explicitly ignore incremental mode to honor "always full=true")
-        return await sync.sync_full_history()
+        if full_sync or sync.needs_full_reconcile():
+            return await sync.sync_full_history()
+        return await sync.sync_incremental_history()
     finally:
         del sync
 
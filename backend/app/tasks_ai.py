@@ -135,51 +135,39 @@ async def _generate_chat_list_async(ai_list_id: str, user_id: int = 1):
                 default_obscurity = "balanced"
         # For chat lists, don't pass default - only use what's in the prompt
         
-        parsed = parse_prompt(ai_list.prompt_text or ai_list.normalized_prompt or "", default_obscurity=default_obscurity)
-        normalized = parsed["normalized_prompt"]
-        # Enhance prompt for "like <title>" cases by appending seed title's metadata
-        enhanced_prompt = normalized
-        try:
-            seeds = (parsed.get("seed_titles") or [])
-            if seeds:
-                seed = seeds[0]
-                from app.services.tmdb_client import search_movies, search_tv, fetch_tmdb_metadata
-                seed_meta = None
-                # Try movie then TV for the seed
-                try:
-                    sm = await search_movies(seed, page=1)
-                    if sm and sm.get("results"):
-                        tmdb_id = sm["results"][0].get("id")
-                        if tmdb_id:
-                            seed_meta = await fetch_tmdb_metadata(tmdb_id, media_type='movie')
-                except Exception:
-                    seed_meta = None
-                if not seed_meta:
-                    try:
-                        st = await search_tv(seed, page=1)
-                        if st and st.get("results"):
-                            tmdb_id = st["results"][0].get("id")
-                            if tmdb_id:
-                                seed_meta = await fetch_tmdb_metadata(tmdb_id, media_type='tv')
-                    except Exception:
-                        seed_meta = None
-                # Build anchor text from seed metadata
-                if seed_meta:
-                    import json as _json
-                    title = seed_meta.get("title") or seed_meta.get("name") or seed
-                    genres = ", ".join([g.get("name", "") for g in (seed_meta.get("genres") or []) if isinstance(g, dict)])
-                    kw = []
-                    kws = seed_meta.get("keywords") or {}
-                    if isinstance(kws, dict):
-                        kw_list = kws.get("keywords") or kws.get("results") or []
-                        kw = [k.get("name", "") for k in kw_list if isinstance(k, dict)]
-                    overview = seed_meta.get("overview") or ""
-                    anchor = f"Anchor: {title}. Genres: {genres}. Keywords: {'; '.join(kw[:12])}. Overview: {overview}"
-                    # Append to base normalized prompt for better TF-IDF anchoring
-                    enhanced_prompt = normalized + "\n" + anchor
-        except Exception as _e:
-            # Safe fallback: keep normalized as prompt
+        # Reuse the list's retrieval snapshot (parsed prompt, seed anchor, query embedding,
+        # BGE/FAISS candidates) when the prompt and the indexes are unchanged since the last run
+        from app.services.ai_engine.retrieval_snapshot import (
+            RetrievalSnapshot, index_generation, input_fingerprint, load_valid_snapshot,
+        )
+        snapshot_fingerprint = input_fingerprint(
+            ai_list.prompt_text or ai_list.normalized_prompt or "", ai_list.type, default_obscurity
+        )
+        snapshot = load_valid_snapshot(ai_list_id, snapshot_fingerprint)
+        # Captured before any search so a concurrent index rewrite invalidates what we store
+        retrieval_generation = snapshot.generation if snapshot is not None else index_generation()
+        if snapshot is not None:
+            logger.info(f"[{ai_list_id}] Reusing retrieval snapshot (generation={snapshot.generation}); skipping parse, seed lookup, embedding and index search")
+            parsed = snapshot.parsed
+            normalized = parsed["normalized_prompt"]
+            enhanced_prompt = snapshot.enhanced_prompt or normalized
+        else:
+            parsed = parse_prompt(ai_list.prompt_text or ai_list.normalized_prompt or "", default_obscurity=default_obscurity)
+            normalized = parsed["normalized_prompt"]
+            # Enhance prompt for "like <title>" cases by appending seed title's metadata
             enhanced_prompt = normalized
+            try:
+                seeds = (parsed.get("seed_titles") or [])
+                if seeds:
+                    # Seed anchor: seed_title_cache -> persistent_candidates -> TMDB (cached either way)
+                    from app.services.ai_engine.seed_resolver import resolve_seed
+                    seed_res = await resolve_seed(db, seeds[0])
+                    if seed_res.anchor_text:
+                        # Append to base normalized prompt for better TF-IDF anchoring
+                        enhanced_prompt = normalized + "\n" + seed_res.anchor_text
+            except Exception as _e:
+                # Safe fallback: keep normalized as prompt
+                enhanced_prompt = normalized
         # Persist parsed context on the list
         ai_list.normalized_prompt = normalized
         ai_list.filters = parsed.get("filters")
@@ -330,61 +318,42 @@ async def _generate_chat_list_async(ai_list_id: str, user_id: int = 1):
         # Build enriched query text combining seed metadata AND all extracted filters
         enriched_query = ". ".join(query_parts)
         
-        cache_key = (
-            f"ai:prompt_cache_v2:{normalized}"
-            f"|seeds:{','.join(seeds[:5])}"
-            f"|tone:{','.join(tone_words[:6])}"
-            f"|seasonal:{','.join(seasonal_words[:3])}"
-            f"|neg:{','.join(negative_cues[:6])}"
-            f"|genres:{','.join(extracted_genres[:5])}"
-            f"|langs:{','.join(extracted_languages[:3])}"
-        )
-        cached = r.get(cache_key)
-        embedder = EmbeddingService()
-        index, mapping = load_index()
-        small_index = False
-        try:
-            small_index = len(mapping) < 1000
-            if small_index:
-                logger.warning(f"[{ai_list_id}] FAISS index appears small (size={len(mapping)}). Will use DB fallback if needed.")
-        except Exception:
-            small_index = False
-        
         # Use enriched query text for embedding instead of just base prompt
         # This incorporates genres, languages, mood, and seed metadata into semantic search
         logger.info(f"[{ai_list_id}] Enriched query for FAISS: {enriched_query[:200]}")
-        
-        # --- FAISS fallback logic: up to 3 attempts with increasing top_k ---
-        cache_key = (
-            f"ai:prompt_cache_v2:{normalized}"
-            f"|seeds:{','.join(seeds[:5])}"
-            f"|tone:{','.join(tone_words[:6])}"
-            f"|seasonal:{','.join(seasonal_words[:3])}"
-            f"|neg:{','.join(negative_cues[:6])}"
-            f"|genres:{','.join(extracted_genres[:5])}"
-            f"|langs:{','.join(extracted_languages[:3])}"
-        )
-        embedder = EmbeddingService()
-        index, mapping = load_index()
-        logger.info(f"[{ai_list_id}] Enriched query for FAISS: {enriched_query[:200]}")
-        try:
-            query_emb = embedder.encode_text(enriched_query)
-        except Exception as e:
-            logger.warning(f"Embedding enriched query failed: {e}, falling back to base prompt")
-            query_emb = embedder.encode_text(normalized)
-        if negative_cues:
+        # FAISS index is loaded lazily: a valid snapshot already holds the search results
+        index, mapping = None, None
+        if snapshot is not None:
+            query_emb = snapshot.query_embedding
+            small_index = snapshot.small_index
+        else:
+            embedder = EmbeddingService()
+            index, mapping = load_index()
+            small_index = False
             try:
-                neg_text = ", ".join(negative_cues[:6])
-                neg_vec = embedder.encode_text(f"avoid: {neg_text}")
-                import numpy as _np
-                q = query_emb.astype(_np.float32)
-                n = neg_vec.astype(_np.float32)
-                alpha = float(_np.dot(q, n))
-                q_adj = q - 0.25 * alpha * n
-                q_adj = q_adj / (float((q_adj ** 2).sum()) ** 0.5 + 1e-8)
-                query_emb = q_adj.astype(np.float16)
+                small_index = len(mapping) < 1000
+                if small_index:
+                    logger.warning(f"[{ai_list_id}] FAISS index appears small (size={len(mapping)}). Will use DB fallback if needed.")
+            except Exception:
+                small_index = False
+            try:
+                query_emb = embedder.encode_text(enriched_query)
             except Exception as e:
-                logger.debug(f"Negative cue embedding adjustment skipped: {e}")
+                logger.warning(f"Embedding enriched query failed: {e}, falling back to base prompt")
+                query_emb = embedder.encode_text(normalized)
+            if negative_cues:
+                try:
+                    neg_text = ", ".join(negative_cues[:6])
+                    neg_vec = embedder.encode_text(f"avoid: {neg_text}")
+                    import numpy as _np
+                    q = query_emb.astype(_np.float32)
+                    n = neg_vec.astype(_np.float32)
+                    alpha = float(_np.dot(q, n))
+                    q_adj = q - 0.25 * alpha * n
+                    q_adj = q_adj / (float((q_adj ** 2).sum()) ** 0.5 + 1e-8)
+                    query_emb = q_adj.astype(np.float16)
+                except Exception as e:
+                    logger.debug(f"Negative cue embedding adjustment skipped: {e}")
 
         # === BGE + FAISS HYBRID SEARCH ===
         # Try BGE index first if enabled, then supplement with FAISS
@@ -400,7 +369,13 @@ async def _generate_chat_list_async(ai_list_id: str, user_id: int = 1):
         except Exception:
             pass
         
-        if _bge_enabled:
+        bge_from_snapshot = snapshot is not None and snapshot.bge_enabled == _bge_enabled
+        if bge_from_snapshot:
+            bge_ids = list(snapshot.bge_ids)
+            bge_scores_dict = dict(zip(snapshot.bge_ids, snapshot.bge_scores))
+            if _bge_enabled:
+                logger.info(f"[{ai_list_id}] BGE candidates from snapshot: {len(bge_ids)}")
+        elif _bge_enabled:
             try:
                 from app.services.ai_engine.bge_index import BGEIndex, BGEEmbedder
                 logger.info(f"[{ai_list_id}] BGE index enabled, attempting BGE search first")
@@ -439,23 +414,34 @@ async def _generate_chat_list_async(ai_list_id: str, user_id: int = 1):
         rows = []
         scored = []
         # Iterate FAISS attempts
+        faiss_results = dict(snapshot.faiss_results) if snapshot is not None else {}
+        snapshot_dirty = snapshot is None or not bge_from_snapshot
         for attempt, top_k in enumerate(faiss_attempts, 1):
-            ids, faiss_scores = search_index(index, query_emb, top_k=top_k)
-            faiss_ids = []
-            for idx, internal_id in enumerate(ids):
-                if int(internal_id) in mapping:
-                    mapped_id = mapping.get(int(internal_id))
-                    if mapped_id is None:
-                        continue
-                    try:
-                        mapped_id_int = int(mapped_id)
-                    except Exception:
-                        continue
-                    faiss_ids.append(mapped_id_int)
-                    try:
-                        faiss_scores_dict[mapped_id_int] = float(faiss_scores[idx])
-                    except Exception:
-                        faiss_scores_dict[mapped_id_int] = 0.0
+            if top_k in faiss_results:
+                faiss_ids, snap_scores = faiss_results[top_k]
+                faiss_ids = list(faiss_ids)
+                faiss_scores_dict.update(zip(faiss_ids, snap_scores))
+            else:
+                if index is None:
+                    index, mapping = load_index()
+                ids, faiss_scores = search_index(index, query_emb, top_k=top_k)
+                faiss_ids = []
+                for idx, internal_id in enumerate(ids):
+                    if int(internal_id) in mapping:
+                        mapped_id = mapping.get(int(internal_id))
+                        if mapped_id is None:
+                            continue
+                        try:
+                            mapped_id_int = int(mapped_id)
+                        except Exception:
+                            continue
+                        faiss_ids.append(mapped_id_int)
+                        try:
+                            faiss_scores_dict[mapped_id_int] = float(faiss_scores[idx])
+                        except Exception:
+                            faiss_scores_dict[mapped_id_int] = 0.0
+                faiss_results[top_k] = (faiss_ids, [faiss_scores_dict.get(i, 0.0) for i in faiss_ids])
+                snapshot_dirty = True
             logger.info(f"[{ai_list_id}] FAISS attempt {attempt} (top_k={top_k}) returned {len(faiss_ids)} candidate IDs")
             
             # === MERGE BGE + FAISS RESULTS ===
@@ -761,6 +747,19 @@ async def _generate_chat_list_async(ai_list_id: str, user_id: int = 1):
             # If enough candidates, break and use this pool
             if len(scored) >= max(20, int((ai_list.item_limit or 50) * 0.6)):
                 break
+        if snapshot_dirty:
+            RetrievalSnapshot(
+                fingerprint=snapshot_fingerprint,
+                generation=retrieval_generation,
+                parsed=parsed,
+                enhanced_prompt=enhanced_prompt,
+                query_embedding=np.asarray(query_emb),
+                small_index=small_index,
+                bge_enabled=_bge_enabled,
+                bge_ids=bge_ids,
+                bge_scores=[bge_scores_dict.get(i, 0.0) for i in bge_ids],
+                faiss_results=faiss_results,
+            ).save(ai_list_id)
         # Non-FAISS pool fallback if index tiny or FAISS-targeted pool too small
         if len(scored) < max(20, int((ai_list.item_limit or 50) * 0.6)):
             need_pool_fallback = small_index or len(rows) < max(20, int((ai_list.item_limit or 50) * 0.4))
@@ -1129,23 +1128,10 @@ async def _generate_chat_list_async(ai_list_id: str, user_id: int = 1):
                         logger.info(f"AI list {ai_list.id}: no resolvable items for Trakt sync (missing IDs) - skipping")
                     else:
                         t = TraktClient(user_id=user_id)
-                        # Strategy: If we have at least 5 trakt IDs use full sync (add/remove). Otherwise additive push only.
-                        use_full_sync = trakt_present >= 5
                         try:
-                            if use_full_sync:
-                                # Only include items with trakt IDs for sync diff logic
-                                diff_items = [d for d in desired_items if "trakt_id" in d]
-                                stats = await t.sync_list_items(ai_list.trakt_list_id, diff_items)
-                                logger.info(f"Synced AI list {ai_list.id} to Trakt {ai_list.trakt_list_id}: {stats}")
-                                # After sync, attempt additive push of any tmdb-only items
-                                tmdb_only = [d for d in desired_items if "tmdb_id" in d and "trakt_id" not in d]
-                                if tmdb_only:
-                                    add_stats = await t.add_items_to_list(ai_list.trakt_list_id, tmdb_only)
-                                    logger.info(f"Added {len(tmdb_only)} tmdb-only items to AI list {ai_list.trakt_list_id}: {add_stats}")
-                            else:
-                                # Low trakt coverage: push everything additively so Trakt assigns IDs
-                                add_stats = await t.add_items_to_list(ai_list.trakt_list_id, desired_items)
-                                logger.info(f"Added {len(desired_items)} items (mixed IDs) to AI list {ai_list.trakt_list_id}: {add_stats}")
+                            # Diff-sync against the list's shadow copy; tmdb-only items are matched by TMDB ID
+                            stats = await t.sync_list_items(ai_list.trakt_list_id, desired_items)
+                            logger.info(f"Synced AI list {ai_list.id} to Trakt {ai_list.trakt_list_id} ({trakt_present}/{len(desired_items)} with Trakt IDs): {stats}")
                         except Exception as sync_err:
                             logger.warning(f"AI list {ai_list.id}: Trakt sync/add failed, attempting recreate: {sync_err}")
                             try:
@@ -1684,6 +1670,42 @@ def rebuild_faiss_index(self):
         gc.collect()
 
 
+@celery_app.task(name="build_candidate_features", bind=True, max_retries=2)
+def build_candidate_features(self):
+    """Nightly: recompute global popularity/rating/novelty/freshness quantiles.
+
+    Writes /data/ai/candidate_features.npz keyed by (tmdb_id, media_type); scorers
+    pick up the new file on their next reload check.
+    """
+    try:
+        from app.services.ai_engine.feature_store import build_feature_store
+        stats = build_feature_store()
+        return {"status": "ok", **stats}
+    except Exception as e:
+        logger.exception(f"[Features] Failed to build candidate feature store: {e}")
+        raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
+    finally:
+        gc.collect()
+
+
+@celery_app.task(name="append_enriched_bge_vectors", bind=True, max_retries=2)
+def append_enriched_bge_vectors(self):
+    """Append BGE vectors of candidates enriched since the last run to the BGE index.
+
+    Enrichment only queues candidate ids; this does one index write per run so the
+    enrichment request paths never load or rewrite the FAISS file.
+    """
+    try:
+        from app.services.ai_engine.candidate_enricher import append_pending_to_bge_index
+        stats = append_pending_to_bge_index()
+        return {"status": "ok", **stats}
+    except Exception as e:
+        logger.exception(f"[BGE] Failed to append enriched candidate vectors: {e}")
+        raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
+    finally:
+        gc.collect()
+
+
 @celery_app.task(name="generate_embeddings_for_new_items", bind=True, max_retries=3)
 def generate_embeddings_for_new_items(self):
     """Generate embeddings for new candidates that don't have embeddings yet.
@@ -32,12 +32,18 @@ export default function ListDetails({ listId, title, onBack }: { listId: number;
   const [userRatings, setUserRatings] = React.useState<Record<number, number>>({});
   const [listMeta, setListMeta] = React.useState<any | null>(null);
 
+  // Keyset cursors per page number; reset whenever the filter/sort/page size changes
+  const cursorsRef = React.useRef<Record<number, string>>({});
+  React.useEffect(()=>{ cursorsRef.current = {}; }, [listId, includeWatched, sortBy, order, limit]);
+
   const load = React.useCallback(async () => {
     try{
       setLoading(true); setError("");
+      const cursor = page > 1 ? cursorsRef.current[page] : undefined;
   const res = await api.get(`/lists/${listId}/items/`, {
-        params: { include_watched: includeWatched, sort_by: sortBy, order, page, limit, user_id: 1 }
+        params: { include_watched: includeWatched, sort_by: sortBy, order, page, limit, user_id: 1, ...(cursor ? { cursor } : {}) }
       });
+      if (res.data.next_cursor) cursorsRef.current[page + 1] = res.data.next_cursor;
       setItems(res.data.items || []);
       setTotal(res.data.total || 0);
     } catch(e:any){
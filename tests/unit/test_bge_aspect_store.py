@@ -0,0 +1,88 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.ai_engine.bge_aspect_store import (
+    ASPECTS, BGEAspectStore, _advance_watermark, _fill_rows, _unseen_rows, decode_embedding, encode_keys,
+)
+
+
+def blob(*values):
+    # bge_embeddings writers store float16 bytes
+    return np.asarray(values, dtype=np.float16).tobytes()
+
+
+def make_store():
+    rows = [
+        SimpleNamespace(tmdb_id=20, media_type="show", embedding_base=blob(1, 0, 0), embedding_title=None,
+                        embedding_keywords=blob(0, 1, 0), embedding_people=None, embedding_brands=None),
+        SimpleNamespace(tmdb_id=10, media_type="movie", embedding_base=blob(0, 2, 0), embedding_title=blob(0, 0, 1),
+                        embedding_keywords=None, embedding_people=None, embedding_brands=None),
+        SimpleNamespace(tmdb_id=20, media_type="movie", embedding_base=blob(0, 0, 3), embedding_title=None,
+                        embedding_keywords=None, embedding_people=None, embedding_brands=None),
+    ]
+    return BGEAspectStore.from_rows(rows)
+
+
+class TestBGEAspectStore(unittest.TestCase):
+    def test_keys_are_sorted_and_looked_up_by_media_type(self):
+        store = make_store()
+        self.assertTrue((np.diff(store.keys) > 0).all())
+        rows = store.rows_for(encode_keys([20, 10, 20, 99], ["show", "movie", "movie", "movie"]))
+        self.assertEqual(rows[3], -1)
+        self.assertEqual(len(set(rows[:3].tolist())), 3)
+
+    def test_masked_weighted_fusion(self):
+        store = make_store()
+        profile = {"base": np.array([0, 1, 0], dtype=np.float32), "title": np.array([0, 0, 1], dtype=np.float32)}
+        keys = encode_keys([10, 20, 99], ["movie", "show", "movie"])
+        final, per_aspect, stored = store.score(profile, keys, {"base": 0.5, "title": 0.5})
+        # movie 10: base and title both match exactly
+        self.assertAlmostEqual(float(final[0]), 1.0, places=3)
+        # show 20: no title vector, so only base counts (orthogonal)
+        self.assertAlmostEqual(float(final[1]), 0.0, places=3)
+        self.assertTrue(np.isnan(per_aspect["title"][1]))
+        self.assertEqual(stored.tolist(), [True, True, False])
+        self.assertEqual(float(final[2]), 0.0)
+
+    def test_weighted_profile_skips_missing_aspects(self):
+        store = make_store()
+        keys = encode_keys([10, 20], ["movie", "show"])
+        profile = store.weighted_profile(keys, np.array([3.0, 1.0]))
+        np.testing.assert_allclose(profile["base"], [0.25, 0.75, 0.0], atol=1e-3)
+        np.testing.assert_allclose(profile["title"], [0.0, 0.0, 1.0], atol=1e-3)
+        self.assertIsNone(profile["people"])
+
+    def test_float16_blob_round_trip(self):
+        vec = np.random.default_rng(0).standard_normal(384).astype(np.float32)
+        stored = vec.astype(np.float16).tobytes()  # as candidate_enricher writes it
+        decoded = decode_embedding(stored)
+        self.assertEqual(decoded.shape, (384,))
+        np.testing.assert_allclose(decoded, vec, rtol=1e-2, atol=1e-2)
+
+        mats = {a: np.zeros((1, 384), dtype=np.float16) for a in ASPECTS}
+        mask = np.zeros(1, dtype=np.uint8)
+        row = SimpleNamespace(**{f"embedding_{a}": None for a in ASPECTS})
+        row.embedding_base = stored
+        _fill_rows(mats, mask, np.array([0]), [row])
+        self.assertEqual(int(mask[0]), 1)
+        unit = vec / np.linalg.norm(vec)
+        self.assertGreater(float(mats["base"][0].astype(np.float32) @ unit), 0.999)
+
+    def test_inclusive_watermark_skips_only_rows_already_stored(self):
+        t1, t2 = datetime(2026, 1, 1, 12), datetime(2026, 1, 1, 13)
+        first = [SimpleNamespace(id=1, updated_at=t1), SimpleNamespace(id=2, updated_at=t2)]
+        watermark, ids = _advance_watermark(first, None, set())
+        self.assertEqual((watermark, ids), (t2.isoformat(), {2}))
+
+        # id 3 committed at the watermark timestamp after the previous run read it
+        second = [SimpleNamespace(id=2, updated_at=t2), SimpleNamespace(id=3, updated_at=t2)]
+        unseen = _unseen_rows(second, watermark, ids)
+        self.assertEqual([r.id for r in unseen], [3])
+        self.assertEqual(_advance_watermark(unseen, watermark, ids), (t2.isoformat(), {2, 3}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from app.services import candidate_cache
+from app.services.candidate_cache import candidate_record, get_many, invalidate_candidates, to_scoring_dict
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.mget_calls = 0
+        self.results = []
+
+    def mget(self, keys):
+        self.mget_calls += 1
+        return [self.store.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def set(self, key, value, ex=None, nx=False):
+        ok = not (nx and key in self.store)
+        if ok:
+            self.store[key] = value
+        self.results.append(ok or None)
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+def record(tmdb_id, media_type="movie", title="Title"):
+    return {"id": tmdb_id, "tmdb_id": tmdb_id, "media_type": media_type, "title": title, "genres": ["Drama"]}
+
+
+class TestCandidateCache(unittest.TestCase):
+    def setUp(self):
+        candidate_cache.clear_local_cache()
+        self.redis = FakeRedis()
+        patcher = mock.patch.object(candidate_cache, "get_redis_sync", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_layers_and_invalidation(self):
+        self.redis.store["candidate:show:2"] = json.dumps(record(2, "show"))
+        with mock.patch.object(candidate_cache, "_load_from_db", return_value={(1, "movie"): record(1)}) as load:
+            found = get_many([(1, "movie"), ("2", "show"), (3, "movie")])
+            self.assertEqual(set(found), {(1, "movie"), (2, "show")})
+            load.assert_called_once_with([(1, "movie"), (3, "movie")], None)
+            self.assertIn("candidate:movie:1", self.redis.store)
+
+            # Served from the local LRU without touching Redis or the DB
+            get_many([(1, "movie"), (2, "show")])
+            self.assertEqual(self.redis.mget_calls, 1)
+            self.assertEqual(load.call_count, 1)
+
+            invalidate_candidates([(1, "movie")])
+            self.assertEqual(self.redis.store["candidate:movie:1"], "")
+            load.return_value = {(1, "movie"): record(1, title="Renamed")}
+            self.assertEqual(get_many([(1, "movie")])[(1, "movie")]["title"], "Renamed")
+
+    def test_read_racing_an_invalidation_is_not_cached(self):
+        def stale_read(keys, db):
+            # The writer commits and invalidates while this read is in flight
+            invalidate_candidates([(1, "movie")])
+            return {(1, "movie"): record(1, title="Stale")}
+
+        with mock.patch.object(candidate_cache, "_load_from_db", side_effect=stale_read):
+            self.assertEqual(get_many([(1, "movie")])[(1, "movie")]["title"], "Stale")
+        self.assertEqual(self.redis.store["candidate:movie:1"], "")
+        with mock.patch.object(candidate_cache, "_load_from_db", return_value={(1, "movie"): record(1, title="Fresh")}):
+            self.assertEqual(get_many([(1, "movie")])[(1, "movie")]["title"], "Fresh")
+
+    def test_record_views(self):
+        row = SimpleNamespace(tmdb_id=5, media_type="show", genres='["Crime", "Drama"]', vote_count=None)
+        rec = candidate_record(row)
+        self.assertEqual(rec["genres"], ["Crime", "Drama"])
+        self.assertIsNone(rec["overview"])
+        scoring = to_scoring_dict(rec)
+        self.assertEqual(scoring["ids"], {"trakt": None, "tmdb": 5})
+        self.assertEqual((scoring["type"], scoring["votes"], scoring["overview"]), ("show", 0, ""))
+        self.assertEqual(candidate_record(SimpleNamespace(genres="Action|Comedy"))["genres"], ["Action", "Comedy"])
+
+
+if __name__ == "__main__":
+    unittest.main()
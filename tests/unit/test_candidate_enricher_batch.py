@@ -0,0 +1,175 @@
+import asyncio
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from sqlalchemy.dialects import postgresql
+
+from app.services.ai_engine import candidate_enricher
+
+
+def candidate(cid, title, keywords='[]', cast='[]', companies='[]'):
+    return SimpleNamespace(id=cid, tmdb_id=cid * 10, media_type="movie", title=title, overview="", genres="[]",
+                           keywords=keywords, cast=cast, production_companies=companies, content_hash="h",
+                           embedding_hash=None)
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True):
+        self.calls.append(list(texts))
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+class TestBatchedBGERegeneration(unittest.TestCase):
+    def test_one_encode_and_one_upsert_for_all_candidates(self):
+        pcs = [candidate(1, "Heat", cast='["Al Pacino"]'), candidate(2, "Ran", companies='["Toho"]')]
+        model, db = FakeModel(), mock.MagicMock()
+        with mock.patch("app.services.ai_engine.model_registry.get_sentence_transformer", return_value=model):
+            written = candidate_enricher._regenerate_bge_embeddings(db, pcs)
+
+        self.assertEqual(written, 2)
+        self.assertEqual(len(model.calls), 1)
+        # base + title for both, people for the first, brands for the second (empty aspects skipped)
+        self.assertEqual(len(model.calls[0]), 6)
+        db.execute.assert_called_once()
+        db.begin_nested.assert_called_once()
+        params = db.execute.call_args[0][0].compile(dialect=postgresql.dialect()).params
+        self.assertEqual((params["tmdb_id_m0"], params["tmdb_id_m1"]), (10, 20))
+        self.assertIsNone(params["embedding_brands_m0"])
+        self.assertIsNotNone(params["embedding_people_m0"])
+        self.assertEqual([pc.embedding_hash for pc in pcs], [None, None])
+
+    def test_failed_upsert_rolls_back_only_its_savepoint(self):
+        pcs = [candidate(1, "Heat")]
+        db = mock.MagicMock()
+        db.execute.side_effect = RuntimeError("constraint missing")
+        savepoint = db.begin_nested.return_value
+        with mock.patch("app.services.ai_engine.model_registry.get_sentence_transformer", return_value=FakeModel()):
+            written = candidate_enricher._regenerate_bge_embeddings(db, pcs)
+
+        self.assertEqual(written, 0)
+        # The exception passed through the savepoint's __exit__, which rolls it back
+        self.assertIs(savepoint.__exit__.call_args[0][0], RuntimeError)
+
+    def test_index_append_is_queued_only_after_commit(self):
+        pc = mock.MagicMock(id=1)
+        db = mock.MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = [pc]
+
+        async def fetch(tmdb_id, media_type):
+            return {"title": "Heat"}
+
+        def enrich(commit_error=None):
+            db.commit.side_effect = commit_error
+            with mock.patch.object(candidate_enricher, "fetch_tmdb_metadata", new=fetch), \
+                    mock.patch.object(candidate_enricher, "_needs_enrichment", return_value=True), \
+                    mock.patch.object(candidate_enricher, "_apply_metadata"), \
+                    mock.patch.object(candidate_enricher, "_regenerate_bge_embeddings", return_value=1), \
+                    mock.patch.object(candidate_enricher, "invalidate_candidates"), \
+                    mock.patch.object(candidate_enricher, "_queue_bge_index_append") as queue:
+                asyncio.run(candidate_enricher._enrich_candidates_async(
+                    db, [{"id": 1, "tmdb_id": 10, "media_type": "movie"}]))
+            return queue
+
+        enrich(RuntimeError("serialization failure")).assert_not_called()
+        enrich().assert_called_once_with([pc])
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def exists(self, key):
+        return key in self.hashes
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.hashes:
+            return None
+        self.hashes[key] = value
+        return True
+
+    def rename(self, src, dst):
+        if src not in self.hashes:
+            raise RuntimeError("no such key")
+        self.hashes[dst] = self.hashes.pop(src)
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+class TestPendingBGEIndexAppend(unittest.TestCase):
+    def test_queued_candidates_are_appended_in_one_write(self):
+        from app.core.config import settings
+        from app.services.ai_engine import bge_index
+        if bge_index.faiss is None:
+            self.skipTest("faiss not installed")
+        redis = FakeRedis()
+        vec = np.array([0.0, 1.0, 0.0, 0.0], dtype=np.float16).tobytes()
+        stored = SimpleNamespace(**{f"embedding_{a}": None for a in candidate_enricher.BGE_ASPECTS},
+                                 **{f"hash_{a}": None for a in candidate_enricher.BGE_ASPECTS})
+        stored.embedding_base, stored.hash_base = vec, "hb"
+        stored.embedding_title, stored.hash_title = vec, "ht"
+        db = mock.MagicMock()
+        db.query.return_value.join.return_value.filter.return_value.all.return_value = [(1, stored)]
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch("app.core.redis_client.get_redis_sync", return_value=redis), \
+                mock.patch.object(settings, "ai_bge_index_dir", tmp):
+            bge_index.BGEIndex(tmp).add_items([9], [[1.0, 0.0, 0.0, 0.0]], content_hashes=["x"])
+            candidate_enricher._queue_bge_index_append([candidate(1, "Heat")])
+            with mock.patch.object(bge_index.BGEIndex, "add_items", autospec=True,
+                                   side_effect=bge_index.BGEIndex.add_items) as add:
+                stats = candidate_enricher.append_pending_to_bge_index(db)
+            idx = bge_index.BGEIndex(tmp)
+            self.assertTrue(idx.load())
+
+        self.assertEqual(stats, {"queued": 1, "vectors": 2})
+        add.assert_called_once()
+        self.assertTrue(add.call_args.kwargs["replace"])
+        self.assertEqual(idx.positions_to_item_ids([1, 2]), [(1, "base"), (1, "title")])
+        self.assertEqual(db.execute.call_args[0][1], [{"id": 1, "h": "h"}])
+        db.commit.assert_called_once()
+        self.assertEqual(redis.hashes, {})
+
+
+    def test_append_is_deferred_while_the_build_holds_the_write_lock(self):
+        from app.services.ai_engine import bge_index
+        redis = FakeRedis()
+        redis.hashes[bge_index.WRITE_LOCK_KEY] = "1"
+        with mock.patch("app.core.redis_client.get_redis_sync", return_value=redis):
+            candidate_enricher._queue_bge_index_append([candidate(1, "Heat")])
+            stats = candidate_enricher.append_pending_to_bge_index(mock.MagicMock())
+        self.assertEqual(stats["deferred"], 1)
+        self.assertIn(candidate_enricher.BGE_PENDING_KEY, redis.hashes)
+
+
+class TestBGEIndexReplace(unittest.TestCase):
+    def test_replace_unmaps_superseded_entries(self):
+        from app.services.ai_engine import bge_index
+        if bge_index.faiss is None:
+            self.skipTest("faiss not installed")
+        with tempfile.TemporaryDirectory() as tmp:
+            idx = bge_index.BGEIndex(tmp)
+            vec = [1.0, 0.0, 0.0, 0.0]
+            idx.add_items([1, 1, 2], [vec, vec, vec], content_hashes=["a", "a", "b"], labels=["base", "title", "base"])
+            idx.add_items([1], [vec], content_hashes=["c"], labels=["base"], replace=True)
+
+            entries = idx._id_map["items"]["1"]["entries"]
+            self.assertEqual(sorted((e["label"], e["pos"]) for e in entries), [("base", 3), ("title", 1)])
+            self.assertEqual(idx.positions_to_item_ids([0, 3]), [(-1, "unknown"), (1, "base")])
+            self.assertEqual(idx.get_missing_or_stale({1: "c", 2: "b"}), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from unittest import mock
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import candidate_ingestion
+
+
+class TestUpsertPage(unittest.TestCase):
+    def test_vote_updates_keep_content_hash(self):
+        db = mock.Mock()
+        db.execute.return_value.fetchall.return_value = []
+        row = {"tmdb_id": 1, "media_type": "movie", "title": "Heat", "popularity": 9.5, "vote_count": 10,
+               "content_hash": "abc"}
+        with mock.patch.object(candidate_ingestion, "invalidate_candidates"):
+            candidate_ingestion._upsert_page(db, [row])
+        sql = str(db.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+        update_clause = sql.split("DO UPDATE SET", 1)[1]
+        self.assertIn("popularity = excluded.popularity", update_clause)
+        self.assertNotIn("content_hash", update_clause.split("WHERE", 1)[0])
+        # Conflict target is the column pair, which works for a unique index as well as a constraint
+        self.assertIn("ON CONFLICT (tmdb_id, media_type)", sql)
+
+    def test_rows_with_different_columns_are_not_padded_with_null(self):
+        db = mock.Mock()
+        db.execute.return_value.fetchall.return_value = []
+        basic = {"tmdb_id": 1, "media_type": "movie", "title": "Heat"}
+        enriched = {"tmdb_id": 2, "media_type": "movie", "title": "Ran", "cast": '["Tatsuya Nakadai"]'}
+        with mock.patch.object(candidate_ingestion, "invalidate_candidates"):
+            candidate_ingestion._upsert_page(db, [basic, enriched, dict(basic, tmdb_id=3)])
+        self.assertEqual(db.execute.call_count, 2)
+        params = db.execute.call_args_list[0][0][0].compile(dialect=postgresql.dialect()).params
+        self.assertNotIn("cast_m0", params)
+        db.commit.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
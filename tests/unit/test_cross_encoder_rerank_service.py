@@ -0,0 +1,66 @@
+import unittest
+
+from app.services.ai_engine.cross_encoder_reranker import CrossEncoderRerankService
+
+
+class FakeReranker:
+    """Scores a pair by text length; records the batches it was called with."""
+
+    model_name = "fake-ce"
+
+    def __init__(self):
+        self.batches = []
+
+    def ensure(self):
+        pass
+
+    def token_lengths(self, query, texts):
+        return [len(t.split()) for t in texts]
+
+    def predict_pairs(self, pairs, batch_size=64):
+        self.batches.append([t for _, t in pairs])
+        return [min(1.0, len(t.split()) / 100.0) for _, t in pairs]
+
+
+def make_service(**kwargs):
+    svc = CrossEncoderRerankService("fake-ce", use_redis=False, **kwargs)
+    svc.reranker = FakeReranker()
+    return svc
+
+
+class TestCrossEncoderRerankService(unittest.TestCase):
+    def test_bucketed_scores_keep_input_order(self):
+        svc = make_service(max_batch_size=2, max_batch_tokens=1000)
+        texts = ["w " * 50, "w " * 2, "w " * 30, "w " * 3]
+        scores = svc.score("q", texts)
+        self.assertEqual(scores, [0.5, 0.02, 0.3, 0.03])
+        # shortest pairs share a batch, longest pairs share the other
+        self.assertEqual([len(b[0].split()) for b in svc.reranker.batches], [2, 30])
+
+    def test_token_budget_splits_batches(self):
+        svc = make_service(max_batch_size=64, max_batch_tokens=100)
+        svc.score("q", ["w " * 40] * 5)
+        self.assertEqual([len(b) for b in svc.reranker.batches], [2, 2, 1])
+
+    def test_cache_skips_unchanged_texts(self):
+        svc = make_service()
+        svc.score("q", ["a b", "c d e"])
+        svc.reranker.batches.clear()
+        scores = svc.score("q", ["a b", "c d e", "f"])
+        self.assertEqual(svc.reranker.batches, [["f"]])
+        self.assertEqual(scores, [0.02, 0.03, 0.01])
+        svc.score("other query", ["a b"])
+        self.assertEqual(svc.reranker.batches[-1], ["a b"])
+
+    def test_early_exit_stops_when_top_k_is_stable(self):
+        svc = make_service()
+        texts = ["w " * n for n in (90, 80, 70, 60, 5, 4, 3, 2)]
+        priors = [8, 7, 6, 5, 4, 3, 2, 1]
+        scores = svc.score("q", texts, top_k=2, priors=priors, chunk_size=2, patience=1)
+        self.assertEqual(scores[:4], [0.9, 0.8, 0.7, 0.6])
+        self.assertEqual(scores[4:], [None, None, None, None])
+        self.assertEqual(svc.stats["skipped_early_exit"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+import numpy as np
+
+from app.services.ai_engine.bge_aspect_store import encode_keys
+from app.services.ai_engine.feature_store import CandidateFeatureStore, quantile_normalize, shrunk_rating
+
+
+class TestFeatureStore(unittest.TestCase):
+    def test_quantiles_share_tied_ranks(self):
+        q = quantile_normalize(np.array([5.0, 1.0, 5.0, np.nan, 9.0]))
+        np.testing.assert_allclose(q[[1, 0, 2, 4]], [0.0, 0.5, 0.5, 1.0])
+        self.assertTrue(np.isnan(q[3]))
+
+    def test_few_votes_shrink_toward_mean(self):
+        r = shrunk_rating(np.array([10.0, 7.0, 6.0]), np.array([1, 10000, 10000]))
+        self.assertLess(r[0], r[1])
+
+    def test_gather_by_key(self):
+        feats = np.array([[0.1, 0.2, 0.9, 0.3], [0.8, 0.7, 0.2, 0.6]], dtype=np.float32)
+        keys = encode_keys([5, 5], ["movie", "show"])
+        store = CandidateFeatureStore(feats, keys, np.array([1, 0]))
+        out = store.gather_candidates([
+            {"tmdb_id": 5, "media_type": "show"},
+            {"ids": {"tmdb": 5}, "type": "movie"},
+            {"tmdb_id": 6, "media_type": "movie"},
+        ])
+        np.testing.assert_allclose(out[:2], feats[[0, 1]])
+        self.assertTrue(np.isnan(out[2]).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
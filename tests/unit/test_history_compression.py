@@ -0,0 +1,66 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.services.history_compression import HistoryCompressor
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+
+def event(days_ago, genres='["Drama"]', media_type="movie", rating=None, thumb=None):
+    return SimpleNamespace(media_type=media_type, genres=genres, watched_at=(NOW - timedelta(days=days_ago)).replace(tzinfo=None),
+                           user_trakt_rating=rating, thumb=thumb)
+
+
+class FakeCompressor(HistoryCompressor):
+    def __init__(self, events):
+        self.user_id = 1
+        self.events = events
+
+    def _load_watch_events(self, db, since=None):
+        return [e for e in self.events if since is None or e.watched_at.replace(tzinfo=timezone.utc) > since]
+
+
+class TestWatchVectorIncremental(unittest.TestCase):
+    def test_incremental_matches_full_rebuild(self):
+        old = [event(400, rating=9), event(30, '["Comedy"]', "show"), event(10, thumb=1)]
+        new = [event(2, '["Horror"]'), event(1, '["Drama", "Horror"]', "show")]
+        earlier = NOW - timedelta(days=5)
+
+        before = FakeCompressor(old)
+        raw, incremental = before._build_watch_vector_raw(None, None, {"count": 3, "ratings": "x"}, earlier, False)
+        self.assertFalse(incremental)
+        existing = {
+            "watch_vector_raw": raw,
+            "vector_as_of": earlier.isoformat(),
+            "fingerprint": {"max_watched_at": (NOW - timedelta(days=10)).isoformat(), "count": 3, "ratings": "x"},
+        }
+
+        after = FakeCompressor(old + new)
+        fingerprint = {"max_watched_at": (NOW - timedelta(days=1)).isoformat(), "count": 5, "ratings": "x"}
+        updated, incremental = after._build_watch_vector_raw(None, existing, fingerprint, NOW, False)
+        self.assertTrue(incremental)
+        full, _ = after._build_watch_vector_raw(None, None, fingerprint, NOW, False)
+        self.assertEqual(set(updated), set(full))
+        for key in full:
+            self.assertAlmostEqual(updated[key], full[key], places=6)
+        self.assertIn("high_rated", full)
+
+    def test_rating_change_or_backfill_forces_full_rebuild(self):
+        old = [event(10)]
+        existing = {
+            "watch_vector_raw": {"genre:drama": 1.0},
+            "vector_as_of": NOW.isoformat(),
+            "fingerprint": {"max_watched_at": (NOW - timedelta(days=10)).isoformat(), "count": 1, "ratings": "x"},
+        }
+        compressor = FakeCompressor(old + [event(20, '["War"]')])  # backfilled older event
+        _, incremental = compressor._build_watch_vector_raw(
+            None, existing, {"max_watched_at": existing["fingerprint"]["max_watched_at"], "count": 2, "ratings": "x"}, NOW, False)
+        self.assertFalse(incremental)
+        _, incremental = FakeCompressor(old)._build_watch_vector_raw(
+            None, existing, dict(existing["fingerprint"], ratings="y"), NOW, False)
+        self.assertFalse(incremental)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from unittest import mock
+from app.models import PersistentCandidate
+from app.scripts import import_tmdb_csv
+from app.scripts.import_tmdb_csv import compute_scores_vectorized, copy_upsert_chunk, map_row, resolve_columns
+
+class TestImportTmdbCsv(unittest.TestCase):
+    def test_vectorized_scores_match_model(self):
+        rows = [
+            {"tmdb_id": 1, "popularity": 120.5, "vote_count": 4000, "vote_average": 7.9, "release_date": "2010-07-16"},
+            {"tmdb_id": 2, "popularity": 0.0, "vote_count": 0, "vote_average": None, "release_date": None},
+            {"tmdb_id": 3, "popularity": 3.2, "vote_count": 12, "vote_average": 8.4, "release_date": "2024"},
+            {"tmdb_id": 4, "popularity": 9.0, "vote_count": 50, "vote_average": 6.1, "release_date": "bad-date"},
+        ]
+        compute_scores_vectorized(rows)
+        for r in rows:
+            pc = PersistentCandidate(popularity=r["popularity"], vote_count=r["vote_count"],
+                                     vote_average=r["vote_average"], release_date=r["release_date"])
+            pc.compute_scores()
+            self.assertAlmostEqual(r["obscurity_score"], pc.obscurity_score, places=9)
+            self.assertAlmostEqual(r["mainstream_score"], pc.mainstream_score, places=9)
+            self.assertAlmostEqual(r["freshness_score"], pc.freshness_score, places=3)
+
+    def test_map_row(self):
+        headers = ["id", "name", "original_language", "popularity", "vote_average", "vote_count", "first_air_date", "genres"]
+        colmap = resolve_columns(headers)
+        row = dict(zip(headers, ["42", " Dark ", "DE", "10.5", "8.7", "900", "2017-12-01", "Drama, Mystery"]))
+        mapped = map_row(row, colmap, default_media_type="tv")
+        self.assertEqual(mapped["tmdb_id"], 42)
+        self.assertEqual(mapped["title"], "Dark")
+        self.assertEqual(mapped["media_type"], "show")
+        self.assertEqual(mapped["language"], "de")
+        self.assertEqual(mapped["year"], 2017)
+        self.assertEqual(mapped["genres"], '["Drama", "Mystery"]')
+        self.assertIsNone(map_row({**row, "id": ""}, colmap))
+
+    def test_upsert_invalidates_updated_rows_after_commit(self):
+        events = []
+        cur = mock.MagicMock()
+        cur.fetchall.return_value = [(1, "movie", True), (2, "show", False)]
+        raw_conn = mock.MagicMock(cursor=mock.MagicMock(return_value=cur))
+        raw_conn.commit.side_effect = lambda: events.append("commit")
+        with mock.patch.object(import_tmdb_csv, "invalidate_candidates",
+                               side_effect=lambda keys: events.append(list(keys))):
+            result = copy_upsert_chunk(raw_conn, [{"tmdb_id": 1, "media_type": "movie"},
+                                                  {"tmdb_id": 2, "media_type": "show"}])
+        self.assertEqual(result, (1, 1))
+        self.assertEqual(events, ["commit", [(2, "show")]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+from app.services import individual_list_suggestions as suggestions
+
+
+class FakeIndex:
+    def __init__(self):
+        self.queries = None
+
+    def search(self, queries, top_k):
+        self.queries = queries
+        return np.zeros((len(queries), top_k), dtype=np.float32), np.full((len(queries), top_k), -1)
+
+
+class TestListNeighbors(unittest.TestCase):
+    def test_centroid_covers_items_past_query_cap(self):
+        n = suggestions.MAX_ITEM_QUERIES + 10
+        items = [SimpleNamespace(tmdb_id=i, media_type="movie", trakt_id=1000 + i, order_index=i) for i in range(n)]
+        # Only the items past the per-item query cap point along the second axis
+        rows = [SimpleNamespace(tmdb_id=i, media_type="movie",
+                                embedding=np.array([0.0, 1.0, 0.0] if i >= suggestions.MAX_ITEM_QUERIES else [1.0, 0.0, 0.0],
+                                                   dtype=np.float32))
+                for i in range(n)]
+        db = mock.MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = rows
+        index = FakeIndex()
+        with mock.patch.object(suggestions, "SessionLocal", return_value=db), \
+                mock.patch.object(suggestions, "load_index", return_value=(index, {})), \
+                mock.patch.object(suggestions, "deserialize_embedding", side_effect=lambda blob: blob):
+            service = suggestions.IndividualListSuggestionsService.__new__(suggestions.IndividualListSuggestionsService)
+            result = service._get_faiss_neighbors(items, set())
+
+        self.assertEqual(result, [])
+        # One centroid query plus the capped per-item queries
+        self.assertEqual(index.queries.shape, (1 + suggestions.MAX_ITEM_QUERIES, 3))
+        keys = db.query.return_value.filter.call_args_list[0][0][0].right.value
+        self.assertEqual(len(keys), n)
+        self.assertGreater(index.queries[0, 1], 0.0)
+        self.assertEqual(index.queries[1:, 1].max(), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
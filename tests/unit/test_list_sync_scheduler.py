@@ -0,0 +1,126 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+from app.services import list_sync_scheduler as scheduler
+
+
+class FakeRedis:
+    def __init__(self):
+        self.zset, self.kv = {}, {}
+
+    def zadd(self, key, mapping, nx=False, xx=False):
+        for member, score in mapping.items():
+            if (nx and member in self.zset) or (xx and member not in self.zset):
+                continue
+            self.zset[member] = score
+
+    def zrem(self, key, member):
+        self.zset.pop(member, None)
+
+    def zrangebyscore(self, key, lo, hi):
+        hi = float(hi)
+        return [m for m, s in sorted(self.zset.items(), key=lambda kv: kv[1]) if s <= hi]
+
+    def incr(self, key):
+        self.kv[key] = int(self.kv.get(key, 0)) + 1
+        return self.kv[key]
+
+    def decr(self, key):
+        self.kv[key] = int(self.kv.get(key, 0)) - 1
+        return self.kv[key]
+
+    def get(self, key):
+        return self.kv.get(key)
+
+    def hincrby(self, key, field, amount=1):
+        self.kv[field] = int(self.kv.get(field, 0)) + amount
+        return self.kv[field]
+
+    def hdel(self, key, field):
+        self.kv.pop(field, None)
+
+    def expire(self, key, ttl):
+        pass
+
+    def delete(self, key):
+        self.kv.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+
+def user_list(list_id, user_id=1, last_sync=None, last_full=None, interval=None, filters=None, status=None):
+    return SimpleNamespace(id=list_id, user_id=user_id, last_sync_at=last_sync, last_full_sync_at=last_full,
+                           sync_interval=interval, filters=filters, sync_status=status)
+
+
+class TestListSyncScheduler(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch.object(scheduler, "get_redis_sync", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        settings_patch = mock.patch.object(scheduler, "settings", SimpleNamespace(
+            list_sync_per_user_concurrency=2, list_sync_max_dispatch=200))
+        settings_patch.start()
+        self.addCleanup(settings_patch.stop)
+
+    def test_next_due_matches_interval_and_full_sync_rules(self):
+        synced = datetime(2024, 1, 1, 12, 0)
+        base = scheduler._ts(synced)
+        self.assertEqual(scheduler.next_due_at(user_list(1), now=5.0), 5.0)
+        self.assertEqual(scheduler.next_due_at(user_list(1, last_sync=synced)), base + 1800)
+        self.assertEqual(scheduler.next_due_at(user_list(1, last_sync=synced, interval=24)), base + 86400)
+        # A full sync due earlier than the incremental interval wins
+        due = scheduler.next_due_at(user_list(1, last_sync=synced, last_full=synced, interval=72,
+                                               filters='{"full_sync_days": 2}'))
+        self.assertEqual(due, base + 2 * 86400)
+
+    def test_claims_only_due_lists_within_free_slots(self):
+        for list_id, due in ((1, 10), (2, 20), (3, 30), (4, 500)):
+            scheduler.schedule_list(user_list(list_id), due_at=due)
+        scheduler.schedule_list(user_list(5, user_id=2), due_at=40)
+
+        self.assertTrue(scheduler.acquire_slot(1))
+        claimed = scheduler.claim_due_lists(now=100)
+        # User 1 has one free slot left: only its oldest due list; list 4 is not due yet
+        self.assertEqual(claimed, [(1, 1), (2, 5)])
+        self.assertEqual(self.redis.zset["1:1"], 100 + scheduler.CLAIM_LEASE)
+        self.assertEqual(self.redis.zset["1:2"], 20)
+
+        self.assertTrue(scheduler.acquire_slot(1))
+        self.assertFalse(scheduler.acquire_slot(1))
+        scheduler.release_slot(1)
+        self.assertEqual(scheduler.claim_due_lists(user_id=1, now=100), [(1, 2)])
+
+        scheduler.unschedule_list(4, 1)
+        self.assertNotIn("1:4", self.redis.zset)
+
+        # A subtask waiting for a slot keeps its lease alive
+        scheduler.renew_claim(1, 1, now=2000)
+        self.assertEqual(self.redis.zset["1:1"], 2000 + scheduler.CLAIM_LEASE)
+
+    def test_failed_syncs_back_off_exponentially(self):
+        synced = datetime(2024, 1, 1, 12, 0)
+        now = scheduler._ts(synced) + 7200  # the last successful sync is long overdue
+        failing = user_list(7, last_sync=synced, status="error")
+        expected = [now + 1800, now + 3600, now + 7200]
+        for due in expected:
+            scheduler.reschedule_after_sync(failing, now=now)
+            self.assertEqual(self.redis.zset["1:7"], due)
+
+        # Backoff is capped, and a successful sync returns to the normal interval
+        self.assertEqual(scheduler.error_backoff(failing, 30), scheduler.MAX_ERROR_BACKOFF)
+        recovered = user_list(7, last_sync=datetime(2024, 1, 1, 14, 0), status="complete")
+        scheduler.reschedule_after_sync(recovered, now=now)
+        self.assertEqual(self.redis.zset["1:7"], now + 1800)
+        self.assertNotIn("1:7", self.redis.kv)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.services.local_text_search import LocalTextSearchIndex, _advance_watermark, _unseen_rows, within_one_edit
+
+DOCS = [
+    {"tmdb_id": 1396, "media_type": "show", "title": "Breaking Bad", "original_title": "Breaking Bad", "year": 2008,
+     "popularity": 300.0, "cast": "Bryan Cranston Aaron Paul", "genres": "Crime Drama", "networks": "AMC"},
+    {"tmdb_id": 603, "media_type": "movie", "title": "The Matrix", "original_title": "The Matrix", "year": 1999,
+     "popularity": 80.0, "cast": "Keanu Reeves Carrie-Anne Moss", "genres": "Action Science Fiction"},
+    {"tmdb_id": 604, "media_type": "movie", "title": "The Matrix Reloaded", "original_title": "The Matrix Reloaded",
+     "year": 2003, "popularity": 40.0, "cast": "Keanu Reeves", "genres": "Action"},
+    {"tmdb_id": 194, "media_type": "movie", "title": "Amélie", "original_title": "Le Fabuleux Destin d'Amélie Poulain",
+     "year": 2001, "popularity": 30.0, "cast": "Audrey Tautou", "genres": "Comedy Romance",
+     "production_countries": "France"},
+    {"tmdb_id": 66732, "media_type": "show", "title": "Stranger Things", "original_title": "Stranger Things",
+     "year": 2016, "popularity": 250.0, "cast": "Millie Bobby Brown", "genres": "Drama Mystery"},
+]
+
+
+def make_index(path=None):
+    idx = LocalTextSearchIndex(path)
+    idx.index_candidates(DOCS)
+    return idx
+
+
+def ids(results):
+    return [r["tmdb_id"] for r in results]
+
+
+class TestLocalTextSearch(unittest.TestCase):
+    def test_exact_title_ranks_first_with_es_shape(self):
+        results = make_index().search("the matrix")
+        self.assertEqual(ids(results)[:2], [603, 604])
+        self.assertEqual(set(results[0]), {"tmdb_id", "media_type", "title", "year", "popularity", "es_score"})
+
+    def test_prefix_fuzzy_and_accent_folding(self):
+        idx = make_index()
+        self.assertEqual(ids(idx.search("strang"))[0], 66732)
+        self.assertEqual(ids(idx.search("breakng"))[0], 1396)
+        self.assertEqual(ids(idx.search("stranger thinsg"))[0], 66732)
+        self.assertEqual(ids(idx.search("amelie"))[0], 194)
+
+    def test_people_and_filters(self):
+        idx = make_index()
+        self.assertEqual(set(ids(idx.search("keanu reeves"))), {603, 604})
+        self.assertEqual(ids(idx.search("cranston", media_type="movie")), [])
+        boosted = idx.search("action", enhanced_filters=[{"match": {"cast": {"query": "Carrie-Anne Moss", "boost": 2.0}}}])
+        self.assertEqual(ids(boosted)[0], 603)
+
+    def test_strict_titles_only_requires_every_token(self):
+        idx = make_index()
+        self.assertEqual(ids(idx.search("matrix reloaded", strict_titles_only=True)), [604])
+        self.assertEqual(ids(idx.search("keanu", strict_titles_only=True)), [])
+
+    def test_upsert_remove_and_compaction(self):
+        idx = make_index()
+        idx.index_candidates([dict(DOCS[1], title="The Matrix Resurrections", original_title="")])
+        self.assertEqual(idx.doc_count, len(DOCS))
+        self.assertEqual(idx.search("resurrections")[0]["tmdb_id"], 603)
+        self.assertEqual(ids(idx.search("the matrix")).count(603), 1)
+        self.assertEqual(idx.remove([(1396, "show"), (999, "movie")]), 1)
+        self.assertNotIn(1396, ids(idx.search("breaking bad")))
+        idx.compact()
+        self.assertEqual(idx.get_index_stats()["tombstones"], 0)
+        self.assertEqual(ids(idx.search("stranger things"))[0], 66732)
+
+    def test_save_and_load_roundtrip(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "index.pkl"
+            idx = make_index(path)
+            idx.watermark = "2026-01-01T00:00:00"
+            idx.save()
+            loaded = LocalTextSearchIndex(path)
+            self.assertTrue(loaded.load())
+        self.assertEqual(loaded.watermark, "2026-01-01T00:00:00")
+        self.assertEqual(ids(loaded.search("strang")), ids(idx.search("strang")))
+        self.assertTrue(loaded.is_connected())
+
+    def test_rows_committed_at_the_watermark_are_picked_up_once(self):
+        t1, t2 = datetime(2026, 1, 1, 12, 0), datetime(2026, 1, 1, 12, 5)
+        first_run = [SimpleNamespace(id=1, last_refreshed=t1), SimpleNamespace(id=2, last_refreshed=t2)]
+        watermark, seen = _advance_watermark(first_run, None, set())
+        self.assertEqual((watermark, seen), (t2.isoformat(), {2}))
+
+        # Row 3 shares the watermark timestamp but committed after the first run read it
+        second_run = [SimpleNamespace(id=2, last_refreshed=t2), SimpleNamespace(id=3, last_refreshed=t2)]
+        fresh = _unseen_rows(second_run, watermark, seen)
+        self.assertEqual([r.id for r in fresh], [3])
+        self.assertEqual(_advance_watermark(fresh, watermark, set(seen)), (t2.isoformat(), {2, 3}))
+
+    def test_within_one_edit(self):
+        self.assertTrue(within_one_edit("matrix", "matrx"))
+        self.assertTrue(within_one_edit("matrix", "matrixx"))
+        self.assertTrue(within_one_edit("matrix", "metrix"))
+        self.assertFalse(within_one_edit("matrix", "mtarix"))
+
+
+if __name__ == "__main__":
+    unittest.main()
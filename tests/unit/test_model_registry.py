@@ -0,0 +1,55 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app.services.ai_engine import model_registry as mr
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.loads = []
+
+        def fake_loader(source, device):
+            self.loads.append((source, device))
+            time.sleep(0.05)
+            return object()
+
+        patcher = mock.patch.dict(mr._LOADERS, {mr.KIND_SENTENCE_TRANSFORMER: fake_loader})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_concurrent_first_use_loads_once(self):
+        reg = mr.ModelRegistry()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(reg.get(mr.KIND_SENTENCE_TRANSFORMER, "bge", device="cpu")))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.loads), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        stats = reg.stats()["models"]["sentence_transformer:bge@cpu"]
+        self.assertEqual(stats["loads"], 1)
+        self.assertEqual(stats["hits"], 7)
+
+    def test_source_and_device_are_passed_to_loader(self):
+        reg = mr.ModelRegistry()
+        reg.get(mr.KIND_SENTENCE_TRANSFORMER, "minilm", device="cpu", source="/snapshots/minilm")
+        self.assertEqual(self.loads, [("/snapshots/minilm", "cpu")])
+
+    def test_lru_eviction_under_memory_pressure(self):
+        reg = mr.ModelRegistry(max_rss_mb=100)
+        with mock.patch.object(mr, "_process_rss_mb", return_value=50):
+            reg.get(mr.KIND_SENTENCE_TRANSFORMER, "a")
+            reg.get(mr.KIND_SENTENCE_TRANSFORMER, "b")
+        with mock.patch.object(mr, "_process_rss_mb", side_effect=[500, 50]):
+            reg.get(mr.KIND_SENTENCE_TRANSFORMER, "c")
+        loaded = [k[1] for k in reg.loaded()]
+        self.assertEqual(loaded, ["b", "c"])
+        self.assertEqual(reg.stats()["models"]["sentence_transformer:a@auto"]["evictions"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import numpy as np
+
+from app.services.ai_engine.scorer import _multi_query_rrf, _reciprocal_rank_fusion
+
+
+def loop_rrf(rankings, k=60):
+    """Reference implementation (previous per-element loop)."""
+    n = len(rankings[0])
+    out = np.zeros(n)
+    for ranking in rankings:
+        for idx in range(n):
+            rank = np.where(ranking == idx)[0]
+            if len(rank) > 0:
+                out[idx] += 1.0 / (k + rank[0])
+    return out
+
+
+class TestMultiQueryRRF(unittest.TestCase):
+    def test_vectorized_rrf_matches_loop(self):
+        rng = np.random.default_rng(7)
+        rankings = [rng.permutation(50), np.argsort(-rng.random(50)), np.arange(50)]
+        np.testing.assert_allclose(_reciprocal_rank_fusion(rankings, k=60), loop_rrf(rankings, k=60))
+
+    def test_multi_query_rrf_uses_best_rank_per_row(self):
+        cand_ids = np.array([10, 20, 30, 40])
+        rows = np.array([
+            [20, 99, 20, 10],   # 20 appears twice: only rank 0 counts
+            [30, 10, -1, -1],
+        ])
+        scores = _multi_query_rrf(rows, cand_ids, k=60)
+        expected = np.array([1 / 63 + 1 / 61, 1 / 60, 1 / 60, 0.0])
+        np.testing.assert_allclose(scores, expected)
+
+    def test_multi_query_rrf_empty(self):
+        self.assertEqual(_multi_query_rrf(np.empty((0, 5), dtype=np.int64), np.array([1, 2])).tolist(), [0.0, 0.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import json
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from app.models import PairwiseTrainingSession, PersistentCandidate
+from app.services import pairwise_trainer
+from app.services.pairwise_trainer import EMBEDDING_DIM, PairwiseTrainer, rank_pairs_by_information_gain
+
+
+class FakeRedis:
+    """Hashes, lists and plain keys; pipelines run commands immediately."""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def delete(self, *keys):
+        for k in keys:
+            self.data.pop(k, None)
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def hmget(self, key, *fields):
+        return [self.data.get(key, {}).get(f) for f in fields]
+
+    def rpush(self, key, *values):
+        self.data.setdefault(key, []).extend(values)
+
+    def lindex(self, key, index):
+        values = self.data.get(key) or []
+        return values[index] if len(values) > index else None
+
+    def expire(self, key, ttl):
+        pass
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis, self.results = redis, []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.results.append(getattr(self.redis, name)(*args, **kwargs))
+            return self
+        return call
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+class TestPairQueueRanking(unittest.TestCase):
+    def test_cold_start_prefers_distant_pairs_and_covers_pool(self):
+        vecs = np.array([[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [-1.0, 0.0]])
+        order = rank_pairs_by_information_gain(vecs, None, limit=2)
+        # (0, 3) are opposite; the second pick avoids reusing 0 and 3
+        self.assertEqual(order[0], (0, 3))
+        self.assertEqual(set(order[1]), {1, 2})
+
+    def test_confident_outcomes_rank_last(self):
+        vecs = np.array([[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]])
+        user = np.array([1.0, 0.0])
+        order = rank_pairs_by_information_gain(vecs, user, limit=3)
+        # 0 vs 1 is the most predictable outcome for this user
+        self.assertEqual(order[-1], (0, 1))
+
+    def test_limit_and_exclusions(self):
+        vecs = np.eye(4)
+        order = rank_pairs_by_information_gain(vecs, None, limit=10, exclude={(0, 1), (2, 3)})
+        self.assertEqual(len(order), 4)
+        self.assertNotIn((0, 1), order)
+        self.assertEqual(rank_pairs_by_information_gain(vecs[:1], None, limit=5), [])
+
+
+class TestPairQueueFromCandidates(unittest.TestCase):
+    def test_get_next_pair_rebuilds_queue_from_candidate_rows(self):
+        rows = [
+            PersistentCandidate(id=i, tmdb_id=100 + i, media_type="movie", title=f"Film {i}", language="fr",
+                                genres='["Drama"]', overview="", embedding=None)
+            for i in (1, 2, 3)
+        ]
+        session = PairwiseTrainingSession(id=7, user_id=1, status="active", total_pairs=2, completed_pairs=0,
+                                          candidate_pool_snapshot=json.dumps([1, 2, 3]))
+        db = mock.Mock()
+        db.query.return_value.filter_by.return_value.first.return_value = session
+        db.query.return_value.filter.return_value.all.side_effect = [rows, []]
+        redis = FakeRedis()
+        vecs = {1: [1.0, 0.0], 2: [0.0, 1.0], 3: [-1.0, 0.0]}
+
+        def embedding(cand):
+            vec = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+            vec[:2] = vecs[cand.id]
+            return vec
+
+        with mock.patch.object(pairwise_trainer, "get_redis_sync", return_value=redis), \
+                mock.patch.object(pairwise_trainer, "get_redis_sync_binary", return_value=redis), \
+                mock.patch.object(PairwiseTrainer, "_get_or_compute_embedding", side_effect=embedding):
+            pair = PairwiseTrainer(db).get_next_pair(7)
+
+        self.assertIsNotNone(pair)
+        self.assertEqual({pair[0]["id"], pair[1]["id"]}, {1, 3})
+        self.assertNotIn("original_language", pair[0])
+        cached = json.loads(redis.data["pairwise:7:candidates"]["1"])
+        self.assertEqual(cached["original_language"], "fr")
+
+
+if __name__ == "__main__":
+    unittest.main()
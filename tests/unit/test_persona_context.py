@@ -0,0 +1,55 @@
+import json
+import unittest
+from unittest import mock
+
+from app.services import persona_context
+from app.services.persona_context import PersonaContext, get_persona_context, invalidate_persona_context
+
+
+def make_context(version="v1", **overrides):
+    fields = dict(
+        user_id=1,
+        version=version,
+        persona_text="Loves slow-burn Nordic crime dramas and dry comedies.",
+        watch_vector={"genre:crime": 1.0, "type:show": 0.8, "genre:comedy": 0.5},
+        pairwise_profile={"genre_weights": {"thriller": 0.3, "drama": 0.1}},
+        profile_summary="Fallback summary from the database profile.",
+    )
+    fields.update(overrides)
+    return PersonaContext(**fields)
+
+
+class TestPersonaContext(unittest.TestCase):
+    def setUp(self):
+        invalidate_persona_context()
+        patcher = mock.patch.object(persona_context, "_ensure_listener")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_format_for_prompt(self):
+        ctx = make_context()
+        self.assertEqual(ctx.format_for_prompt(include_history=False), {"persona": ctx.persona_text, "history": ""})
+        self.assertEqual(
+            ctx.format_for_prompt(include_history=True, include_pairwise=True)["history"],
+            "crime, show, comedy; prefers: thriller, drama",
+        )
+        self.assertEqual(make_context(persona_text="").persona, "Fallback summary from the database profile.")
+
+    def test_cached_until_invalidated(self):
+        with mock.patch.object(persona_context, "_load_context", side_effect=[make_context("v1"), make_context("v2")]) as load:
+            self.assertEqual(get_persona_context(1).version, "v1")
+            self.assertEqual(get_persona_context(1).version, "v1")
+            self.assertEqual(load.call_count, 1)
+
+            # Same version already cached: keep it
+            persona_context._handle_message({"data": json.dumps({"type": "persona_updated", "user_id": 1, "version": "v1"})})
+            get_persona_context(1)
+            self.assertEqual(load.call_count, 1)
+
+            persona_context._handle_message({"data": json.dumps({"type": "persona_updated", "user_id": 1})})
+            self.assertEqual(get_persona_context(1).version, "v2")
+            self.assertEqual(load.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
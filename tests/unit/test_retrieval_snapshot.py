@@ -0,0 +1,55 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from app.services.ai_engine.retrieval_snapshot import RetrievalSnapshot, input_fingerprint
+
+
+def make_snapshot(**overrides):
+    kwargs = dict(
+        fingerprint=input_fingerprint("cozy mysteries", "chat", None),
+        generation="gen-1",
+        parsed={"normalized_prompt": "cozy mysteries", "filters": {"genres": ["mystery"]}},
+        enhanced_prompt="cozy mysteries\nAnchor: Knives Out.",
+        query_embedding=np.arange(4, dtype=np.float16),
+        bge_enabled=True,
+        bge_ids=[11, 12],
+        bge_scores=[0.9, 0.8],
+        faiss_results={40000: ([5, 6, 7], [0.7, 0.6, 0.5])},
+    )
+    kwargs.update(overrides)
+    return RetrievalSnapshot(**kwargs)
+
+
+class TestRetrievalSnapshot(unittest.TestCase):
+    def test_save_and_load_roundtrip(self):
+        snap = make_snapshot()
+        with tempfile.TemporaryDirectory() as d:
+            snap.save("list-1", Path(d))
+            loaded = RetrievalSnapshot.load("list-1", Path(d))
+        self.assertEqual(loaded.parsed, snap.parsed)
+        self.assertEqual(loaded.enhanced_prompt, snap.enhanced_prompt)
+        self.assertEqual(loaded.bge_ids, [11, 12])
+        self.assertEqual(loaded.faiss_results[40000][0], [5, 6, 7])
+        np.testing.assert_allclose(loaded.faiss_results[40000][1], [0.7, 0.6, 0.5], rtol=1e-6)
+        np.testing.assert_array_equal(loaded.query_embedding, snap.query_embedding)
+
+    def test_validity_requires_same_inputs_generation_and_age(self):
+        fp = input_fingerprint("cozy mysteries", "chat", None)
+        snap = make_snapshot()
+        self.assertTrue(snap.is_valid_for(fp, "gen-1", 3600))
+        self.assertFalse(snap.is_valid_for(fp, "gen-2", 3600))
+        self.assertFalse(snap.is_valid_for(input_fingerprint("dark", "mood", "balanced"), "gen-1", 3600))
+        old = make_snapshot(saved_at=time.time() - 7200)
+        self.assertFalse(old.is_valid_for(fp, "gen-1", 3600))
+
+    def test_missing_snapshot_loads_as_none(self):
+        with tempfile.TemporaryDirectory() as d:
+            self.assertIsNone(RetrievalSnapshot.load("nope", Path(d)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from app.services.ai_engine.seed_resolver import _anchor_from_tmdb, _json_names, build_anchor_text, normalize_title
+
+
+class TestSeedResolverHelpers(unittest.TestCase):
+    def test_normalize_title_folds_case_accents_and_punctuation(self):
+        self.assertEqual(normalize_title("  Breaking Bad! "), "breaking bad")
+        self.assertEqual(normalize_title("Amélie"), "amelie")
+        self.assertEqual(normalize_title("Spider-Man: Into the Spider-Verse"), "spider man into the spider verse")
+        self.assertEqual(normalize_title("Law & Order"), "law and order")
+
+    def test_json_names_accepts_db_text_and_tmdb_shapes(self):
+        self.assertEqual(_json_names('["Crime", "Drama"]'), ["Crime", "Drama"])
+        self.assertEqual(_json_names([{"name": "Crime"}, {"name": "Drama"}]), ["Crime", "Drama"])
+        self.assertEqual(_json_names({"results": [{"name": "meth"}]}), ["meth"])
+        self.assertEqual(_json_names("crime, drama"), ["crime", "drama"])
+        self.assertEqual(_json_names(None), [])
+
+    def test_local_and_tmdb_anchor_texts_match(self):
+        local = build_anchor_text("Breaking Bad", ["Crime", "Drama"], ["meth", "teacher"], "A chemistry teacher...")
+        tmdb = _anchor_from_tmdb({
+            "name": "Breaking Bad",
+            "genres": [{"id": 80, "name": "Crime"}, {"id": 18, "name": "Drama"}],
+            "keywords": {"results": [{"name": "meth"}, {"name": "teacher"}]},
+            "overview": "A chemistry teacher...",
+        }, "breaking bad")
+        self.assertEqual(local, tmdb)
+        self.assertEqual(local, "Anchor: Breaking Bad. Genres: Crime, Drama. Keywords: meth; teacher. Overview: A chemistry teacher...")
+
+
+if __name__ == "__main__":
+    unittest.main()
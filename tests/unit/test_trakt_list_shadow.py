@@ -0,0 +1,122 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from app.services import trakt_client
+from app.services.trakt_client import TraktClient
+from app.services.trakt_list_sync import _desired_payload
+
+
+class FakeAsyncRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    async def delete(self, *keys):
+        for k in keys:
+            self.store.pop(k, None)
+
+
+def remote(media_type, trakt_id, tmdb_id):
+    return {"type": media_type, media_type: {"ids": {"trakt": trakt_id, "tmdb": tmdb_id}}}
+
+
+class FakeTrakt:
+    """Stands in for TraktClient._request; records calls."""
+
+    def __init__(self, items, etag='"v1"'):
+        self.items, self.etag, self.calls = items, etag, []
+
+    async def __call__(self, method, endpoint, params=None, data=None, extra_headers=None,
+                       use_cache=True, with_meta=False, **kwargs):
+        self.calls.append((method, endpoint, extra_headers, data))
+        if method == "GET":
+            if extra_headers and extra_headers.get("If-None-Match") == self.etag:
+                return 304, None, self.etag
+            return 200, self.items, self.etag
+        if endpoint.endswith("/items/remove"):
+            return {"deleted": {"movies": len(data["movies"]), "shows": len(data["shows"])}}
+        if endpoint.endswith("/items"):
+            # Shows are never found on Trakt
+            return {"added": {"movies": len(data["movies"]), "shows": 0},
+                    "not_found": {"movies": [], "shows": data["shows"]}}
+        return {}
+
+
+class TestTraktListShadow(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeAsyncRedis()
+        patcher = mock.patch.object(trakt_client, "get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = TraktClient(user_id=3)
+
+    def sync(self, fake, desired, **kwargs):
+        with mock.patch.object(self.client, "_request", new=fake):
+            return asyncio.run(self.client.sync_list_items("42", desired, **kwargs))
+
+    def test_diff_push_then_skip_then_conditional_fetch(self):
+        fake = FakeTrakt([remote("movie", 1, 11), remote("movie", 2, 22)])
+        desired = [
+            {"media_type": "movie", "trakt_id": 1},
+            {"media_type": "movie", "tmdb_id": 33},
+            {"media_type": "show", "tmdb_id": 77},
+        ]
+        stats = self.sync(fake, desired)
+        self.assertEqual((stats["added"], stats["removed"], stats["unchanged"], stats["not_found"]), (1, 1, 1, 1))
+        methods = [c[1] for c in fake.calls]
+        self.assertEqual(methods, ["/users/me/lists/42/items", "/users/me/lists/42/items",
+                                   "/users/me/lists/42/items/remove"])
+        self.assertEqual(fake.calls[2][3]["movies"], [{"ids": {"trakt": 2, "tmdb": 22}}])
+
+        # Same desired set (any order): no API calls at all
+        fake.calls.clear()
+        stats = self.sync(fake, list(reversed(desired)))
+        self.assertTrue(stats["skipped"])
+        self.assertEqual(fake.calls, [])
+
+        # Forced check after a push has no ETag; the next one is answered with 304 from the shadow
+        fake.items = [remote("movie", 1, 11), remote("movie", 3, 33)]
+        self.sync(fake, desired, force_fetch=True)
+        fake.calls.clear()
+        stats = self.sync(fake, desired, force_fetch=True)
+        self.assertEqual(fake.calls[0][2], {"If-None-Match": '"v1"'})
+        # Only the unresolvable show is retried; nothing is removed
+        self.assertEqual([c[1] for c in fake.calls], ["/users/me/lists/42/items", "/users/me/lists/42/items"])
+        self.assertEqual(stats["unchanged"], 2)
+
+    def test_update_list_skips_unchanged_metadata(self):
+        fake = FakeTrakt([])
+        with mock.patch.object(self.client, "_request", new=fake):
+            asyncio.run(self.client.update_list("42", name="Picks"))
+            asyncio.run(self.client.update_list("42", name="Picks"))
+            asyncio.run(self.client.update_list("42", name="Better picks"))
+        self.assertEqual([c[0] for c in fake.calls], ["PUT", "PUT"])
+
+        # An old shadow is pushed again, so renames made on Trakt are corrected
+        with mock.patch.object(self.client, "_request", new=fake), \
+                mock.patch.object(trakt_client.time, "time",
+                                  return_value=trakt_client.time.time() + trakt_client.LIST_SHADOW_MAX_AGE + 1):
+            asyncio.run(self.client.update_list("42", name="Better picks"))
+        self.assertEqual([c[0] for c in fake.calls], ["PUT", "PUT", "PUT"])
+
+    def test_unresolved_trakt_id_keeps_item_by_tmdb_id(self):
+        fake = FakeTrakt([remote("movie", 1, 11), remote("movie", 2, 22)])
+        payload = _desired_payload([
+            {"media_type": "movie", "trakt_id": 1, "tmdb_id": 11},
+            # Resolver missed this one in this run
+            {"media_type": "movie", "trakt_id": None, "tmdb_id": 22},
+        ])
+        self.assertEqual(payload[1], {"trakt_id": None, "tmdb_id": 22, "media_type": "movie"})
+        stats = self.sync(fake, payload)
+        self.assertEqual((stats["added"], stats["removed"], stats["unchanged"]), (0, 0, 2))
+        self.assertEqual([c[0] for c in fake.calls], ["GET"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from app.services.ai_engine.vocab_embeddings import VocabEmbeddingTable
+
+
+class FakeEmbedder:
+    model_name = "fake-model"
+
+    def __init__(self):
+        self.calls = []
+
+    def encode_texts(self, texts, batch_size=64):
+        self.calls.append(list(texts))
+        out = np.zeros((len(texts), 8), dtype=np.float16)
+        for i, t in enumerate(texts):
+            out[i, sum(map(ord, t)) % 8] = 1.0
+        return out
+
+
+class TestVocabEmbeddingTable(unittest.TestCase):
+    def test_rows_for_encodes_unknown_terms_once(self):
+        emb = FakeEmbedder()
+        table = VocabEmbeddingTable.build(["action", "drama"], embedder=emb)
+        rows = table.rows_for([" Drama", "noir", "noir", "ACTION"], embedder=emb)
+        self.assertEqual(rows, [1, 2, 2, 0])
+        self.assertEqual(emb.calls[-1], ["noir"])
+        table.rows_for(["noir"], embedder=emb)
+        self.assertEqual(len(emb.calls), 2)
+
+    def test_similarities_match_direct_cosine(self):
+        emb = FakeEmbedder()
+        table = VocabEmbeddingTable.build(["action", "drama", "horror"], embedder=emb)
+        q = np.arange(8, dtype=np.float32)
+        direct = emb.encode_texts(["drama"]).astype(np.float32)[0]
+        expected = direct.dot(q) / (np.linalg.norm(direct) * np.linalg.norm(q))
+        self.assertAlmostEqual(float(table.similarities(q)[1]), float(expected), places=5)
+
+    def test_save_and_load_roundtrip_checks_vocabulary(self):
+        emb = FakeEmbedder()
+        table = VocabEmbeddingTable.build(["action", "drama"], embedder=emb)
+        with tempfile.TemporaryDirectory() as d:
+            table.save(Path(d))
+            loaded = VocabEmbeddingTable.load("fake-model", ["action", "drama"], Path(d))
+            self.assertIsNotNone(loaded)
+            np.testing.assert_allclose(loaded.matrix, table.matrix)
+            self.assertIsNone(VocabEmbeddingTable.load("fake-model", ["comedy"], Path(d)))
+            self.assertIsNone(VocabEmbeddingTable.load("other-model", ["action", "drama"], Path(d)))
+
+    def test_appended_terms_are_saved_in_batches(self):
+        emb = FakeEmbedder()
+        with tempfile.TemporaryDirectory() as d:
+            table = VocabEmbeddingTable.build(["action", "drama"], embedder=emb)
+            table.save(Path(d))
+            table.rows_for(["noir"], embedder=emb)
+            self.assertIsNone(table.save_if_due(Path(d)))
+            self.assertIsNotNone(table.save_if_due(Path(d), force=True))
+            self.assertIsNone(table.save_if_due(Path(d), force=True))
+            # Only the final file remains; temp files are unique and renamed into place
+            self.assertEqual([p.name for p in Path(d).iterdir()], ["fake-model.npz"])
+            loaded = VocabEmbeddingTable.load("fake-model", ["action", "drama"], Path(d))
+            self.assertEqual(loaded.terms, ["action", "drama", "noir"])
+
+
+if __name__ == "__main__":
+    unittest.main()